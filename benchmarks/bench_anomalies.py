@@ -0,0 +1,108 @@
+"""
+=============================================================================
+Benchmark - Streaming KPI anomaly detection at scale
+=============================================================================
+Simulates --days of daily KPIs (win rate, CTR, ROAS) for --series
+campaigns and feeds them to an AnomalyDetector one day at a time:
+
+  drops          : --drops series lose 40-60% of one KPI from a random day
+                   in the second half, and should raise a shift alert
+  underperformers: --laggards series run at a third of the typical ROAS
+                   throughout, and should raise a peer alert
+
+Reports the per-day update and peer-check time, microseconds per
+(series, KPI) update, detector memory next to a 28-day window store of
+the same series, and alert recall / false positives. A second pass with
+max_series at half the series count exercises eviction.
+
+Usage (from the repository root):
+    python benchmarks/bench_anomalies.py
+    python benchmarks/bench_anomalies.py --series 500000 --days 90
+=============================================================================
+"""
+
+import argparse
+import sys
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "streamlit"))
+
+from ad_tech.anomalies import AnomalyDetector  # noqa: E402
+
+KPIS = ("win_rate", "ctr", "roas")
+TYPICAL = np.array([0.75, 0.04, 3.5])
+NOISE = np.array([0.03, 0.08, 0.10])         # relative day-to-day noise
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Streaming KPI anomaly detection at scale")
+    parser.add_argument("--series", type=int, default=100_000)
+    parser.add_argument("--days", type=int, default=60)
+    parser.add_argument("--drops", type=int, default=500)
+    parser.add_argument("--laggards", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=11)
+    args = parser.parse_args()
+    rng = np.random.default_rng(args.seed)
+    origin = date(2026, 1, 1)
+
+    series = [f"CMP-{i:07d}" for i in range(args.series)]
+    base = TYPICAL * rng.uniform(0.8, 1.25, size=(args.series, len(KPIS)))
+    planted = rng.choice(args.series, size=args.drops + args.laggards, replace=False)
+    drops, laggards = planted[:args.drops], planted[args.drops:]
+    base[laggards, 2] = TYPICAL[2] / 3
+    drop_kpi = rng.integers(len(KPIS), size=args.drops)
+    drop_day = rng.integers(args.days // 2, args.days, size=args.drops)
+    drop_factor = rng.uniform(0.4, 0.6, size=args.drops)
+
+    def observations(day: int) -> np.ndarray:
+        x = base * (1 + NOISE * rng.standard_normal(base.shape))
+        hit = drop_day <= day
+        x[drops[hit], drop_kpi[hit]] *= drop_factor[hit]
+        return x
+
+    for label, max_series in (("all series fit", args.series), ("max_series = series / 2", args.series // 2)):
+        detector = AnomalyDetector(kpis=KPIS, max_series=max_series)
+        update_s, peer_s, shifts = [], [], []
+        for day in range(args.days):
+            x = observations(day)
+            if max_series < args.series:
+                # Half the series report each day, so rows are recycled between them
+                subset = np.flatnonzero((np.arange(args.series) + day) % 2 == 0)
+            else:
+                subset = np.arange(args.series)
+            names = [series[i] for i in subset.tolist()]
+            t0 = time.perf_counter()
+            shifts.extend(detector.update("campaign", names, origin + timedelta(days=day), x[subset]))
+            update_s.append(time.perf_counter() - t0)
+            t0 = time.perf_counter()
+            detector.check_peers(origin + timedelta(days=day))
+            peer_s.append(time.perf_counter() - t0)
+
+        updates_per_day = detector.updates / args.days
+        print(f"{label}: {args.series:,} series x {len(KPIS)} KPIs, {args.days} days, "
+              f"{len(detector):,} series held")
+        print(f"  update     : median {np.median(update_s) * 1e3:7.1f} ms/day "
+              f"({np.median(update_s) / updates_per_day * 1e6:.2f} us per series-KPI)")
+        print(f"  check_peers: median {np.median(peer_s) * 1e3:7.1f} ms/day")
+        window = 28 * max_series * len(KPIS) * 8
+        print(f"  memory     : {detector.nbytes / 2**20:.1f} MB detector vs {window / 2**20:.1f} MB "
+              f"for a 28-day window of float64 KPIs")
+
+        if max_series == args.series:
+            shifted = {a.series for a in shifts if a.direction == "down"}
+            shifted_planted = {series[i] for i in drops.tolist()}
+            lagging = {a.series for a in detector.peer_alerts.values() if a.kpi == "roas"}
+            lagging_planted = {series[i] for i in laggards.tolist()}
+            print(f"  shift drops: {len(shifted & shifted_planted) / args.drops:.1%} recall, "
+                  f"{len(shifted - shifted_planted):,} other series alerted")
+            print(f"  peer ROAS  : {len(lagging & lagging_planted) / args.laggards:.1%} recall, "
+                  f"{len(lagging - lagging_planted):,} other series alerted")
+        print()
+
+
+if __name__ == "__main__":
+    main()
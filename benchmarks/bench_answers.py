@@ -0,0 +1,136 @@
+"""
+=============================================================================
+Benchmark - Offline answer engine: intent accuracy and latency
+=============================================================================
+Runs ad_tech/answers.py over a labelled question set on the LocalEngine:
+
+  labelled  : chat questions (the suggested prompts and rewordings of them)
+              labelled with the intent they should be answered by
+  off-topic : questions none of the five intents covers; in demo mode
+              these get the help text, in Snowflake they go to the agent
+
+Reports intent accuracy, how many questions the Snowflake fast path
+takes (and how many of those it gets right), and per-intent latency of
+the full answer (extract, classify, SQL on the engine, render), with
+every query run for real (no result cache). The canned answers this
+replaces ignored the question's entities; the agent it stands in for
+takes seconds (--agent-seconds, for comparison only).
+
+Usage (from the repository root):
+    python benchmarks/bench_answers.py
+    python benchmarks/bench_answers.py --repeat 50
+=============================================================================
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "streamlit"))
+
+from ad_tech.answers import INTENT_LABELS, AnswerEngine, load_vocabulary  # noqa: E402
+from ad_tech.data_access import fetch_arrow  # noqa: E402
+from ad_tech.metrics import MetricsRegistry  # noqa: E402
+from ad_tech.runtime import get_local_engine  # noqa: E402
+
+LABELLED = [
+    ("What's the optimal bid price for a diabetes campaign in cardiology waiting rooms?", "bid_pricing"),
+    ("what should I bid for oncology slots in the Northeast", "bid_pricing"),
+    ("CPM pricing for evening exam room screens", "bid_pricing"),
+    ("Optimal bid for a weight loss campaign in primary care", "bid_pricing"),
+    ("Which audience segments have the highest engagement for heart medications?", "audience"),
+    ("Show me high-conversion audience cohorts in the Southwest", "audience"),
+    ("senior women with Medicare insurance", "audience"),
+    ("which cohorts have the highest revenue per member in the Midwest", "audience"),
+    ("Compare Q4 2024 vs Q3 2024 campaign performance", "period_comparison"),
+    ("Compare Q3 2026 vs Q2 2026 by partner", "period_comparison"),
+    ("how did the last 30 days compare", "period_comparison"),
+    ("quarter over quarter revenue growth by therapeutic area", "period_comparison"),
+    ("Q3 2026 versus Q2 2026 revenue", "period_comparison"),
+    ("Find premium morning slots in Texas endocrinology clinics", "inventory"),
+    ("Recommend inventory for a new GLP-1 drug launch", "inventory"),
+    ("cheapest waiting room screens in California", "inventory"),
+    ("available kiosk placements in the Southeast", "inventory"),
+    ("What's driving the ROAS improvement for Pfizer campaigns?", "partner_roas"),
+    ("Which therapeutic areas have the best CTR?", "partner_roas"),
+    ("top 3 partners by revenue", "partner_roas"),
+    ("How is Ozempic performing on win rate?", "partner_roas"),
+    ("What is the ROAS for Pfizer?", "partner_roas"),
+    ("ROAS for Merck", "partner_roas"),
+    ("Merck ROAS versus Pfizer", "partner_roas"),
+]
+
+OFF_TOPIC = [
+    "Why did CTR drop last week?",
+    "Draft a media plan for a $500k immunology launch",
+    "What creative works best in exam rooms?",
+    "Summarize yesterday's bidding activity",
+    "How does weekend engagement compare to weekdays?",
+    "hello",
+    "Who won the game last night?",
+    "Write a haiku about waiting rooms",
+]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Offline answer engine: intent accuracy and latency")
+    parser.add_argument("--repeat", type=int, default=20, help="timed runs of each question")
+    parser.add_argument("--agent-seconds", type=float, default=12.0, help="median agent answer time")
+    args = parser.parse_args()
+
+    engine = get_local_engine()
+    t0 = time.perf_counter()
+    vocabulary = load_vocabulary(lambda sql: fetch_arrow(engine, sql))
+    metrics = MetricsRegistry()
+    answers = AnswerEngine(vocabulary, lambda name, sql, table: fetch_arrow(engine, sql), metrics=metrics)
+    build_ms = (time.perf_counter() - t0) * 1e3
+    print(f"vocabulary of {sum(len(v) for v in vocabulary.values())} values, engine built in {build_ms:.0f} ms\n")
+
+    # Labelled accuracy, each question once
+    correct = fast = fast_correct = 0
+    for question, intent in LABELLED:
+        answer = answers.answer(question)
+        got = answer.intent if answer is not None else None
+        correct += got == intent
+        if got != intent:
+            print(f"  WRONG: {question} -> {got} (expected {intent})")
+        fast_answer = answers.answer(question, fast_path=True)
+        if fast_answer is not None:
+            fast += 1
+            fast_correct += fast_answer.intent == intent
+    answered = fast_off = 0
+    for question in OFF_TOPIC:
+        answered += answers.answer(question) is not None
+        fast_off += answers.answer(question, fast_path=True) is not None
+    fast_total = fast + fast_off
+    print(f"labelled : {correct}/{len(LABELLED)} answered by the expected intent")
+    print(f"off-topic: {answered}/{len(OFF_TOPIC)} answered in demo mode (the rest get the help text)")
+    print(f"fast path: takes {fast}/{len(LABELLED)} labelled and {fast_off}/{len(OFF_TOPIC)} off-topic questions, "
+          f"precision {fast_correct / fast_total if fast_total else 1:.0%}\n")
+
+    # Latency per intent, every query on the engine
+    timings = {intent: [] for intent in INTENT_LABELS}
+    for _ in range(args.repeat):
+        for question, intent in LABELLED:
+            t0 = time.perf_counter()
+            answer = answers.answer(question)
+            if answer is not None:
+                answer.markdown()
+                timings[answer.intent].append(time.perf_counter() - t0)
+    print(f"{'intent':<18} | {'answers':>7} | {'p50':>8} | {'p99':>8}")
+    print("-" * 51)
+    for intent, seconds in timings.items():
+        if seconds:
+            print(f"{INTENT_LABELS[intent]:<18} | {len(seconds):>7} | {np.percentile(seconds, 50) * 1e3:>6.1f}ms | "
+                  f"{np.percentile(seconds, 99) * 1e3:>6.1f}ms")
+    every = [s for seconds in timings.values() for s in seconds]
+    print(f"{'all':<18} | {len(every):>7} | {np.percentile(every, 50) * 1e3:>6.1f}ms | "
+          f"{np.percentile(every, 99) * 1e3:>6.1f}ms")
+    print(f"\nagent for comparison: ~{args.agent_seconds:.0f} s median per answer")
+
+
+if __name__ == "__main__":
+    main()
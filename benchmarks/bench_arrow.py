@@ -0,0 +1,168 @@
+"""
+=============================================================================
+Benchmark - Result transport: Row lists / pandas copies vs Arrow end to end
+=============================================================================
+Delivers the same 1M-row campaign result to Streamlit's serializer three ways:
+
+  rows    : collect()-style list of row dicts -> pandas -> Arrow IPC
+  pandas  : to_pandas() -> pickled cache hit (st.cache_data) -> Arrow IPC
+  arrow   : Arrow table -> shared cache (no copy) -> Arrow IPC
+
+The source is a pyarrow.Table read from an IPC file, standing in for the
+Arrow chunks the Snowflake connector receives. Each path runs in a fresh
+interpreter and reports wall time and peak RSS above the loaded source.
+
+Part 2 times the LocalEngine's collect() / to_pandas() / to_arrow().
+
+Usage (from the repository root):
+    python benchmarks/bench_arrow.py
+    python benchmarks/bench_arrow.py --rows 1000000 --sql-rows 0
+=============================================================================
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.ipc
+
+APP = Path(__file__).resolve().parents[1] / "streamlit"
+sys.path.insert(0, str(APP))
+
+AREAS = ["Diabetes", "Cardiology", "Oncology", "Immunology", "Neurology", "Weight Loss"]
+PARTNERS = ["Pfizer", "Eli Lilly", "Novo Nordisk", "AbbVie", "Merck", "AstraZeneca"]
+STATUSES = ["Active", "Completed", "Paused"]
+
+_PATH_SNIPPET = """
+import json, pickle, resource, sys, time
+sys.path.insert(0, {app!r})
+import pyarrow as pa, pyarrow.ipc
+import pandas as pd
+try:
+    from streamlit.dataframe_util import convert_anything_to_arrow_bytes as to_bytes
+except ImportError:  # streamlit < 1.37
+    from streamlit import type_util
+    def to_bytes(data):
+        if isinstance(data, pa.Table):
+            return type_util.pyarrow_table_to_bytes(data)
+        return type_util.data_frame_to_bytes(type_util.convert_anything_to_df(data))
+
+def rss_kb():
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * resource.getpagesize() // 1024
+
+with pa.memory_map({source!r}) as f:
+    source = pa.ipc.open_file(f).read_all().combine_chunks()
+source = pa.Table.from_batches(source.to_batches())  # detach from the mapping
+import gc; gc.collect()
+base = rss_kb()
+t0 = time.perf_counter()
+if {path!r} == "rows":
+    rows = source.to_pylist()
+    data = pd.DataFrame.from_records(rows)
+elif {path!r} == "pandas":
+    cached = pickle.dumps(source.to_pandas(), protocol=pickle.HIGHEST_PROTOCOL)
+    data = pickle.loads(cached)
+else:
+    from ad_tech.data_access import ArrowResultCache
+    cache = ArrowResultCache(max_bytes=1 << 34)
+    cache.put(("q",), source)
+    data = cache.get(("q",))
+t1 = time.perf_counter()
+payload = to_bytes(data)
+t2 = time.perf_counter()
+peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({{"fetch": t1 - t0, "serialize": t2 - t1, "peak_mb": (peak - base) / 1024,
+                  "payload_mb": len(payload) / 2**20}}))
+"""
+
+
+def synthetic_result(rows: int, seed: int) -> pa.Table:
+    """Campaign-table shaped result (strings, ints, decimals as doubles)."""
+    rng = np.random.default_rng(seed)
+    ids = np.arange(rows)
+    return pa.table({
+        "CAMPAIGN_ID": pa.array([f"CAMP-{i:08d}" for i in ids]),
+        "CAMPAIGN_NAME": pa.array([f"Campaign {i % 5000}" for i in ids]),
+        "THERAPEUTIC_AREA": pa.array(np.array(AREAS)[rng.integers(0, len(AREAS), rows)]),
+        "PARTNER_NAME": pa.array(np.array(PARTNERS)[rng.integers(0, len(PARTNERS), rows)]),
+        "STATUS": pa.array(np.array(STATUSES)[rng.integers(0, len(STATUSES), rows)]),
+        "TOTAL_IMPRESSIONS": rng.integers(1_000, 500_000, rows),
+        "WIN_RATE": np.round(rng.uniform(40, 90, rows), 1),
+        "CTR": np.round(rng.uniform(0.01, 0.08, rows), 3),
+        "ROAS": np.round(rng.uniform(0.5, 5.0, rows), 2),
+        "TOTAL_REVENUE": np.round(rng.uniform(1e4, 1e7, rows), 2),
+    })
+
+
+def run_path(path: str, source: Path) -> dict:
+    code = _PATH_SNIPPET.format(app=str(APP), source=str(source), path=path)
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def transport_benchmark(rows: int, seed: int, repeat: int) -> None:
+    table = synthetic_result(rows, seed)
+    with tempfile.TemporaryDirectory() as tmp:
+        source = Path(tmp) / "result.arrow"
+        with pa.OSFile(str(source), "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+        print(f"Transport, {rows:,} rows ({table.nbytes / 2**20:.0f} MB in Arrow)")
+        print(f"{'path':>8} | {'fetch+cache':>11} {'serialize':>10} {'total':>9} | {'peak MB':>8}")
+        print("-" * 56)
+        results = {}
+        for path in ("rows", "pandas", "arrow"):
+            runs = [run_path(path, source) for _ in range(repeat)]
+            best = min(runs, key=lambda r: r["fetch"] + r["serialize"])
+            results[path] = best
+            total = best["fetch"] + best["serialize"]
+            print(f"{path:>8} | {best['fetch'] * 1e3:>9.0f}ms {best['serialize'] * 1e3:>8.0f}ms "
+                  f"{total * 1e3:>7.0f}ms | {best['peak_mb']:>8.0f}")
+        arrow = results["arrow"]["fetch"] + results["arrow"]["serialize"]
+        for path in ("rows", "pandas"):
+            other = results[path]["fetch"] + results[path]["serialize"]
+            print(f"arrow vs {path}: {other / arrow:.1f}x faster, "
+                  f"{results[path]['peak_mb'] - results['arrow']['peak_mb']:.0f} MB less peak memory")
+
+
+def sql_benchmark(rows: int, seed: int) -> None:
+    from ad_tech.engine import LocalEngine
+    from ad_tech.seed import Column
+
+    table = synthetic_result(rows, seed)
+    columns = [Column(name, "VARCHAR" if pa.types.is_string(t) else "NUMBER")
+               for name, t in zip(table.column_names, table.schema.types)]
+    engine = LocalEngine(tables={})
+    engine.load_table("T_RESULT", columns, zip(*(c.to_pylist() for c in table.columns)))
+    query = "SELECT * FROM T_RESULT"
+
+    print(f"\nLocalEngine, {rows:,} rows")
+    for name, fn in (("collect()", lambda: engine.sql(query).collect()),
+                     ("to_pandas()", lambda: engine.sql(query).to_pandas()),
+                     ("to_arrow()", lambda: engine.sql(query).to_arrow())):
+        t0 = time.perf_counter()
+        fn()
+        print(f"{name:>12}: {(time.perf_counter() - t0) * 1e3:>8.0f} ms")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Row/pandas vs Arrow result transport")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--sql-rows", type=int, default=200_000, help="rows for the LocalEngine run (0 to skip)")
+    parser.add_argument("--repeat", type=int, default=2)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    transport_benchmark(args.rows, args.seed, args.repeat)
+    if args.sql_rows:
+        sql_benchmark(args.sql_rows, args.seed)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+=============================================================================
+Benchmark - Multi-touch attribution throughput and correctness
+=============================================================================
+1. Correctness: attributes a small simulated event set with the partitioned
+   numpy pipeline and with a plain Python loop over each conversion's path
+   (same Shapley channel shares), and compares campaign and slot revenue
+   for every model.
+2. Throughput: streams --exposures simulated impressions for --people
+   people through PartitionWriter and attribute() once per --workers
+   setting, reporting impressions/s for the partition (spill) and
+   attribution phases and the peak resident memory, which stays bounded
+   by one chunk and one partition rather than the event volume.
+
+Usage (from the repository root):
+    python benchmarks/bench_attribution.py
+    python benchmarks/bench_attribution.py --people 5000000 --exposures 200000000 --workers 1,4,8
+=============================================================================
+"""
+
+import argparse
+import resource
+import shutil
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "streamlit"))
+
+from ad_tech.attribution import (  # noqa: E402
+    DAY, DEFAULT_HALF_LIFE_DAYS, DEFAULT_LOOKBACK_DAYS, MAX_TOUCHES, MODELS, Catalog, PartitionWriter, attribute,
+    run_attribution, simulate_events,
+)
+from ad_tech.seed import load_seed_tables  # noqa: E402
+
+
+def reference(chunks, catalog: Catalog, shares: np.ndarray):
+    """Per-conversion Python loop: {model: (campaign revenue, slot revenue)}."""
+    touches = defaultdict(list)
+    conversions = []
+    for chunk in chunks:
+        for person, campaign, slot, ts in zip(chunk.person.tolist(), chunk.campaign.tolist(),
+                                              chunk.slot.tolist(), chunk.ts.tolist()):
+            touches[(person, int(catalog.campaign_brand[campaign]))].append((ts, campaign, slot))
+        conversions.extend(zip(chunk.conversion_person.tolist(), chunk.conversion_brand.tolist(),
+                               chunk.conversion_ts.tolist(), chunk.revenue.tolist()))
+    out = {model: (np.zeros(len(catalog.campaigns)), np.zeros(len(catalog.slots))) for model in MODELS}
+    for path in touches.values():
+        path.sort()
+    for person, brand, ts, revenue in conversions:
+        path = [t for t in touches.get((person, brand), []) if ts - DEFAULT_LOOKBACK_DAYS * DAY <= t[0] <= ts]
+        path = path[-MAX_TOUCHES:]
+        if not path:
+            continue
+        n = len(path)
+        decay = [2 ** (-(ts - t) / (DEFAULT_HALF_LIFE_DAYS * DAY)) for t, _, _ in path]
+        channels = [int(catalog.slot_channel[slot]) for _, _, slot in path]
+        value = [shares[brand, c] / channels.count(c) for c in channels]
+        weights = {
+            "last_touch": [0.0] * (n - 1) + [1.0],
+            "linear": [1.0 / n] * n,
+            "time_decay": [d / sum(decay) for d in decay],
+            "shapley": [v / sum(value) for v in value] if sum(value) > 0 else [1.0 / n] * n,
+        }
+        for model, weight in weights.items():
+            for w, (_, campaign, slot) in zip(weight, path):
+                out[model][0][campaign] += w * revenue
+                out[model][1][slot] += w * revenue
+    return out
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Multi-touch attribution throughput and correctness")
+    parser.add_argument("--people", type=int, default=500_000)
+    parser.add_argument("--exposures", type=int, default=20_000_000)
+    parser.add_argument("--chunk-people", type=int, default=100_000, help="people per streamed chunk")
+    parser.add_argument("--partitions", type=int, default=16)
+    parser.add_argument("--workers", default="1,2", help="comma-separated worker counts")
+    parser.add_argument("--seed", type=int, default=3)
+    args = parser.parse_args()
+
+    tables = load_seed_tables()
+    catalog = Catalog.from_rows(tables["T_CAMPAIGN_PERFORMANCE"].records(), tables["T_INVENTORY_ANALYTICS"].records())
+
+    # 1. Correctness against the per-conversion loop
+    small = list(simulate_events(catalog, people=5_000, exposures=200_000, chunk_people=1_000, seed=args.seed))
+    result = run_attribution(iter(small), catalog, partitions=4, workers=1)
+    expected = reference(small, catalog, result.shares)
+    for model in MODELS:
+        credit = result.credits[model]
+        if not (np.allclose(credit[1, :len(catalog.campaigns)], expected[model][0])
+                and np.allclose(credit[3, :len(catalog.slots)], expected[model][1])):
+            raise AssertionError(f"{model}: partitioned result differs from the reference loop")
+    print(f"correctness: {result.conversions:,} conversions over {result.exposures:,} impressions - "
+          f"all {len(MODELS)} models match the per-conversion loop\n")
+
+    # 2. Throughput
+    print(f"{args.exposures:,} impressions, {args.people:,} people, {args.partitions} partitions")
+    print(f"{'workers':>8} | {'partition':>16} | {'attribute':>16} | {'total':>8} | {'peak RSS':>9}")
+    print("-" * 70)
+    for workers in [int(w) for w in args.workers.split(",")]:
+        directory = Path(tempfile.mkdtemp(prefix="bench-attribution-"))
+        try:
+            t0 = time.perf_counter()
+            writer = PartitionWriter(directory, args.partitions)
+            for chunk in simulate_events(catalog, args.people, args.exposures, chunk_people=args.chunk_people,
+                                         seed=args.seed):
+                writer.add(chunk)
+            spill_s = time.perf_counter() - t0
+            result = attribute(directory, catalog, args.partitions, workers)
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        print(f"{workers:>8} | {writer.exposures / spill_s:>10,.0f} imp/s | "
+              f"{result.exposures / result.seconds:>10,.0f} imp/s | {spill_s + result.seconds:>7.1f}s | "
+              f"{rss:>6.0f} MB")
+    print("\n(partition includes simulating the events; peak RSS is the driver process)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""
+=============================================================================
+Benchmark - Inventory availability over segment trees vs a dense calendar
+=============================================================================
+Builds --slots synthetic slots (attributes drawn from the seed inventory),
+books --reservations random flights into a BookingEngine, and answers
+--queries bulk questions of the form "slots matching these filters with at
+least N impressions free on every day of this window", two ways:
+
+  dense : one (slots x days) array of reserved impressions; filter, then
+          max over the window's columns for every candidate slot
+  trees : BookingEngine.find(), reading the O(log days) segment tree
+          nodes that cover the window, for booked candidates only
+
+Every answer is checked against the dense one. Then times multi-slot
+reserve() calls (conflict check + apply, no table writes).
+
+Usage (from the repository root):
+    python benchmarks/bench_booking.py
+    python benchmarks/bench_booking.py --slots 200000 --reservations 50000
+=============================================================================
+"""
+
+import argparse
+import sys
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "streamlit"))
+
+from ad_tech.booking import FILTER_COLUMNS, BookingConflict, BookingEngine, Reservation  # noqa: E402
+from ad_tech.seed import load_seed_tables  # noqa: E402
+
+
+def synthetic_slots(n: int, rng: np.random.Generator):
+    """``n`` slots whose attributes and volumes are drawn from the seed slots."""
+    seed = load_seed_tables()["T_INVENTORY_ANALYTICS"].records()
+    values = {column: sorted({str(s[column]) for s in seed}) for column in FILTER_COLUMNS if column != "is_premium"}
+    volumes = np.array([s["estimated_daily_impressions"] for s in seed])
+    drawn = {column: rng.choice(choices, size=n) for column, choices in values.items()}
+    premium = rng.random(n) < 0.3
+    impressions = (rng.choice(volumes, size=n) * rng.uniform(0.5, 1.5, size=n)).astype(int)
+    return [
+        {"slot_id": f"SLOT-{i:07d}", "slot_name": f"Synthetic slot {i}",
+         "estimated_daily_impressions": int(impressions[i]), "is_premium": bool(premium[i]), **{column: drawn[column][i] for column in values}}
+        for i in range(n)
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Inventory availability over segment trees vs a dense calendar")
+    parser.add_argument("--slots", type=int, default=100_000)
+    parser.add_argument("--reservations", type=int, default=20_000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--bookings", type=int, default=500, help="multi-slot reserve() calls to time")
+    parser.add_argument("--booking-slots", type=int, default=10, help="slots per booking")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+    rng = np.random.default_rng(args.seed)
+    origin = date(2026, 1, 1)
+
+    slots = synthetic_slots(args.slots, rng)
+    capacity = np.array([s["estimated_daily_impressions"] for s in slots])
+    reservations = []
+    for n, slot in enumerate(rng.integers(args.slots, size=args.reservations).tolist()):
+        start = int(rng.integers(0, 300))
+        length = int(rng.integers(7, 61))
+        amount = int(capacity[slot] * rng.uniform(0.1, 0.4))
+        reservations.append(Reservation(f"BKG-{n}", slots[slot]["slot_id"], origin + timedelta(days=start),
+                                        origin + timedelta(days=start + length - 1), max(amount, 1)))
+
+    t0 = time.perf_counter()
+    engine = BookingEngine(slots, reservations, origin=origin)
+    build_s = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    dense = np.zeros((args.slots, engine.horizon), dtype=np.int32)
+    for r in reservations:
+        first, last = (r.start - origin).days, min((r.end - origin).days, engine.horizon - 1)
+        dense[engine.index[r.slot_id], first:last + 1] += r.daily_impressions
+    dense_build_s = time.perf_counter() - t0
+
+    specialties = sorted({s["specialty_name"] for s in slots})
+    regions = sorted({s["region"] for s in slots})
+    tree_s, dense_s, matches = [], [], []
+    for _ in range(args.queries):
+        filters = {"specialty_name": str(rng.choice(specialties))}
+        if rng.random() < 0.5:
+            filters["is_premium"] = True
+        if rng.random() < 0.5:
+            filters["region"] = str(rng.choice(regions))
+        first = int(rng.integers(0, 300))
+        last = first + int(rng.integers(6, 60))
+        start, end = origin + timedelta(days=first), origin + timedelta(days=last)
+        min_free = int(rng.choice([100, 200, 300]))
+
+        t0 = time.perf_counter()
+        found, _ = engine.find(start, end, min_free, **filters)
+        tree_s.append(time.perf_counter() - t0)
+
+        t0 = time.perf_counter()
+        candidates = np.flatnonzero(engine.mask(**filters))
+        free = capacity[candidates] - dense[candidates, first:last + 1].max(axis=1)
+        expected = set(candidates[free >= min_free].tolist())
+        dense_s.append(time.perf_counter() - t0)
+
+        got = set(found.tolist())
+        if got != expected:
+            raise AssertionError(f"availability mismatch for {filters} {start}..{end}")
+        matches.append(len(got))
+
+    reserve_s, conflicts = [], 0
+    for _ in range(args.bookings):
+        chosen = [slots[i]["slot_id"] for i in rng.choice(args.slots, size=args.booking_slots, replace=False)]
+        first = int(rng.integers(0, 300))
+        start, end = origin + timedelta(days=first), origin + timedelta(days=first + 29)
+        t0 = time.perf_counter()
+        try:
+            engine.reserve(chosen, start, end, int(rng.integers(50, 250)))
+        except BookingConflict:
+            conflicts += 1
+        reserve_s.append(time.perf_counter() - t0)
+
+    print(f"{args.slots:,} slots, {args.reservations:,} reservations over {engine.horizon} days")
+    print(f"trees: {engine.calendar.rows:,} booked slots, {engine.calendar.nbytes / 2**20:.1f} MB, "
+          f"built in {build_s:.2f} s | dense: {dense.nbytes / 2**20:.1f} MB, built in {dense_build_s:.2f} s")
+    print(f"{args.queries} bulk queries, median {int(np.median(matches)):,} matching slots - all answers agree\n")
+    print(f"{'path':<28} | {'p50':>10} | {'p99':>10}")
+    print("-" * 54)
+    for name, times in (("find() (trees)", tree_s), ("dense calendar scan", dense_s),
+                        (f"reserve() {args.booking_slots} slots", reserve_s)):
+        print(f"{name:<28} | {np.percentile(times, 50) * 1e3:>8.2f}ms | {np.percentile(times, 99) * 1e3:>8.2f}ms")
+    print(f"\n{conflicts} of {args.bookings} bookings rejected with conflicts (nothing applied)")
+
+
+if __name__ == "__main__":
+    main()
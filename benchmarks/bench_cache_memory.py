@@ -0,0 +1,137 @@
+"""
+=============================================================================
+Benchmark - Result cache memory at 100 concurrent sessions
+=============================================================================
+Builds a Campaign Optimizer style result set shaped like Snowflake returns
+it (NUMBER(18,2) / NUMBER(8,2) as decimal128, NUMBER(38,0) as int64,
+VARCHAR as string) and splits it into --variants filtered results, one per
+filter combination. --sessions sessions each look at one of them
+(Zipf-popular) and the resident memory is compared for:
+
+  per-session pandas : st.cache_data style - every session holds its own
+                       DataFrame copy (decimals become Python objects)
+  shared arrow       : one ArrowResultCache entry per distinct result
+  shared compressed  : the same, stored with compress_table()
+
+Part 2 replays --reruns page reruns per session against a cache capped at
+--budget-mb, with and without compression, and reports the hit ratio.
+
+Usage (from the repository root):
+    python benchmarks/bench_cache_memory.py
+    python benchmarks/bench_cache_memory.py --rows 2000000 --budget-mb 64
+=============================================================================
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "streamlit"))
+
+from ad_tech.data_access import ArrowResultCache, compress_table  # noqa: E402
+
+AREAS = ["Diabetes", "Cardiology", "Oncology", "Immunology", "Neurology", "Weight Loss", "Respiratory",
+         "Dermatology"]
+PARTNERS = ["Pfizer Inc.", "Eli Lilly", "Novo Nordisk", "AbbVie Inc.", "Merck & Co.", "AstraZeneca",
+            "Johnson & Johnson", "Novartis"]
+REGIONS = ["Northeast", "Southeast", "Midwest", "Southwest", "West"]
+SPECIALTIES = ["Cardiology", "Endocrinology", "Oncology", "Primary Care", "Neurology", "Pulmonology"]
+
+
+def snowflake_result(rows: int, seed: int) -> pa.Table:
+    rng = np.random.default_rng(seed)
+
+    def money(low, high, precision=18):
+        values = np.round(rng.uniform(low, high, rows), 2)
+        return pa.array(values).cast(pa.decimal128(precision, 2), safe=False)
+
+    def pick(values):
+        return pa.array(np.array(values)[rng.integers(0, len(values), rows)])
+
+    return pa.table({
+        "CAMPAIGN_ID": pa.array([f"CAMP-{i:08d}" for i in range(rows)]),
+        "CAMPAIGN_NAME": pa.array([f"Campaign {i % 5000} Q{i % 4 + 1} 2025" for i in range(rows)]),
+        "THERAPEUTIC_AREA": pick(AREAS),
+        "PARTNER_NAME": pick(PARTNERS),
+        "REGION": pick(REGIONS),
+        "SPECIALTY_NAME": pick(SPECIALTIES),
+        "STATUS": pick(["Active", "Completed", "Paused"]),
+        "TOTAL_IMPRESSIONS": pa.array(rng.integers(1_000, 500_000, rows), pa.int64()),
+        "TOTAL_CONVERSIONS": pa.array(rng.integers(0, 5_000, rows), pa.int64()),
+        "WIN_RATE_PCT": money(40, 90, precision=8),
+        "CTR_PCT": money(0, 8, precision=8),
+        "BUDGET": money(10_000, 2_000_000),
+        "TOTAL_REVENUE": money(10_000, 9_000_000),
+        "TOTAL_SPEND": money(5_000, 2_000_000),
+    })
+
+
+def variants(table: pa.Table, count: int):
+    """``count`` filtered results: therapeutic area x partner combinations."""
+    out = []
+    for i in range(count):
+        area, partner = AREAS[i % len(AREAS)], PARTNERS[(i // len(AREAS)) % len(PARTNERS)]
+        mask = pc.or_(pc.equal(table["THERAPEUTIC_AREA"], area), pc.equal(table["PARTNER_NAME"], partner))
+        out.append(table.filter(mask))
+    return out
+
+
+def zipf_choices(rng, n: int, size: int) -> np.ndarray:
+    weights = 1.0 / np.arange(1, n + 1)
+    return rng.choice(n, size=size, p=weights / weights.sum())
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Result cache memory per session")
+    parser.add_argument("--rows", type=int, default=400_000)
+    parser.add_argument("--variants", type=int, default=24, help="distinct filter combinations")
+    parser.add_argument("--sessions", type=int, default=100)
+    parser.add_argument("--reruns", type=int, default=20)
+    parser.add_argument("--budget-mb", type=float, default=128)
+    parser.add_argument("--seed", type=int, default=9)
+    args = parser.parse_args()
+    rng = np.random.default_rng(args.seed)
+
+    results = variants(snowflake_result(args.rows, args.seed), args.variants)
+    picks = zipf_choices(rng, args.variants, args.sessions)
+    distinct = sorted(set(picks.tolist()))
+    print(f"{args.sessions} sessions over {len(distinct)} distinct results "
+          f"({sum(results[i].num_rows for i in distinct) / len(distinct):,.0f} rows each on average)\n")
+
+    t0 = time.perf_counter()
+    compressed = {i: compress_table(results[i]) for i in distinct}
+    compress_ms = (time.perf_counter() - t0) * 1e3 / len(distinct)
+
+    per_copy = {i: results[i].to_pandas().memory_usage(deep=True).sum() for i in distinct}
+    modes = {
+        "per-session pandas": sum(per_copy[i] for i in picks),
+        "shared arrow": sum(results[i].nbytes for i in distinct),
+        "shared compressed": sum(compressed[i].nbytes for i in distinct),
+    }
+    print(f"{'cache':<20} | {'resident':>10} | {'per user':>9}")
+    print("-" * 46)
+    for name, total in modes.items():
+        print(f"{name:<20} | {total / 2**20:>8.1f}MB | {total / args.sessions / 2**20:>7.2f}MB")
+    print(f"\ncompress_table: {compress_ms:.1f} ms per result, "
+          f"{modes['shared arrow'] / modes['shared compressed']:.1f}x smaller than raw Arrow")
+
+    print(f"\n{args.sessions} sessions x {args.reruns} reruns, cache capped at {args.budget_mb:.0f} MB")
+    requests = zipf_choices(rng, args.variants, args.sessions * args.reruns)
+    for compress in (False, True):
+        cache = ArrowResultCache(max_bytes=int(args.budget_mb * 2**20), ttl=1e9, compress=compress)
+        for i in requests.tolist():
+            if cache.get(("q", i)) is None:
+                cache.put(("q", i), results[i], cost=0.5)
+        stats = cache.stats()
+        label = "compressed" if compress else "raw"
+        print(f"{label:>10}: hit ratio {stats['hits'] / len(requests):.1%}, {stats['entries']} results resident "
+              f"({stats['bytes'] / 2**20:.1f} MB), {stats['evictions']} evictions")
+
+
+if __name__ == "__main__":
+    main()
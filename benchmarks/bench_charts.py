@@ -0,0 +1,121 @@
+"""
+=============================================================================
+Benchmark - Chart payloads: raw query results vs viewport-sized chart data
+=============================================================================
+Builds a synthetic slot-level T_CAMPAIGN_DAILY (--days x --slots rows,
+2.2M by default) in the LocalEngine, with one spike day and one outage
+day, and prepares the Inventory Explorer's Slot Delivery charts three ways:
+
+  raw        : the source query as st.line_chart would receive it
+  per day    : GROUP BY date_day / slot_id in SQL, every group sent
+  viewport   : ad_tech/charts.py - aggregated and bucketed in SQL, LTTB
+               to the chart width (time series), top bars plus "Other"
+               (categories); then the same call again from the cache
+
+Reports rows sent, Arrow IPC bytes (the form Streamlit ships chart data
+in), server time, and whether the spike and the outage survive. The
+browser lays out one mark per row, so its render time follows rows sent.
+
+Usage (from the repository root):
+    python benchmarks/bench_charts.py
+    python benchmarks/bench_charts.py --days 3650 --slots 500 --width 600
+=============================================================================
+"""
+
+import argparse
+import sys
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+import numpy as np
+import pyarrow as pa
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "streamlit"))
+
+from ad_tech.charts import Viewport, category_bars, time_series  # noqa: E402
+from ad_tech.data_access import ArrowResultCache, fetch_arrow  # noqa: E402
+from ad_tech.engine import LocalEngine  # noqa: E402
+from ad_tech.seed import Column  # noqa: E402
+
+SOURCE = "SELECT date_day, slot_id, impressions, revenue FROM AD_TECH.ANALYTICS.T_CAMPAIGN_DAILY"
+PER_DAY = "SELECT date_day, SUM(impressions) AS impressions FROM T_CAMPAIGN_DAILY GROUP BY date_day ORDER BY date_day"
+PER_SLOT = "SELECT slot_id, SUM(impressions) AS impressions FROM T_CAMPAIGN_DAILY GROUP BY slot_id"
+
+
+def ipc_bytes(table: pa.Table) -> int:
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().size
+
+
+def load(engine: LocalEngine, days: int, slots: int, seed: int):
+    """Slot-days with a weekly cycle and slow growth; returns the spike and outage days."""
+    rng = np.random.default_rng(seed)
+    first = date.today() - timedelta(days=days)
+    spike, outage = days // 3, 2 * days // 3
+    base = rng.lognormal(6.0, 0.8, slots)
+    day_factor = (1.0 + 0.5 * np.arange(days) / days) * np.where(np.arange(days) % 7 >= 5, 0.4, 1.0)
+    day_factor[spike] *= 4.0
+    day_factor[outage] = 0.02
+    names = [f"SLOT-{j:05d}" for j in range(slots)]
+
+    def rows():
+        for d in range(days):
+            day = (first + timedelta(days=d)).isoformat()
+            impressions = rng.poisson(base * day_factor[d])
+            revenue = np.round(impressions * 0.014, 2)
+            yield from zip([day] * slots, names, impressions.tolist(), revenue.tolist())
+
+    columns = [Column("date_day", "DATE"), Column("slot_id", "VARCHAR"), Column("impressions", "INT"),
+               Column("revenue", "NUMBER")]
+    engine.load_table("T_CAMPAIGN_DAILY", columns, rows())
+    return (first + timedelta(days=spike)).isoformat(), (first + timedelta(days=outage)).isoformat()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Chart payloads: raw query results vs viewport-sized chart data")
+    parser.add_argument("--days", type=int, default=1095)
+    parser.add_argument("--slots", type=int, default=2000)
+    parser.add_argument("--width", type=int, default=1200, help="chart width in pixels")
+    parser.add_argument("--seed", type=int, default=11)
+    args = parser.parse_args()
+    viewport = Viewport(args.width)
+
+    engine = LocalEngine(tables={})
+    start = time.perf_counter()
+    spike, outage = load(engine, args.days, args.slots, args.seed)
+    print(f"{args.days * args.slots:,} slot-day rows loaded in {time.perf_counter() - start:.1f} s; "
+          f"{args.width} px chart -> {viewport.points} points, {viewport.bars} bars\n")
+    print(f"{'chart':<12} | {'data':<16} | {'rows sent':>10} | {'IPC bytes':>11} | {'server':>8} | shape kept")
+    print("-" * 82)
+
+    def row(chart, label, table, seconds, note=""):
+        print(f"{chart:<12} | {label:<16} | {table.num_rows:>10,} | {ipc_bytes(table):>11,} | "
+              f"{seconds * 1000:>6.0f}ms | {note}")
+
+    def kept(table):
+        days = set(table.column("DATE_DAY").to_pylist())
+        return f"spike {'yes' if spike in days else 'NO'}, outage {'yes' if outage in days else 'NO'}"
+
+    for label, sql in (("raw", SOURCE), ("per day", PER_DAY)):
+        start = time.perf_counter()
+        table = fetch_arrow(engine, sql)
+        row("time series", label, table, time.perf_counter() - start, kept(table))
+    cache = ArrowResultCache()
+    for label in ("viewport", "viewport, cached"):
+        result = time_series(engine, SOURCE, "date_day", ["impressions"], viewport, cache=cache)
+        row("time series", label, result.table, result.seconds, kept(result.table))
+
+    start = time.perf_counter()
+    table = fetch_arrow(engine, PER_SLOT)
+    row("slot bars", "per slot", table, time.perf_counter() - start)
+    for label in ("viewport", "viewport, cached"):
+        result = category_bars(engine, SOURCE, "slot_id", "impressions", viewport, cache=cache)
+        row("slot bars", label, result.table, result.seconds,
+            f"top {result.table.num_rows - 1} of {result.source_points:,} + Other")
+
+
+if __name__ == "__main__":
+    main()
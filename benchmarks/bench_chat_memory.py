@@ -0,0 +1,89 @@
+"""
+=============================================================================
+Benchmark - Agent Chat rerun time and prompt size vs thread length
+=============================================================================
+Seeds the chat page with threads of increasing length and measures:
+
+  rerun        : AppTest rerun of pages/3_Agent_Chat.py rendering only the
+                 visible tail vs rendering every turn (the old behaviour)
+  prompt       : tokens sent to the agent when the whole history is inlined
+                 vs ConversationMemory.build_prompt (summary + window)
+  disk         : size of the persisted thread (gzip JSON lines + metadata)
+
+Usage (from the repository root):
+    python benchmarks/bench_chat_memory.py
+    python benchmarks/bench_chat_memory.py --turns 100 500 1000
+=============================================================================
+"""
+
+import argparse
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+REPO = Path(__file__).resolve().parents[1]
+APP = REPO / "streamlit"
+sys.path.insert(0, str(APP))
+
+from ad_tech.agent import BUDGET_TOKENS, estimate_tokens, generate_demo_response  # noqa: E402
+from ad_tech.content import SUGGESTED_PROMPTS  # noqa: E402
+from ad_tech.memory import ConversationMemory, ThreadStore  # noqa: E402
+
+PAGE = str(APP / "pages" / "3_Agent_Chat.py")
+
+
+def build_thread(turns: int) -> ConversationMemory:
+    memory = ConversationMemory()
+    for i in range(turns // 2):
+        question = f"{SUGGESTED_PROMPTS[i % len(SUGGESTED_PROMPTS)]} (follow-up {i})"
+        memory.add("user", question)
+        memory.add("assistant", generate_demo_response(question))
+    return memory
+
+
+def time_rerun(memory: ConversationMemory, visible: int, repeat: int) -> float:
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(PAGE, default_timeout=120)
+    at.session_state["memory"] = memory
+    at.session_state["visible_turns"] = visible
+    at.run()
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        at.run()
+        samples.append(time.perf_counter() - t0)
+    if at.exception:
+        raise RuntimeError(at.exception[0].value)
+    return statistics.median(samples)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, nargs="+", default=[20, 100, 300, 600])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--visible", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'turns':>6} | {'rerun all':>10} {'rerun tail':>10} | "
+          f"{'full prompt':>11} {'memory':>7} | {'disk KB':>8}")
+    print("-" * 66)
+    store = ThreadStore(tempfile.mkdtemp(prefix="bench_threads_"))
+    for turns in args.turns:
+        memory = build_thread(turns)
+        full_prompt = sum(t.tokens + 4 for t in memory.turns)
+        bounded = estimate_tokens(memory.build_prompt("Next question?"))
+        store.save(memory)
+        disk = sum(p.stat().st_size for p in store.root.rglob(f"{memory.thread_id}.*"))
+
+        rerun_all = time_rerun(memory, turns, args.repeat)
+        rerun_tail = time_rerun(memory, args.visible, args.repeat)
+        over = " (over budget)" if full_prompt > BUDGET_TOKENS else ""
+        print(f"{turns:>6} | {rerun_all * 1e3:>8.0f}ms {rerun_tail * 1e3:>8.0f}ms | "
+              f"{full_prompt:>11,} {bounded:>7,} | {disk / 1024:>8.1f}{over}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+=============================================================================
+Benchmark - Setup deployment: serial replay vs the dependency-graph runner
+=============================================================================
+Deploys setup/01-05 with ad_tech/deploy.py into a LocalTarget whose
+objects each sleep for a typical Snowflake build time of their kind
+(BUILD_SECONDS, multiplied by --scale to keep the run short):
+
+  cold, serial    : every object, one at a time in script order - what
+                    running the five files by hand does
+  cold, parallel  : every object, on --workers threads, as soon as its
+                    dependencies are done
+  no change       : a redeploy of the same scripts
+  search edit     : one search service's TARGET_LAG changed
+  table edit      : one campaign name in T_CAMPAIGN_PERFORMANCE changed
+  comment edit    : only a comment changed
+
+Reports objects applied, plan and wall time, and the Snowflake-equivalent
+apply time (apply time / --scale). Cold deploys are checked against the seed tables.
+
+Usage (from the repository root):
+    python benchmarks/bench_deploy.py
+    python benchmarks/bench_deploy.py --scale 0.1 --workers 8
+=============================================================================
+"""
+
+import argparse
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "streamlit"))
+
+from ad_tech.deploy import DEFAULT_SCRIPTS, LocalTarget, deploy  # noqa: E402
+from ad_tech.engine import LocalEngine  # noqa: E402
+
+# Typical seconds to create each kind of object in Snowflake (search services build their index)
+BUILD_SECONDS = {
+    "DATABASE": 0.4, "SCHEMA": 0.3, "WAREHOUSE": 0.8, "GRANT": 0.2, "TABLE": 1.5,
+    "CORTEX SEARCH SERVICE": 45.0, "SEMANTIC VIEW": 1.0, "AGENT": 2.0,
+}
+EDITS = {
+    "search edit": ("03_cortex_search.sql", "TARGET_LAG = '1 hour'", "TARGET_LAG = '2 hours'"),
+    "table edit": ("02_demo_data.sql", "'Ozempic Direct Response Q3 2025'", "'Ozempic Direct Response Q3'"),
+    "comment edit": ("04_semantic_views.sql", "-- CAMPAIGN ANALYTICS SEMANTIC VIEW", "-- Campaign analytics"),
+}
+
+
+def check_tables(target: LocalTarget) -> None:
+    """The deployed tables hold exactly the rows the local engine loads from the seed script."""
+    reference = LocalEngine()
+    for name in reference.tables:
+        got = [tuple(r) for r in target.engine.execute(f"SELECT * FROM {name}")]
+        if got != [tuple(r) for r in reference.execute(f"SELECT * FROM {name}")]:
+            raise AssertionError(f"{name} differs from the seed rows")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Setup deployment: serial replay vs the dependency-graph runner")
+    parser.add_argument("--scale", type=float, default=0.02, help="fraction of BUILD_SECONDS actually slept")
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+    latency = {kind: seconds * args.scale for kind, seconds in BUILD_SECONDS.items()}
+
+    print(f"setup/01-05, build times x{args.scale}, Snowflake-equivalent = apply time / {args.scale}\n")
+    print(f"{'run':<16} | {'applied':>7} | {'plan':>7} | {'wall':>7} | {'Snowflake eq.':>13}")
+    print("-" * 64)
+
+    def report(label, result):
+        wall = result.plan_seconds + result.apply_seconds
+        print(f"{label:<16} | {len(result.applied):>7} | {result.plan_seconds:>6.2f}s | {wall:>6.2f}s | "
+              f"{result.apply_seconds / args.scale:>12.0f}s")
+
+    report("cold, serial", deploy(LocalTarget(latency=latency), workers=1))
+    target = LocalTarget(latency=latency)
+    report("cold, parallel", deploy(target, workers=args.workers))
+    check_tables(target)
+    report("no change", deploy(target, workers=args.workers))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        scripts = [Path(shutil.copy(path, tmp)) for path in DEFAULT_SCRIPTS]
+        for label, (name, old, new) in EDITS.items():
+            path = Path(tmp) / name
+            text = path.read_text(encoding="utf-8")
+            assert old in text, f"{name}: {old!r} not found"
+            path.write_text(text.replace(old, new, 1), encoding="utf-8")
+            result = deploy(target, scripts, workers=args.workers)
+            report(label, result)
+            if result.applied:
+                print(f"{'':<16}   " + ", ".join("grant" if s.node.kind == "GRANT" else s.node.name.split(".")[-1]
+                                                   for s in result.applied))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+=============================================================================
+Benchmark - Campaign Optimizer chart prep on raw vs schema-cast results
+=============================================================================
+Builds a T_CAMPAIGN_PERFORMANCE result the way ``fetch_arrow_all()`` returns
+it from Snowflake (NUMBER(p,s) columns as decimal128, VARCHAR as string)
+and times the Optimizer page's chart prep on it:
+
+  ROAS by therapeutic area : mean roas, distinct campaigns, sum impressions
+  partner tier             : mean roas, sum revenue
+  top campaigns            : 10 best by roas
+  chart conversion         : the three results to Arrow for st.bar_chart /
+                             st.dataframe
+
+once on the raw table and once after schema.cast_result() (float32 /
+int32 / dictionary types from setup/02_demo_data.sql), including the time
+the cast itself takes. Each run starts from ``to_pandas()``, as the page does.
+
+Usage (from the repository root):
+    python benchmarks/bench_dtypes.py
+    python benchmarks/bench_dtypes.py --rows 1000000 --repeat 3
+=============================================================================
+"""
+
+import argparse
+import sys
+import time
+from decimal import Decimal
+from pathlib import Path
+
+import numpy as np
+import pyarrow as pa
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "streamlit"))
+
+from ad_tech.schema import cast_result  # noqa: E402
+
+AREAS = ["Diabetes", "Cardiology", "Oncology", "Immunology", "Neurology", "Weight Loss", "Respiratory",
+         "Dermatology"]
+PARTNERS = ["Pfizer Inc.", "Eli Lilly", "Novo Nordisk", "AbbVie Inc.", "Merck & Co.", "AstraZeneca"]
+TIERS = ["Platinum", "Gold", "Silver", "Bronze"]
+
+
+def snowflake_table(rows: int, seed: int) -> "pa.Table":
+    rng = np.random.default_rng(seed)
+
+    def decimals(low, high, precision, places):
+        quantum = Decimal(1).scaleb(-places)
+        return pa.array([Decimal(str(v)).quantize(quantum)
+                         for v in np.round(rng.uniform(low, high, rows), places)],
+                        pa.decimal128(precision, places))
+
+    def pick(values):
+        return pa.array(np.array(values, dtype=object)[rng.integers(0, len(values), rows)], pa.string())
+
+    return pa.table({
+        "CAMPAIGN_ID": pa.array([f"CAMP-{i:08d}" for i in range(rows)], pa.string()),
+        "CAMPAIGN_NAME": pa.array([f"Campaign {i % 5000} Q{i % 4 + 1} 2025" for i in range(rows)], pa.string()),
+        "THERAPEUTIC_AREA": pick(AREAS),
+        "PARTNER_NAME": pick(PARTNERS),
+        "PARTNER_TIER": pick(TIERS),
+        "STATUS": pick(["Active", "Completed", "Paused"]),
+        "TOTAL_IMPRESSIONS": pa.array(rng.integers(1_000, 500_000, rows)).cast(pa.decimal128(38, 0)),
+        "WIN_RATE_PCT": decimals(40, 90, 5, 2),
+        "CTR_PCT": decimals(0, 8, 8, 4),
+        "ROAS": decimals(0.5, 9, 10, 4),
+        "BUDGET": decimals(10_000, 2_000_000, 18, 2),
+        "TOTAL_REVENUE": decimals(10_000, 9_000_000, 18, 2),
+    })
+
+
+def chart_prep(table: "pa.Table"):
+    """The pandas conversion, aggregations and Arrow conversions behind the Optimizer charts."""
+    df = table.to_pandas()
+    by_area = (df.groupby("THERAPEUTIC_AREA", observed=True)
+               .agg(CAMPAIGNS=("CAMPAIGN_ID", "nunique"), AVG_ROAS=("ROAS", "mean"),
+                    IMPRESSIONS=("TOTAL_IMPRESSIONS", "sum"))
+               .reset_index().sort_values("AVG_ROAS", ascending=False))
+    by_tier = (df.groupby("PARTNER_TIER", observed=True)
+               .agg(AVG_ROAS=("ROAS", "mean"), REVENUE=("TOTAL_REVENUE", "sum"))
+               .reset_index().sort_values("AVG_ROAS", ascending=False))
+    top = df.nlargest(10, "ROAS") if df["ROAS"].dtype != object else \
+        df.loc[df["ROAS"].sort_values(ascending=False).index[:10]]
+    return [pa.Table.from_pandas(frame, preserve_index=False) for frame in (by_area, by_tier, top)]
+
+
+def timed(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Optimizer chart prep on raw vs schema-cast results")
+    parser.add_argument("--rows", type=int, default=300_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=5)
+    args = parser.parse_args()
+
+    raw = snowflake_table(args.rows, args.seed)
+    cast_s = timed(lambda: cast_result(raw), args.repeat)
+    cast = cast_result(raw)
+
+    raw_prep = timed(lambda: chart_prep(raw), args.repeat)
+    cast_prep = timed(lambda: chart_prep(cast), args.repeat)
+    for a, b in zip(chart_prep(raw), chart_prep(cast)):
+        column = "AVG_ROAS" if "AVG_ROAS" in a.column_names else "ROAS"
+        assert np.allclose(np.asarray(a[column].to_pylist(), dtype=float),
+                           np.asarray(b[column].to_pylist(), dtype=float), rtol=1e-5)
+
+    print(f"{args.rows:,} campaign rows, best of {args.repeat}\n")
+    print(f"{'result':<10} | {'arrow':>9} | {'chart prep':>10}")
+    print("-" * 36)
+    for name, table, prep in (("raw", raw, raw_prep), ("cast", cast, cast_prep)):
+        print(f"{name:<10} | {table.nbytes / 2**20:>7.1f}MB | {prep * 1e3:>8.1f}ms")
+    print(f"\ncast_result: {cast_s * 1e3:.0f} ms once per fetch; chart prep "
+          f"{raw_prep / cast_prep:.1f}x faster on every rerun")
+
+
+if __name__ == "__main__":
+    main()
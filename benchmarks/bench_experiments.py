@@ -0,0 +1,147 @@
+"""
+=============================================================================
+Benchmark - Bid strategy experiments: throughput, error rate and early stops
+=============================================================================
+Runs --experiments concurrent two-arm ROAS experiments in one
+ExperimentEngine (ad_tech/experiments.py) and streams simulated auction
+outcomes at them in batches of --batch, as a bid path logging outcomes
+would. A --effect-share of the experiments have a true --lift on the
+treatment arm; the rest are A/A tests, where any decision is an error.
+Outcomes stop for an experiment once it is decided.
+
+Reports:
+
+  throughput : outcomes/s through record_batch() (statistics update plus
+               the sequential test of every experiment in the batch), and
+               record() / arm() per call
+  errors     : A/A experiments decided by the mSPRT, against a naive z-test
+               at 95% checked after every batch on the same data
+  power      : real-lift experiments promoted, and the outcomes they
+               needed against a fixed-horizon test sized for the lift
+
+Usage (from the repository root):
+    python benchmarks/bench_experiments.py
+    python benchmarks/bench_experiments.py --experiments 5000 --outcomes 50000000
+=============================================================================
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "streamlit"))
+
+from ad_tech.experiments import ExperimentEngine  # noqa: E402
+from ad_tech.metrics import MetricsRegistry  # noqa: E402
+
+WINNING_CPM = 40.0
+ENGAGEMENT_RATE = 0.025
+ENGAGEMENT_VALUE = 6.0
+
+
+def outcomes(lift: np.ndarray, rng: np.random.Generator):
+    """Revenue and spend of one CPM block per request; ``lift`` scales the engagement rate."""
+    size = len(lift)
+    clearing = WINNING_CPM * rng.lognormal(0.0, 0.25, size)
+    won = rng.random(size) < 0.6
+    engagements = rng.binomial(1000, ENGAGEMENT_RATE * (1.0 + lift)) * won
+    return engagements * ENGAGEMENT_VALUE, np.where(won, clearing, 0.0)
+
+
+def naive_z(n, sx, sy, sxx, syy, sxy):
+    """Delta-method z of arm 1 against arm 0 on the ratio metric, per experiment."""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mx, my = sx / n, sy / n
+        r = mx / my
+        var = (sxx / n - mx * mx - 2 * r * (sxy / n - mx * my) + r * r * (syy / n - my * my)) / (my * my * n)
+        return (r[:, 1] - r[:, 0]) / np.sqrt(var[:, 0] + var[:, 1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Bid strategy experiments: throughput, error rate and early stops")
+    parser.add_argument("--experiments", type=int, default=2_000)
+    parser.add_argument("--outcomes", type=int, default=20_000_000)
+    parser.add_argument("--batch", type=int, default=100_000)
+    parser.add_argument("--effect-share", type=float, default=0.2)
+    parser.add_argument("--lift", type=float, default=0.03, help="true ROAS lift of the treatment arms")
+    parser.add_argument("--max-units", type=int, default=50_000, help="outcomes per arm before giving up")
+    parser.add_argument("--seed", type=int, default=5)
+    args = parser.parse_args()
+    rng = np.random.default_rng(args.seed)
+
+    engine = ExperimentEngine(capacity=args.experiments, max_units=args.max_units, metrics=MetricsRegistry())
+    ids = [engine.create(f"exp {i}", ("sweet_spot", "shaded"), unit="request_id").experiment_id
+           for i in range(args.experiments)]
+    id_array = np.array(ids, dtype=object)
+    has_effect = rng.random(args.experiments) < args.effect_share
+
+    # Naive baseline: the same sums, a z-test after every batch
+    sums = {name: np.zeros((args.experiments, 2)) for name in ("n", "sx", "sy", "sxx", "syy", "sxy")}
+    naive_decided = np.zeros(args.experiments, dtype=bool)
+    open_ = np.ones(args.experiments, dtype=bool)
+    elapsed = 0.0
+    streamed = 0
+    while streamed < args.outcomes and open_.any():
+        size = min(args.batch, args.outcomes - streamed)
+        live = np.flatnonzero(open_)
+        rows = live[rng.integers(0, len(live), size)]
+        arms = rng.integers(0, 2, size)
+        revenue, spend = outcomes(np.where(has_effect[rows] & (arms == 1), args.lift, 0.0), rng)
+        t0 = time.perf_counter()
+        decisions = engine.record_batch(id_array[rows].tolist(), arms, revenue, spend)
+        elapsed += time.perf_counter() - t0
+        streamed += size
+        for name, values in (("n", 1.0), ("sx", revenue), ("sy", spend), ("sxx", revenue * revenue),
+                             ("syy", spend * spend), ("sxy", revenue * spend)):
+            np.add.at(sums[name], (rows, arms), values)
+        enough = sums["n"].min(axis=1) >= engine.min_units
+        naive_decided |= enough & (np.abs(naive_z(**sums)) > 1.96)
+        for decision in decisions:
+            row = engine.index[decision.experiment_id]
+            open_[row] = False
+
+    statuses = np.array([engine.status(e) for e in ids])
+    decided = statuses != "running"
+    print(f"{args.experiments:,} concurrent experiments, {streamed:,} outcomes in batches of {args.batch:,}")
+    print(f"record_batch : {streamed / elapsed / 1e6:.2f}M outcomes/s ({elapsed:.1f} s, test included)")
+
+    t0 = time.perf_counter()
+    for i in range(100_000):
+        engine.record(ids[i % 10], i & 1, 4.0, 1.0)
+    record_us = (time.perf_counter() - t0) / 100_000 * 1e6
+    t0 = time.perf_counter()
+    for i in range(100_000):
+        engine.arm(ids[-1 - i % 10], f"SLOT-{i:05d}")
+    arm_us = (time.perf_counter() - t0) / 100_000 * 1e6
+    print(f"record()     : {record_us:.1f} us per outcome; arm(): {arm_us:.1f} us per assignment\n")
+
+    null = ~has_effect
+    print(f"A/A experiments ({null.sum():,}) decided, i.e. false positives:")
+    false_positives = decided & null & (statuses != "inconclusive")
+    print(f"  mSPRT, checked after every batch : {false_positives.sum() / null.sum():.1%}")
+    print(f"  naive z-test, checked every batch: {(naive_decided & null).sum() / null.sum():.1%}")
+    effect = has_effect
+    promoted = (statuses == "promoted") & effect
+    n_per_arm = sums["n"][promoted].sum(axis=1) / 2 if promoted.any() else np.array([np.nan])
+    print(f"\nreal +{args.lift:.0%} lift ({effect.sum():,}): {promoted.sum() / effect.sum():.1%} promoted, "
+          f"{(statuses[effect] == 'stopped').sum()} stopped the wrong way, "
+          f"{(statuses[effect] == 'inconclusive').sum()} inconclusive at {args.max_units:,} per arm")
+
+    # Fixed-horizon sample size for 80% power at the same lift, from the pooled A/A noise
+    aa = null & (sums["n"].min(axis=1) > 1000)
+    mx, my = sums["sx"][aa].sum() / sums["n"][aa].sum(), sums["sy"][aa].sum() / sums["n"][aa].sum()
+    r = mx / my
+    n_all = sums["n"][aa].sum()
+    per_unit_var = ((sums["sxx"][aa].sum() / n_all - mx * mx)
+                    - 2 * r * (sums["sxy"][aa].sum() / n_all - mx * my)
+                    + r * r * (sums["syy"][aa].sum() / n_all - my * my)) / (my * my)
+    fixed_n = 2 * (1.96 + 0.84) ** 2 * per_unit_var / (args.lift * r) ** 2
+    print(f"  outcomes per arm at promotion: median {np.median(n_per_arm):,.0f}, "
+          f"mean {np.mean(n_per_arm):,.0f} vs {fixed_n:,.0f} for a fixed-horizon test (80% power)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+"""
+=============================================================================
+Benchmark - Data quality checks on 100M daily fact rows
+=============================================================================
+Streams --days days of synthetic T_CAMPAIGN_DAILY rows (--campaigns x
+--slots rows per day, 1M by default) through the vectorized checker of
+ad_tech/quality.py, one day per Arrow batch in key order, as the
+warehouse scan returns them. Each day has planted violations at known rows:
+
+  funnel     : winning_bids above total_bids
+  negative   : negative spend
+  orphan     : a campaign_id missing from the campaign table
+  duplicate  : a row repeating the previous row's key
+  null       : NULL revenue (unknown, so never a violation)
+
+Reports rows/s and checks every rule's count against the planted ones.
+Then loads --local-days days of --local-rows rows in total into the
+LocalEngine and times a full check in both modes, and an incremental
+check of one newly ingested day.
+
+Usage (from the repository root):
+    python benchmarks/bench_quality.py
+    python benchmarks/bench_quality.py --days 20 --local-rows 200000 --local-days 5
+=============================================================================
+"""
+
+import argparse
+import sys
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+import numpy as np
+import pyarrow as pa
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "streamlit"))
+
+from ad_tech.engine import LocalEngine  # noqa: E402
+from ad_tech.quality import (  # noqa: E402
+    CAMPAIGNS, DAILY, INVENTORY, RULES, BatchChecker, QualityMonitor, validate,
+)
+from ad_tech.seed import Column, load_seed_schema  # noqa: E402
+from ad_tech.trends import DAILY_COLUMNS  # noqa: E402
+
+TEMPLATES = 8            # distinct day batches, cycled
+PLANTED_PER_DAY = 50     # rows per kind of violation
+
+
+def day_batch(day: date, campaigns: int, slots: int, rng: np.random.Generator, planted: dict) -> pa.RecordBatch:
+    """One day of rows ordered by (campaign_id, slot_id), with planted violations (counts added to ``planted``)."""
+    n = campaigns * slots
+    campaign = np.repeat(np.arange(campaigns), slots)
+    slot = np.tile(np.arange(slots), campaigns)
+    bids = rng.integers(100, 1000, n)
+    wins = (bids * rng.uniform(0.5, 0.9, n)).astype(np.int64)
+    impressions = wins * 10
+    engagements = impressions // 30
+    conversions = engagements // 10
+    revenue = impressions * 0.4
+    spend = impressions * 0.1
+
+    def rows():
+        return rng.choice(np.flatnonzero(slot > 0), PLANTED_PER_DAY, replace=False)
+
+    funnel = rows()
+    wins[funnel] = bids[funnel] + 1
+    spend[rows()] = -1.0
+    orphan = rows()
+    duplicate = rows()
+    slot[duplicate] = slot[duplicate - 1]
+    revenue_nulls = rows()
+    for kind in ("funnel", "negative", "orphan", "duplicate"):
+        planted[kind] = planted.get(kind, 0) + PLANTED_PER_DAY
+    campaign_ids = np.array([f"CAMP-{i:05d}" for i in range(campaigns)], dtype=object)[campaign]
+    campaign_ids[orphan] = [f"CAMP-X{k:04d}" for k in range(PLANTED_PER_DAY)]
+    slot_ids = pa.DictionaryArray.from_arrays(
+        pa.array(slot.astype(np.int32)), pa.array([f"SLOT-{j:05d}" for j in range(slots)])).cast(pa.string())
+    revenue_mask = np.zeros(n, dtype=bool)
+    revenue_mask[revenue_nulls] = True
+    return pa.record_batch({
+        "date_day": pa.array(np.full(n, (day - date(1970, 1, 1)).days, dtype=np.int32), pa.date32()),
+        "campaign_id": pa.array(campaign_ids, pa.string()),
+        "slot_id": slot_ids,
+        "total_bids": bids, "winning_bids": wins, "impressions": impressions, "engagements": engagements,
+        "conversions": conversions, "revenue": pa.array(revenue, mask=revenue_mask), "spend": spend,
+    })
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Data quality checks on 100M daily fact rows")
+    parser.add_argument("--days", type=int, default=100)
+    parser.add_argument("--campaigns", type=int, default=2000)
+    parser.add_argument("--slots", type=int, default=500)
+    parser.add_argument("--local-rows", type=int, default=500_000)
+    parser.add_argument("--local-days", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=3)
+    args = parser.parse_args()
+    rng = np.random.default_rng(args.seed)
+    rules = [r for r in RULES if r.table == DAILY]
+
+    # Vectorized: 100 day batches in key order, cycling through a few templates
+    planted_per_template = []
+    templates = []
+    for _ in range(TEMPLATES):
+        planted = {}
+        templates.append(day_batch(date(2026, 1, 1), args.campaigns, args.slots, rng, planted))
+        planted_per_template.append(planted)
+    parents = {(CAMPAIGNS, "campaign_id"): pa.array([f"CAMP-{i:05d}" for i in range(args.campaigns)]),
+               (INVENTORY, "slot_id"): pa.array([f"SLOT-{j:05d}" for j in range(args.slots)])}
+    checker = BatchChecker(DAILY, rules, parents)
+    expected = {}
+    elapsed = 0.0
+    for day in range(args.days):
+        batch = templates[day % TEMPLATES]
+        dates = pa.array(np.full(batch.num_rows, (date(2026, 1, 1) - date(1970, 1, 1)).days + day, dtype=np.int32),
+                         pa.date32())
+        batch = batch.set_column(0, "date_day", dates)
+        for kind, count in planted_per_template[day % TEMPLATES].items():
+            expected[kind] = expected.get(kind, 0) + count
+        t0 = time.perf_counter()
+        checker.feed(batch)
+        elapsed += time.perf_counter() - t0
+
+    found = {r.rule: r.violations for r in checker.results.values()}
+    print(f"vectorized: {checker.rows:,} rows x {len(rules)} rules in {elapsed:.1f} s "
+          f"({checker.rows / elapsed / 1e6:.1f}M rows/s, one {args.campaigns * args.slots:,}-row batch per day)")
+    for kind, rule in (("funnel", "winning_bids_le_total_bids"), ("negative", "spend_non_negative"),
+                       ("orphan", "campaign_exists"), ("duplicate", "day_campaign_slot_unique")):
+        status = "ok" if found[rule] == expected[kind] else "MISMATCH"
+        print(f"  {rule:<28} {found[rule]:>8,} found, {expected[kind]:>8,} planted  {status}")
+    others = {rule: count for rule, count in found.items() if count and rule not in (
+        "winning_bids_le_total_bids", "spend_non_negative", "campaign_exists", "day_campaign_slot_unique")}
+    print(f"  other rules: {others or 'no violations'} (NULL revenue passes)\n")
+
+    # Local engine: the head of each template per day, full check in both modes, then one newly ingested day
+    local_days = args.local_days
+    per_day = min(args.campaigns * args.slots, args.local_rows // local_days)
+    engine = LocalEngine()
+    columns = [Column(n, t) for n, t in DAILY_COLUMNS]
+    today = date.today()
+
+    def load(days, first):
+        rows = []
+        for day in range(first, first + days):
+            batch = templates[day % TEMPLATES].slice(0, per_day).to_pydict()
+            day_value = (today - timedelta(days=local_days - 1 - day)).isoformat()
+            rows.extend(zip([day_value] * per_day, batch["campaign_id"], batch["slot_id"], ["Area"] * per_day,
+                            [1] * per_day, ["Partner"] * per_day, ["Gold"] * per_day, batch["total_bids"],
+                            batch["winning_bids"], batch["impressions"], batch["engagements"], batch["conversions"],
+                            batch["revenue"], batch["spend"]))
+        engine.load_table("T_CAMPAIGN_DAILY", columns, rows, replace=first == 0)
+
+    campaign_columns = load_seed_schema()["T_CAMPAIGN_PERFORMANCE"]
+    engine.load_table("T_CAMPAIGN_PERFORMANCE", campaign_columns, [
+        tuple(f"CAMP-{i:05d}" if c.name == "campaign_id" else None for c in campaign_columns)
+        for i in range(args.campaigns)])
+    engine.load_table("T_INVENTORY_ANALYTICS", [Column("slot_id", "VARCHAR")],
+                      [(f"SLOT-{j:05d}",) for j in range(args.slots)])
+    load(local_days, 0)
+    print(f"local engine, {local_days * per_day:,} rows of T_CAMPAIGN_DAILY")
+    for mode in ("vectorized", "pushdown"):
+        report, _ = validate(engine, rules, mode)
+        print(f"  {mode:<11} full check    : {report.seconds:6.2f} s, {sum(r.violations for r in report.results):,} "
+              f"violations")
+    monitor = QualityMonitor(rules, mode="vectorized")
+    # Each poll runs the day after the newest partition, once it is complete
+    monitor.poll(engine, today=today + timedelta(days=1))
+    load(1, local_days)
+    report = monitor.poll(engine, today=today + timedelta(days=2))
+    print(f"  incremental one new day  : {report.seconds:6.2f} s, {report.rows[DAILY]:,} rows checked "
+          f"(since {report.since[DAILY]})")
+
+
+if __name__ == "__main__":
+    main()
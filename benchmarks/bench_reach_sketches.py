@@ -0,0 +1,127 @@
+"""
+=============================================================================
+Benchmark - Sketch-based reach vs raw exposure log scans
+=============================================================================
+Simulates --days of exposures for the seed cohorts and slots (cohort sizes
+and impressions multiplied by --scale), builds the ReachStore, and answers
+--queries random planning questions of the form "deduplicated reach of
+these --slots slots for one age bucket over the last N days" two ways:
+
+  raw log : filter the exposure arrays (ids dictionary-encoded, as a
+            columnar store keeps them) and count distinct people with numpy
+            in memory - a lower bound on any warehouse scan; with --sql
+            also COUNT(DISTINCT) over the log in the LocalEngine
+  sketch  : ReachStore.estimate(), merging per (cohort, slot, day) sketches
+
+Reports latency, reach error against the exact count, and footprint.
+
+Usage (from the repository root):
+    python benchmarks/bench_reach_sketches.py
+    python benchmarks/bench_reach_sketches.py --scale 20 --days 90 --sql
+=============================================================================
+"""
+
+import argparse
+import sys
+import time
+from datetime import timedelta
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "streamlit"))
+
+from ad_tech.engine import LocalEngine  # noqa: E402
+from ad_tech.reach import ReachStore, simulate_exposures  # noqa: E402
+from ad_tech.seed import Column, load_seed_tables  # noqa: E402
+
+WINDOWS = (None, 7, 14)          # None: every day in the store
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Sketch-based reach vs raw exposure log scans")
+    parser.add_argument("--scale", type=float, default=10.0, help="multiplier on cohort sizes and impressions")
+    parser.add_argument("--days", type=int, default=28)
+    parser.add_argument("--queries", type=int, default=300)
+    parser.add_argument("--slots", type=int, default=12, help="slots per question")
+    parser.add_argument("--sql", action="store_true", help="also time COUNT(DISTINCT) in SQLite")
+    parser.add_argument("--seed", type=int, default=5)
+    args = parser.parse_args()
+    rng = np.random.default_rng(args.seed)
+
+    tables = load_seed_tables()
+    cohorts = tables["T_AUDIENCE_INSIGHTS"].records()
+    for cohort in cohorts:
+        cohort["cohort_size"] = int(cohort["cohort_size"] * args.scale)
+        cohort["total_impressions"] = int(cohort["total_impressions"] * args.scale)
+    slots = tables["T_INVENTORY_ANALYTICS"].records()
+
+    t0 = time.perf_counter()
+    log = simulate_exposures(cohorts, slots, days=args.days, seed=args.seed)
+    simulate_s = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    store = ReachStore.from_exposures(log)
+    build_s = time.perf_counter() - t0
+    store.cohort_info = {c["cohort_id"]: c for c in cohorts}
+    ages = sorted({c["age_bucket"] for c in cohorts})
+    first, last = store.days
+
+    engine = None
+    if args.sql:
+        engine = LocalEngine(tables={})
+        columns = [Column("cohort_id", "VARCHAR"), Column("slot_id", "VARCHAR"), Column("day", "INT"),
+                   Column("person_id", "INT")]
+        engine.load_table("EXPOSURE_LOG", columns, zip(
+            log.cohort_id.tolist(), log.slot_id.tolist(), log.day.tolist(), log.person_id.tolist()))
+
+    cohort_names, cohort_codes = np.unique(log.cohort_id, return_inverse=True)
+    slot_names, slot_codes = np.unique(log.slot_id, return_inverse=True)
+
+    sketch_s, raw_s, sql_s, errors = [], [], [], []
+    for _ in range(args.queries):
+        chosen = rng.choice(store.slots, size=min(args.slots, len(store.slots)), replace=False).tolist()
+        age = str(rng.choice(ages))
+        window = WINDOWS[rng.integers(len(WINDOWS))]
+        start = last - timedelta(days=window - 1) if window else None
+        cohort_ids = store.cohorts_where(age_bucket=age)
+
+        t0 = time.perf_counter()
+        estimate = store.estimate(cohort_ids, chosen, start=start)
+        sketch_s.append(time.perf_counter() - t0)
+
+        t0 = time.perf_counter()
+        mask = np.isin(cohort_names, cohort_ids)[cohort_codes] & np.isin(slot_names, chosen)[slot_codes]
+        if start is not None:
+            mask &= log.day >= start.toordinal()
+        exact = len(np.unique(log.person_id[mask]))
+        raw_s.append(time.perf_counter() - t0)
+        if exact:
+            errors.append(abs(estimate.reach - exact) / exact)
+
+        if engine is not None:
+            marks = lambda values: ", ".join("?" for _ in values)  # noqa: E731
+            t0 = time.perf_counter()
+            engine.execute(
+                f"SELECT COUNT(DISTINCT person_id) AS reach FROM EXPOSURE_LOG WHERE cohort_id IN ({marks(cohort_ids)}) "
+                f"AND slot_id IN ({marks(chosen)}) AND day >= ?",
+                [*cohort_ids, *chosen, start.toordinal() if start else first.toordinal()])
+            sql_s.append(time.perf_counter() - t0)
+
+    raw_bytes = sum(a.nbytes for a in (cohort_codes.astype(np.int32), slot_codes.astype(np.int32),
+                                       log.day.astype(np.int32), log.person_id))
+    print(f"{len(log):,} exposures, {len(np.unique(log.person_id)):,} people, {args.days} days "
+          f"(simulated in {simulate_s:.1f} s)")
+    print(f"store: {len(store.unit_day):,} (cohort, slot, day) units + {len(store.pair_cohort):,} rollups, "
+          f"{store.nbytes / 2**20:.1f} MB vs {raw_bytes / 2**20:.1f} MB raw log, built in {build_s:.1f} s\n")
+    print(f"{'path':<22} | {'p50':>10} | {'p99':>10}")
+    print("-" * 48)
+    rows = [("sketch merge", sketch_s), ("raw log (numpy)", raw_s)] + ([("raw log (SQLite)", sql_s)] if sql_s else [])
+    for name, times in rows:
+        print(f"{name:<22} | {np.percentile(times, 50) * 1e6:>8.0f}us | {np.percentile(times, 99) * 1e6:>8.0f}us")
+    errors = np.array(errors) * 100
+    print(f"\nreach error vs exact: median {np.median(errors):.2f}%, p95 {np.percentile(errors, 95):.2f}%, "
+          f"max {errors.max():.2f}% (HyperLogLog standard error {estimate.relative_error:.2%})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,223 @@
+"""
+=============================================================================
+Benchmark - Warehouse cold starts: direct queries vs query routing
+=============================================================================
+Replays --days workdays of Campaign Optimizer page views (4 dashboard
+queries each, Poisson arrivals, busy mornings/afternoons, quiet lunch and
+nights) against a simulated AD_TECH_WH on a virtual clock:
+
+  - a query on a suspended warehouse first waits --resume seconds
+  - the warehouse suspends --auto-suspend seconds after its last query
+  - credits are billed for running time (MEDIUM, 4 credits/hour, 60 s
+    minimum per resume)
+
+Queries run for real on the LocalEngine; only warehouse time is simulated.
+Scenarios, all behind the same Arrow result cache:
+
+  direct      : every cache miss goes to the warehouse (today's pages)
+  router      : cheap aggregates from the snapshot while it is suspended
+  keep-warm   : router + traffic-driven keep-warm pings
+
+Usage (from the repository root):
+    python benchmarks/bench_routing.py
+    python benchmarks/bench_routing.py --days 10 --resume 4 --cache-ttl 120
+=============================================================================
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+import pyarrow as pa
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "streamlit"))
+
+from ad_tech import snapshots  # noqa: E402
+from ad_tech.data_access import ArrowResultCache  # noqa: E402
+from ad_tech.engine import LocalEngine  # noqa: E402
+from ad_tech.metrics import LatencyHistogram, MetricsRegistry  # noqa: E402
+from ad_tech.routing import KEEPALIVE_SQL, KeepWarmScheduler, QueryRouter, WarehouseMonitor  # noqa: E402
+
+TABLE = "T_CAMPAIGN_PERFORMANCE"
+VIEW = "AD_TECH.ANALYTICS.V_CAMPAIGN_PERFORMANCE"
+PAGE_QUERIES = [
+    ("kpis", f"SELECT COUNT(DISTINCT campaign_id) AS campaigns, SUM(total_impressions) AS impressions, "
+             f"ROUND(AVG(win_rate_pct), 1) AS avg_win_rate, ROUND(AVG(roas), 2) AS avg_roas, "
+             f"SUM(total_revenue) AS total_revenue FROM {VIEW} WHERE status = 'Active'",
+     snapshots.campaign_kpis),
+    ("top_campaigns", f"SELECT campaign_name, roas, total_revenue FROM {VIEW} ORDER BY roas DESC LIMIT 10",
+     snapshots.top_campaigns),
+    ("roas_by_area", f"SELECT therapeutic_area, ROUND(AVG(roas), 2) AS avg_roas FROM {VIEW} "
+                     f"GROUP BY therapeutic_area",
+     lambda store: snapshots.roas_by(store, "THERAPEUTIC_AREA")),
+    ("roas_by_tier", f"SELECT partner_tier, ROUND(AVG(roas), 2) AS avg_roas FROM {VIEW} GROUP BY partner_tier",
+     lambda store: snapshots.roas_by(store, "PARTNER_TIER")),
+]
+# Page views per hour (UTC) on a workday
+HOURLY_VIEWS = {8: 6, 9: 14, 10: 18, 11: 14, 12: 3, 13: 10, 14: 16, 15: 16, 16: 10, 17: 4}
+QUERY_SECONDS = 0.15
+
+
+class VirtualClock:
+    """Simulated offset plus real elapsed time, so local work still counts."""
+
+    def __init__(self, start: float):
+        self.offset = start - time.perf_counter()
+
+    def __call__(self) -> float:
+        return self.offset + time.perf_counter()
+
+    def advance(self, seconds: float) -> None:
+        self.offset += seconds
+
+    def advance_to(self, ts: float) -> None:
+        self.offset += max(0.0, ts - self())
+
+
+class _Rows:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def collect(self):
+        return self.rows
+
+    def to_arrow(self):
+        return pa.Table.from_pylist(self.rows)
+
+
+class SimulatedWarehouse:
+    """LocalEngine behind a warehouse that suspends, resumes and bills."""
+
+    def __init__(self, engine: LocalEngine, clock: VirtualClock, auto_suspend: float,
+                 resume_seconds: float):
+        self.engine = engine
+        self.clock = clock
+        self.auto_suspend = auto_suspend
+        self.resume_seconds = resume_seconds
+        self.connection = object()   # looks remote to WarehouseMonitor
+        self.resumes = 0
+        self.billed_seconds = 0.0
+        self._started: float = None
+        self._last: float = None
+
+    def running(self, now: float) -> bool:
+        return self._last is not None and now - self._last < self.auto_suspend
+
+    def _close(self) -> None:
+        if self._started is not None:
+            self.billed_seconds += max(60.0, self._last + self.auto_suspend - self._started)
+            self._started = None
+
+    def sql(self, query: str, params=None):
+        now = self.clock()
+        if query.startswith("SHOW WAREHOUSES"):
+            return _Rows([{"state": "STARTED" if self.running(now) else "SUSPENDED"}])
+        if not self.running(now):
+            self._close()
+            self.resumes += 1
+            self.clock.advance(self.resume_seconds)
+            self._started = self.clock()
+        self.clock.advance(QUERY_SECONDS)
+        self._last = self.clock()
+        if query == KEEPALIVE_SQL:
+            return _Rows([{"PING": 1}])
+        return self.engine.sql(query)
+
+    def credits(self, credits_per_hour: float = 4) -> float:
+        self._close()
+        return self.billed_seconds / 3600 * credits_per_hour
+
+
+def arrivals(days: int, start: float, rng) -> list:
+    out = []
+    for day in range(days):
+        for hour, rate in HOURLY_VIEWS.items():
+            base = start + day * 86400 + hour * 3600
+            count = rng.poisson(rate)
+            out.extend(base + rng.uniform(0, 3600, count))
+    return sorted(out)
+
+
+def run(scenario: str, engine, store, views, start, args) -> dict:
+    clock = VirtualClock(start)
+    warehouse = SimulatedWarehouse(engine, clock, args.auto_suspend, args.resume)
+    metrics = MetricsRegistry()
+    router = QueryRouter(
+        warehouse, store if scenario != "direct" else None,
+        monitor=WarehouseMonitor(warehouse, auto_suspend=args.auto_suspend, clock=clock),
+        cache=ArrowResultCache(ttl=args.cache_ttl, clock=clock),
+        metrics=metrics, max_staleness=float("inf"), clock=clock,
+    )
+    keep_warm = KeepWarmScheduler(router, args.min_requests) if scenario == "keep-warm" else None
+    # Keep-warm learns from --train-weeks of earlier traffic first
+    if keep_warm is not None:
+        for k in range(args.train_weeks, 0, -1):
+            for ts in views:
+                router.traffic.record(ts - k * 7 * 86400)
+
+    page = LatencyHistogram()
+    next_tick = start
+    for ts in views:
+        if keep_warm is not None:
+            while next_tick <= ts:
+                clock.advance_to(next_tick)
+                keep_warm.tick()
+                next_tick += keep_warm.interval
+        clock.advance_to(ts)
+        t0 = clock()
+        for name, sql, snapshot in PAGE_QUERIES:
+            router.fetch(name, sql, table=TABLE, snapshot=snapshot)
+        page.record(clock() - t0)
+
+    counters = metrics.snapshot()["counters"]
+    totals = metrics.snapshot()["totals"]
+    return {
+        "resumes": warehouse.resumes,
+        "credits": warehouse.credits(),
+        "p50": page.percentile(50),
+        "p99": page.percentile(99),
+        "slow": sum(c for b, c in page.buckets() if b >= args.resume * 1e3 * 0.9),
+        "routes": {r: counters.get(f"router.route.{r}", 0) for r in ("cache", "snapshot", "warehouse")},
+        "saved": totals.get("router.saved_seconds", 0.0),
+        "pings": counters.get("keepwarm.pings", 0),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Direct vs routed dashboard queries on a cold warehouse")
+    parser.add_argument("--days", type=int, default=5)
+    parser.add_argument("--resume", type=float, default=2.5, help="warehouse resume seconds")
+    parser.add_argument("--auto-suspend", type=float, default=60)
+    parser.add_argument("--cache-ttl", type=float, default=600)
+    parser.add_argument("--min-requests", type=float, default=2.0, help="keep-warm slot threshold")
+    parser.add_argument("--train-weeks", type=int, default=2, help="weeks of history for keep-warm")
+    parser.add_argument("--seed", type=int, default=11)
+    args = parser.parse_args()
+
+    engine = LocalEngine()
+    root = Path(tempfile.mkdtemp(prefix="bench_routing_"))
+    snapshots.export_snapshot(engine, TABLE, root)
+    store = snapshots.SnapshotStore(root)
+
+    start = datetime(2026, 10, 19, tzinfo=timezone.utc).timestamp()   # a Monday
+    views = arrivals(args.days, start, np.random.default_rng(args.seed))
+    print(f"{len(views):,} page views over {args.days} workdays, resume {args.resume:.1f}s, "
+          f"auto-suspend {args.auto_suspend:.0f}s, cache TTL {args.cache_ttl:.0f}s\n")
+
+    print(f"{'scenario':<10} | {'resumes':>7} | {'slow views':>10} | {'p50':>7} {'p99':>8} | "
+          f"{'credits':>7} | cache/snapshot/warehouse | saved")
+    print("-" * 96)
+    for scenario in ("direct", "router", "keep-warm"):
+        r = run(scenario, engine, store, views, start, args)
+        routes = "/".join(str(r["routes"][k]) for k in ("cache", "snapshot", "warehouse"))
+        extra = f"  ({r['pings']} pings)" if scenario == "keep-warm" else ""
+        print(f"{scenario:<10} | {r['resumes']:>7} | {r['slow']:>10} | {r['p50'] * 1e3:>5.0f}ms "
+              f"{r['p99'] * 1e3:>6.0f}ms | {r['credits']:>7.2f} | {routes:>24} | {r['saved']:>5.0f}s{extra}")
+
+
+if __name__ == "__main__":
+    main()
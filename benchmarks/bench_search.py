@@ -0,0 +1,120 @@
+"""
+=============================================================================
+Benchmark - Inventory search: retrieval and re-ranking latency
+=============================================================================
+Builds --slots synthetic inventory slots (seed rows with fresh ids and
+jittered CPM / engagement / fill rate) and times:
+
+  retrieve : local BM25 top --candidates for a set of queries
+  re-rank  : --candidates rows through the cached feature matrix
+             (target: 1,000 candidates in under 5 ms)
+  per-slot : the same blend computed per candidate from the row dicts,
+             i.e. re-ranking without cached feature vectors
+
+Usage (from the repository root):
+    python benchmarks/bench_search.py
+    python benchmarks/bench_search.py --slots 200000 --candidates 1000
+=============================================================================
+"""
+
+import argparse
+import math
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "streamlit"))
+
+from ad_tech.metrics import LatencyHistogram  # noqa: E402
+from ad_tech.search import InventorySearch, RerankWeights, rerank  # noqa: E402
+from ad_tech.seed import load_seed_tables  # noqa: E402
+
+QUERIES = [
+    "cardiology waiting room display",
+    "premium oncology exam room tablet",
+    "primary care check-in kiosk morning",
+    "midwest hospital digital display",
+    "neurology afternoon tv screen",
+]
+
+
+def synthetic_slots(count: int, seed: int):
+    table = load_seed_tables()["T_INVENTORY_ANALYTICS"]
+    base = [dict(zip(table.column_names, row)) for row in table.rows]
+    rng = np.random.default_rng(seed)
+    jitter = rng.uniform(0.6, 1.4, size=(count, 3))
+    slots = []
+    for i in range(count):
+        slot = dict(base[i % len(base)])
+        slot["slot_id"] = f"SLOT-{i:08d}"
+        slot["base_cpm"] = round(float(slot["base_cpm"]) * jitter[i, 0], 2)
+        slot["engagement_rate_pct"] = round(float(slot["engagement_rate_pct"]) * jitter[i, 1], 3)
+        slot["fill_rate_pct"] = min(100.0, round(float(slot["fill_rate_pct"]) * jitter[i, 2], 1))
+        slots.append(slot)
+    return slots
+
+
+def per_slot_rerank(slots, candidates, relevance, k, weights):
+    """Reference implementation: features recomputed from each row dict."""
+    cpms = [max(float(s["base_cpm"]), 0.01) for s in slots]
+    values = [math.log1p(float(s["engagement_rate_pct"]) / c * 100) for s, c in zip(slots, cpms)]
+    reaches = [math.log1p(float(s["estimated_daily_impressions"])) for s in slots]
+    lo_v, hi_v, lo_r, hi_r = min(values), max(values), min(reaches), max(reaches)
+    top = max(relevance)
+    scored = []
+    for row, rel in zip(candidates, relevance):
+        slot = slots[row]
+        score = (weights.relevance * rel / top
+                 + weights.value * (values[row] - lo_v) / (hi_v - lo_v)
+                 + weights.availability * (1 - float(slot["fill_rate_pct"]) / 100)
+                 + weights.reach * (reaches[row] - lo_r) / (hi_r - lo_r)
+                 + weights.premium * (1.0 if slot["is_premium"] else 0.0))
+        scored.append((score, row))
+    return sorted(scored, reverse=True)[:k]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Inventory retrieval and re-rank latency")
+    parser.add_argument("--slots", type=int, default=100_000)
+    parser.add_argument("--candidates", type=int, default=1000)
+    parser.add_argument("--k", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=3)
+    args = parser.parse_args()
+
+    slots = synthetic_slots(args.slots, args.seed)
+    t0 = time.perf_counter()
+    search = InventorySearch(slots)
+    print(f"{args.slots:,} slots, index + feature matrix built in {(time.perf_counter() - t0) * 1e3:.0f} ms\n")
+
+    weights = RerankWeights()
+    rng = np.random.default_rng(args.seed)
+    retrieve, cached, uncached = LatencyHistogram(), LatencyHistogram(), LatencyHistogram()
+    for i in range(args.repeat):
+        t0 = time.perf_counter()
+        search.index.top(QUERIES[i % len(QUERIES)], args.candidates)
+        retrieve.record(time.perf_counter() - t0)
+
+        rows = rng.choice(args.slots, args.candidates, replace=False)
+        relevance = np.sort(rng.uniform(0.1, 12.0, args.candidates))[::-1].astype(np.float32)
+        t0 = time.perf_counter()
+        rerank(search.features, rows, relevance, args.k, weights)
+        cached.record(time.perf_counter() - t0)
+
+        if i < 5:
+            t0 = time.perf_counter()
+            per_slot_rerank(slots, rows.tolist(), relevance.tolist(), args.k, weights)
+            uncached.record(time.perf_counter() - t0)
+
+    print(f"{'stage':<32} | {'p50':>9} | {'p99':>9}")
+    print("-" * 56)
+    for name, hist in ((f"retrieve top {args.candidates} (BM25)", retrieve),
+                       (f"re-rank {args.candidates} (cached features)", cached),
+                       (f"re-rank {args.candidates} (per-slot)", uncached)):
+        print(f"{name:<32} | {hist.percentile(50) * 1e3:>7.3f}ms | {hist.percentile(99) * 1e3:>7.3f}ms")
+
+
+if __name__ == "__main__":
+    main()
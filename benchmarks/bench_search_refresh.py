@@ -0,0 +1,137 @@
+"""
+=============================================================================
+Benchmark - Search index freshness vs refresh cost
+=============================================================================
+Loads --slots inventory slots into a LocalEngine and replays --hours of
+inventory changes (--changes-per-minute CPM / fill-rate updates, plus a
+few new and retired slots). Three ways of keeping the search index
+current are compared:
+
+  full / 1 hour   : rebuild from the whole table every hour (what
+                    TARGET_LAG = '1 hour' over a full SELECT amounts to)
+  full / 1 minute : the same rebuild, every minute
+  incremental     : SearchIndexRefresher every minute, applying only the
+                    rows the LocalTableStream logged
+
+Freshness lag is the time from a change to the refresh that indexes it.
+Cost is rows indexed and CPU time per hour. Rebuild time is measured on
+--rebuilds real rebuilds and scaled to the schedule. Every incremental
+refresh runs for real, and the final index is checked against a fresh build.
+
+Usage (from the repository root):
+    python benchmarks/bench_search_refresh.py
+    python benchmarks/bench_search_refresh.py --slots 100000 --changes-per-minute 100
+=============================================================================
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "streamlit"))
+
+from ad_tech.engine import LocalEngine  # noqa: E402
+from ad_tech.metrics import MetricsRegistry  # noqa: E402
+from ad_tech.search import InventorySearch, load_slots  # noqa: E402
+from ad_tech.search_refresh import SearchIndexRefresher, change_source  # noqa: E402
+from ad_tech.seed import load_seed_tables  # noqa: E402
+
+TABLE = "T_INVENTORY_ANALYTICS"
+QUERIES = ["cardiology waiting room display", "premium oncology exam room", "midwest hospital tablet"]
+
+
+def scaled_engine(slots: int) -> LocalEngine:
+    seed = load_seed_tables()[TABLE]
+    engine = LocalEngine(tables={})
+    rows = ([f"{row[0]}-{k}", *row[1:]] for k in range(slots // len(seed.rows) + 1) for row in seed.rows)
+    engine.load_table(TABLE, seed.columns, (row for _, row in zip(range(slots), rows)))
+    return engine
+
+
+def apply_changes(engine: LocalEngine, columns, rng, count: int, next_id: list) -> None:
+    """``count`` changes: 90% price / fill updates, 5% new slots, 5% retired."""
+    ids = [r["slot_id"] for r in engine.execute(f"SELECT slot_id FROM {TABLE} ORDER BY RANDOM() LIMIT ?",
+                                                [count])]
+    for slot_id in ids:
+        roll = rng.random()
+        if roll < 0.90:
+            engine.execute(f"UPDATE {TABLE} SET base_cpm = ROUND(base_cpm * ?, 2), fill_rate_pct = ? "
+                           f"WHERE slot_id = ?", [float(rng.uniform(0.8, 1.2)), float(rng.uniform(40, 99)), slot_id])
+        elif roll < 0.95:
+            next_id[0] += 1
+            engine.execute(f"INSERT INTO {TABLE} SELECT 'NEW-{next_id[0]}', slot_name || ' annex', "
+                           f"{', '.join(c.name for c in columns[2:])} FROM {TABLE} WHERE slot_id = ?",
+                           [slot_id])
+        else:
+            engine.execute(f"DELETE FROM {TABLE} WHERE slot_id = ?", [slot_id])
+
+
+def lags(change_times: np.ndarray, interval: float, duration: float) -> np.ndarray:
+    """Seconds from each change to the end of the first refresh after it."""
+    return np.ceil(change_times / interval) * interval - change_times + duration
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Search index freshness vs refresh cost")
+    parser.add_argument("--slots", type=int, default=50_000)
+    parser.add_argument("--hours", type=float, default=1.0)
+    parser.add_argument("--changes-per-minute", type=int, default=20)
+    parser.add_argument("--rebuilds", type=int, default=3, help="full rebuilds to time")
+    parser.add_argument("--seed", type=int, default=11)
+    args = parser.parse_args()
+    rng = np.random.default_rng(args.seed)
+
+    engine = scaled_engine(args.slots)
+    columns = load_seed_tables()[TABLE].columns
+    source = change_source(engine)
+    search = InventorySearch.from_engine(engine)
+    metrics = MetricsRegistry()
+    refresher = SearchIndexRefresher(search, engine, source, metrics=metrics)
+
+    rebuild = []
+    for _ in range(args.rebuilds):
+        t0 = time.perf_counter()
+        InventorySearch.from_engine(engine)
+        rebuild.append(time.perf_counter() - t0)
+    rebuild_s = float(np.median(rebuild))
+
+    minutes = int(args.hours * 60)
+    next_id = [0]
+    incremental, change_times = [], []
+    for minute in range(minutes):
+        apply_changes(engine, columns, rng, args.changes_per_minute, next_id)
+        change_times.extend(minute * 60 + np.sort(rng.uniform(0, 60, args.changes_per_minute)))
+        t0 = time.perf_counter()
+        refresher.refresh()
+        incremental.append(time.perf_counter() - t0)
+    change_times = np.array(change_times)
+    incremental_s = float(np.mean(incremental))
+
+    fresh = InventorySearch(load_slots(engine))
+    for query in QUERIES:
+        a = [(s["slot_id"], s["score"]) for s in search.search(query, k=20).slots]
+        b = [(s["slot_id"], s["score"]) for s in fresh.search(query, k=20).slots]
+        assert sorted(a) == sorted(b), f"incremental index diverged on {query!r}"
+
+    rows = len(search.features.row)
+    per_hour = 1 / args.hours
+    policies = [
+        ("full / 1 hour", lags(change_times, 3600, rebuild_s), rows, rebuild_s),
+        ("full / 1 minute", lags(change_times, 60, rebuild_s), rows * 60, rebuild_s * 60),
+        ("incremental / 1 minute", lags(change_times, 60, incremental_s),
+         metrics.get("search.refresh.rows") * per_hour, sum(incremental) * per_hour),
+    ]
+    print(f"{rows:,} slots, {args.changes_per_minute} changes/minute for {args.hours:g} h "
+          f"(full rebuild {rebuild_s * 1e3:.0f} ms, incremental refresh {incremental_s * 1e3:.1f} ms)\n")
+    print(f"{'policy':<24} | {'lag p50':>8} | {'lag p99':>8} | {'rows indexed/h':>14} | {'CPU/h':>8}")
+    print("-" * 76)
+    for name, lag, indexed, cpu in policies:
+        print(f"{name:<24} | {np.percentile(lag, 50):>7.0f}s | {np.percentile(lag, 99):>7.0f}s | "
+              f"{indexed:>14,.0f} | {cpu:>7.2f}s")
+
+
+if __name__ == "__main__":
+    main()
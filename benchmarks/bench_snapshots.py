@@ -0,0 +1,142 @@
+"""
+=============================================================================
+Benchmark - Dashboard reads: engine queries vs memory-mapped snapshots
+=============================================================================
+Builds a synthetic T_CAMPAIGN_PERFORMANCE of --rows rows in the local
+engine, exports it as a partitioned snapshot and compares:
+
+  kpis / by tier : the Campaign Optimizer aggregates as SQL on the engine
+                   vs the same numbers from the snapshot
+  filtered scan  : one therapeutic area, high-ROAS rows, 3 columns; with
+                   partition + min/max pruning vs reading every file
+  refresh        : full export vs merging a CHANGES result for --changed
+                   updated rows into the affected partition files
+
+The engine run excludes any warehouse resume; against Snowflake a cold
+AD_TECH_WH adds seconds that the snapshot path never pays.
+
+Usage (from the repository root):
+    python benchmarks/bench_snapshots.py
+    python benchmarks/bench_snapshots.py --rows 1000000 --format parquet
+=============================================================================
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "streamlit"))
+
+from ad_tech import snapshots  # noqa: E402
+from ad_tech.engine import LocalEngine  # noqa: E402
+from ad_tech.seed import load_seed_tables  # noqa: E402
+
+KPI_QUERY = """
+SELECT COUNT(DISTINCT campaign_id) AS campaigns, SUM(total_impressions) AS impressions,
+       ROUND(AVG(win_rate_pct), 1) AS avg_win_rate, ROUND(AVG(roas), 2) AS avg_roas,
+       SUM(total_revenue) AS total_revenue
+FROM AD_TECH.ANALYTICS.T_CAMPAIGN_PERFORMANCE WHERE status = 'Active'
+"""
+TIER_QUERY = """
+SELECT partner_tier, COUNT(DISTINCT campaign_id) AS campaigns, ROUND(AVG(roas), 2) AS avg_roas,
+       SUM(total_revenue) AS revenue
+FROM AD_TECH.ANALYTICS.T_CAMPAIGN_PERFORMANCE GROUP BY partner_tier ORDER BY avg_roas DESC
+"""
+
+
+def timed(fn, repeat=5):
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - t0)
+    return best, result
+
+
+def synthetic_engine(rows: int, seed: int) -> LocalEngine:
+    """Seed campaign rows repeated with fresh ids and jittered metrics."""
+    seed_table = load_seed_tables()["T_CAMPAIGN_PERFORMANCE"]
+    rng = np.random.default_rng(seed)
+    names = seed_table.column_names
+    roas_at = names.index("roas")
+    base = seed_table.rows
+
+    def generate():
+        for i in range(rows):
+            row = list(base[i % len(base)])
+            row[0] = f"CAMP-{i:08d}"
+            row[roas_at] = round(float(row[roas_at]) * rng.uniform(0.7, 1.3), 2)
+            yield row
+
+    engine = LocalEngine(tables={})
+    engine.load_table("T_CAMPAIGN_PERFORMANCE", seed_table.columns, generate())
+    return engine
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Engine queries vs columnar snapshots")
+    parser.add_argument("--rows", type=int, default=500_000)
+    parser.add_argument("--changed", type=int, default=100)
+    parser.add_argument("--format", choices=["ipc", "parquet"], default="ipc")
+    parser.add_argument("--seed", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"Building {args.rows:,} campaign rows...")
+    engine = synthetic_engine(args.rows, args.seed)
+    root = Path(tempfile.mkdtemp(prefix="bench_snapshots_"))
+    table = "T_CAMPAIGN_PERFORMANCE"
+
+    export_s, manifest = timed(lambda: snapshots.export_snapshot(engine, table, root, args.format), repeat=1)
+    store = snapshots.SnapshotStore(root)
+    size = sum(p.stat().st_size for p in (root / table).iterdir())
+    print(f"Snapshot: {len(manifest['partitions'])} partitions, {size / 2**20:.1f} MB ({args.format})\n")
+
+    print(f"{'read':<16} | {'engine SQL':>10} | {'snapshot':>9} | speedup")
+    print("-" * 52)
+    for name, sql, snap in (
+        ("kpis", KPI_QUERY, lambda: snapshots.campaign_kpis(store)),
+        ("by tier", TIER_QUERY, lambda: snapshots.roas_by(store, "PARTNER_TIER")),
+    ):
+        engine_s, _ = timed(lambda: engine.execute(sql), repeat=3)
+        snap_s, _ = timed(snap)
+        print(f"{name:<16} | {engine_s * 1e3:>8.1f}ms | {snap_s * 1e3:>7.2f}ms | {engine_s / snap_s:>6.0f}x")
+
+    columns = ["CAMPAIGN_ID", "ROAS", "TOTAL_REVENUE"]
+    filters = [("THERAPEUTIC_AREA", "=", "Diabetes"), ("ROAS", ">=", 4.0)]
+    pruned_s, rows = timed(lambda: store.scan(table, columns, filters))
+    full_s, _ = timed(lambda: store.scan(table, None).filter(
+        snapshots._mask(store.scan(table, None), filters)).select(columns))
+    print(f"{'filtered scan':<16} | {full_s * 1e3:>8.1f}ms | {pruned_s * 1e3:>7.2f}ms | "
+          f"{full_s / pruned_s:>6.0f}x  ({rows.num_rows:,} rows, all files vs pruned)")
+
+    # A CHANGES result for --changed updated rows: DELETE + INSERT per row
+    ids = [f"CAMP-{i:08d}" for i in range(0, args.rows, max(1, args.rows // args.changed))][: args.changed]
+    updated = store.scan(table, None, [("CAMPAIGN_ID", "in", ids)])
+    updated = updated.set_column(
+        updated.column_names.index("ROAS"), "ROAS", pc.add(updated["ROAS"], 0.5)
+    )
+    old = store.scan(table, None, [("CAMPAIGN_ID", "in", ids)])
+    changes = pa.concat_tables([
+        old.append_column("METADATA$ACTION", pa.array(["DELETE"] * old.num_rows)),
+        updated.append_column("METADATA$ACTION", pa.array(["INSERT"] * updated.num_rows)),
+    ])
+
+    def apply_delta():
+        manifest = store.manifest(table)
+        snapshots._apply_changes(store, manifest, changes)
+        snapshots._save_manifest(root / table, manifest)
+
+    delta_s, _ = timed(apply_delta, repeat=1)
+    print(f"\nRefresh after {len(ids)} updated rows: full export {export_s * 1e3:.0f} ms, "
+          f"delta merge {delta_s * 1e3:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+=============================================================================
+Benchmark - Streamlit cold start and per-page first render
+=============================================================================
+Measures, each in a fresh interpreter so nothing is warm:
+
+  imports      : import time of the heavy modules a page may pull in
+  first render : AppTest run of each page right after process start
+  rerun        : a second run of the same page in that process
+
+Pass --baseline-ref to run the same measurements against the app as it was
+at another git revision (extracted with `git archive`) and print both.
+
+Usage (from the repository root):
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py --baseline-ref <commit> --repeat 5
+=============================================================================
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import tarfile
+import tempfile
+from io import BytesIO
+from pathlib import Path
+
+REPO = Path(__file__).resolve().parents[1]
+PAGES = ["Home.py", "pages/1_Campaign_Optimizer.py", "pages/2_Inventory_Explorer.py", "pages/3_Agent_Chat.py"]
+IMPORTS = ["json", "pandas", "snowflake.snowpark", "ad_tech.runtime", "ad_tech.content"]
+
+_RENDER_SNIPPET = """
+import json, sys, time
+sys.path.insert(0, {app!r})
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file({page!r}, default_timeout=120)
+t0 = time.perf_counter(); at.run(); t1 = time.perf_counter(); at.run(); t2 = time.perf_counter()
+print(json.dumps({{"first": t1 - t0, "rerun": t2 - t1,
+                  "errors": [str(e.value) for e in at.exception],
+                  "pandas": "pandas" in sys.modules, "snowpark": "snowflake.snowpark" in sys.modules}}))
+"""
+
+_IMPORT_SNIPPET = """
+import sys, time
+sys.path.insert(0, {app!r})
+t0 = time.perf_counter()
+try:
+    __import__({module!r})
+    print(time.perf_counter() - t0)
+except ImportError:
+    print(-1)
+"""
+
+
+def run_python(code):
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    return out.stdout.strip().splitlines()[-1]
+
+
+def measure_imports(app, repeat):
+    results = {}
+    for module in IMPORTS:
+        times = [float(run_python(_IMPORT_SNIPPET.format(app=str(app), module=module))) for _ in range(repeat)]
+        results[module] = None if min(times) < 0 else statistics.median(times)
+    return results
+
+
+def measure_pages(app, repeat):
+    results = {}
+    for page in PAGES:
+        runs = [json.loads(run_python(_RENDER_SNIPPET.format(app=str(app), page=str(app / page))))
+                for _ in range(repeat)]
+        results[page] = {
+            "first": statistics.median(r["first"] for r in runs),
+            "rerun": statistics.median(r["rerun"] for r in runs),
+            "pandas": runs[0]["pandas"],
+            "errors": runs[0]["errors"],
+        }
+    return results
+
+
+def extract_app(ref, dest):
+    archive = subprocess.run(["git", "-C", str(REPO), "archive", ref, "streamlit", "setup"],
+                             capture_output=True, check=True).stdout
+    with tarfile.open(fileobj=BytesIO(archive)) as tar:
+        tar.extractall(dest)
+    return Path(dest) / "streamlit"
+
+
+def report(label, imports, pages):
+    print(f"\n== {label} ==")
+    for module, seconds in imports.items():
+        shown = "not installed" if seconds is None else f"{seconds * 1e3:8.1f} ms"
+        print(f"  import {module:<22} {shown}")
+    for page, r in pages.items():
+        errors = f"  errors: {r['errors']}" if r["errors"] else ""
+        print(f"  {page:<32} first {r['first'] * 1e3:8.1f} ms   rerun {r['rerun'] * 1e3:7.1f} ms"
+              f"   pandas loaded: {r['pandas']}{errors}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Streamlit cold start benchmark")
+    parser.add_argument("--baseline-ref", help="git revision to compare against")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    current = REPO / "streamlit"
+    cur_imports, cur_pages = measure_imports(current, args.repeat), measure_pages(current, args.repeat)
+
+    if args.baseline_ref:
+        with tempfile.TemporaryDirectory() as tmp:
+            base = extract_app(args.baseline_ref, tmp)
+            base_imports, base_pages = measure_imports(base, args.repeat), measure_pages(base, args.repeat)
+        report(f"baseline ({args.baseline_ref})", base_imports, base_pages)
+    report("current", cur_imports, cur_pages)
+
+    if args.baseline_ref:
+        print("\n== first render change ==")
+        for page in PAGES:
+            before, after = base_pages[page]["first"], cur_pages[page]["first"]
+            print(f"  {page:<32} {before * 1e3:8.1f} -> {after * 1e3:8.1f} ms ({(after - before) / before:+.0%})")
+
+
+if __name__ == "__main__":
+    main()
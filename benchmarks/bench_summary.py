@@ -0,0 +1,116 @@
+"""
+=============================================================================
+Benchmark - Headline metrics: per-page queries vs the shared summary service
+=============================================================================
+Scales the three T_* tables by --factor and replays --views page views
+(Home, Campaign Optimizer, Inventory Explorer in turn) from --workers
+concurrent sessions:
+
+  per-page : each view runs the headline queries its page needs
+             (Home: all three tables, Optimizer: campaigns,
+             Explorer: inventory) - what wiring them up naively costs
+  service  : each view reads SummaryService.get(); the numbers are
+             computed once and refreshed in the background
+
+Usage (from the repository root):
+    python benchmarks/bench_summary.py
+    python benchmarks/bench_summary.py --factor 5000 --views 600 --workers 16
+=============================================================================
+"""
+
+import argparse
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "streamlit"))
+
+from ad_tech.data_access import fetch_arrow  # noqa: E402
+from ad_tech.engine import LocalEngine  # noqa: E402
+from ad_tech.metrics import LatencyHistogram  # noqa: E402
+from ad_tech.seed import load_seed_tables  # noqa: E402
+from ad_tech.summary import SUMMARY_SQL, SUMMARY_TABLES, SummaryService  # noqa: E402
+
+CAMPAIGNS = """
+SELECT COUNT(DISTINCT CASE WHEN status = 'Active' THEN campaign_id END) AS active_campaigns,
+       COUNT(DISTINCT partner_id) AS partners,
+       ROUND(AVG(CASE WHEN status = 'Active' THEN win_rate_pct END), 1) AS avg_win_rate,
+       ROUND(AVG(CASE WHEN status = 'Active' THEN roas END), 2) AS avg_roas
+FROM AD_TECH.ANALYTICS.T_CAMPAIGN_PERFORMANCE
+"""
+INVENTORY = """
+SELECT COUNT(DISTINCT slot_id) AS slots, COUNT(DISTINCT facility_name) AS facilities,
+       ROUND(AVG(base_cpm), 2) AS avg_cpm, SUM(estimated_daily_impressions) AS daily_impressions
+FROM AD_TECH.ANALYTICS.T_INVENTORY_ANALYTICS
+"""
+AUDIENCE = """
+SELECT COUNT(DISTINCT cohort_id) AS cohorts, SUM(cohort_size) AS audience_members
+FROM AD_TECH.ANALYTICS.T_AUDIENCE_INSIGHTS
+"""
+PAGES = {
+    "home": [CAMPAIGNS, INVENTORY, AUDIENCE],
+    "optimizer": [CAMPAIGNS],
+    "explorer": [INVENTORY],
+}
+
+
+def scaled_engine(factor: int) -> LocalEngine:
+    """Every seed row repeated ``factor`` times with a unique id."""
+    seed = load_seed_tables()
+    engine = LocalEngine(tables={})
+    for name in SUMMARY_TABLES:
+        table = seed[name]
+        rows = ([f"{row[0]}-{k}", *row[1:]] for k in range(factor) for row in table.rows)
+        engine.load_table(name, table.columns, rows)
+    return engine
+
+
+def replay(view, views: int, workers: int):
+    pages = list(PAGES)
+    latency = LatencyHistogram()
+
+    def one(i):
+        t0 = time.perf_counter()
+        view(pages[i % len(pages)])
+        latency.record(time.perf_counter() - t0)
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(workers) as pool:
+        list(pool.map(one, range(views)))
+    return time.perf_counter() - t0, latency
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Per-page headline queries vs shared summary service")
+    parser.add_argument("--factor", type=int, default=1000, help="copies of each seed row")
+    parser.add_argument("--views", type=int, default=300)
+    parser.add_argument("--workers", type=int, default=8)
+    args = parser.parse_args()
+
+    engine = scaled_engine(args.factor)
+    scans = {"per-page": 0, "service": 0}
+
+    def per_page(page):
+        for sql in PAGES[page]:
+            fetch_arrow(engine, sql)
+            scans["per-page"] += 1
+
+    def load():
+        scans["service"] += len(SUMMARY_TABLES)
+        return fetch_arrow(engine, SUMMARY_SQL), None
+
+    service = SummaryService(load)
+
+    print(f"{args.views} page views, {args.workers} concurrent sessions, "
+          f"{args.factor * 30:,} inventory / {args.factor * 20:,} cohort rows\n")
+    print(f"{'headline metrics':<16} | {'total':>8} | {'p50':>8} {'p99':>8} | table scans")
+    print("-" * 60)
+    for name, view in (("per-page", per_page), ("service", lambda page: service.get())):
+        total, latency = replay(view, args.views, args.workers)
+        print(f"{name:<16} | {total * 1e3:>6.0f}ms | {latency.percentile(50) * 1e3:>6.2f}ms "
+              f"{latency.percentile(99) * 1e3:>6.1f}ms | {scans[name]:>5}")
+
+
+if __name__ == "__main__":
+    main()
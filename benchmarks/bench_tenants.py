@@ -0,0 +1,226 @@
+"""
+=============================================================================
+Benchmark - Partner dashboards: row policy vs partner-scoped tables
+=============================================================================
+Builds --tenants synthetic partners with --campaigns campaigns each, active
+over the last --days days, on the LocalEngine. Then --tenants threads each
+load their partner dashboard --views times (KPIs, campaign table and a daily
+trend over one of five windows) three ways:
+
+  policy     : the shared T_CAMPAIGN_DAILY / T_CAMPAIGN_PERFORMANCE, filtered
+               per row by a row-access-policy style lookup of the user's
+               partner (every scan reads every partner's rows)
+  partition  : the partner-scoped tables (ad_tech/partners.py), primary
+               key led by partner_id, so a query reads only its partner's rows
+  + cache    : PartnerScope, i.e. partition through the result cache in the
+               partner's tenant namespace
+
+Reports page-view throughput and latency, and per-tenant cache hit rates
+and latency (spread across tenants). Every partition result is checked
+against the policy path and for rows of other partners. A last run adds
+one noisy tenant that loads hundreds of distinct windows through a cache
+sized to the others' working set, with and without a per-tenant byte
+budget.
+
+Usage (from the repository root):
+    python benchmarks/bench_tenants.py
+    python benchmarks/bench_tenants.py --tenants 100 --campaigns 40 --views 50
+=============================================================================
+"""
+
+import argparse
+import sys
+import threading
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "streamlit"))
+
+from ad_tech.data_access import ArrowResultCache, fetch_arrow  # noqa: E402
+from ad_tech.engine import LocalEngine  # noqa: E402
+from ad_tech.metrics import LatencyHistogram  # noqa: E402
+from ad_tech.partners import (  # noqa: E402
+    CAMPAIGNS_QUERY, DAILY_QUERY, KPI_QUERY, PartnerScope, load_local_partner_tables,
+)
+from ad_tech.seed import Column, load_seed_schema  # noqa: E402
+from ad_tech.trends import DAILY_COLUMNS  # noqa: E402
+
+USERS_DDL = "CREATE TABLE T_PARTNER_USERS (user_name TEXT, partner_id INTEGER)"
+POLICY = "partner_id IN (SELECT partner_id FROM T_PARTNER_USERS WHERE user_name = ?)"
+POLICY_QUERIES = {
+    "kpis": KPI_QUERY.replace("T_PARTNER_CAMPAIGNS", "T_CAMPAIGN_PERFORMANCE").replace("partner_id = ?", POLICY),
+    "campaigns": CAMPAIGNS_QUERY.replace("T_PARTNER_CAMPAIGNS", "T_CAMPAIGN_PERFORMANCE")
+                                .replace("partner_id = ?", POLICY),
+    "daily": DAILY_QUERY.replace("T_PARTNER_DAILY", "T_CAMPAIGN_DAILY").replace("partner_id = ?", POLICY),
+}
+WINDOWS = (7, 30, 90, 180, 365)
+
+
+def build_engine(tenants: int, campaigns: int, days: int, rng: np.random.Generator) -> LocalEngine:
+    """Shared tables (date-ordered, like T_CAMPAIGN_DAILY's clustering) plus the partner-scoped ones."""
+    engine = LocalEngine(tables={})
+    columns = load_seed_schema()["T_CAMPAIGN_PERFORMANCE"]
+    today = date.today()
+    campaign_rows, ids = [], []
+    for partner in range(1, tenants + 1):
+        for k in range(campaigns):
+            spend = float(rng.uniform(1e5, 2e6))
+            bids = int(rng.integers(10_000, 60_000))
+            record = {c.name: None for c in columns}
+            record.update(
+                campaign_id=f"CAMP-{partner:03d}-{k:03d}", campaign_name=f"P{partner:03d} campaign {k}",
+                drug_name=f"Drug {k % 7}", therapeutic_area=f"Area {k % 5}", campaign_type="Awareness",
+                status="Active" if k % 3 else "Completed", start_date=today - timedelta(days=days - 1),
+                end_date=today + timedelta(days=30), budget=spend * 1.2, partner_id=partner,
+                partner_name=f"Partner {partner:03d}", partner_tier="Gold", total_bids=bids,
+                winning_bids=int(bids * rng.uniform(0.5, 0.9)), total_impressions=bids * 10,
+                total_engagements=bids // 3, total_conversions=bids // 30, total_revenue=spend * rng.uniform(1, 5),
+                total_spend=spend,
+            )
+            record["roas"] = record["total_revenue"] / spend
+            campaign_rows.append(tuple(record[c.name] for c in columns))
+            ids.append((record["campaign_id"], partner))
+    engine.load_table("T_CAMPAIGN_PERFORMANCE", columns, campaign_rows)
+
+    daily = []
+    for day in range(days):
+        day_value = (today - timedelta(days=days - 1 - day)).isoformat()
+        impressions = rng.integers(500, 5_000, size=len(ids))
+        for (campaign_id, partner), n in zip(ids, impressions.tolist()):
+            daily.append((day_value, campaign_id, "SLOT-0001", "Area", partner, f"Partner {partner:03d}", "Gold",
+                          n // 5, n // 7, n, n // 30, n // 300, n * 0.4, n * 0.1))
+    engine.load_table("T_CAMPAIGN_DAILY", [Column(n, t) for n, t in DAILY_COLUMNS], daily)
+    engine.executescript("CREATE INDEX IX_DAILY_DATE ON T_CAMPAIGN_DAILY (date_day, campaign_id);")
+    engine.execute(USERS_DDL)
+    for partner in range(1, tenants + 1):
+        engine.execute("INSERT INTO T_PARTNER_USERS VALUES (?, ?)", [f"user{partner}", partner])
+    load_local_partner_tables(engine)
+    return engine
+
+
+def dashboard(engine, mode: str, partner: int, window: int, scope: PartnerScope):
+    """One page view: (kpis, campaigns, daily) tables."""
+    today = date.today()
+    start, end = (today - timedelta(days=window - 1)).isoformat(), today.isoformat()
+    if mode == "policy":
+        user = f"user{partner}"
+        return (fetch_arrow(engine, POLICY_QUERIES["kpis"], [user]),
+                fetch_arrow(engine, POLICY_QUERIES["campaigns"], [user]),
+                fetch_arrow(engine, POLICY_QUERIES["daily"], [user, start, end]))
+    if mode == "partition":
+        return (fetch_arrow(engine, KPI_QUERY, [partner]),
+                fetch_arrow(engine, CAMPAIGNS_QUERY, [partner]),
+                fetch_arrow(engine, DAILY_QUERY, [partner, start, end]))
+    return (scope._query(KPI_QUERY), scope.campaigns(),
+            scope.daily(today - timedelta(days=window - 1), today))
+
+
+def run(engine, mode: str, tenants: int, views: int, seed: int, cache: ArrowResultCache = None,
+        noisy: bool = False):
+    """
+    ``tenants`` concurrent threads; returns (page-view latencies, wall
+    seconds, results by tenant). With ``noisy``, tenant 1 loads 20x the views,
+    each with a window length nobody else uses.
+    """
+    histogram = LatencyHistogram()
+    results = {}
+    lock = threading.Lock()
+    barrier = threading.Barrier(tenants)
+
+    def tenant(partner: int) -> None:
+        rng = np.random.default_rng(seed + partner)
+        scope = PartnerScope(engine, partner, cache=cache, ttl=3600)
+        barrier.wait()
+        seen = []
+        for view in range(views * 20 if partner == 1 and noisy else views):
+            if partner == 1 and noisy:
+                window = 8 + view % 350
+            else:
+                window = int(rng.choice(WINDOWS))
+            t0 = time.perf_counter()
+            tables = dashboard(engine, mode, partner, window, scope)
+            elapsed = time.perf_counter() - t0
+            seen.append((window, tables))
+            with lock:
+                histogram.record(elapsed)
+        results[partner] = seen
+
+    threads = [threading.Thread(target=tenant, args=(p,)) for p in range(1, tenants + 1)]
+    t0 = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return histogram, time.perf_counter() - t0, results
+
+
+def check(engine, results) -> None:
+    """Partition results equal the policy path's; campaign tables hold only the tenant's campaigns."""
+    for partner, seen in results.items():
+        for window, (kpis, campaigns, daily) in seen[:2]:
+            expected = dashboard(engine, "policy", partner, window, None)
+            for got, want in zip((kpis, campaigns, daily), expected):
+                if got.to_pylist() != want.to_pylist():
+                    raise AssertionError(f"partner {partner}: partition result differs from the policy path")
+            names = campaigns.column(0).to_pylist()
+            if not all(name.startswith(f"P{partner:03d} ") for name in names):
+                raise AssertionError(f"partner {partner} received another partner's campaigns")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Partner dashboards: row policy vs partner-scoped tables")
+    parser.add_argument("--tenants", type=int, default=50)
+    parser.add_argument("--campaigns", type=int, default=20, help="campaigns per partner")
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--views", type=int, default=20, help="dashboard views per tenant")
+    parser.add_argument("--seed", type=int, default=5)
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    engine = build_engine(args.tenants, args.campaigns, args.days, np.random.default_rng(args.seed))
+    rows = engine.execute("SELECT COUNT(*) FROM T_CAMPAIGN_DAILY")[0][0]
+    print(f"{args.tenants} partners x {args.campaigns} campaigns, {rows:,} daily rows "
+          f"(built in {time.perf_counter() - t0:.1f}s); {args.tenants} concurrent tenants x {args.views} views\n")
+
+    print(f"{'path':<12} | {'views/s':>8} | {'p50':>9} | {'p99':>9}")
+    print("-" * 48)
+    cache = ArrowResultCache(ttl=3600)
+    for mode in ("policy", "partition", "cached"):
+        histogram, wall, results = run(engine, mode, args.tenants, args.views, args.seed,
+                                       cache=cache if mode == "cached" else None)
+        if mode != "policy":
+            check(engine, results)
+        label = "+ cache" if mode == "cached" else mode
+        print(f"{label:<12} | {histogram.count / wall:>8,.0f} | {histogram.percentile(50) * 1e3:>7.2f}ms | "
+              f"{histogram.percentile(99) * 1e3:>7.2f}ms")
+    print("(partition and cached results match the policy path; no tenant saw another's rows)\n")
+
+    stats = cache.tenant_stats()
+    working_set = sum(s["bytes"] for s in stats.values())
+    print(f"per-tenant cache ({len(stats)} namespaces) |     min |  median |     max")
+    print("-" * 64)
+    for name, key, scale, fmt in (("hit rate", "hit_rate", 100, "{:>6.0f}%"),
+                                  ("p50 latency ms", "p50_ms", 1, "{:>7.3f}"),
+                                  ("p99 latency ms", "p99_ms", 1, "{:>7.2f}")):
+        values = np.array([s[key] for s in stats.values()]) * scale
+        print(f"{name:<33} | " + " | ".join(fmt.format(v) for v in (values.min(), np.median(values), values.max())))
+
+    # One tenant requests a new window on every view, through a cache sized to the others' working set
+    small = int(working_set * 1.2)
+    print(f"\nnoisy tenant, {small / 2**10:,.0f} KB cache ({working_set / 2**10:,.0f} KB working set)")
+    print(f"{'budget':<26} | {'others hit rate':>15} | {'noisy hit rate':>14} | {'noisy share':>11}")
+    print("-" * 76)
+    for label, budget in (("shared", None), ("max_tenant_bytes = 1/25", small // 25)):
+        cache = ArrowResultCache(max_bytes=small, ttl=3600, max_tenant_bytes=budget)
+        run(engine, "cached", args.tenants, args.views, args.seed, cache=cache, noisy=True)
+        stats = cache.tenant_stats()
+        others = np.median([s["hit_rate"] for t, s in stats.items() if t != "partner:1"])
+        noisy = stats["partner:1"]
+        print(f"{label:<26} | {others:>15.0%} | {noisy['hit_rate']:>14.0%} | {noisy['bytes'] / small:>11.0%}")
+
+
+if __name__ == "__main__":
+    main()
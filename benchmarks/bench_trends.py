@@ -0,0 +1,150 @@
+"""
+=============================================================================
+Benchmark - Period comparison: rollup lookup vs naive full-scan recompute
+=============================================================================
+Answers "Compare <quarter> vs <previous quarter> by therapeutic area" two ways:
+
+  naive   : scan every daily fact row, filter both date ranges, aggregate
+  rollup  : read the two quarter rows per campaign from the period rollup
+
+Part 1 uses columnar NumPy arrays so it can reach the 100M-row target on one
+box (--rows 100000000 needs ~1.6 GB RAM). Part 2 runs the real SQL from
+ad_tech.trends on the local engine against a smaller synthetic fact table.
+
+Usage (from the repository root):
+    python benchmarks/bench_trends.py
+    python benchmarks/bench_trends.py --rows 100000000 --sql-rows 0
+=============================================================================
+"""
+
+import argparse
+import sys
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "streamlit"))
+
+from ad_tech import trends  # noqa: E402
+from ad_tech.engine import LocalEngine  # noqa: E402
+
+AREAS = ["Diabetes", "Cardiology", "Oncology", "Immunology", "Neurology", "Weight Loss"]
+TIERS = ["Platinum", "Gold", "Silver", "Bronze"]
+
+
+def timed(fn, repeat=5):
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def columnar_benchmark(rows, campaigns, days, seed):
+    rng = np.random.default_rng(seed)
+    print(f"Generating {rows:,} daily rows ({campaigns:,} campaigns x {days} days)...")
+    day = rng.integers(0, days, rows, dtype=np.int16)
+    camp = rng.integers(0, campaigns, rows, dtype=np.int32)
+    revenue = rng.gamma(2.0, 50.0, rows).astype(np.float32)
+    spend = (revenue / rng.uniform(1.0, 6.0, rows)).astype(np.float32)
+    area_of = rng.integers(0, len(AREAS), campaigns)
+
+    first = date.today() - timedelta(days=days - 1)
+    quarter_of_day = np.array(
+        [(d.year * 4 + (d.month - 1) // 3) for d in (first + timedelta(days=i) for i in range(days))]
+    )
+    quarter_of_day -= quarter_of_day.min()
+    n_quarters = int(quarter_of_day.max()) + 1
+    cur_q, prev_q = n_quarters - 1, n_quarters - 2
+    cur_days = np.flatnonzero(quarter_of_day == cur_q)
+    prev_days = np.flatnonzero(quarter_of_day == prev_q)
+
+    def naive():
+        out = {}
+        for name, span in (("cur", cur_days), ("prev", prev_days)):
+            mask = (day >= span[0]) & (day <= span[-1])
+            areas = area_of[camp[mask]]
+            out[name] = (np.bincount(areas, revenue[mask], len(AREAS)),
+                         np.bincount(areas, spend[mask], len(AREAS)))
+        return out
+
+    def build_rollup():
+        key = quarter_of_day[day] * campaigns + camp
+        size = n_quarters * campaigns
+        return (np.bincount(key, revenue, size).reshape(n_quarters, campaigns),
+                np.bincount(key, spend, size).reshape(n_quarters, campaigns))
+
+    def from_rollup(rollup):
+        rev, spd = rollup
+        return {name: (np.bincount(area_of, rev[q], len(AREAS)),
+                       np.bincount(area_of, spd[q], len(AREAS)))
+                for name, q in (("cur", cur_q), ("prev", prev_q))}
+
+    naive_s, expected = timed(naive, repeat=3)
+    build_s, rollup = timed(build_rollup, repeat=1)
+    rollup_s, actual = timed(lambda: from_rollup(rollup), repeat=50)
+    assert np.allclose(expected["cur"][0], actual["cur"][0], rtol=1e-3)
+
+    print(f"  naive full scan       : {naive_s * 1e3:10.2f} ms per comparison")
+    print(f"  rollup build (1x)     : {build_s * 1e3:10.2f} ms (amortized by the dynamic table)")
+    print(f"  rollup lookup         : {rollup_s * 1e3:10.4f} ms per comparison")
+    print(f"  speedup               : {naive_s / rollup_s:10.0f}x")
+
+
+def sql_benchmark(rows, campaigns, days, seed):
+    rng = np.random.default_rng(seed)
+    engine = LocalEngine()
+    first = date.today() - timedelta(days=days - 1)
+    print(f"\nLoading {rows:,} daily rows into the local engine...")
+    camp = rng.integers(0, campaigns, rows)
+    day = rng.integers(0, days, rows)
+    revenue = rng.gamma(2.0, 50.0, rows).round(2)
+    spend = (revenue / rng.uniform(1.0, 6.0, rows)).round(2)
+    impressions = rng.integers(10, 500, rows)
+    fact_rows = [
+        ((first + timedelta(days=int(d))).isoformat(), f"CAMP-{c:05d}", f"SLOT-{c % 300:05d}",
+         AREAS[c % len(AREAS)], c % 20, f"Partner {c % 20}", TIERS[c % len(TIERS)],
+         int(i) * 3, int(i) * 2, int(i), int(i) // 30, int(i) // 300, float(r), float(s))
+        for c, d, r, s, i in zip(camp, day, revenue, spend, impressions)
+    ]
+    load_s, _ = timed(lambda: trends.load_local_daily_facts(engine, rows=fact_rows), repeat=1)
+    comparison = trends.resolve_comparison(trends.period_options()[2])
+    cur, prev = comparison.current, comparison.previous
+
+    naive_sql = """
+    SELECT therapeutic_area,
+        SUM(CASE WHEN date_day BETWEEN ? AND ? THEN revenue ELSE 0 END) AS cur_revenue,
+        SUM(CASE WHEN date_day BETWEEN ? AND ? THEN revenue ELSE 0 END) AS prev_revenue
+    FROM T_CAMPAIGN_DAILY
+    GROUP BY therapeutic_area
+    """
+    params = [cur.start.isoformat(), cur.end.isoformat(), prev.start.isoformat(), prev.end.isoformat()]
+    naive_s, _ = timed(lambda: engine.execute(naive_sql, params), repeat=3)
+    api_s, _ = timed(lambda: trends.compare_periods(engine, comparison, by="therapeutic_area"), repeat=20)
+
+    print(f"  load + rollup refresh : {load_s:10.2f} s")
+    print(f"  naive SQL full scan   : {naive_s * 1e3:10.2f} ms")
+    print(f"  trends.compare_periods: {api_s * 1e3:10.2f} ms")
+    print(f"  speedup               : {naive_s / api_s:10.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rollup vs full-scan period comparison")
+    parser.add_argument("--rows", type=int, default=10_000_000, help="columnar daily rows")
+    parser.add_argument("--sql-rows", type=int, default=300_000, help="daily rows for the SQL run (0 to skip)")
+    parser.add_argument("--campaigns", type=int, default=2_000)
+    parser.add_argument("--days", type=int, default=730)
+    parser.add_argument("--seed", type=int, default=11)
+    args = parser.parse_args()
+
+    columnar_benchmark(args.rows, args.campaigns, args.days, args.seed)
+    if args.sql_rows:
+        sql_benchmark(args.sql_rows, args.campaigns, args.days, args.seed)
+
+
+if __name__ == "__main__":
+    main()
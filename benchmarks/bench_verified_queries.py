@@ -0,0 +1,162 @@
+"""
+=============================================================================
+Benchmark - Verified query hit rate, precision and latency saved
+=============================================================================
+Runs the chat page's verified query layer over a labelled question set:
+
+  paraphrases : hot questions worded differently from the repository
+                (setup/09_verified_queries.sql), each labelled with the
+                verified query and values it should resolve to
+  long tail   : one-off questions the repository does not cover; any
+                match on these is a wrong answer
+
+Traffic is --questions drawn with Zipf(--zipf) popularity, paraphrases
+taking the head (they were verified because they are asked most) and the
+long tail the rest. Hits run their SQL on the LocalEngine for real; misses
+are charged a simulated agent answer (lognormal, median --agent-seconds),
+since SQL generation is the step a verified query skips.
+
+Usage (from the repository root):
+    python benchmarks/bench_verified_queries.py
+    python benchmarks/bench_verified_queries.py --questions 20000 --agent-seconds 8
+=============================================================================
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "streamlit"))
+
+from ad_tech.data_access import fetch_arrow  # noqa: E402
+from ad_tech.engine import LocalEngine  # noqa: E402
+from ad_tech.metrics import MetricsRegistry  # noqa: E402
+from ad_tech.verified_queries import (  # noqa: E402
+    QueryMatcher, VerifiedQueryLayer, load_synonyms, load_verified_queries, load_vocabulary,
+)
+
+PARAPHRASES = [
+    ("Which campaigns have the highest ROAS?", "top_campaigns_by_roas", {}),
+    ("top 5 campaigns by return on ad spend", "top_campaigns_by_roas", {"n": 5}),
+    ("best performing campaigns by roi", "top_campaigns_by_roas", {}),
+    ("ROAS by therapy area", "roas_by_therapeutic_area", {}),
+    ("which therapeutic areas have the best return on ad spend", "roas_by_therapeutic_area", {}),
+    ("Which therapeutic areas have the best CTR?", "ctr_by_therapeutic_area", {}),
+    ("click through rate by therapeutic area", "ctr_by_therapeutic_area", {}),
+    ("Which partners generate the most revenue?", "revenue_by_partner", {}),
+    ("revenue by partner", "revenue_by_partner", {}),
+    ("What is the ROI for Pfizer campaigns?", "partner_performance", {"partner_name": "Pfizer Inc."}),
+    ("how are Novo Nordisk campaigns doing", "partner_performance", {"partner_name": "Novo Nordisk"}),
+    ("Merck campaign performance", "partner_performance", {"partner_name": "Merck & Co."}),
+    ("Oncology campaigns", "area_performance", {"therapeutic_area": "Oncology"}),
+    ("how is diabetes performing", "area_performance", {"therapeutic_area": "Diabetes"}),
+    ("how many active campaigns do we have", "active_campaign_summary", {}),
+    ("average cpm per region", "cpm_by_region", {}),
+    ("CPM by region", "cpm_by_region", {}),
+    ("premium slots in the Midwest", "premium_slots_in_region", {"region": "Midwest"}),
+    ("show premium inventory in the Northeast", "premium_slots_in_region", {"region": "Northeast"}),
+    ("cardiology inventory", "slots_for_specialty", {"specialty_name": "Cardiology"}),
+    ("most engaged audience segments", "top_cohorts_by_engagement", {}),
+    ("Show me high-conversion audience cohorts in the Southwest", "converting_cohorts_in_region",
+     {"region": "Southwest"}),
+    ("revenue by income bracket", "revenue_by_income", {}),
+]
+
+LONG_TAIL = [
+    "What's driving the ROAS improvement for Pfizer campaigns?",
+    "Compare Q4 2024 vs Q3 2024 campaign performance",
+    "What's the optimal bid price for a diabetes campaign in cardiology waiting rooms?",
+    "Find premium morning slots in Texas endocrinology clinics",
+    "Which audience segments have the highest engagement for heart medications?",
+    "Recommend inventory for a new GLP-1 drug launch",
+    "how are oncology campaigns doing in the west",
+    "Why did CTR drop last week?",
+    "Draft a media plan for a $500k immunology launch",
+    "Which slots should we retire next quarter?",
+    "Forecast impressions for the Ozempic campaign through December",
+    "Is Eli Lilly spending more than AstraZeneca this year?",
+    "What creative works best in exam rooms?",
+    "Summarize yesterday's bidding activity",
+    "Should we raise the floor price for premium cardiology screens?",
+    "How does weekend engagement compare to weekdays?",
+]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Verified query hit rate, precision and latency saved")
+    parser.add_argument("--questions", type=int, default=5_000)
+    parser.add_argument("--zipf", type=float, default=1.1, help="popularity exponent")
+    parser.add_argument("--agent-seconds", type=float, default=12.0, help="median agent answer time")
+    parser.add_argument("--questions-per-day", type=int, default=2_000)
+    parser.add_argument("--seed", type=int, default=17)
+    args = parser.parse_args()
+    rng = np.random.default_rng(args.seed)
+
+    engine = LocalEngine()
+    t0 = time.perf_counter()
+    vocabulary = load_vocabulary(lambda sql: fetch_arrow(engine, sql))
+    matcher = QueryMatcher(load_verified_queries(), load_synonyms(), vocabulary)
+    build_ms = (time.perf_counter() - t0) * 1e3
+    metrics = MetricsRegistry()
+    layer = VerifiedQueryLayer(matcher, lambda name, sql, table: fetch_arrow(engine, sql), metrics=metrics)
+
+    # Labelled accuracy, each question once
+    correct = wrong = missed = false_hits = 0
+    for question, name, params in PARAPHRASES:
+        match = matcher.match(question)
+        if match is None:
+            missed += 1
+            print(f"  miss : {question}")
+        elif match.query.name == name and match.params == params:
+            correct += 1
+        else:
+            wrong += 1
+            print(f"  WRONG: {question} -> {match.query.name} {match.params}")
+    for question in LONG_TAIL:
+        match = matcher.match(question)
+        if match is not None:
+            false_hits += 1
+            print(f"  FALSE: {question} -> {match.query.name} {match.params}")
+    hits = correct + wrong + false_hits
+
+    # Zipf traffic: paraphrases at the head, long tail after
+    pool = [q for q, _, _ in PARAPHRASES] + LONG_TAIL
+    order = rng.permutation(len(PARAPHRASES)).tolist() + (len(PARAPHRASES) + rng.permutation(len(LONG_TAIL))).tolist()
+    weights = 1.0 / np.arange(1, len(pool) + 1) ** args.zipf
+    traffic = rng.choice(order, size=args.questions, p=weights / weights.sum())
+    agent = rng.lognormal(np.log(args.agent_seconds), 0.4, size=args.questions)
+
+    verified_s, baseline, served = [], float(agent.sum()), 0.0
+    for i, index in enumerate(traffic):
+        t0 = time.perf_counter()
+        answer = layer.answer(pool[index])
+        if answer is not None:
+            answer.markdown()
+            elapsed = time.perf_counter() - t0
+            verified_s.append(elapsed)
+            served += elapsed
+        else:
+            served += time.perf_counter() - t0 + agent[i]
+    hit_rate = len(verified_s) / args.questions
+    saved_per_question = (baseline - served) / args.questions
+
+    print(f"\n{len(load_verified_queries())} verified queries, matcher built in {build_ms:.0f} ms")
+    print(f"labelled: {correct}/{len(PARAPHRASES)} paraphrases answered correctly, {wrong} wrong, {missed} missed; "
+          f"{false_hits}/{len(LONG_TAIL)} long-tail questions matched")
+    print(f"precision {correct / hits if hits else 1:.1%}, recall {correct / len(PARAPHRASES):.1%}\n")
+    print(f"{'path':<22} | {'share':>6} | {'p50':>9} | {'p99':>9}")
+    print("-" * 56)
+    print(f"{'verified query':<22} | {hit_rate:>6.1%} | {np.percentile(verified_s, 50) * 1e3:>7.1f}ms | "
+          f"{np.percentile(verified_s, 99) * 1e3:>7.1f}ms")
+    print(f"{'agent (simulated)':<22} | {1 - hit_rate:>6.1%} | {np.percentile(agent, 50):>8.1f}s | "
+          f"{np.percentile(agent, 99):>8.1f}s")
+    print(f"\nmean answer time {baseline / args.questions:.1f}s -> {served / args.questions:.1f}s; "
+          f"~{saved_per_question * args.questions_per_day / 3600:.1f} h of waiting saved per "
+          f"{args.questions_per_day:,} questions/day")
+
+
+if __name__ == "__main__":
+    main()
@@ -35,9 +35,11 @@ AS (
         daypart,
         base_cpm,
         is_premium,
-        -- Search text combines key searchable fields
-        slot_name || ' ' || facility_name || ' ' || region || ' ' || specialty_name || ' ' || 
-        screen_type || ' ' || placement_area || ' ' || daypart || 
+        -- Search text combines key searchable fields (keep in sync with
+        -- SEARCH_TEXT_COLUMNS in streamlit/ad_tech/search.py, the local index).
+        -- Ranking by CPM, engagement and fill rate happens in the app's re-ranker.
+        slot_name || ' ' || facility_name || ' ' || facility_type || ' ' || city || ' ' || state || ' ' ||
+        region || ' ' || specialty_name || ' ' || screen_type || ' ' || placement_area || ' ' || daypart || 
         CASE WHEN is_premium THEN ' premium' ELSE '' END AS search_text
     FROM AD_TECH.ANALYTICS.T_INVENTORY_ANALYTICS
 );
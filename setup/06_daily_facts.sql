@@ -0,0 +1,159 @@
+/*
+=============================================================================
+PatientPoint Ad Tech Demo - Daily Fact Table & Period Rollups
+=============================================================================
+T_CAMPAIGN_PERFORMANCE holds one lifetime row per campaign, so "Q4 vs Q3"
+style questions cannot be answered from it. This script adds:
+
+1. T_CAMPAIGN_DAILY          - daily grain per campaign / slot,
+                               clustered by date for range pruning
+2. T_CAMPAIGN_PERIOD_ROLLUP  - dynamic table of day / week / quarter totals
+                               per campaign (additive measures only)
+
+Ratios (ROAS, CTR, win rate) are never stored in the rollup; they are
+derived at query time from the summed measures so any roll-up stays exact.
+Trend queries (streamlit/ad_tech/trends.py) read only the rollup and
+compute period-over-period deltas in a single statement.
+
+The demo backfill spreads each campaign's lifetime totals across its active
+days (weekends weighted 0.4) and across the slots of its target specialty
+(weighted by delivered impressions), so daily rows sum back to the curated
+lifetime numbers.
+
+Run after 02_demo_data.sql. Run time: ~15 seconds
+=============================================================================
+*/
+
+USE ROLE SF_INTELLIGENCE_DEMO;
+USE DATABASE AD_TECH;
+USE SCHEMA ANALYTICS;
+USE WAREHOUSE AD_TECH_WH;
+
+-- ============================================================================
+-- T_CAMPAIGN_DAILY - one row per day / campaign / slot
+-- ============================================================================
+CREATE OR REPLACE TABLE T_CAMPAIGN_DAILY (
+    date_day DATE,
+    campaign_id VARCHAR(20),
+    slot_id VARCHAR(20),
+    therapeutic_area VARCHAR(50),
+    partner_id INT,
+    partner_name VARCHAR(100),
+    partner_tier VARCHAR(20),
+    total_bids INT,
+    winning_bids INT,
+    impressions INT,
+    engagements INT,
+    conversions INT,
+    revenue NUMBER(18,2),
+    spend NUMBER(18,2)
+)
+CLUSTER BY (date_day, campaign_id);
+
+INSERT INTO T_CAMPAIGN_DAILY
+WITH days AS (
+    SELECT
+        c.campaign_id,
+        DATEADD(day, g.value::INT, c.start_date) AS date_day
+    FROM T_CAMPAIGN_PERFORMANCE c,
+        LATERAL FLATTEN(
+            ARRAY_GENERATE_RANGE(0, DATEDIFF(day, c.start_date, LEAST(c.end_date, CURRENT_DATE)) + 1)
+        ) g
+),
+day_shares AS (
+    SELECT
+        campaign_id,
+        date_day,
+        IFF(DAYOFWEEKISO(date_day) >= 6, 0.4, 1.0)
+            / SUM(IFF(DAYOFWEEKISO(date_day) >= 6, 0.4, 1.0)) OVER (PARTITION BY campaign_id) AS day_share
+    FROM days
+),
+slot_shares AS (
+    SELECT
+        c.campaign_id,
+        i.slot_id,
+        i.delivered_impressions
+            / SUM(i.delivered_impressions) OVER (PARTITION BY c.campaign_id) AS slot_share
+    FROM T_CAMPAIGN_PERFORMANCE c
+    JOIN T_INVENTORY_ANALYTICS i ON i.specialty_name = c.target_specialty
+)
+SELECT
+    d.date_day,
+    c.campaign_id,
+    s.slot_id,
+    c.therapeutic_area,
+    c.partner_id,
+    c.partner_name,
+    c.partner_tier,
+    ROUND(c.total_bids * d.day_share * s.slot_share)::INT,
+    ROUND(c.winning_bids * d.day_share * s.slot_share)::INT,
+    ROUND(c.total_impressions * d.day_share * s.slot_share)::INT,
+    ROUND(c.total_engagements * d.day_share * s.slot_share)::INT,
+    ROUND(c.total_conversions * d.day_share * s.slot_share)::INT,
+    ROUND(c.total_revenue * d.day_share * s.slot_share, 2),
+    ROUND(c.total_spend * d.day_share * s.slot_share, 2)
+FROM T_CAMPAIGN_PERFORMANCE c
+JOIN day_shares d ON d.campaign_id = c.campaign_id
+JOIN slot_shares s ON s.campaign_id = c.campaign_id;
+
+SELECT 'T_CAMPAIGN_DAILY created: ' || COUNT(*) || ' daily rows' AS status FROM T_CAMPAIGN_DAILY;
+
+
+-- ============================================================================
+-- T_CAMPAIGN_PERIOD_ROLLUP - day / week / quarter totals per campaign
+-- Incrementally maintained; trend queries never touch T_CAMPAIGN_DAILY
+-- ============================================================================
+CREATE OR REPLACE DYNAMIC TABLE T_CAMPAIGN_PERIOD_ROLLUP
+    TARGET_LAG = '1 hour'
+    WAREHOUSE = AD_TECH_WH
+    CLUSTER BY (period_grain, period_start)
+AS
+SELECT 'day' AS period_grain, date_day AS period_start,
+    campaign_id, therapeutic_area, partner_name, partner_tier,
+    SUM(total_bids) AS total_bids, SUM(winning_bids) AS winning_bids,
+    SUM(impressions) AS impressions, SUM(engagements) AS engagements,
+    SUM(conversions) AS conversions, SUM(revenue) AS revenue, SUM(spend) AS spend
+FROM T_CAMPAIGN_DAILY
+GROUP BY date_day, campaign_id, therapeutic_area, partner_name, partner_tier
+UNION ALL
+SELECT 'week', DATE_TRUNC('week', date_day),
+    campaign_id, therapeutic_area, partner_name, partner_tier,
+    SUM(total_bids), SUM(winning_bids), SUM(impressions), SUM(engagements),
+    SUM(conversions), SUM(revenue), SUM(spend)
+FROM T_CAMPAIGN_DAILY
+GROUP BY DATE_TRUNC('week', date_day), campaign_id, therapeutic_area, partner_name, partner_tier
+UNION ALL
+SELECT 'quarter', DATE_TRUNC('quarter', date_day),
+    campaign_id, therapeutic_area, partner_name, partner_tier,
+    SUM(total_bids), SUM(winning_bids), SUM(impressions), SUM(engagements),
+    SUM(conversions), SUM(revenue), SUM(spend)
+FROM T_CAMPAIGN_DAILY
+GROUP BY DATE_TRUNC('quarter', date_day), campaign_id, therapeutic_area, partner_name, partner_tier;
+
+SELECT 'T_CAMPAIGN_PERIOD_ROLLUP created!' AS status;
+
+
+-- ============================================================================
+-- VERIFICATION - daily rows must sum back to the lifetime totals
+-- ============================================================================
+SELECT
+    c.campaign_id,
+    c.total_revenue,
+    SUM(d.revenue) AS daily_revenue_sum,
+    CASE WHEN ABS(c.total_revenue - SUM(d.revenue)) / NULLIF(c.total_revenue, 0) < 0.01
+         THEN '✅ VALID' ELSE '❌ MISMATCH' END AS revenue_check
+FROM T_CAMPAIGN_PERFORMANCE c
+JOIN T_CAMPAIGN_DAILY d ON d.campaign_id = c.campaign_id
+WHERE c.campaign_id = 'CAMP-00001'
+GROUP BY c.campaign_id, c.total_revenue;
+
+-- Example trend query: quarter over quarter by therapeutic area
+SELECT
+    therapeutic_area,
+    SUM(IFF(period_start = DATE_TRUNC('quarter', CURRENT_DATE), revenue, 0)) AS current_revenue,
+    SUM(IFF(period_start = DATEADD(quarter, -1, DATE_TRUNC('quarter', CURRENT_DATE)), revenue, 0)) AS previous_revenue
+FROM T_CAMPAIGN_PERIOD_ROLLUP
+WHERE period_grain = 'quarter'
+  AND period_start >= DATEADD(quarter, -1, DATE_TRUNC('quarter', CURRENT_DATE))
+GROUP BY therapeutic_area
+ORDER BY current_revenue DESC;
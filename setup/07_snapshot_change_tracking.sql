@@ -0,0 +1,44 @@
+/*
+=============================================================================
+PatientPoint Ad Tech Demo - Change Tracking for Local Snapshots
+=============================================================================
+The Streamlit app keeps columnar snapshots of the three analytics tables
+(streamlit/ad_tech/snapshots.py) so dashboards render without resuming
+AD_TECH_WH. After the first full export, the background refresh only pulls
+rows changed since its last watermark:
+
+    SELECT * FROM T_CAMPAIGN_PERFORMANCE
+        CHANGES(INFORMATION => DEFAULT)
+        AT(TIMESTAMP => <watermark>);
+
+The CHANGES clause needs change tracking on each source table, and the
+watermark must stay within the data retention period; otherwise the app
+falls back to a full export.
+
+Run after 02_demo_data.sql. Run time: < 5 seconds
+=============================================================================
+*/
+
+USE ROLE SF_INTELLIGENCE_DEMO;
+USE DATABASE AD_TECH;
+USE SCHEMA ANALYTICS;
+USE WAREHOUSE AD_TECH_WH;
+
+-- ============================================================================
+-- Enable change tracking (retention covers a missed day of refreshes)
+-- ============================================================================
+ALTER TABLE T_CAMPAIGN_PERFORMANCE SET CHANGE_TRACKING = TRUE DATA_RETENTION_TIME_IN_DAYS = 1;
+ALTER TABLE T_INVENTORY_ANALYTICS SET CHANGE_TRACKING = TRUE DATA_RETENTION_TIME_IN_DAYS = 1;
+ALTER TABLE T_AUDIENCE_INSIGHTS SET CHANGE_TRACKING = TRUE DATA_RETENTION_TIME_IN_DAYS = 1;
+
+SELECT 'Change tracking enabled for snapshot refresh!' AS status;
+
+
+-- ============================================================================
+-- VERIFICATION
+-- ============================================================================
+SHOW TABLES LIKE 'T_%' IN SCHEMA AD_TECH.ANALYTICS;
+
+SELECT "name", "change_tracking", "retention_time"
+FROM TABLE(RESULT_SCAN(LAST_QUERY_ID()))
+WHERE "name" IN ('T_CAMPAIGN_PERFORMANCE', 'T_INVENTORY_ANALYTICS', 'T_AUDIENCE_INSIGHTS');
@@ -0,0 +1,189 @@
+/*
+=============================================================================
+PatientPoint Ad Tech Demo - Change-Driven Cortex Search Refresh
+=============================================================================
+03_cortex_search.sql builds each search service over a full-table SELECT
+with TARGET_LAG = '1 hour'. Tightening that lag on those sources means
+re-reading every row on every refresh. This script makes refreshes scale
+with the rows that changed instead:
+
+    T_* table --(change tracking)--> V_*_SEARCH_SOURCE (adds search_text)
+        --(stream)--> SEARCH_DOCS_SYNC task, every minute, only when the
+                      stream has data: delete + re-insert the changed rows
+        --> *_SEARCH_DOCS tables (change tracked)
+        --> *_SEARCH_SVC, TARGET_LAG = '1 minute', incremental refresh
+
+- The task's WHEN clause (SYSTEM$STREAM_HAS_DATA) is evaluated without a
+  warehouse, so quiet minutes cost nothing.
+- The services re-index only the rows the task touched.
+- Service names and columns are unchanged, so the app and the agent keep
+  working as before.
+
+The app keeps its own re-rank features and local index current the same
+way, reading CHANGES on T_INVENTORY_ANALYTICS (streamlit/ad_tech/search_refresh.py).
+
+Run after 03_cortex_search.sql. Run time: ~1 minute (initial index build)
+=============================================================================
+*/
+
+USE ROLE SF_INTELLIGENCE_DEMO;
+USE DATABASE AD_TECH;
+USE SCHEMA CORTEX;
+USE WAREHOUSE AD_TECH_WH;
+
+-- ============================================================================
+-- STEP 1: Change tracking on the source tables
+-- ============================================================================
+ALTER TABLE AD_TECH.ANALYTICS.T_CAMPAIGN_PERFORMANCE SET CHANGE_TRACKING = TRUE;
+ALTER TABLE AD_TECH.ANALYTICS.T_INVENTORY_ANALYTICS SET CHANGE_TRACKING = TRUE;
+ALTER TABLE AD_TECH.ANALYTICS.T_AUDIENCE_INSIGHTS SET CHANGE_TRACKING = TRUE;
+
+
+-- ============================================================================
+-- STEP 2: Search source views (same columns and search_text as 03)
+-- ============================================================================
+CREATE OR REPLACE VIEW V_INVENTORY_SEARCH_SOURCE CHANGE_TRACKING = TRUE AS
+SELECT
+    slot_id, slot_name, facility_name, facility_type, city, state, region,
+    specialty_name, screen_type, placement_area, daypart, base_cpm, is_premium,
+    -- Keep in sync with SEARCH_TEXT_COLUMNS in streamlit/ad_tech/search.py
+    slot_name || ' ' || facility_name || ' ' || facility_type || ' ' || city || ' ' || state || ' ' ||
+    region || ' ' || specialty_name || ' ' || screen_type || ' ' || placement_area || ' ' || daypart ||
+    CASE WHEN is_premium THEN ' premium' ELSE '' END AS search_text
+FROM AD_TECH.ANALYTICS.T_INVENTORY_ANALYTICS;
+
+CREATE OR REPLACE VIEW V_CAMPAIGN_SEARCH_SOURCE CHANGE_TRACKING = TRUE AS
+SELECT
+    campaign_id, campaign_name, drug_name, therapeutic_area, campaign_type,
+    target_specialty, status, partner_name, partner_tier, total_revenue, roas,
+    total_impressions, ctr_pct,
+    campaign_name || ' ' || drug_name || ' ' || therapeutic_area || ' ' ||
+    campaign_type || ' ' || partner_name || ' ' || partner_tier || ' ' ||
+    status || ' ' || target_specialty AS search_text
+FROM AD_TECH.ANALYTICS.T_CAMPAIGN_PERFORMANCE;
+
+CREATE OR REPLACE VIEW V_AUDIENCE_SEARCH_SOURCE CHANGE_TRACKING = TRUE AS
+SELECT
+    cohort_id, cohort_name, age_bucket, gender, region, income_bracket,
+    insurance_type, health_interest, top_therapeutic_interests, cohort_size,
+    baseline_engagement_score, engagement_rate_pct, conversion_rate_pct,
+    cohort_name || ' ' || age_bucket || ' ' || gender || ' ' || region || ' ' ||
+    income_bracket || ' ' || insurance_type || ' ' || health_interest || ' ' ||
+    top_therapeutic_interests AS search_text
+FROM AD_TECH.ANALYTICS.T_AUDIENCE_INSIGHTS;
+
+
+-- ============================================================================
+-- STEP 3: Streams first, then the indexed copies, so no change is missed
+-- ============================================================================
+CREATE OR REPLACE STREAM INVENTORY_SEARCH_STREAM ON VIEW V_INVENTORY_SEARCH_SOURCE;
+CREATE OR REPLACE STREAM CAMPAIGN_SEARCH_STREAM ON VIEW V_CAMPAIGN_SEARCH_SOURCE;
+CREATE OR REPLACE STREAM AUDIENCE_SEARCH_STREAM ON VIEW V_AUDIENCE_SEARCH_SOURCE;
+
+CREATE OR REPLACE TABLE INVENTORY_SEARCH_DOCS CHANGE_TRACKING = TRUE AS
+    SELECT * FROM V_INVENTORY_SEARCH_SOURCE;
+CREATE OR REPLACE TABLE CAMPAIGN_SEARCH_DOCS CHANGE_TRACKING = TRUE AS
+    SELECT * FROM V_CAMPAIGN_SEARCH_SOURCE;
+CREATE OR REPLACE TABLE AUDIENCE_SEARCH_DOCS CHANGE_TRACKING = TRUE AS
+    SELECT * FROM V_AUDIENCE_SEARCH_SOURCE;
+
+
+-- ============================================================================
+-- STEP 4: Sync task - push only changed rows into the indexed copies
+-- ============================================================================
+-- An update shows up in a stream as a DELETE + INSERT pair, so "delete every
+-- touched key, insert every INSERT row" covers inserts, updates and deletes.
+-- All statements in the transaction see the same stream contents; the
+-- offsets advance on COMMIT.
+CREATE OR REPLACE TASK SEARCH_DOCS_SYNC
+    WAREHOUSE = AD_TECH_WH
+    SCHEDULE = '1 MINUTE'
+    WHEN SYSTEM$STREAM_HAS_DATA('INVENTORY_SEARCH_STREAM')
+      OR SYSTEM$STREAM_HAS_DATA('CAMPAIGN_SEARCH_STREAM')
+      OR SYSTEM$STREAM_HAS_DATA('AUDIENCE_SEARCH_STREAM')
+AS
+EXECUTE IMMEDIATE
+$$
+BEGIN
+    BEGIN TRANSACTION;
+
+    DELETE FROM INVENTORY_SEARCH_DOCS
+        WHERE slot_id IN (SELECT slot_id FROM INVENTORY_SEARCH_STREAM);
+    INSERT INTO INVENTORY_SEARCH_DOCS
+        SELECT slot_id, slot_name, facility_name, facility_type, city, state, region,
+               specialty_name, screen_type, placement_area, daypart, base_cpm, is_premium, search_text
+        FROM INVENTORY_SEARCH_STREAM WHERE METADATA$ACTION = 'INSERT';
+
+    DELETE FROM CAMPAIGN_SEARCH_DOCS
+        WHERE campaign_id IN (SELECT campaign_id FROM CAMPAIGN_SEARCH_STREAM);
+    INSERT INTO CAMPAIGN_SEARCH_DOCS
+        SELECT campaign_id, campaign_name, drug_name, therapeutic_area, campaign_type,
+               target_specialty, status, partner_name, partner_tier, total_revenue, roas,
+               total_impressions, ctr_pct, search_text
+        FROM CAMPAIGN_SEARCH_STREAM WHERE METADATA$ACTION = 'INSERT';
+
+    DELETE FROM AUDIENCE_SEARCH_DOCS
+        WHERE cohort_id IN (SELECT cohort_id FROM AUDIENCE_SEARCH_STREAM);
+    INSERT INTO AUDIENCE_SEARCH_DOCS
+        SELECT cohort_id, cohort_name, age_bucket, gender, region, income_bracket,
+               insurance_type, health_interest, top_therapeutic_interests, cohort_size,
+               baseline_engagement_score, engagement_rate_pct, conversion_rate_pct, search_text
+        FROM AUDIENCE_SEARCH_STREAM WHERE METADATA$ACTION = 'INSERT';
+
+    COMMIT;
+END;
+$$;
+
+ALTER TASK SEARCH_DOCS_SYNC RESUME;
+
+
+-- ============================================================================
+-- STEP 5: Services over the indexed copies, minute-level lag
+-- ============================================================================
+CREATE OR REPLACE CORTEX SEARCH SERVICE INVENTORY_SEARCH_SVC
+    ON search_text
+    ATTRIBUTES slot_id, slot_name, facility_name, region, specialty_name, screen_type, placement_area, daypart, base_cpm, is_premium
+    WAREHOUSE = AD_TECH_WH
+    TARGET_LAG = '1 minute'
+AS (
+    SELECT * FROM AD_TECH.CORTEX.INVENTORY_SEARCH_DOCS
+);
+
+CREATE OR REPLACE CORTEX SEARCH SERVICE CAMPAIGN_SEARCH_SVC
+    ON search_text
+    ATTRIBUTES campaign_id, campaign_name, partner_name, therapeutic_area, drug_name, campaign_type, status, roas, total_revenue
+    WAREHOUSE = AD_TECH_WH
+    TARGET_LAG = '1 minute'
+AS (
+    SELECT * FROM AD_TECH.CORTEX.CAMPAIGN_SEARCH_DOCS
+);
+
+CREATE OR REPLACE CORTEX SEARCH SERVICE AUDIENCE_SEARCH_SVC
+    ON search_text
+    ATTRIBUTES cohort_id, cohort_name, age_bucket, gender, region, health_interest, income_bracket, insurance_type, cohort_size, engagement_rate_pct
+    WAREHOUSE = AD_TECH_WH
+    TARGET_LAG = '1 minute'
+AS (
+    SELECT * FROM AD_TECH.CORTEX.AUDIENCE_SEARCH_DOCS
+);
+
+SELECT 'Search services now refresh from change streams!' AS status;
+
+
+-- ============================================================================
+-- VERIFICATION: freshness lag and refresh cost
+-- ============================================================================
+-- Index freshness: seconds since each service's data timestamp
+SHOW CORTEX SEARCH SERVICES IN SCHEMA AD_TECH.CORTEX;
+SELECT "name" AS service,
+       DATEDIFF('second', "data_timestamp", CURRENT_TIMESTAMP()) AS freshness_lag_seconds
+FROM TABLE(RESULT_SCAN(LAST_QUERY_ID()));
+
+-- Sync cost: SKIPPED runs found no changes and used no warehouse time
+SELECT state,
+       COUNT(*) AS runs,
+       ROUND(AVG(DATEDIFF('millisecond', query_start_time, completed_time)) / 1000, 1) AS avg_seconds
+FROM TABLE(INFORMATION_SCHEMA.TASK_HISTORY(
+    TASK_NAME => 'SEARCH_DOCS_SYNC',
+    SCHEDULED_TIME_RANGE_START => DATEADD(hour, -24, CURRENT_TIMESTAMP())))
+GROUP BY state;
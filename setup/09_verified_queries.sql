@@ -0,0 +1,216 @@
+/*
+=============================================================================
+PatientPoint Ad Tech Demo - Verified Query Repository
+=============================================================================
+Canonical question -> SQL mappings for the questions the analyst tools
+(CampaignAnalyst, InventoryAnalyst, AudienceAnalyst) see most often. Each
+row belongs to one semantic view in 04_semantic_views.sql and answers from
+that view's table.
+
+The chat page matches incoming questions against this repository
+(streamlit/ad_tech/verified_queries.py). A match runs the stored SQL
+directly, with no text-to-SQL generation. Anything else goes to the agent
+as before.
+
+Templates:
+  {therapeutic_area} {partner_name} {drug_name}   values from T_CAMPAIGN_PERFORMANCE
+  {region} {specialty_name}                       values from the table of the view
+  {n}                                             a row limit (default 10)
+A question matches a template only if it names exactly the values the
+template takes. "ROAS for Oncology campaigns" is a hit for
+area_performance; "ROAS for Oncology in Q4" is not.
+
+variants holds other phrasings, separated by '|'. The same rows can be
+published to Cortex Analyst as the semantic model's verified_queries once
+the placeholders are filled in.
+
+Run after 04_semantic_views.sql. Run time: < 5 seconds
+=============================================================================
+*/
+
+USE ROLE SF_INTELLIGENCE_DEMO;
+USE DATABASE AD_TECH;
+USE SCHEMA CORTEX;
+USE WAREHOUSE AD_TECH_WH;
+
+-- ============================================================================
+-- REPOSITORY
+-- ============================================================================
+CREATE OR REPLACE TABLE VERIFIED_QUERIES (
+    name VARCHAR(50),
+    semantic_view VARCHAR(100),
+    tool VARCHAR(30),
+    question VARCHAR(500),
+    variants VARCHAR(2000),
+    sql_text VARCHAR(4000),
+    verified_by VARCHAR(50),
+    verified_at DATE
+);
+
+INSERT INTO VERIFIED_QUERIES VALUES
+-- ----------------------------------------------------------------------------
+-- CampaignAnalyst - SV_CAMPAIGN_ANALYTICS
+-- ----------------------------------------------------------------------------
+('top_campaigns_by_roas', 'SV_CAMPAIGN_ANALYTICS', 'CampaignAnalyst',
+ 'Which campaigns have the highest ROAS?',
+ 'top campaigns by roas|best performing campaigns|show the top {n} campaigns by return on ad spend|highest roi campaigns',
+ 'SELECT campaign_name, partner_name, therapeutic_area, status, ROUND(roas, 2) AS roas, total_revenue
+  FROM AD_TECH.ANALYTICS.T_CAMPAIGN_PERFORMANCE
+  ORDER BY roas DESC
+  LIMIT {n}',
+ 'Ad Ops Analytics', CURRENT_DATE),
+
+('roas_by_therapeutic_area', 'SV_CAMPAIGN_ANALYTICS', 'CampaignAnalyst',
+ 'What is the average ROAS by therapeutic area?',
+ 'roas by therapeutic area|which therapeutic areas have the best roas|compare return on ad spend across therapeutic areas',
+ 'SELECT therapeutic_area, COUNT(*) AS campaigns, ROUND(AVG(roas), 2) AS avg_roas, SUM(total_revenue) AS revenue
+  FROM AD_TECH.ANALYTICS.T_CAMPAIGN_PERFORMANCE
+  GROUP BY therapeutic_area
+  ORDER BY avg_roas DESC',
+ 'Ad Ops Analytics', CURRENT_DATE),
+
+('ctr_by_therapeutic_area', 'SV_CAMPAIGN_ANALYTICS', 'CampaignAnalyst',
+ 'Which therapeutic areas have the best CTR?',
+ 'ctr by therapeutic area|click through rate by therapeutic area|which therapeutic area gets the most clicks',
+ 'SELECT therapeutic_area, ROUND(AVG(ctr_pct), 3) AS avg_ctr_pct, SUM(total_engagements) AS engagements,
+         SUM(total_impressions) AS impressions
+  FROM AD_TECH.ANALYTICS.T_CAMPAIGN_PERFORMANCE
+  GROUP BY therapeutic_area
+  ORDER BY avg_ctr_pct DESC',
+ 'Ad Ops Analytics', CURRENT_DATE),
+
+('revenue_by_partner', 'SV_CAMPAIGN_ANALYTICS', 'CampaignAnalyst',
+ 'Which partners generate the most revenue?',
+ 'top partners by revenue|revenue by pharma partner|which advertisers spend the most|partner revenue ranking',
+ 'SELECT partner_name, partner_tier, COUNT(*) AS campaigns, SUM(total_revenue) AS revenue,
+         SUM(total_spend) AS spend, ROUND(AVG(roas), 2) AS avg_roas
+  FROM AD_TECH.ANALYTICS.T_CAMPAIGN_PERFORMANCE
+  GROUP BY partner_name, partner_tier
+  ORDER BY revenue DESC
+  LIMIT {n}',
+ 'Ad Ops Analytics', CURRENT_DATE),
+
+('partner_performance', 'SV_CAMPAIGN_ANALYTICS', 'CampaignAnalyst',
+ 'How are {partner_name} campaigns performing?',
+ 'what is the roas for {partner_name} campaigns|show {partner_name} campaign performance|{partner_name} campaigns',
+ 'SELECT campaign_name, drug_name, therapeutic_area, status, total_impressions,
+         ROUND(win_rate_pct, 1) AS win_rate_pct, ROUND(ctr_pct, 3) AS ctr_pct, ROUND(roas, 2) AS roas, total_revenue
+  FROM AD_TECH.ANALYTICS.T_CAMPAIGN_PERFORMANCE
+  WHERE partner_name = {partner_name}
+  ORDER BY roas DESC',
+ 'Ad Ops Analytics', CURRENT_DATE),
+
+('area_performance', 'SV_CAMPAIGN_ANALYTICS', 'CampaignAnalyst',
+ 'How are {therapeutic_area} campaigns performing?',
+ 'what is the roas for {therapeutic_area} campaigns|show {therapeutic_area} campaigns|{therapeutic_area} campaign performance',
+ 'SELECT campaign_name, partner_name, drug_name, status, total_impressions,
+         ROUND(ctr_pct, 3) AS ctr_pct, ROUND(roas, 2) AS roas, total_revenue
+  FROM AD_TECH.ANALYTICS.T_CAMPAIGN_PERFORMANCE
+  WHERE therapeutic_area = {therapeutic_area}
+  ORDER BY roas DESC',
+ 'Ad Ops Analytics', CURRENT_DATE),
+
+('drug_performance', 'SV_CAMPAIGN_ANALYTICS', 'CampaignAnalyst',
+ 'How is the {drug_name} campaign performing?',
+ 'what is the roas for {drug_name}|show {drug_name} campaign results|{drug_name} performance',
+ 'SELECT campaign_name, partner_name, status, total_impressions, ROUND(win_rate_pct, 1) AS win_rate_pct,
+         ROUND(ctr_pct, 3) AS ctr_pct, ROUND(roas, 2) AS roas, total_revenue, total_spend
+  FROM AD_TECH.ANALYTICS.T_CAMPAIGN_PERFORMANCE
+  WHERE drug_name = {drug_name}',
+ 'Ad Ops Analytics', CURRENT_DATE),
+
+('active_campaign_summary', 'SV_CAMPAIGN_ANALYTICS', 'CampaignAnalyst',
+ 'How many active campaigns are there?',
+ 'active campaign count|number of active campaigns|how many campaigns are running',
+ 'SELECT COUNT(*) AS active_campaigns, SUM(budget) AS budget, SUM(total_impressions) AS impressions,
+         ROUND(AVG(roas), 2) AS avg_roas
+  FROM AD_TECH.ANALYTICS.T_CAMPAIGN_PERFORMANCE
+  WHERE status = ''Active''',
+ 'Ad Ops Analytics', CURRENT_DATE),
+
+-- ----------------------------------------------------------------------------
+-- InventoryAnalyst - SV_INVENTORY_ANALYTICS
+-- ----------------------------------------------------------------------------
+('cpm_by_region', 'SV_INVENTORY_ANALYTICS', 'InventoryAnalyst',
+ 'What is the average CPM by region?',
+ 'cpm by region|inventory by region|compare slot prices across regions',
+ 'SELECT region, COUNT(*) AS slots, ROUND(AVG(base_cpm), 2) AS avg_cpm,
+         SUM(estimated_daily_impressions) AS daily_impressions, ROUND(AVG(fill_rate_pct), 1) AS avg_fill_rate_pct
+  FROM AD_TECH.ANALYTICS.T_INVENTORY_ANALYTICS
+  GROUP BY region
+  ORDER BY avg_cpm DESC',
+ 'Ad Ops Analytics', CURRENT_DATE),
+
+('top_slots_by_engagement', 'SV_INVENTORY_ANALYTICS', 'InventoryAnalyst',
+ 'Which ad slots have the highest engagement rate?',
+ 'top placements by engagement|best performing slots|highest engagement inventory',
+ 'SELECT slot_name, facility_name, region, specialty_name, ROUND(engagement_rate_pct, 2) AS engagement_rate_pct,
+         base_cpm, ROUND(fill_rate_pct, 1) AS fill_rate_pct
+  FROM AD_TECH.ANALYTICS.T_INVENTORY_ANALYTICS
+  ORDER BY engagement_rate_pct DESC
+  LIMIT {n}',
+ 'Ad Ops Analytics', CURRENT_DATE),
+
+('premium_slots_in_region', 'SV_INVENTORY_ANALYTICS', 'InventoryAnalyst',
+ 'Show premium slots in the {region}',
+ 'premium placements in the {region}|premium inventory {region}|find premium slots in {region}',
+ 'SELECT slot_name, facility_name, city, state, specialty_name, daypart, base_cpm,
+         ROUND(engagement_rate_pct, 2) AS engagement_rate_pct
+  FROM AD_TECH.ANALYTICS.T_INVENTORY_ANALYTICS
+  WHERE is_premium AND region = {region}
+  ORDER BY engagement_rate_pct DESC',
+ 'Ad Ops Analytics', CURRENT_DATE),
+
+('slots_for_specialty', 'SV_INVENTORY_ANALYTICS', 'InventoryAnalyst',
+ 'What inventory is available in {specialty_name} clinics?',
+ 'find slots in {specialty_name} clinics|{specialty_name} inventory|best placements for {specialty_name}',
+ 'SELECT slot_name, facility_name, region, screen_type, daypart, base_cpm,
+         ROUND(engagement_rate_pct, 2) AS engagement_rate_pct, ROUND(fill_rate_pct, 1) AS fill_rate_pct
+  FROM AD_TECH.ANALYTICS.T_INVENTORY_ANALYTICS
+  WHERE specialty_name = {specialty_name}
+  ORDER BY engagement_rate_pct DESC',
+ 'Ad Ops Analytics', CURRENT_DATE),
+
+-- ----------------------------------------------------------------------------
+-- AudienceAnalyst - SV_AUDIENCE_INSIGHTS
+-- ----------------------------------------------------------------------------
+('top_cohorts_by_engagement', 'SV_AUDIENCE_INSIGHTS', 'AudienceAnalyst',
+ 'Which audience segments have the highest engagement?',
+ 'top cohorts by engagement rate|most engaged audiences|best audience segments',
+ 'SELECT cohort_name, age_bucket, region, health_interest, cohort_size,
+         ROUND(engagement_rate_pct, 2) AS engagement_rate_pct, ROUND(conversion_rate_pct, 2) AS conversion_rate_pct
+  FROM AD_TECH.ANALYTICS.T_AUDIENCE_INSIGHTS
+  ORDER BY engagement_rate_pct DESC
+  LIMIT {n}',
+ 'Ad Ops Analytics', CURRENT_DATE),
+
+('converting_cohorts_in_region', 'SV_AUDIENCE_INSIGHTS', 'AudienceAnalyst',
+ 'Show me high-conversion audience cohorts in the {region}',
+ 'best converting segments in the {region}|{region} audience cohorts by conversion rate|top cohorts in {region}',
+ 'SELECT cohort_name, age_bucket, income_bracket, health_interest, cohort_size,
+         ROUND(conversion_rate_pct, 2) AS conversion_rate_pct, ROUND(engagement_rate_pct, 2) AS engagement_rate_pct
+  FROM AD_TECH.ANALYTICS.T_AUDIENCE_INSIGHTS
+  WHERE region = {region}
+  ORDER BY conversion_rate_pct DESC',
+ 'Ad Ops Analytics', CURRENT_DATE),
+
+('revenue_by_income', 'SV_AUDIENCE_INSIGHTS', 'AudienceAnalyst',
+ 'What is cohort revenue by income bracket?',
+ 'revenue by income|which income brackets generate the most revenue|revenue per member by income bracket',
+ 'SELECT income_bracket, COUNT(*) AS cohorts, SUM(cohort_size) AS members, SUM(cohort_revenue) AS revenue,
+         ROUND(AVG(revenue_per_member), 2) AS revenue_per_member
+  FROM AD_TECH.ANALYTICS.T_AUDIENCE_INSIGHTS
+  GROUP BY income_bracket
+  ORDER BY revenue DESC',
+ 'Ad Ops Analytics', CURRENT_DATE);
+
+SELECT 'Verified query repository created!' AS status;
+
+
+-- ============================================================================
+-- VERIFICATION
+-- ============================================================================
+SELECT semantic_view, tool, COUNT(*) AS verified_queries
+FROM VERIFIED_QUERIES
+GROUP BY semantic_view, tool
+ORDER BY semantic_view;
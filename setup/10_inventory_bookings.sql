@@ -0,0 +1,83 @@
+/*
+=============================================================================
+PatientPoint Ad Tech Demo - Inventory Reservations
+=============================================================================
+T_INVENTORY_ANALYTICS describes each slot's daily impression volume but not
+how much of it is already sold. T_SLOT_RESERVATIONS records reserved
+impressions per slot per day range. The app's booking engine
+(streamlit/ad_tech/booking.py) loads the open reservations into per-slot
+capacity calendars:
+
+    free(slot, day) = estimated_daily_impressions - SUM(reserved that day)
+
+- A booking is checked inside the transaction that writes it. The app
+  takes the row lock in T_SLOT_BOOKING_LOCK (so bookings from every app
+  process run one at a time), re-reads the stored reservations of the
+  booked slots and sums them per day. If any slot would go below zero on
+  any day, the transaction rolls back and the whole booking is rejected
+  with the conflicting slots and days.
+- Otherwise every slot of the booking is written in one INSERT and
+  committed, so a booking lands completely or not at all.
+
+Run after 02_demo_data.sql. Run time: < 5 seconds
+=============================================================================
+*/
+
+USE ROLE SF_INTELLIGENCE_DEMO;
+USE DATABASE AD_TECH;
+USE SCHEMA ANALYTICS;
+USE WAREHOUSE AD_TECH_WH;
+
+-- ============================================================================
+-- STEP 1: Reservations
+-- ============================================================================
+CREATE TABLE IF NOT EXISTS T_SLOT_RESERVATIONS (
+    booking_id VARCHAR(40),                 -- shared by every slot of one booking
+    slot_id VARCHAR(20),
+    start_date DATE,
+    end_date DATE,                          -- inclusive
+    daily_impressions INT,
+    campaign_id VARCHAR(20),
+    created_at TIMESTAMP_NTZ DEFAULT CURRENT_TIMESTAMP()
+);
+
+-- One row; bookings UPDATE it first, which holds its lock until COMMIT
+CREATE TABLE IF NOT EXISTS T_SLOT_BOOKING_LOCK (
+    lock_name VARCHAR(20),
+    locked_at TIMESTAMP_NTZ
+);
+
+INSERT INTO T_SLOT_BOOKING_LOCK (lock_name, locked_at)
+SELECT 'reservations', CURRENT_TIMESTAMP()
+WHERE NOT EXISTS (SELECT 1 FROM T_SLOT_BOOKING_LOCK WHERE lock_name = 'reservations');
+
+-- A few sample bookings so the calendars aren't empty
+INSERT INTO T_SLOT_RESERVATIONS (booking_id, slot_id, start_date, end_date, daily_impressions, campaign_id)
+SELECT 'BKG-SEED-' || ROW_NUMBER() OVER (ORDER BY slot_id),
+       slot_id,
+       DATEADD(day, 3, CURRENT_DATE()),
+       DATEADD(day, 33, CURRENT_DATE()),
+       ROUND(estimated_daily_impressions * 0.6),
+       'CAMP-00001'
+FROM T_INVENTORY_ANALYTICS
+WHERE is_premium AND specialty_name = 'Cardiology'
+  AND NOT EXISTS (SELECT 1 FROM T_SLOT_RESERVATIONS WHERE booking_id LIKE 'BKG-SEED-%');
+
+SELECT 'Inventory reservations ready!' AS status;
+
+
+-- ============================================================================
+-- VERIFICATION: days in the next 30 where a slot is oversold (should be none)
+-- ============================================================================
+WITH days AS (
+    SELECT DATEADD(day, SEQ4(), CURRENT_DATE()) AS day
+    FROM TABLE(GENERATOR(ROWCOUNT => 30))
+)
+SELECT i.slot_id, d.day, i.estimated_daily_impressions AS capacity,
+       SUM(r.daily_impressions) AS reserved
+FROM days d
+JOIN T_SLOT_RESERVATIONS r ON d.day BETWEEN r.start_date AND r.end_date
+JOIN T_INVENTORY_ANALYTICS i ON i.slot_id = r.slot_id
+GROUP BY i.slot_id, d.day, i.estimated_daily_impressions
+HAVING SUM(r.daily_impressions) > i.estimated_daily_impressions
+ORDER BY d.day, i.slot_id;
@@ -0,0 +1,91 @@
+/*
+=============================================================================
+PatientPoint Ad Tech Demo - Multi-Touch Attribution
+=============================================================================
+total_conversions, total_revenue and roas in T_CAMPAIGN_PERFORMANCE are
+single precomputed numbers. Once raw events land in the RAW schema, the
+attribution job (streamlit/ad_tech/attribution.py) recomputes them:
+
+- It joins each conversion to the same person's impressions for the brand
+  in the lookback window before it.
+- It splits the conversion's revenue across those touches under four
+  models: last-touch, linear, time-decay and Shapley.
+- It writes campaign- and slot-level attributed revenue to
+  T_ATTRIBUTED_REVENUE.
+
+    cd streamlit && python -m ad_tech.attribution --source warehouse --write
+
+V_CAMPAIGN_ATTRIBUTION sets each model's revenue and ROAS next to the
+reported numbers.
+
+Run after 02_demo_data.sql. Run time: < 5 seconds
+=============================================================================
+*/
+
+USE ROLE SF_INTELLIGENCE_DEMO;
+USE DATABASE AD_TECH;
+USE WAREHOUSE AD_TECH_WH;
+
+-- ============================================================================
+-- STEP 1: Raw events (loaded by the ad server and conversion feeds)
+-- ============================================================================
+CREATE TABLE IF NOT EXISTS RAW.T_IMPRESSION_EVENTS (
+    person_id NUMBER(38,0),                 -- hashed patient / device id
+    campaign_id VARCHAR(20),
+    slot_id VARCHAR(20),
+    event_ts TIMESTAMP_NTZ
+)
+CLUSTER BY (TO_DATE(event_ts));
+
+CREATE TABLE IF NOT EXISTS RAW.T_CONVERSION_EVENTS (
+    person_id NUMBER(38,0),
+    drug_name VARCHAR(50),                  -- the brand converted on
+    event_ts TIMESTAMP_NTZ,
+    revenue NUMBER(18,2)
+);
+
+-- ============================================================================
+-- STEP 2: Attributed revenue (written by the attribution job)
+-- ============================================================================
+CREATE TABLE IF NOT EXISTS ANALYTICS.T_ATTRIBUTED_REVENUE (
+    model VARCHAR(20),                      -- last_touch | linear | time_decay | shapley
+    level VARCHAR(10),                      -- campaign | slot
+    key_id VARCHAR(20),                     -- campaign_id or slot_id
+    attributed_conversions NUMBER(18,4),
+    attributed_revenue NUMBER(18,2),
+    lookback_days INT,
+    computed_at TIMESTAMP_NTZ
+);
+
+-- ============================================================================
+-- STEP 3: Reported vs attributed, per campaign and model
+-- ============================================================================
+CREATE OR REPLACE VIEW ANALYTICS.V_CAMPAIGN_ATTRIBUTION AS
+SELECT
+    c.campaign_id,
+    c.campaign_name,
+    c.drug_name,
+    a.model,
+    c.total_conversions AS reported_conversions,
+    ROUND(a.attributed_conversions, 1) AS attributed_conversions,
+    c.total_revenue AS reported_revenue,
+    a.attributed_revenue,
+    c.roas AS reported_roas,
+    ROUND(a.attributed_revenue / NULLIF(c.total_spend, 0), 4) AS attributed_roas,
+    a.computed_at
+FROM ANALYTICS.T_CAMPAIGN_PERFORMANCE c
+JOIN ANALYTICS.T_ATTRIBUTED_REVENUE a
+  ON a.level = 'campaign' AND a.key_id = c.campaign_id;
+
+SELECT 'Attribution tables ready!' AS status;
+
+
+-- ============================================================================
+-- VERIFICATION: every model should distribute the same total revenue
+-- ============================================================================
+SELECT model, level, COUNT(*) AS rows_written,
+       SUM(attributed_revenue) AS total_revenue,
+       MAX(computed_at) AS computed_at
+FROM ANALYTICS.T_ATTRIBUTED_REVENUE
+GROUP BY model, level
+ORDER BY level, model;
@@ -0,0 +1,111 @@
+/*
+=============================================================================
+PatientPoint Ad Tech Demo - Partner-Scoped Views
+=============================================================================
+When pharma partners get their own logins, a row access policy on the
+shared tables would add a partner_name check to every dashboard query,
+evaluated per row on every scan. This script precomputes partner-scoped
+copies instead:
+
+1. T_PARTNER_USERS      - which Snowflake user belongs to which partner
+2. T_PARTNER_CAMPAIGNS  - campaign rows, clustered by partner_id
+3. T_PARTNER_DAILY      - day / campaign totals (slots summed out),
+                          clustered by (partner_id, date_day)
+
+The app (streamlit/ad_tech/partners.py) resolves the logged-in user's
+partner once and filters every dashboard query on partner_id = <literal>.
+That equality prunes the clustered micro-partitions, so a partner's
+dashboard reads only that partner's partitions. Its results are cached
+under that partner's namespace in the app's result cache.
+
+The row access policy in STEP 4 only protects direct SQL access from
+partner roles. The app's owner role short-circuits it before any lookup.
+
+Run after 06_daily_facts.sql. Run time: < 10 seconds
+=============================================================================
+*/
+
+USE ROLE SF_INTELLIGENCE_DEMO;
+USE DATABASE AD_TECH;
+USE SCHEMA ANALYTICS;
+USE WAREHOUSE AD_TECH_WH;
+
+-- ============================================================================
+-- STEP 1: Partner logins
+-- ============================================================================
+CREATE TABLE IF NOT EXISTS T_PARTNER_USERS (
+    user_name VARCHAR(100),                 -- CURRENT_USER() of the partner login
+    partner_id INT,
+    granted_at TIMESTAMP_NTZ DEFAULT CURRENT_TIMESTAMP()
+);
+
+-- ============================================================================
+-- STEP 2: Campaigns per partner
+-- ============================================================================
+CREATE OR REPLACE DYNAMIC TABLE T_PARTNER_CAMPAIGNS
+    TARGET_LAG = '1 hour'
+    WAREHOUSE = AD_TECH_WH
+    CLUSTER BY (partner_id)
+AS
+SELECT
+    partner_id, partner_name, partner_tier,
+    campaign_id, campaign_name, drug_name, therapeutic_area, campaign_type, status,
+    start_date, end_date, budget,
+    total_bids, winning_bids, total_impressions, total_engagements, total_conversions,
+    total_revenue, total_spend, roas
+FROM T_CAMPAIGN_PERFORMANCE;
+
+-- ============================================================================
+-- STEP 3: Daily totals per partner and campaign
+-- ============================================================================
+CREATE OR REPLACE DYNAMIC TABLE T_PARTNER_DAILY
+    TARGET_LAG = '1 hour'
+    WAREHOUSE = AD_TECH_WH
+    CLUSTER BY (partner_id, date_day)
+AS
+SELECT
+    partner_id, date_day, campaign_id,
+    SUM(total_bids) AS total_bids, SUM(winning_bids) AS winning_bids,
+    SUM(impressions) AS impressions, SUM(engagements) AS engagements,
+    SUM(conversions) AS conversions, SUM(revenue) AS revenue, SUM(spend) AS spend
+FROM T_CAMPAIGN_DAILY
+GROUP BY partner_id, date_day, campaign_id;
+
+-- ============================================================================
+-- STEP 4: Direct SQL access from partner roles
+-- ============================================================================
+CREATE OR REPLACE ROW ACCESS POLICY PARTNER_ROWS AS (row_partner_id INT) RETURNS BOOLEAN ->
+    IS_ROLE_IN_SESSION('SF_INTELLIGENCE_DEMO')
+    OR EXISTS (
+        SELECT 1 FROM AD_TECH.ANALYTICS.T_PARTNER_USERS u
+        WHERE u.user_name = CURRENT_USER() AND u.partner_id = row_partner_id
+    );
+
+ALTER DYNAMIC TABLE T_PARTNER_CAMPAIGNS ADD ROW ACCESS POLICY PARTNER_ROWS ON (partner_id);
+ALTER DYNAMIC TABLE T_PARTNER_DAILY ADD ROW ACCESS POLICY PARTNER_ROWS ON (partner_id);
+
+SELECT 'Partner-scoped views ready!' AS status;
+
+
+-- ============================================================================
+-- VERIFICATION: one row per partner; daily revenue covers days to date only
+-- ============================================================================
+SELECT
+    c.partner_id,
+    c.partner_name,
+    c.campaigns,
+    c.lifetime_revenue,
+    d.daily_revenue
+FROM (
+    SELECT partner_id, partner_name, COUNT(*) AS campaigns, SUM(total_revenue) AS lifetime_revenue
+    FROM T_PARTNER_CAMPAIGNS
+    GROUP BY partner_id, partner_name
+) c
+LEFT JOIN (
+    SELECT partner_id, SUM(revenue) AS daily_revenue
+    FROM T_PARTNER_DAILY
+    GROUP BY partner_id
+) d ON d.partner_id = c.partner_id
+ORDER BY c.partner_id;
+
+SELECT SYSTEM$CLUSTERING_INFORMATION('T_PARTNER_DAILY', '(partner_id)');
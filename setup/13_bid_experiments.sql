@@ -0,0 +1,84 @@
+/*
+=============================================================================
+PatientPoint Ad Tech Demo - Bid Strategy Experiments
+=============================================================================
+A/B tests of bid strategies on live bid traffic. The app's experiment
+engine (streamlit/ad_tech/experiments.py) assigns each bid request to an
+arm by hashing its slot_id (or request_id) and writes one outcome row per
+auction to T_BID_EXPERIMENT_OUTCOMES.
+
+The sequential test (mSPRT) keeps running sums per arm. On start the app
+rebuilds them from this log with one GROUP BY, so the log is the only
+state that has to survive a restart:
+
+    n, SUM(x), SUM(y), SUM(x*x), SUM(y*y), SUM(x*y)   per experiment / arm
+
+where x / y are the metric's numerator and denominator (ROAS: revenue /
+spend). Promotions and early stops are written back to T_BID_EXPERIMENTS
+(status, winner, decided_at).
+
+Run after 02_demo_data.sql. Run time: < 5 seconds
+=============================================================================
+*/
+
+USE ROLE SF_INTELLIGENCE_DEMO;
+USE DATABASE AD_TECH;
+USE SCHEMA ANALYTICS;
+USE WAREHOUSE AD_TECH_WH;
+
+-- ============================================================================
+-- STEP 1: Experiments
+-- ============================================================================
+CREATE TABLE IF NOT EXISTS T_BID_EXPERIMENTS (
+    experiment_id VARCHAR(20),
+    name VARCHAR(200),
+    arms VARCHAR(200),                      -- comma-separated bid strategies, control first
+    weights VARCHAR(100),                   -- comma-separated traffic weights
+    metric VARCHAR(20),                     -- roas, win_rate, ctr, revenue
+    unit VARCHAR(20),                       -- slot_id or request_id
+    specialty_name VARCHAR(100),            -- scope; NULL means any
+    region VARCHAR(50),
+    daypart VARCHAR(20),
+    alpha FLOAT,
+    status VARCHAR(20),                     -- running, promoted, stopped, inconclusive
+    winner VARCHAR(50),
+    decided_at TIMESTAMP_NTZ,
+    created_at TIMESTAMP_NTZ DEFAULT CURRENT_TIMESTAMP()
+);
+
+-- ============================================================================
+-- STEP 2: Outcome log, clustered so the per-arm sums read one experiment's rows
+-- ============================================================================
+CREATE TABLE IF NOT EXISTS T_BID_EXPERIMENT_OUTCOMES (
+    experiment_id VARCHAR(20),
+    arm INT,                                -- index into arms
+    unit_id VARCHAR(40),
+    numerator FLOAT,
+    denominator FLOAT,
+    logged_at TIMESTAMP_NTZ DEFAULT CURRENT_TIMESTAMP()
+)
+CLUSTER BY (experiment_id);
+
+-- ============================================================================
+-- STEP 3: Starter experiments (shaded bids in Cardiology, a network-wide test)
+-- ============================================================================
+INSERT INTO T_BID_EXPERIMENTS (experiment_id, name, arms, weights, metric, unit, specialty_name, alpha, status)
+SELECT * FROM VALUES
+    ('EXP-SEED-CARDIO', 'Shaded bids vs sweet spot (Cardiology)', 'sweet_spot,shaded', '1,1', 'roas',
+     'slot_id', 'Cardiology', 0.05, 'running'),
+    ('EXP-SEED-NETWORK', 'Three-way bid test (network)', 'sweet_spot,shaded,aggressive', '1,1,1', 'roas',
+     'slot_id', NULL, 0.05, 'running')
+WHERE NOT EXISTS (SELECT 1 FROM T_BID_EXPERIMENTS WHERE experiment_id LIKE 'EXP-SEED-%');
+
+SELECT 'Bid experiments ready!' AS status;
+
+
+-- ============================================================================
+-- VERIFICATION: outcomes per experiment and arm
+-- ============================================================================
+SELECT e.name, e.status, o.arm, SPLIT_PART(e.arms, ',', o.arm + 1) AS strategy,
+       COUNT(*) AS outcomes, SUM(o.numerator) / NULLIF(SUM(o.denominator), 0) AS metric_value
+FROM T_BID_EXPERIMENT_OUTCOMES o
+JOIN T_BID_EXPERIMENTS e ON e.experiment_id = o.experiment_id
+GROUP BY e.name, e.status, o.arm, e.arms
+ORDER BY e.name, o.arm;
@@ -15,6 +15,13 @@ Deploy to Snowflake:
 
 import streamlit as st
 
+from ad_tech import content
+from ad_tech.runtime import get_summary, in_snowflake
+from ad_tech.snapshots import format_age
+
+# Headline numbers come from the shared summary service (placeholders in demo mode)
+summary = get_summary() if in_snowflake() else None
+
 # Page configuration
 st.set_page_config(
     page_title="PatientPoint Ad Tech Optimizer",
@@ -24,43 +31,7 @@ st.set_page_config(
 )
 
 # Custom CSS for better styling
-st.markdown("""
-<style>
-    .main-header {
-        font-size: 2.5rem;
-        font-weight: 700;
-        color: #1E3A5F;
-        margin-bottom: 0.5rem;
-    }
-    .sub-header {
-        font-size: 1.2rem;
-        color: #666;
-        margin-bottom: 2rem;
-    }
-    .metric-card {
-        background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-        padding: 1.5rem;
-        border-radius: 12px;
-        color: white;
-        text-align: center;
-    }
-    .feature-card {
-        background: #f8f9fa;
-        padding: 1.5rem;
-        border-radius: 12px;
-        border-left: 4px solid #667eea;
-        margin-bottom: 1rem;
-    }
-    .stButton>button {
-        background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-        color: white;
-        border: none;
-        padding: 0.5rem 2rem;
-        border-radius: 8px;
-        font-weight: 600;
-    }
-</style>
-""", unsafe_allow_html=True)
+st.markdown(content.HOME_CSS, unsafe_allow_html=True)
 
 # Header
 st.markdown('<p class="main-header">🏥 PatientPoint Ad Tech Optimizer</p>', unsafe_allow_html=True)
@@ -76,31 +47,34 @@ col1, col2, col3, col4 = st.columns(4)
 with col1:
     st.metric(
         label="📊 Active Campaigns",
-        value="100+",
-        delta="12 new this month"
+        value=f"{summary.active_campaigns:,}" if summary else "100+",
+        delta=f"{summary.new_campaigns:,} new this month" if summary else "12 new this month"
     )
 
 with col2:
     st.metric(
         label="📍 Ad Placements",
-        value="5,000+",
-        delta="500 facilities"
+        value=f"{summary.slots:,}" if summary else "5,000+",
+        delta=f"{summary.facilities:,} facilities" if summary else "500 facilities"
     )
 
 with col3:
     st.metric(
         label="👥 Audience Cohorts",
-        value="200+",
+        value=f"{summary.cohorts:,}" if summary else "200+",
         delta="Privacy-safe"
     )
 
 with col4:
     st.metric(
         label="💊 Pharma Partners",
-        value="20",
+        value=f"{summary.partners:,}" if summary else "20",
         delta="Top-tier brands"
     )
 
+if summary:
+    st.caption(f"Updated {format_age(summary.age())} ago")
+
 st.divider()
 
 # Feature Cards
@@ -109,77 +83,21 @@ st.markdown("## 🚀 Demo Features")
 col1, col2 = st.columns(2)
 
 with col1:
-    st.markdown("""
-    <div class="feature-card">
-        <h3>📈 Campaign Optimizer</h3>
-        <p>Real-time bid optimization and campaign performance analytics. 
-        Get AI-powered pricing recommendations based on historical data.</p>
-        <ul>
-            <li>Optimal bid price predictions</li>
-            <li>ROAS analysis by therapeutic area</li>
-            <li>Partner performance comparisons</li>
-        </ul>
-    </div>
-    """, unsafe_allow_html=True)
+    st.markdown(content.FEATURE_CAMPAIGN_OPTIMIZER, unsafe_allow_html=True)
     
-    st.markdown("""
-    <div class="feature-card">
-        <h3>🔍 Inventory Explorer</h3>
-        <p>Natural language search to discover available ad placements 
-        across medical facilities nationwide.</p>
-        <ul>
-            <li>Search by specialty (Cardiology, Endocrinology, etc.)</li>
-            <li>Filter by region, screen type, daypart</li>
-            <li>View pricing and performance metrics</li>
-        </ul>
-    </div>
-    """, unsafe_allow_html=True)
+    st.markdown(content.FEATURE_INVENTORY_EXPLORER, unsafe_allow_html=True)
 
 with col2:
-    st.markdown("""
-    <div class="feature-card">
-        <h3>🤖 AI Agent Chat</h3>
-        <p>Conversational AI assistant powered by Snowflake Cortex Agent 
-        for intelligent campaign optimization.</p>
-        <ul>
-            <li>Natural language queries</li>
-            <li>Multi-tool orchestration</li>
-            <li>Automated visualizations</li>
-        </ul>
-    </div>
-    """, unsafe_allow_html=True)
+    st.markdown(content.FEATURE_AGENT_CHAT, unsafe_allow_html=True)
     
-    st.markdown("""
-    <div class="feature-card">
-        <h3>👥 Audience Insights</h3>
-        <p>Privacy-safe audience cohort discovery with HIPAA-compliant 
-        analytics (k-anonymity enforced).</p>
-        <ul>
-            <li>Demographic segmentation</li>
-            <li>Engagement pattern analysis</li>
-            <li>Lookalike cohort discovery</li>
-        </ul>
-    </div>
-    """, unsafe_allow_html=True)
+    st.markdown(content.FEATURE_AUDIENCE_INSIGHTS, unsafe_allow_html=True)
 
 st.divider()
 
 # Quick Start Section
 st.markdown("## 🎬 Demo Scenarios")
 
-st.info("""
-**Try these questions with the AI Agent:**
-
-1. **Pricing Optimization:** "What's the optimal bid price for a diabetes campaign in cardiology waiting rooms?"
-
-2. **Audience Targeting:** "Which audience segments have the highest engagement for heart medications?"
-
-3. **Campaign Analysis:** "Compare Q4 2024 vs Q3 2024 campaign performance across all partners"
-
-4. **Inventory Discovery:** "Find premium morning slots in Texas endocrinology clinics"
-
-5. **Cross-functional:** "I'm launching a new GLP-1 drug. Recommend inventory and target audiences."
-""")
+st.info(content.DEMO_SCENARIOS)
 
 # Navigation
 st.markdown("## 📍 Navigate to Demo")
@@ -202,29 +120,7 @@ st.divider()
 
 # Architecture
 with st.expander("🏗️ Technical Architecture"):
-    st.markdown("""
-    ### Snowflake Capabilities Demonstrated
-    
-    | Component | Snowflake Feature | Purpose |
-    |-----------|-------------------|---------|
-    | Data Model | Dynamic Tables & Views | Real-time aggregations |
-    | Semantic Layer | Semantic Views | Natural language to SQL |
-    | Search | Cortex Search Services | Unstructured data discovery |
-    | AI Assistant | Cortex Agents | Multi-tool orchestration |
-    | Visualization | Data to Chart | Automated chart generation |
-    | Application | Streamlit in Snowflake | Interactive demo UI |
-    
-    ### Data Pipeline
-    ```
-    Raw Data → Bronze Layer → Silver (Dim/Fact) → Gold (Aggregates) → Semantic Views → Cortex Agent
-    ```
-    
-    ### Privacy & Compliance
-    - All patient data is synthetic (HIPAA-safe demo)
-    - K-anonymity enforced (minimum cohort size = 50)
-    - Row-level security ready
-    - Audit logging enabled
-    """)
+    st.markdown(content.ARCHITECTURE)
 
 # Footer
 st.divider()
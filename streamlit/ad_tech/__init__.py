@@ -0,0 +1,9 @@
+"""
+=============================================================================
+PatientPoint Ad Tech Demo - Shared Application Package
+=============================================================================
+Helpers shared by the Streamlit pages and the command-line tools that sit
+next to them. Modules are imported individually (``from ad_tech import
+bidding``) so that a page only pays for what it uses.
+=============================================================================
+"""
@@ -0,0 +1,179 @@
+"""
+=============================================================================
+PatientPoint Ad Tech Demo - Agent Calls
+=============================================================================
+The two ways the chat page answers a prompt:
+
+- call_cortex_agent()      : Cortex COMPLETE through the Snowpark session,
+                             bounded by the agent's orchestration budget and
+                             cancellable while the query is running
+- generate_demo_response() : answers from the demo data outside Snowflake,
+                             without a model (see answers.py)
+
+Both take the same (prompt, timeout, cancel_event) arguments so the request
+queue (agent_queue.py) can schedule either one.
+=============================================================================
+"""
+
+from __future__ import annotations
+
+import math
+import threading
+import time
+from typing import Optional
+
+# Mirrors orchestration.budget in setup/05_cortex_agent.sql
+BUDGET_SECONDS = 60.0
+BUDGET_TOKENS = 32000
+
+AGENT_MODEL = "claude-3-5-sonnet"
+POLL_INTERVAL = 0.1
+
+AGENT_SQL = """
+SELECT SNOWFLAKE.CORTEX.COMPLETE(
+    ?,
+    CONCAT(
+        'You are a healthcare advertising optimization expert for PatientPoint. ',
+        'Answer this question about pharmaceutical advertising campaigns: ',
+        ?
+    )
+) AS response
+"""
+
+# Shown in demo mode when a prompt fits none of the answer engine's intents
+DEMO_HELP = """
+## 🤖 PatientPoint Campaign Optimizer
+
+I can help you with:
+
+### 📊 Campaign Analytics
+- Performance metrics (ROAS, CTR, conversions)
+- Partner comparisons
+- Quarter-over-quarter and period comparisons
+
+### 💰 Bid Optimization
+- Optimal pricing recommendations
+- Win rate predictions
+- CPM analysis by specialty
+
+### 🔍 Inventory Discovery
+- Available ad placements
+- Slot characteristics
+- Regional availability
+
+### 👥 Audience Targeting
+- High-engagement cohorts
+- Demographic analysis
+
+**Try asking something like:**
+- "What's the optimal bid for diabetes campaigns in cardiology?"
+- "Find premium inventory in the Southwest"
+- "Which audiences respond best to oncology medications?"
+
+*Note: Running in demo mode. For full functionality, deploy to Snowflake.*
+"""
+
+
+class AgentError(Exception):
+    """Base class for agent request failures."""
+
+
+class AgentBusyError(AgentError):
+    """The request was refused because a concurrency or queue limit was hit."""
+
+
+class AgentTimeoutError(AgentError):
+    """The request ran past its time budget."""
+
+
+class AgentCancelledError(AgentError):
+    """The request was cancelled by the user."""
+
+
+class AgentBudgetError(AgentError):
+    """The prompt alone exceeds the agent's token budget."""
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token) used for budget checks."""
+    return math.ceil(len(text) / 4) if text else 0
+
+
+def check_budget(prompt: str, max_tokens: int = BUDGET_TOKENS) -> int:
+    tokens = estimate_tokens(prompt)
+    if tokens > max_tokens:
+        raise AgentBudgetError(
+            f"Prompt is ~{tokens:,} tokens; the agent budget is {max_tokens:,}."
+        )
+    return tokens
+
+
+def _wait_for_job(job, timeout: float, cancel_event: Optional[threading.Event]):
+    """Poll an async Snowpark job, cancelling it on timeout or user request."""
+    deadline = time.monotonic() + timeout
+    while not job.is_done():
+        if cancel_event is not None and cancel_event.is_set():
+            job.cancel()
+            raise AgentCancelledError("Request cancelled.")
+        if time.monotonic() >= deadline:
+            job.cancel()
+            raise AgentTimeoutError(f"No response within {timeout:.0f} s.")
+        time.sleep(POLL_INTERVAL)
+    return job.result()
+
+
+def call_cortex_agent(
+    session,
+    prompt: str,
+    timeout: float = BUDGET_SECONDS,
+    cancel_event: Optional[threading.Event] = None,
+) -> str:
+    """
+    Call the Cortex Agent via the Snowflake session.
+    The query runs asynchronously so it can be cancelled server-side when the
+    time budget runs out or the user cancels.
+    """
+    check_budget(prompt)
+    try:
+        df = session.sql(AGENT_SQL, params=[AGENT_MODEL, prompt])
+        if hasattr(df, "collect_nowait"):
+            result = _wait_for_job(df.collect_nowait(), timeout, cancel_event)
+        else:
+            result = df.collect()
+
+        if result and len(result) > 0:
+            return result[0]['RESPONSE']
+        else:
+            return "I couldn't generate a response. Please try rephrasing your question."
+
+    except AgentError:
+        raise
+    except Exception as e:
+        # If agent call fails, try a simpler approach
+        return f"Agent processing error. Please try the Snowsight Agent UI directly. Error: {str(e)}"
+
+
+def demo_agent(
+    prompt: str,
+    timeout: float = BUDGET_SECONDS,
+    cancel_event: Optional[threading.Event] = None,
+) -> str:
+    """Queue-compatible wrapper around generate_demo_response()."""
+    check_budget(prompt)
+    return generate_demo_response(prompt)
+
+
+def generate_demo_response(prompt: str, answers=None) -> str:
+    """
+    Answer from the demo data with the offline answer engine (answers.py),
+    or list what can be asked when the prompt fits none of its intents.
+    Used when not connected to Snowflake.
+    """
+    if answers is None:
+        from .runtime import get_answer_engine
+
+        answers = get_answer_engine()
+    answer = answers.answer(prompt)
+    if answer is not None:
+        return answer.markdown()
+    return DEMO_HELP
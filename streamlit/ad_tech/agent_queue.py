@@ -0,0 +1,248 @@
+"""
+=============================================================================
+PatientPoint Ad Tech Demo - Agent Request Queue
+=============================================================================
+One process-wide queue sits in front of every agent call so throughput
+under concurrent users is bounded and predictable:
+
+- at most ``max_concurrent`` calls run at once (worker threads)
+- at most ``max_pending`` more wait in line; beyond that submit() refuses
+- each browser session has at most ``per_session_limit`` (default 1)
+  request in flight, each user at most ``per_user_limit``
+- every request carries a deadline from orchestration.budget (60 s);
+  time spent waiting in line counts against it
+- requests can be cancelled while queued or running; a running Cortex
+  query is cancelled server-side (see agent.call_cortex_agent)
+
+Refusals raise AgentBusyError immediately instead of piling up work that
+would only time out later.
+=============================================================================
+"""
+
+from __future__ import annotations
+
+import itertools
+import threading
+import time
+from concurrent.futures import CancelledError, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Optional
+
+from .agent import (
+    BUDGET_SECONDS,
+    AgentBusyError,
+    AgentCancelledError,
+    AgentTimeoutError,
+    check_budget,
+)
+from .metrics import Counter, LatencyHistogram
+
+# handler(prompt, timeout_seconds, cancel_event) -> response text
+AgentHandler = Callable[[str, float, threading.Event], str]
+
+DEFAULT_MAX_CONCURRENT = 4
+DEFAULT_MAX_PENDING = 16
+DEFAULT_PER_USER_LIMIT = 2
+DEFAULT_PER_SESSION_LIMIT = 1
+
+_ids = itertools.count(1)
+
+
+@dataclass
+class AgentTicket:
+    """Handle for one submitted prompt."""
+
+    prompt: str
+    session_key: str
+    user_key: str
+    deadline: float
+    id: int = field(default_factory=lambda: next(_ids))
+    submitted_at: float = field(default_factory=time.monotonic)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    cancel_event: threading.Event = field(default_factory=threading.Event)
+    expired: bool = False
+    future: object = None
+
+    @property
+    def status(self) -> str:
+        if self.future is None or not self.future.done():
+            return "running" if self.started_at is not None else "queued"
+        if self.future.cancelled():
+            return "cancelled"
+        error = self.future.exception()
+        if error is None:
+            return "done"
+        if isinstance(error, AgentCancelledError):
+            return "cancelled"
+        if isinstance(error, AgentTimeoutError):
+            return "timed_out"
+        return "failed"
+
+    def done(self) -> bool:
+        return self.future is not None and self.future.done()
+
+    def elapsed(self) -> float:
+        return (self.finished_at or time.monotonic()) - self.submitted_at
+
+    def remaining(self) -> float:
+        return max(0.0, self.deadline - time.monotonic())
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block up to ``timeout`` seconds; True once the request has finished."""
+        try:
+            self.future.result(timeout)
+        except FutureTimeout:
+            return False
+        except Exception:
+            pass
+        return True
+
+    def result(self, timeout: Optional[float] = None) -> str:
+        """
+        The response text. Raises AgentTimeoutError once the deadline has
+        passed and AgentCancelledError if the request was cancelled.
+        """
+        wait = self.remaining() if timeout is None else min(timeout, self.remaining())
+        try:
+            return self.future.result(wait)
+        except CancelledError:
+            raise AgentCancelledError("Request cancelled.") from None
+        except FutureTimeout:
+            if self.remaining() > 0:
+                raise
+            self.expired = True
+            self.cancel()
+            raise AgentTimeoutError(f"No response within {self.deadline - self.submitted_at:g} s.") from None
+
+    def cancel(self) -> None:
+        """Cancel the request whether it is still queued or already running."""
+        self.cancel_event.set()
+        if self.future is not None:
+            self.future.cancel()
+
+
+class AgentRequestQueue:
+    """Bounded, deadline-aware executor for agent calls."""
+
+    def __init__(
+        self,
+        handler: AgentHandler,
+        max_concurrent: int = DEFAULT_MAX_CONCURRENT,
+        max_pending: int = DEFAULT_MAX_PENDING,
+        per_user_limit: int = DEFAULT_PER_USER_LIMIT,
+        per_session_limit: int = DEFAULT_PER_SESSION_LIMIT,
+        timeout: float = BUDGET_SECONDS,
+    ):
+        self.handler = handler
+        self.max_concurrent = max_concurrent
+        self.max_pending = max_pending
+        self.per_user_limit = per_user_limit
+        self.per_session_limit = per_session_limit
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrent, thread_name_prefix="agent")
+        self._lock = threading.Lock()
+        self._by_session: Dict[str, int] = {}
+        self._by_user: Dict[str, int] = {}
+        self._in_flight = 0
+        self.running = 0
+        self.wait_time = LatencyHistogram()
+        self.service_time = LatencyHistogram()
+        self.counters = Counter()
+
+    # ------------------------------------------------------------------
+    # Submission
+    # ------------------------------------------------------------------
+    def submit(self, prompt: str, session_key: str, user_key: Optional[str] = None) -> AgentTicket:
+        """Queue ``prompt``; raises AgentBusyError if any limit is reached."""
+        check_budget(prompt)
+        user_key = user_key or session_key
+        with self._lock:
+            if self._by_session.get(session_key, 0) >= self.per_session_limit:
+                self.counters.inc("rejected_session")
+                raise AgentBusyError("Still working on your previous question.")
+            if self._by_user.get(user_key, 0) >= self.per_user_limit:
+                self.counters.inc("rejected_user")
+                raise AgentBusyError(
+                    f"You already have {self.per_user_limit} agent requests running."
+                )
+            if self._in_flight >= self.max_concurrent + self.max_pending:
+                self.counters.inc("rejected_full")
+                raise AgentBusyError("The agent is at capacity. Please try again shortly.")
+            self._by_session[session_key] = self._by_session.get(session_key, 0) + 1
+            self._by_user[user_key] = self._by_user.get(user_key, 0) + 1
+            self._in_flight += 1
+            self.counters.inc("submitted")
+
+        ticket = AgentTicket(
+            prompt=prompt,
+            session_key=session_key,
+            user_key=user_key,
+            deadline=time.monotonic() + self.timeout,
+        )
+        ticket.future = self._executor.submit(self._run, ticket)
+        ticket.future.add_done_callback(lambda _f: self._release(ticket))
+        return ticket
+
+    def _run(self, ticket: AgentTicket) -> str:
+        ticket.started_at = time.monotonic()
+        with self._lock:
+            self.running += 1
+            self.wait_time.record(ticket.started_at - ticket.submitted_at)
+        try:
+            if ticket.cancel_event.is_set():
+                raise AgentCancelledError("Request cancelled.")
+            remaining = ticket.remaining()
+            if remaining <= 0:
+                raise AgentTimeoutError("Request expired while waiting in the queue.")
+            try:
+                response = self.handler(ticket.prompt, remaining, ticket.cancel_event)
+            except AgentCancelledError:
+                if ticket.expired:
+                    raise AgentTimeoutError(f"No response within {self.timeout:g} s.") from None
+                raise
+            if ticket.expired or ticket.remaining() <= 0:
+                raise AgentTimeoutError(f"No response within {self.timeout:g} s.")
+            if ticket.cancel_event.is_set():
+                raise AgentCancelledError("Request cancelled.")
+            return response
+        finally:
+            with self._lock:
+                self.running -= 1
+                self.service_time.record(time.monotonic() - ticket.started_at)
+
+    def _release(self, ticket: AgentTicket) -> None:
+        ticket.finished_at = time.monotonic()
+        with self._lock:
+            for counts, key in ((self._by_session, ticket.session_key), (self._by_user, ticket.user_key)):
+                left = counts.get(key, 0) - 1
+                if left > 0:
+                    counts[key] = left
+                else:
+                    counts.pop(key, None)
+            self._in_flight -= 1
+            self.counters.inc(ticket.status)
+
+    # ------------------------------------------------------------------
+    # Introspection
+    # ------------------------------------------------------------------
+    def in_flight(self, session_key: Optional[str] = None) -> int:
+        with self._lock:
+            if session_key is None:
+                return self._in_flight
+            return self._by_session.get(session_key, 0)
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            return {
+                "in_flight": self._in_flight,
+                "running": self.running,
+                "queued": self._in_flight - self.running,
+                "counters": dict(self.counters.values),
+                "wait": self.wait_time.summary(),
+                "service": self.service_time.summary(),
+            }
+
+    def shutdown(self, cancel_pending: bool = True) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=cancel_pending)
@@ -0,0 +1,397 @@
+"""
+=============================================================================
+PatientPoint Ad Tech Demo - Streaming KPI Anomaly Detection
+=============================================================================
+Watches campaign win rate, slot fill rate (share of bid requests filled),
+and CTR and ROAS for both, as daily rows land in T_CAMPAIGN_DAILY, instead
+of waiting for someone to ask the agent about underperformers.
+
+AnomalyDetector keeps O(1) state per (series, KPI) in preallocated numpy
+arrays: an EWMA level, an EWMA absolute deviation and a count. A batch of
+observations (one per series) updates every series at once:
+
+  shift : robust z = (x - level) / (1.25 * deviation) beyond
+          SHIFT_Z_THRESHOLD after WARMUP observations - a sudden move
+          against the series' own history. Observations are clipped to
+          the band before they update the state, so one spike cannot
+          drag the level with it.
+  peer  : after each batch, each series' level is compared with the
+          other series of its kind (median / MAD of log levels, as the
+          KPIs are ratios). Levels PEER_Z_THRESHOLD or more below the
+          peers flag persistent underperformers such as the ROAS
+          1.0-2.0 campaigns in the demo data.
+
+Memory is bounded by ``max_series``: the stalest series are evicted when
+a new one needs a row. KpiMonitor feeds the detector from T_CAMPAIGN_DAILY
+(complete days only) and a MonitorRefresher thread polls for new days.
+=============================================================================
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+import warnings
+from collections import deque
+from dataclasses import dataclass
+from datetime import date, timedelta
+from typing import Callable, Deque, Dict, Hashable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from .data_access import fetch_arrow
+from .metrics import MetricsRegistry, registry
+
+KPIS = ("win_rate", "fill_rate", "ctr", "roas")
+KINDS = ("campaign", "slot")
+ALPHA = 0.1                     # EWMA weight of the newest observation
+WARMUP = 14                     # observations before a series can alert on shifts
+SHIFT_Z_THRESHOLD = 4.0
+PEER_Z_THRESHOLD = 2.0
+MIN_RELATIVE_SCALE = 0.05       # deviation floor as a fraction of the level
+STALE_DAYS = 14                 # series not updated for this long leave the peer group
+DEFAULT_MAX_SERIES = 200_000
+MAX_RECENT_ALERTS = 500
+DEFAULT_REFRESH_SECONDS = 300
+_MAD_TO_SIGMA = 1.2533          # mean absolute deviation -> standard deviation
+_EPOCH = date(1970, 1, 1)
+
+DAILY_QUERY = """
+SELECT date_day, campaign_id, slot_id, total_bids, winning_bids, impressions, engagements, revenue, spend
+FROM AD_TECH.ANALYTICS.T_CAMPAIGN_DAILY
+WHERE date_day > ? AND date_day < ?
+"""
+SLOTS_QUERY = """
+SELECT slot_id, slot_name
+FROM AD_TECH.ANALYTICS.T_INVENTORY_ANALYTICS
+"""
+CAMPAIGNS_QUERY = """
+SELECT campaign_id, campaign_name
+FROM AD_TECH.ANALYTICS.T_CAMPAIGN_PERFORMANCE
+"""
+
+
+@dataclass(frozen=True)
+class Alert:
+    kind: str                   # campaign | slot
+    series: str                 # campaign_id or slot_id
+    kpi: str
+    rule: str                   # shift | peer
+    day: date
+    value: float
+    expected: float             # the series' level (shift) or the peer median (peer)
+    z: float
+
+    @property
+    def direction(self) -> str:
+        return "up" if self.value > self.expected else "down"
+
+
+# =============================================================================
+# Detector
+# =============================================================================
+class AnomalyDetector:
+    """EWMA / robust z-score state for up to ``max_series`` series."""
+
+    def __init__(self, kpis: Sequence[str] = KPIS, max_series: int = DEFAULT_MAX_SERIES, alpha: float = ALPHA,
+                 warmup: int = WARMUP, shift_z: float = SHIFT_Z_THRESHOLD, peer_z: float = PEER_Z_THRESHOLD,
+                 metrics: MetricsRegistry = registry):
+        self.kpis = tuple(kpis)
+        self.max_series = max_series
+        self.alpha = alpha
+        self.warmup = warmup
+        self.shift_z = shift_z
+        self.peer_z = peer_z
+        self.metrics = metrics
+        self.index: Dict[Hashable, int] = {}
+        self.keys: List[Optional[Hashable]] = []
+        self._free: List[int] = []                           # unused rows, popped from the end
+        self.kind = np.empty(0, dtype=np.int8)
+        self.count = np.empty((0, len(self.kpis)), dtype=np.int32)
+        self.level = np.empty((0, len(self.kpis)))
+        self.deviation = np.empty((0, len(self.kpis)))
+        self.last_day = np.empty(0, dtype=np.int32)          # days since 1970-01-01
+        self.peer_alerts: Dict[Tuple[str, str, str], Alert] = {}
+        self.recent: Deque[Alert] = deque(maxlen=MAX_RECENT_ALERTS)
+        self.updates = 0
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(a.nbytes for a in (self.kind, self.count, self.level, self.deviation, self.last_day))
+
+    # ------------------------------------------------------------------
+    # Rows
+    # ------------------------------------------------------------------
+    def _grow(self, rows: int) -> None:
+        extra = rows - len(self.keys)
+        self._free.extend(range(rows - 1, len(self.keys) - 1, -1))
+        self.keys.extend([None] * extra)
+        self.kind = np.concatenate([self.kind, np.zeros(extra, dtype=np.int8)])
+        self.count = np.concatenate([self.count, np.zeros((extra, len(self.kpis)), dtype=np.int32)])
+        self.level = np.concatenate([self.level, np.zeros((extra, len(self.kpis)))])
+        self.deviation = np.concatenate([self.deviation, np.zeros((extra, len(self.kpis)))])
+        self.last_day = np.concatenate([self.last_day, np.full(extra, -1, dtype=np.int32)])
+
+    def _make_room(self, needed: int, keep: np.ndarray) -> None:
+        """
+        Have ``needed`` free rows: grow (doubling, up to max_series), then
+        evict the stalest occupied rows, never one in ``keep``.
+        """
+        grow = min(self.max_series - len(self.keys), max(needed - len(self._free), len(self.keys), 1024))
+        if grow > 0:
+            self._grow(len(self.keys) + grow)
+        short = needed - len(self._free)
+        if short > 0:
+            candidates = np.ones(len(self.keys), dtype=bool)
+            candidates[self._free] = False
+            candidates[keep] = False
+            candidates = np.flatnonzero(candidates)
+            stalest = candidates[np.argsort(self.last_day[candidates], kind="stable")[:short]]
+            for r in stalest.tolist():
+                del self.index[self.keys[r]]
+                self.keys[r] = None
+                self.last_day[r] = -1
+                self._free.append(r)
+            self.metrics.inc("anomaly.evictions", short)
+
+    def rows(self, kind: str, series: Sequence[str]) -> np.ndarray:
+        """Row of each series, allocating (or evicting the stalest) for new ones."""
+        code = KINDS.index(kind)
+        rows = np.fromiter((self.index.get((code, s), -1) for s in series), dtype=np.int64, count=len(series))
+        new = np.flatnonzero(rows < 0)
+        if len(new):
+            if len(rows) > self.max_series:
+                raise ValueError(f"{len(rows):,} series in one batch, more than max_series ({self.max_series:,})")
+            if len(self._free) < len(new):
+                self._make_room(len(new), rows[rows >= 0])
+            for position in new.tolist():
+                r = self._free.pop()
+                key = (code, series[position])
+                self.index[key] = r
+                self.keys[r] = key
+                rows[position] = r
+            assigned = rows[new]
+            self.kind[assigned] = code
+            self.count[assigned] = 0
+            self.level[assigned] = 0.0
+            self.deviation[assigned] = 0.0
+        return rows
+
+    # ------------------------------------------------------------------
+    # Updates
+    # ------------------------------------------------------------------
+    def update(self, kind: str, series: Sequence[str], day: date, values: np.ndarray) -> List[Alert]:
+        """
+        One observation per series for ``day``; ``values`` is (len(series),
+        len(kpis)) with NaN for KPIs that don't apply. Returns shift alerts.
+        """
+        t0 = time.perf_counter()
+        rows = self.rows(kind, series)
+        x = np.asarray(values, dtype=np.float64)
+        valid = np.isfinite(x)
+        count, level, deviation = self.count[rows], self.level[rows], self.deviation[rows]
+
+        scale = np.maximum(_MAD_TO_SIGMA * deviation, MIN_RELATIVE_SCALE * np.abs(level))
+        scale = np.where(scale > 0, scale, 1e-12)
+        z = (x - level) / scale
+        warm = valid & (count >= self.warmup)
+        flagged = warm & (np.abs(z) >= self.shift_z)
+
+        # Huberized update: a warm series moves at most shift_z scales per observation
+        bound = self.shift_z * scale
+        clipped = np.where(warm, np.clip(x, level - bound, level + bound), x)
+        # Running means until 1 / n drops to alpha, so young series aren't biased towards zero
+        weight = np.maximum(self.alpha, 1.0 / (count + 1))
+        deviation_weight = np.maximum(self.alpha, 1.0 / np.maximum(count, 1))
+        first = valid & (count == 0)
+        new_level = np.where(first, x, level + weight * (clipped - level))
+        new_deviation = np.where(first, 0.0, deviation + deviation_weight * (np.abs(clipped - level) - deviation))
+        self.level[rows] = np.where(valid, new_level, level)
+        self.deviation[rows] = np.where(valid, new_deviation, deviation)
+        self.count[rows] = count + valid
+        self.last_day[rows] = (day - _EPOCH).days
+        self.updates += int(valid.sum())
+
+        alerts = [
+            Alert(kind, series[i], self.kpis[k], "shift", day, float(x[i, k]), float(level[i, k]), float(z[i, k]))
+            for i, k in zip(*np.nonzero(flagged))
+        ]
+        self.recent.extend(alerts)
+        self.metrics.inc("anomaly.updates", int(valid.sum()))
+        self.metrics.inc("anomaly.shift_alerts", len(alerts))
+        self.metrics.observe("anomaly.update.seconds", time.perf_counter() - t0)
+        return alerts
+
+    def check_peers(self, day: date) -> List[Alert]:
+        """
+        Re-score every warm, recently updated series against its kind's
+        peers; replaces the open peer alerts. Only low levels alert.
+        """
+        active = self.last_day >= (day - _EPOCH).days - STALE_DAYS     # unused rows hold -1
+        open_alerts: Dict[Tuple[str, str, str], Alert] = {}
+        for code, kind in enumerate(KINDS):
+            members = np.flatnonzero(active & (self.kind == code))
+            if len(members) < 5:
+                continue
+            warm = self.count[members] >= self.warmup
+            level = self.level[members]
+            positive = warm & (level > 0)
+            logs = np.log(np.where(positive, level, np.nan))
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore", RuntimeWarning)         # KPIs no member has, e.g. campaign fill rate
+                center = np.nanmedian(np.where(positive, logs, np.nan), axis=0)
+                spread = 1.4826 * np.nanmedian(np.abs(logs - center), axis=0)
+            spread = np.where(np.isfinite(spread) & (spread > 0), spread, np.inf)
+            z = (logs - center) / spread
+            for i, k in zip(*np.nonzero(positive & (z <= -self.peer_z))):
+                series = self.keys[members[i]][1]
+                open_alerts[(kind, series, self.kpis[k])] = Alert(
+                    kind, series, self.kpis[k], "peer", day, float(level[i, k]), float(np.exp(center[k])),
+                    float(z[i, k]),
+                )
+        self.peer_alerts = open_alerts
+        return list(open_alerts.values())
+
+    def alerts(self, since: Optional[date] = None, drops_only: bool = False) -> List[Alert]:
+        """Open peer alerts and shifts on or after ``since``, most severe first."""
+        shifts = [a for a in self.recent
+                  if (since is None or a.day >= since) and not (drops_only and a.direction == "up")]
+        return sorted([*self.peer_alerts.values(), *shifts], key=lambda a: -abs(a.z))
+
+
+# =============================================================================
+# Feeding from T_CAMPAIGN_DAILY
+# =============================================================================
+def _days(column) -> np.ndarray:
+    """Days since 1970-01-01 from a date, timestamp or ISO string column."""
+    if pa.types.is_string(column.type) or pa.types.is_large_string(column.type):
+        column = pc.strptime(pc.utf8_slice_codeunits(column, 0, 10), "%Y-%m-%d", "s")
+    if pa.types.is_timestamp(column.type):
+        column = column.cast(pa.date32())
+    return column.cast(pa.int32()).to_numpy(zero_copy_only=False)
+
+
+def _lower(table) -> List[Dict[str, object]]:
+    return table.rename_columns([c.lower() for c in table.column_names]).to_pylist()
+
+
+def _floats(column) -> np.ndarray:
+    return column.cast(pa.float64()).fill_null(0).to_numpy(zero_copy_only=False)
+
+
+def _ratio(numerator: np.ndarray, denominator: np.ndarray) -> np.ndarray:
+    return np.divide(numerator, denominator, out=np.full(len(numerator), np.nan), where=denominator > 0)
+
+
+class KpiMonitor:
+    """
+    Aggregates daily fact rows per (day, campaign) and (day, slot) and feeds
+    them to the detector one day at a time. Days are ingested once, in
+    order; rows arriving late for an ingested day are not replayed.
+    """
+
+    def __init__(self, detector: Optional[AnomalyDetector] = None, labels: Optional[Dict[str, str]] = None):
+        self.detector = detector or AnomalyDetector()
+        self.labels = labels or {}
+        self.watermark: Optional[date] = None       # last ingested day
+        self.refresher: Optional[MonitorRefresher] = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_engine(cls, engine, **kwargs) -> "KpiMonitor":
+        labels = {s["slot_id"]: s["slot_name"] for s in _lower(fetch_arrow(engine, SLOTS_QUERY))}
+        labels.update((c["campaign_id"], c["campaign_name"]) for c in _lower(fetch_arrow(engine, CAMPAIGNS_QUERY)))
+        return cls(labels=labels, **kwargs)
+
+    def ingest(self, table: pa.Table) -> int:
+        """Feed daily rows (T_CAMPAIGN_DAILY columns); returns the number of days ingested."""
+        table = table.rename_columns([c.lower() for c in table.column_names])
+        if not table.num_rows:
+            return 0
+        days = _days(table.column("date_day"))
+        measures = {name: _floats(table.column(name)) for name in (
+            "total_bids", "winning_bids", "impressions", "engagements", "revenue", "spend")}
+        ids = {"campaign": table.column("campaign_id").to_numpy(zero_copy_only=False).astype(str),
+               "slot": table.column("slot_id").to_numpy(zero_copy_only=False).astype(str)}
+        ingested = 0
+        with self._lock:
+            for day_number in np.unique(days).tolist():
+                day = _EPOCH + timedelta(days=day_number)
+                if self.watermark is not None and day <= self.watermark:
+                    continue
+                rows = days == day_number
+                for kind in KINDS:
+                    series, group = np.unique(ids[kind][rows], return_inverse=True)
+                    sums = {name: np.bincount(group, weights=values[rows], minlength=len(series))
+                            for name, values in measures.items()}
+                    filled = _ratio(sums["winning_bids"], sums["total_bids"])
+                    kpis = {
+                        # Campaigns win bids; slots fill bid requests
+                        "win_rate": filled if kind == "campaign" else None,
+                        "fill_rate": filled if kind == "slot" else None,
+                        "ctr": _ratio(sums["engagements"], sums["impressions"]),
+                        "roas": _ratio(sums["revenue"], sums["spend"]),
+                    }
+                    missing = np.full(len(series), np.nan)
+                    values = np.column_stack([
+                        missing if kpis.get(k) is None else kpis[k] for k in self.detector.kpis])
+                    self.detector.update(kind, series.tolist(), day, values)
+                self.detector.check_peers(day)
+                self.watermark = day
+                ingested += 1
+        return ingested
+
+    def poll(self, engine, today: Optional[date] = None) -> int:
+        """Ingest complete days newer than the watermark."""
+        since = self.watermark or date(1970, 1, 1)
+        today = today or date.today()
+        return self.ingest(fetch_arrow(engine, DAILY_QUERY, [since.isoformat(), today.isoformat()]))
+
+    def label(self, series: str) -> str:
+        return self.labels.get(series, series)
+
+
+class MonitorRefresher:
+    """Daemon thread polling for new days every ``interval`` seconds, gated like the other refreshers."""
+
+    def __init__(self, monitor: KpiMonitor, engine, interval: float = DEFAULT_REFRESH_SECONDS,
+                 gate: Optional[Callable[[], bool]] = None, clock: Callable[[], float] = time.time):
+        self.monitor = monitor
+        self.engine = engine
+        self.interval = interval
+        self.gate = gate
+        self.clock = clock
+        self.last_run: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def refresh(self) -> int:
+        try:
+            days = self.monitor.poll(self.engine)
+            self.last_error = None
+        except Exception as e:
+            self.last_error = str(e)
+            days = 0
+        self.last_run = self.clock()
+        return days
+
+    def _loop(self) -> None:
+        while not self._stop.wait(self.interval):
+            if self.gate is None or self.gate():
+                self.refresh()
+
+    def start(self) -> "MonitorRefresher":
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._loop, name="kpi-monitor", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
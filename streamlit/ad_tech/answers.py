@@ -0,0 +1,770 @@
+"""
+=============================================================================
+PatientPoint Ad Tech Demo - Offline Answer Engine
+=============================================================================
+Answers the chat questions that fall into one of five intents from the
+analytics tables themselves, without a model:
+
+  bid_pricing        "What's the optimal bid for diabetes in cardiology?"
+  audience           "Which cohorts convert best in the Southwest?"
+  period_comparison  "Compare Q3 2026 vs Q2 2026"
+  inventory          "Find premium morning slots in Texas clinics"
+  partner_roas       "How are Pfizer campaigns doing on ROAS?"
+
+  1. extract  : known values (areas, partners, drugs, specialties, regions,
+                states, dayparts, cohorts, ...) are found longest phrase
+                first, with a few everyday synonyms ("heart" -> Cardiology,
+                "Texas" -> TX, "GLP-1" -> the GLP-1 drugs). A value that is
+                both an area and a specialty is a specialty next to a
+                facility word ("cardiology waiting rooms"), else decided
+                by the intent.
+  2. classify : keyword and entity evidence per intent (INTENT_KEYWORDS,
+                ENTITY_EVIDENCE). Below MIN_SCORE there is no answer.
+  3. query    : the intent's SQL template with one clause per entity,
+                through ``run(name, sql, table)`` (the query router). When
+                nothing matches, the least important clause is dropped
+                until something does, and the answer says what was relaxed
+                (with ``fast_path`` such a question goes to the agent).
+  4. render   : markdown built from the returned rows.
+
+In demo mode it replaces the canned answers (agent.generate_demo_response).
+In Snowflake it answers ahead of the agent queue when the classification
+is confident (``fast_path=True``: FAST_PATH_SCORE and FAST_PATH_MARGIN).
+Lookups, hits and latency are recorded in the metrics registry:
+
+  answers.lookups / .hits / .misses / .errors   counters
+  answers.intent.<intent>                      hits per intent
+  answers.seconds                              extract + query + render time
+=============================================================================
+"""
+
+from __future__ import annotations
+
+import re
+import time
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from .bidding import ROAS_QUERY, BidRecommender
+from .metrics import MetricsRegistry, registry
+from .search import tokenize
+from .trends import ROLLUP_TABLE, Comparison, Period, _add_quarters, _quarter, comparison_sql, quarter_start
+from .trends import _comparison_params, resolve_comparison
+from .verified_queries import _literal, value_aliases
+
+MIN_SCORE = 2.0
+FAST_PATH_SCORE = 3.0
+FAST_PATH_MARGIN = 1.5
+DEFAULT_ROWS = 5
+MAX_ROWS = 25
+
+INTENT_LABELS = {
+    "bid_pricing": "Bid pricing",
+    "audience": "Audience",
+    "period_comparison": "Period comparison",
+    "inventory": "Inventory",
+    "partner_roas": "Partner ROAS",
+}
+
+
+def _token_keys(table: Dict[str, object]) -> Dict[str, object]:
+    """``table`` keyed by the search.tokenize form of each word ('roas' -> 'roa')."""
+    return {tokenize(word)[0]: value for word, value in table.items()}
+
+
+# Keyword evidence per intent, keyed like the question tokens they are matched against
+INTENT_KEYWORDS = {intent: _token_keys(keywords) for intent, keywords in {
+    "bid_pricing": {"bid": 2.0, "cpm": 2.0, "price": 2.0, "pricing": 2.0, "optimal": 1.0, "cost": 1.0},
+    "audience": {"audience": 2.0, "cohort": 2.0, "segment": 2.0, "demographic": 2.0, "patient": 1.0,
+                 "respond": 1.0, "convert": 0.5},
+    "period_comparison": {"compare": 1.5, "comparison": 1.5, "vs": 1.0, "versus": 1.0, "quarter": 1.5,
+                          "trend": 1.0, "change": 1.0, "growth": 1.0},
+    "inventory": {"inventory": 2.0, "slot": 2.0, "placement": 2.0, "screen": 1.5, "available": 1.0,
+                  "find": 1.0, "premium": 1.0, "facility": 1.0, "clinic": 0.5},
+    "partner_roas": {"roas": 2.0, "partner": 1.5, "campaign": 1.0, "performance": 1.0, "performing": 1.0,
+                     "ctr": 1.5, "win": 1.0, "return": 1.0, "revenue": 0.5, "best": 0.5, "top": 0.5,
+                     "driving": 0.5},
+}.items()}
+
+# Entity evidence: slot -> {intent: weight}
+ENTITY_EVIDENCE = {
+    "quarters": {"period_comparison": 2.0},
+    "last_days": {"period_comparison": 1.5},
+    "ytd": {"period_comparison": 1.5},
+    "age_bucket": {"audience": 1.5},
+    "gender": {"audience": 1.5},
+    "income_bracket": {"audience": 1.5},
+    "insurance_type": {"audience": 1.5},
+    "daypart": {"inventory": 0.5, "bid_pricing": 0.5},
+    "placement_area": {"inventory": 1.0, "bid_pricing": 0.5},
+    "screen_type": {"inventory": 1.0},
+    "state": {"inventory": 0.5},
+    "city": {"inventory": 0.5},
+    "partner_name": {"partner_roas": 1.5},
+    "drug_name": {"partner_roas": 0.5},
+}
+
+# Values a question may name: slot -> (table, column)
+VOCABULARY_COLUMNS = {
+    "therapeutic_area": ("T_CAMPAIGN_PERFORMANCE", "therapeutic_area"),
+    "partner_name": ("T_CAMPAIGN_PERFORMANCE", "partner_name"),
+    "drug_name": ("T_CAMPAIGN_PERFORMANCE", "drug_name"),
+    "specialty_name": ("T_INVENTORY_ANALYTICS", "specialty_name"),
+    "region": ("T_INVENTORY_ANALYTICS", "region"),
+    "state": ("T_INVENTORY_ANALYTICS", "state"),
+    "city": ("T_INVENTORY_ANALYTICS", "city"),
+    "daypart": ("T_INVENTORY_ANALYTICS", "daypart"),
+    "placement_area": ("T_INVENTORY_ANALYTICS", "placement_area"),
+    "screen_type": ("T_INVENTORY_ANALYTICS", "screen_type"),
+    "age_bucket": ("T_AUDIENCE_INSIGHTS", "age_bucket"),
+    "gender": ("T_AUDIENCE_INSIGHTS", "gender"),
+    "income_bracket": ("T_AUDIENCE_INSIGHTS", "income_bracket"),
+    "insurance_type": ("T_AUDIENCE_INSIGHTS", "insurance_type"),
+}
+
+# How a value is phrased in a question, when not by itself
+_VALUE_PHRASES = {"income_bracket": "{} income", "insurance_type": "{} insurance"}
+_IGNORED_VALUES = {("gender", "All"), ("daypart", "All Day")}
+
+# Everyday words for known values: phrase -> (slot, values)
+SYNONYMS = {
+    "heart": ("therapeutic_area", ("Cardiology",)),
+    "cardiac": ("therapeutic_area", ("Cardiology",)),
+    "cardiovascular": ("therapeutic_area", ("Cardiology",)),
+    "cancer": ("therapeutic_area", ("Oncology",)),
+    "diabetic": ("therapeutic_area", ("Diabetes",)),
+    "obesity": ("therapeutic_area", ("Weight Loss",)),
+    "weight": ("therapeutic_area", ("Weight Loss",)),
+    "autoimmune": ("therapeutic_area", ("Immunology",)),
+    "neuro": ("therapeutic_area", ("Neurology",)),
+    "glp 1": ("drug_name", ("Ozempic", "Wegovy", "Mounjaro", "Trulicity", "Zepbound")),
+    "endocrine": ("specialty_name", ("Endocrinology",)),
+    "senior": ("age_bucket", ("65+",)),
+    "elderly": ("age_bucket", ("65+",)),
+    "women": ("gender", ("Female",)),
+    "men": ("gender", ("Male",)),
+    "tv": ("screen_type", ("TV Screen",)),
+}
+FACILITY_WORDS = frozenset(tokenize("clinic waiting room office practice facility hospital center specialist "
+                                    "doctor physician exam check"))
+_STATE_NAMES = dict(pair.split(":") for pair in (
+    "AL:alabama AK:alaska AZ:arizona AR:arkansas CA:california CO:colorado CT:connecticut DE:delaware "
+    "FL:florida GA:georgia HI:hawaii ID:idaho IL:illinois IN:indiana IA:iowa KS:kansas KY:kentucky "
+    "LA:louisiana ME:maine MD:maryland MA:massachusetts MI:michigan MN:minnesota MS:mississippi "
+    "MO:missouri MT:montana NE:nebraska NV:nevada NH:new_hampshire NJ:new_jersey NM:new_mexico "
+    "NY:new_york NC:north_carolina ND:north_dakota OH:ohio OK:oklahoma OR:oregon PA:pennsylvania "
+    "RI:rhode_island SC:south_carolina SD:south_dakota TN:tennessee TX:texas UT:utah VT:vermont "
+    "VA:virginia WA:washington WV:west_virginia WI:wisconsin WY:wyoming"
+).split())
+
+_QUARTER_RE = re.compile(r"\bq([1-4])(?:\s*'?(\d{4}|\d{2}))?\b")
+_LAST_DAYS_RE = re.compile(r"\blast (\d+) days?\b")
+_YTD_RE = re.compile(r"\b(?:ytd|year to date)\b")
+_TOP_RE = re.compile(r"\btop (\d+)\b")
+
+Entities = Dict[str, object]
+
+
+# =============================================================================
+# Extraction
+# =============================================================================
+class Lexicon:
+    """Longest-first phrase table: token tuple -> [(slot, values)]."""
+
+    def __init__(self, vocabulary: Dict[str, Sequence[str]]):
+        self.table: Dict[Tuple[str, ...], List[Tuple[str, Tuple[str, ...]]]] = {}
+        self.longest = 1
+        for slot, values in vocabulary.items():
+            for value in values:
+                if (slot, value) in _IGNORED_VALUES:
+                    continue
+                for alias in value_aliases(value):
+                    self.add(_VALUE_PHRASES.get(slot, "{}").format(alias), slot, (value,))
+        states = set(vocabulary.get("state", ()))
+        for code, name in _STATE_NAMES.items():
+            if code in states:
+                self.add(name.replace("_", " "), "state", (code,))
+        for phrase, (slot, values) in SYNONYMS.items():
+            self.add(phrase, slot, values)
+
+    def add(self, phrase: str, slot: str, values: Tuple[str, ...]) -> None:
+        key = tuple(tokenize(phrase))
+        if not key:
+            return
+        entries = self.table.setdefault(key, [])
+        if all(s != slot for s, _ in entries):
+            entries.append((slot, values))
+            self.longest = max(self.longest, len(key))
+
+    def scan(self, tokens: List[str]) -> List[Tuple[int, int, List[Tuple[str, Tuple[str, ...]]]]]:
+        """``(start, end, candidates)`` for each phrase found, longest first, left to right."""
+        found, i = [], 0
+        while i < len(tokens):
+            for size in range(min(self.longest, len(tokens) - i), 0, -1):
+                hit = self.table.get(tuple(tokens[i:i + size]))
+                if hit is not None:
+                    found.append((i, i + size, hit))
+                    i += size
+                    break
+            else:
+                i += 1
+        return found
+
+
+def _quarters(text: str, today: date) -> List[Period]:
+    periods = []
+    for match in _QUARTER_RE.finditer(text):
+        quarter, year = int(match.group(1)), match.group(2)
+        if year is None:
+            year = today.year if 3 * (quarter - 1) + 1 <= today.month else today.year - 1
+        year = int(year) + (2000 if len(str(year)) == 2 else 0)
+        period = _quarter(date(year, 3 * (quarter - 1) + 1, 1))
+        if period not in periods:
+            periods.append(period)
+    return periods
+
+
+# =============================================================================
+# Answers
+# =============================================================================
+@dataclass
+class Classification:
+    intent: str
+    score: float
+    margin: float
+
+
+@dataclass
+class Answer:
+    intent: str
+    score: float
+    entities: Entities
+    body: str
+    rows: int
+    relaxed: List[str] = field(default_factory=list)
+    seconds: float = 0.0
+
+    def markdown(self) -> str:
+        lines = [self.body]
+        if self.relaxed:
+            lines.append(f"\n_Nothing matched every filter, so this leaves out: {', '.join(self.relaxed)}._")
+        lines.append(f"\n_⚡ {INTENT_LABELS[self.intent]} answer from {self.rows:,} rows · "
+                     f"{self.seconds * 1e3:.0f} ms, no model_")
+        return "\n".join(lines)
+
+
+def _fmt_money(value) -> str:
+    return "n/a" if value is None else f"${float(value):,.2f}" if abs(float(value)) < 1000 else f"${float(value):,.0f}"
+
+
+def _fmt_num(value) -> str:
+    return "n/a" if value is None else f"{float(value):,.0f}"
+
+
+def _fmt_pct(value, digits: int = 2) -> str:
+    return "n/a" if value is None else f"{float(value):.{digits}f}%"
+
+
+def _fmt_x(value) -> str:
+    return "n/a" if value is None else f"{float(value):.2f}x"
+
+
+def _change(current, previous) -> str:
+    if current is None or not previous:
+        return "n/a"
+    return f"{(float(current) - float(previous)) * 100.0 / float(previous):+.1f}%"
+
+
+def _table(header: Sequence[str], rows: Sequence[Sequence[str]]) -> List[str]:
+    return (["| " + " | ".join(header) + " |", "|" + "---|" * len(header)]
+            + ["| " + " | ".join(str(c).replace("|", "\\|") for c in row) + " |" for row in rows])
+
+
+def _lower(table) -> List[Dict[str, object]]:
+    return table.rename_columns([c.lower() for c in table.column_names]).to_pylist()
+
+
+def _in(column: str, values: Sequence[str]) -> str:
+    if len(values) == 1:
+        return f"{column} = {_literal(values[0])}"
+    return f"{column} IN ({', '.join(_literal(v) for v in values)})"
+
+
+def _bind(sql: str, params: Sequence) -> str:
+    """``sql`` with each ``?`` replaced by the next parameter as a literal (our own SQL only)."""
+    parts = sql.split("?")
+    if len(parts) != len(params) + 1:
+        raise ValueError("parameter count does not match the SQL")
+    return "".join(p + (_literal(v) if i < len(params) else "") for i, (p, v) in
+                   enumerate(zip(parts, list(params) + [None])))
+
+
+def _population(noun: str, scope: str, relaxed: Sequence[str]) -> str:
+    """What the counted rows match: every filter, only the ``scope`` kept, or nothing ("all <noun>")."""
+    if not relaxed:
+        return f"matching {noun}"
+    return f"{noun} matching {scope}" if scope else noun
+
+
+def _names(values: Sequence[str]) -> str:
+    return " / ".join(values)
+
+
+AREA_INTERESTS = {"Weight Loss": "Obesity"}   # top_therapeutic_interests wording, where it differs
+AUDIENCE_METRICS = _token_keys({
+    "conversion": ("conversion_rate_pct", "conversion rate"),
+    "convert": ("conversion_rate_pct", "conversion rate"),
+    "revenue": ("revenue_per_member", "revenue per member"),
+    "value": ("revenue_per_member", "revenue per member"),
+    "dwell": ("avg_dwell_time_seconds", "dwell time"),
+})
+PERFORMANCE_METRICS = _token_keys({
+    "ctr": ("ctr", "CTR", "100.0 * SUM(total_engagements) / NULLIF(SUM(total_impressions), 0)", _fmt_pct),
+    "conversion": ("conversion_rate", "conversion rate",
+                   "100.0 * SUM(total_conversions) / NULLIF(SUM(total_engagements), 0)", _fmt_pct),
+    "win": ("win_rate", "win rate", "100.0 * SUM(winning_bids) / NULLIF(SUM(total_bids), 0)",
+            lambda v: _fmt_pct(v, 1)),
+    "revenue": ("revenue", "revenue", "SUM(total_revenue)", _fmt_money),
+    "impression": ("impressions", "impressions", "SUM(total_impressions)", _fmt_num),
+    "roas": ("roas", "ROAS", "SUM(total_revenue) / NULLIF(SUM(total_spend), 0)", _fmt_x),
+})
+GROUPINGS = tuple((tokenize(word)[0], column, heading) for word, column, heading in (
+    ("drug", "drug_name", "Drug"),
+    ("tier", "partner_tier", "Tier"),
+    ("area", "therapeutic_area", "Therapeutic Area"),
+    ("therapeutic", "therapeutic_area", "Therapeutic Area"),
+    ("campaign", "campaign_name", "Campaign"),
+    ("partner", "partner_name", "Partner"),
+))
+CHEAP_WORDS = frozenset(tokenize("cheap cheapest value affordable"))
+ENGAGEMENT_WORDS = frozenset(tokenize("engagement engaging engaged"))
+
+
+class AnswerEngine:
+    """
+    Classifies questions into INTENTS and answers them from the data.
+    ``run(name, sql, table)`` executes SQL and returns a pyarrow.Table.
+    """
+
+    def __init__(self, vocabulary: Dict[str, Sequence[str]], run: Callable[[str, str, str], object],
+                 metrics: MetricsRegistry = registry, clock: Callable[[], float] = time.perf_counter,
+                 today: Callable[[], date] = date.today):
+        self.lexicon = Lexicon(vocabulary)
+        self.run = run
+        self.metrics = metrics
+        self.clock = clock
+        self.today = today
+
+    # ------------------------------------------------------------------
+    # Understanding
+    # ------------------------------------------------------------------
+    def extract(self, question: str) -> Tuple[List[str], Entities, List[Tuple[str, Tuple[str, ...]]]]:
+        """Tokens, unambiguous entities, and (area-or-specialty) values still to be placed."""
+        text = question.lower()
+        tokens = tokenize(question)
+        entities: Entities = {}
+        ambiguous: List[Tuple[str, Tuple[str, ...]]] = []
+        for start, end, candidates in self.lexicon.scan(tokens):
+            slots = {slot for slot, _ in candidates}
+            if slots == {"therapeutic_area", "specialty_name"}:
+                near = set(tokens[end:end + 3])
+                if near & FACILITY_WORDS:
+                    self._put(entities, "specialty_name", candidates[0][1])
+                else:
+                    ambiguous.append(("either", candidates[0][1]))
+                continue
+            for slot, values in candidates[:1]:
+                self._put(entities, slot, values)
+        today = self.today()
+        quarters = _quarters(text, today)
+        if quarters:
+            entities["quarters"] = quarters
+        match = _LAST_DAYS_RE.search(text)
+        if match:
+            entities["last_days"] = int(match.group(1))
+        if _YTD_RE.search(text):
+            entities["ytd"] = today.year
+        match = _TOP_RE.search(text)
+        if match:
+            entities["n"] = min(max(int(match.group(1)), 1), MAX_ROWS)
+        if "premium" in tokens:
+            entities["premium"] = True
+        return tokens, entities, ambiguous
+
+    @staticmethod
+    def _put(entities: Entities, slot: str, values: Tuple[str, ...]) -> None:
+        current = entities.get(slot, ())
+        entities[slot] = tuple(dict.fromkeys(current + values))
+
+    def classify(self, tokens: List[str], entities: Entities) -> Optional[Classification]:
+        scores = {intent: 0.0 for intent in INTENT_KEYWORDS}
+        for token in tokens:
+            for intent, keywords in INTENT_KEYWORDS.items():
+                scores[intent] += keywords.get(token, 0.0)
+        for slot, weights in ENTITY_EVIDENCE.items():
+            if slot in entities:
+                for intent, weight in weights.items():
+                    scores[intent] += weight
+        if len(entities.get("quarters", ())) > 1:
+            scores["period_comparison"] += 1.0
+        ranked = sorted(scores.items(), key=lambda kv: -kv[1])
+        (intent, score), (_, second) = ranked[0], ranked[1]
+        if score < MIN_SCORE:
+            return None
+        return Classification(intent, score, score - second)
+
+    @staticmethod
+    def _place(intent: str, entities: Entities, ambiguous) -> None:
+        """An area-or-specialty value fills whichever slot is still open, else the one the intent uses."""
+        for _, values in ambiguous:
+            if "therapeutic_area" in entities and "specialty_name" not in entities:
+                slot = "specialty_name"
+            elif "specialty_name" in entities and "therapeutic_area" not in entities:
+                slot = "therapeutic_area"
+            else:
+                slot = "specialty_name" if intent in ("inventory", "bid_pricing") else "therapeutic_area"
+            AnswerEngine._put(entities, slot, values)
+
+    # ------------------------------------------------------------------
+    # Answering
+    # ------------------------------------------------------------------
+    def answer(self, question: str, fast_path: bool = False) -> Optional[Answer]:
+        """
+        The answer to ``question``, or None when it fits no intent (or, with
+        ``fast_path``, not clearly enough to skip the agent or only with
+        filters dropped) or a query fails.
+        """
+        start = self.clock()
+        self.metrics.inc("answers.lookups")
+        tokens, entities, ambiguous = self.extract(question)
+        found = self.classify(tokens, entities)
+        if found is None or (fast_path and (found.score < FAST_PATH_SCORE or found.margin < FAST_PATH_MARGIN)):
+            self.metrics.inc("answers.misses")
+            return None
+        self._place(found.intent, entities, ambiguous)
+        try:
+            body, rows, relaxed = getattr(self, f"_{found.intent}")(tokens, entities)
+        except Exception:
+            self.metrics.inc("answers.errors")
+            return None
+        if fast_path and relaxed:
+            # Not what was asked; the agent can answer the question as posed
+            self.metrics.inc("answers.misses")
+            return None
+        elapsed = self.clock() - start
+        self.metrics.inc("answers.hits")
+        self.metrics.inc(f"answers.intent.{found.intent}")
+        self.metrics.observe("answers.seconds", elapsed)
+        return Answer(found.intent, found.score, entities, body, rows, relaxed, elapsed)
+
+    def _query(self, name: str, sql: str, table: str) -> List[Dict[str, object]]:
+        return _lower(self.run(f"answers.{name}", sql, table))
+
+    def _relaxing(self, name: str, template: str, table: str,
+                  clauses: List[Tuple[str, str]]) -> Tuple[List[Dict[str, object]], List[str]]:
+        """
+        ``template`` with ``{where}`` filled from ``clauses`` ((label, SQL),
+        most important first); drops clauses from the end until rows come back.
+        """
+        kept = list(clauses)
+        while True:
+            where = " AND ".join(["1 = 1"] + [sql for _, sql in kept])
+            rows = self._query(name, template.format(where=where), table)
+            if rows or not kept:
+                return rows, [label for label, _ in clauses[len(kept):]]
+            kept.pop()
+
+    def _bid_pricing(self, tokens, entities):
+        clauses = []
+        for slot, column in (("specialty_name", "specialty_name"), ("placement_area", "placement_area"),
+                             ("daypart", "daypart"), ("region", "region"), ("state", "state")):
+            if slot in entities:
+                clauses.append((_names(entities[slot]), _in(column, entities[slot])))
+        template = """
+        SELECT slot_id, specialty_name, region, daypart, base_cpm, avg_winning_cpm, fill_rate_pct,
+               engagement_rate_pct, delivered_impressions, total_bids
+        FROM AD_TECH.ANALYTICS.T_INVENTORY_ANALYTICS
+        WHERE {where}
+        """
+        rows, relaxed = self._relaxing("bid_inventory", template, "T_INVENTORY_ANALYTICS", clauses)
+        roas = {r["therapeutic_area"]: r["roas"] for r in self._query("bid_roas", ROAS_QUERY, "T_CAMPAIGN_PERFORMANCE")}
+        area = entities.get("therapeutic_area", (None,))[0]
+        rec = BidRecommender(rows, roas).recommend(therapeutic_area=area)
+        if rec is None:
+            return "No inventory history to price against yet.", 0, relaxed
+        # Only the filters the comparable slots actually match
+        names = [_names(entities[s]) for s in ("therapeutic_area", "specialty_name", "placement_area",
+                                               "daypart", "region", "state") if s in entities]
+        target = " · ".join(name for name in names if name not in relaxed)
+        bids = sum(int(r["total_bids"] or 0) for r in rows)
+        lines = [
+            "## 💰 Optimal Bid Price Recommendation", "",
+            f"Based on **{rec.slots} comparable slots** ({bids:,} historical bids)"
+            + (f" for **{target}**" if target else " across the network") + ":", "",
+            f"### Recommended Bid Range: **{_fmt_money(rec.low_cpm)} - {_fmt_money(rec.high_cpm)} CPM**", "",
+            *_table(["Metric", "Value"], [
+                ["Historical Avg Winning CPM", _fmt_money(rec.historical_avg_cpm)],
+                ["Expected Fill Rate", _fmt_pct(rec.expected_fill_rate_pct, 1)],
+                ["Expected Engagement", _fmt_pct(rec.expected_engagement_pct)],
+                ["Expected ROAS" + (f" ({area})" if area else ""), _fmt_x(rec.expected_roas)],
+                ["Competition Level", rec.competition],
+            ]), "",
+            f"- **Floor**: {_fmt_money(rec.floor_cpm)} (average base CPM)",
+            f"- **Sweet spot**: {_fmt_money(rec.sweet_spot_cpm)} (impression-weighted winning CPM)",
+            f"- **Max recommended**: {_fmt_money(rec.high_cpm)}",
+        ]
+        return "\n".join(lines), len(rows), relaxed
+
+    def _audience(self, tokens, entities):
+        column, label = next((AUDIENCE_METRICS[t] for t in tokens if t in AUDIENCE_METRICS),
+                             ("engagement_rate_pct", "engagement rate"))
+        clauses = []
+        for area in entities.get("therapeutic_area", ())[:1]:
+            interest = _literal(f"%{AREA_INTERESTS.get(area, area)}%")
+            clauses.append((area, f"(top_therapeutic_interests LIKE {interest} OR health_interest LIKE {interest})"))
+        for slot in ("region", "age_bucket", "insurance_type", "income_bracket", "gender"):
+            if slot in entities:
+                clauses.append((_names(entities[slot]), _in(slot, entities[slot])))
+        n = entities.get("n", DEFAULT_ROWS)
+        template = f"""
+        SELECT cohort_name, age_bucket, gender, region, health_interest, cohort_size,
+               engagement_rate_pct, conversion_rate_pct, revenue_per_member, avg_dwell_time_seconds,
+               COUNT(*) OVER () AS matches, AVG({column}) OVER () AS average
+        FROM AD_TECH.ANALYTICS.T_AUDIENCE_INSIGHTS
+        WHERE {{where}}
+        ORDER BY {column} DESC NULLS LAST
+        LIMIT {n}
+        """
+        rows, relaxed = self._relaxing("audience", template, "T_AUDIENCE_INSIGHTS", clauses)
+        if not rows:
+            return "No audience cohorts found.", 0, relaxed
+        scope = " · ".join(label for label, _ in clauses[:len(clauses) - len(relaxed)])
+        top = rows[0]
+        cohorts = _population("cohorts", scope, relaxed)
+        value = (lambda v: _fmt_money(v)) if column == "revenue_per_member" else \
+            (lambda v: f"{float(v):.0f}s") if column == "avg_dwell_time_seconds" else _fmt_pct
+        lines = [
+            "## 👥 Top Audience Cohorts" + (f" · {scope}" if scope else ""), "",
+            f"The top {len(rows)} of {top['matches']} {cohorts} by {label}:", "",
+            *_table(["Cohort", "Age", "Gender", "Region", "Interest", "Size", "Engagement", "Conversion"], [
+                [r["cohort_name"], r["age_bucket"], r["gender"], r["region"], r["health_interest"],
+                 _fmt_num(r["cohort_size"]), _fmt_pct(r["engagement_rate_pct"]), _fmt_pct(r["conversion_rate_pct"])]
+                for r in rows
+            ]), "",
+            f"**{top['cohort_name']}** leads at {value(top[column])} {label}, against "
+            f"{value(top['average'])} for all {top['matches']} {cohorts}.", "",
+            "🔒 *Cohort-level aggregates only (minimum 50 members per cohort).*",
+        ]
+        return "\n".join(lines), int(top["matches"]), relaxed
+
+    def _inventory(self, tokens, entities):
+        clauses = []
+        if "specialty_name" in entities:
+            clauses.append((_names(entities["specialty_name"]), _in("specialty_name", entities["specialty_name"])))
+        else:
+            for slot, column in (("drug_name", "drug_name"), ("therapeutic_area", "therapeutic_area")):
+                if slot in entities:
+                    clauses.append((f"{_names(entities[slot])} target specialties",
+                                    "specialty_name IN (SELECT target_specialty FROM "
+                                    f"AD_TECH.ANALYTICS.T_CAMPAIGN_PERFORMANCE WHERE {_in(column, entities[slot])})"))
+                    break
+        for slot in ("region", "state", "city"):
+            if slot in entities:
+                clauses.append((_names(entities[slot]), _in(slot, entities[slot])))
+        if entities.get("premium"):
+            clauses.append(("premium", "is_premium = TRUE"))
+        for slot in ("placement_area", "screen_type", "daypart"):
+            if slot in entities:
+                clauses.append((_names(entities[slot]), _in(slot, entities[slot])))
+        if CHEAP_WORDS & set(tokens):
+            order, basis = "base_cpm ASC", "lowest CPM"
+        elif ENGAGEMENT_WORDS & set(tokens):
+            order, basis = "engagement_rate_pct DESC", "engagement"
+        else:
+            order, basis = "estimated_daily_impressions DESC", "daily impressions"
+        n = entities.get("n", DEFAULT_ROWS)
+        template = f"""
+        SELECT slot_name, facility_name, city, state, specialty_name, daypart, base_cpm,
+               estimated_daily_impressions, engagement_rate_pct, is_premium,
+               COUNT(*) OVER () AS matches, AVG(base_cpm) OVER () AS avg_cpm,
+               SUM(estimated_daily_impressions) OVER () AS daily_impressions,
+               SUM(CASE WHEN is_premium THEN 1 ELSE 0 END) OVER () AS premium_slots
+        FROM AD_TECH.ANALYTICS.T_INVENTORY_ANALYTICS
+        WHERE {{where}}
+        ORDER BY {order} NULLS LAST
+        LIMIT {n}
+        """
+        rows, relaxed = self._relaxing("inventory", template, "T_INVENTORY_ANALYTICS", clauses)
+        if not rows:
+            return "No inventory found.", 0, relaxed
+        scope = " · ".join(label for label, _ in clauses[:len(clauses) - len(relaxed)])
+        top = rows[0]
+        matches = int(top["matches"])
+        slots = _population("slots", scope, relaxed)
+        lines = [
+            "## 🔍 Available Inventory" + (f" · {scope}" if scope else ""), "",
+            f"The top {len(rows)} of {matches} {slots} by {basis}:", "",
+            *_table(["Slot", "Facility", "Location", "Daypart", "CPM", "Daily Impressions", "Engagement"], [
+                [r["slot_name"] + (" ⭐" if r["is_premium"] else ""), r["facility_name"], f"{r['city']}, {r['state']}",
+                 r["daypart"], _fmt_money(r["base_cpm"]), _fmt_num(r["estimated_daily_impressions"]),
+                 _fmt_pct(r["engagement_rate_pct"])]
+                for r in rows
+            ]), "",
+            f"- **{matches} {slots}**, {int(top['premium_slots'] or 0)} of them premium (⭐)",
+            f"- **Average CPM**: {_fmt_money(top['avg_cpm'])}",
+            f"- **Total daily impressions**: {_fmt_num(top['daily_impressions'])}", "",
+            "📍 *Check free impressions and reserve these slots under Availability & Booking in the "
+            "Inventory Explorer.*",
+        ]
+        return "\n".join(lines), matches, relaxed
+
+    def _partner_roas(self, tokens, entities):
+        key, label, expr, fmt = next((PERFORMANCE_METRICS[t] for t in tokens if t in PERFORMANCE_METRICS),
+                                     PERFORMANCE_METRICS[tokenize("roas")[0]])
+        if "partner_name" in entities or "drug_name" in entities:
+            column, heading = "campaign_name", "Campaign"
+        else:
+            column, heading = next(((c, h) for word, c, h in GROUPINGS if word in tokens),
+                                   ("partner_name", "Partner"))
+        clauses = []
+        for slot in ("partner_name", "drug_name", "therapeutic_area"):
+            if slot in entities and slot != column:
+                clauses.append((_names(entities[slot]), _in(slot, entities[slot])))
+        if "active" in tokens:
+            clauses.append(("active", "status = 'Active'"))
+        n = entities.get("n", 10)
+        template = f"""
+        SELECT {column} AS name, {expr} AS {key},
+               SUM(total_revenue) / NULLIF(SUM(total_spend), 0) AS roas_value,
+               SUM(total_impressions) AS impressions, SUM(total_revenue) AS revenue,
+               COUNT(*) AS campaigns
+        FROM AD_TECH.ANALYTICS.T_CAMPAIGN_PERFORMANCE
+        WHERE {{where}}
+        GROUP BY {column}
+        ORDER BY {key} DESC NULLS LAST
+        LIMIT {n}
+        """
+        rows, relaxed = self._relaxing("performance", template, "T_CAMPAIGN_PERFORMANCE", clauses)
+        if not rows:
+            return "No campaigns found.", 0, relaxed
+        portfolio = self._query("portfolio", f"SELECT {expr} AS {key} FROM AD_TECH.ANALYTICS.T_CAMPAIGN_PERFORMANCE",
+                                "T_CAMPAIGN_PERFORMANCE")[0][key]
+        scope = " · ".join(label_ for label_, _ in clauses[:len(clauses) - len(relaxed)])
+        header = [heading, label] + (["ROAS"] if key != "roas" else []) + ["Impressions", "Revenue"]
+        if column != "campaign_name":
+            header.append("Campaigns")
+        table_rows = []
+        for r in rows:
+            cells = [r["name"], fmt(r[key])] + ([_fmt_x(r["roas_value"])] if key != "roas" else [])
+            cells += [_fmt_num(r["impressions"]), _fmt_money(r["revenue"])]
+            if column != "campaign_name":
+                cells.append(str(r["campaigns"]))
+            table_rows.append(cells)
+        best = rows[0]
+        lines = [
+            f"## 📈 {label} by {heading}" + (f" · {scope}" if scope else ""), "",
+            *_table(header, table_rows), "",
+            f"**{best['name']}** leads at {fmt(best[key])} {label}; the portfolio as a whole runs at "
+            f"{fmt(portfolio)}.",
+        ]
+        if "partner_name" in entities and _names(entities["partner_name"]) not in relaxed:
+            total_revenue = sum(float(r["revenue"] or 0) for r in rows)
+            campaigns = sum(r["campaigns"] for r in rows)
+            lines.append(f"{_names(entities['partner_name'])} has {campaigns} campaign{'s' if campaigns != 1 else ''} "
+                         f"here with {_fmt_money(total_revenue)} revenue.")
+        return "\n".join(lines), sum(int(r["campaigns"]) for r in rows), relaxed
+
+    def _period_comparison(self, tokens, entities):
+        today = self.today()
+        relaxed = []
+        quarters = sorted(entities.get("quarters", ()), key=lambda p: p.start)
+        if len(quarters) >= 2:
+            comparison = Comparison("quarter", quarters[-1], quarters[-2])
+        elif quarters:
+            comparison = Comparison("quarter", quarters[0], _quarter(_add_quarters(quarters[0].start, -1)))
+        elif "last_days" in entities:
+            comparison = resolve_comparison(f"Last {entities['last_days']} Days", today)
+        elif "ytd" in entities:
+            comparison = resolve_comparison(f"YTD {entities['ytd']}", today)
+        else:
+            current = _quarter(quarter_start(today))
+            comparison = Comparison("quarter", current, _quarter(_add_quarters(current.start, -1)))
+        coverage = self._query(
+            "coverage", f"SELECT MIN(period_start) AS first_day, MAX(period_start) AS last_day "
+                        f"FROM {ROLLUP_TABLE} WHERE period_grain = 'day'", "T_CAMPAIGN_PERIOD_ROLLUP")[0]
+        first, last = (date.fromisoformat(str(coverage[k])[:10]) if coverage[k] else None
+                       for k in ("first_day", "last_day"))
+        if last is not None and (comparison.current.start > last or comparison.current.end < first):
+            latest = _quarter(quarter_start(last))
+            if latest.end > last and latest.start > first:
+                latest = _quarter(_add_quarters(latest.start, -1))
+            relaxed.append(f"{comparison.current.label} vs {comparison.previous.label} "
+                           f"(outside the daily facts, {first:%b %d, %Y} - {last:%b %d, %Y}; "
+                           "this is the latest full quarter instead)")
+            comparison = Comparison("quarter", latest, _quarter(_add_quarters(latest.start, -1)))
+
+        by, heading = None, None
+        for slot, word, title in (("partner_name", "partner", "Partner"),
+                                  ("therapeutic_area", "area", "Therapeutic Area"),
+                                  (None, "tier", "Tier")):
+            if (slot and slot in entities) or word in tokens:
+                by, heading = slot or "partner_tier", title
+                break
+        sql = _bind(comparison_sql(by), _comparison_params(comparison))
+        rows = self._query(f"comparison.{by or 'total'}", sql, "T_CAMPAIGN_PERIOD_ROLLUP")
+        if by in entities:
+            rows = [r for r in rows if r["dimension"] in entities[by]]
+        cur, prev = comparison.current.label, comparison.previous.label
+        lines = [f"## 📊 {cur} vs {prev}" + (f" by {heading}" if heading else ""), ""]
+        if not rows:
+            return "\n".join(lines + ["No delivery in either period."]), 0, relaxed
+        if by is None:
+            r = rows[0]
+            lines += _table(["Metric", prev, cur, "Change"], [
+                ["Impressions", _fmt_num(r["prev_impressions"]), _fmt_num(r["cur_impressions"]),
+                 _change(r["cur_impressions"], r["prev_impressions"])],
+                ["Revenue", _fmt_money(r["prev_revenue"]), _fmt_money(r["cur_revenue"]),
+                 _change(r["cur_revenue"], r["prev_revenue"])],
+                ["Spend", _fmt_money(r["prev_spend"]), _fmt_money(r["cur_spend"]),
+                 _change(r["cur_spend"], r["prev_spend"])],
+                ["ROAS", _fmt_x(r["prev_roas"]), _fmt_x(r["cur_roas"]), _change(r["cur_roas"], r["prev_roas"])],
+                ["CTR", _fmt_pct(r["prev_ctr_pct"]), _fmt_pct(r["cur_ctr_pct"]),
+                 _change(r["cur_ctr_pct"], r["prev_ctr_pct"])],
+                ["Win Rate", _fmt_pct(r["prev_win_rate_pct"], 1), _fmt_pct(r["cur_win_rate_pct"], 1),
+                 _change(r["cur_win_rate_pct"], r["prev_win_rate_pct"])],
+                ["Conversion Rate", _fmt_pct(r["prev_conversion_rate_pct"]), _fmt_pct(r["cur_conversion_rate_pct"]),
+                 _change(r["cur_conversion_rate_pct"], r["prev_conversion_rate_pct"])],
+            ])
+        else:
+            lines += _table([heading, f"Revenue {prev}", f"Revenue {cur}", "Change", f"ROAS {cur}"], [
+                [r["dimension"], _fmt_money(r["prev_revenue"]), _fmt_money(r["cur_revenue"]),
+                 _change(r["cur_revenue"], r["prev_revenue"]), _fmt_x(r["cur_roas"])]
+                for r in rows
+            ])
+            movers = [r for r in rows if r["prev_revenue"]]
+            if movers:
+                best = max(movers, key=lambda r: float(r["cur_revenue"] or 0) / float(r["prev_revenue"]))
+                lines += ["", f"**{best['dimension']}** grew revenue the most "
+                              f"({_change(best['cur_revenue'], best['prev_revenue'])})."]
+        if comparison.current.end > today:
+            lines += ["", f"_{cur} runs to {comparison.current.end:%b %d}; it is compared through today._"]
+        return "\n".join(lines), len(rows), relaxed
+
+    def stats(self) -> Dict[str, float]:
+        """Hit rate, intents and latency (ms)."""
+        snap = self.metrics.snapshot("answers.")
+        counters = snap["counters"]
+        lookups, hits = counters.get("answers.lookups", 0), counters.get("answers.hits", 0)
+        return {"lookups": lookups, "hits": hits, "hit_rate": hits / lookups if lookups else 0.0,
+                "intents": {k.rsplit(".", 1)[-1]: v for k, v in counters.items() if k.startswith("answers.intent.")},
+                **snap["histograms"].get("answers.seconds", {})}
+
+
+def load_vocabulary(fetch: Callable[[str], object]) -> Dict[str, List[str]]:
+    """Distinct values for every VOCABULARY_COLUMNS slot; ``fetch(sql)`` returns a pyarrow.Table."""
+    vocabulary = {}
+    for slot, (table, column) in VOCABULARY_COLUMNS.items():
+        values = fetch(f"SELECT DISTINCT {column} AS value FROM AD_TECH.ANALYTICS.{table}").column(0)
+        vocabulary[slot] = sorted({str(v) for v in values.to_pylist() if v})
+    return vocabulary
@@ -0,0 +1,412 @@
+"""
+=============================================================================
+PatientPoint Ad Tech Demo - Streamlit App Load Test
+=============================================================================
+Headless load test for the app itself: virtual planners drive Home.py and
+the three pages through Streamlit's AppTest, all in one process, the way a
+single Streamlit deployment serves every browser session.
+
+Each virtual user follows a scripted journey with think time between steps:
+
+  home      : open the home page
+  optimizer : open, change the sidebar filters, ask for a bid recommendation
+  explorer  : open, type a search, narrow by region, run the search
+  chat      : open, ask a verified question, then one the agent answers
+
+Sessions share the process-wide providers (engine, result cache, snapshots,
+summary, search index) like real ones. The LocalEngine stands in for the
+Snowpark session and a fake agent (lognormal, median --agent-seconds)
+for Cortex, so no Snowflake account is needed.
+
+Users are ramped through --users levels. Each level reports rerun latency
+percentiles (overall and per step), CPU and memory per session, and
+throughput. The overall percentiles leave out chat.agent, whose rerun
+waits for the agent's answer. The saturation point is the last level before
+p95 latency exceeds its budget, errors appear, or throughput stops growing.
+
+Usage (from the streamlit/ directory):
+    python -m ad_tech.app_load --users 1,2,4,8 --duration 20
+    python -m ad_tech.app_load --users 16 --think-seconds 0.5 --json
+=============================================================================
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import random
+import resource
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from .metrics import LatencyHistogram
+
+APP_DIR = Path(__file__).resolve().parents[1]
+PAGES = {
+    "home": "Home.py",
+    "optimizer": "pages/1_Campaign_Optimizer.py",
+    "explorer": "pages/2_Inventory_Explorer.py",
+    "chat": "pages/3_Agent_Chat.py",
+}
+
+SEARCHES = [
+    "premium cardiology waiting room displays",
+    "oncology exam room tablets",
+    "morning endocrinology clinics in Texas",
+    "midwest hospital lobby screens",
+    "primary care check-in kiosks",
+]
+VERIFIED_PROMPTS = [
+    "Which therapeutic areas have the best CTR?",
+    "top 5 campaigns by roas",
+    "premium slots in the Midwest",
+    "revenue by income bracket",
+]
+AGENT_PROMPTS = [
+    "What's the optimal bid price for a diabetes campaign in cardiology waiting rooms?",
+    "Compare Q4 2024 vs Q3 2024 campaign performance",
+    "Recommend inventory for a new GLP-1 drug launch",
+]
+
+# Reruns that wait on the (fake) agent's answer; reported per step only
+AGENT_STEPS = frozenset({"chat.agent"})
+
+# Throughput must grow by this much per level to count as not saturated
+_MIN_SCALING = 1.10
+
+
+# =============================================================================
+# Journeys
+# =============================================================================
+Step = Tuple[str, str, Callable]        # (step name, page, action(app_test, rng))
+
+
+def _widget(at, kind: str, label: str):
+    for widget in getattr(at, kind):
+        if widget.label == label:
+            return widget
+    raise LookupError(f"no {kind} labelled {label!r}")
+
+
+def _pick(at, label: str, rng: random.Random):
+    box = _widget(at, "selectbox", label)
+    return box.set_value(rng.choice(box.options))
+
+
+def _button(at, label: str):
+    for button in list(at.button) + list(at.sidebar.button):
+        if button.label == label:
+            return button.click()
+    raise LookupError(f"no button labelled {label!r}")
+
+
+PLANNER_JOURNEY: List[Step] = [
+    ("home.load", "home", lambda at, rng: at),
+    ("optimizer.load", "optimizer", lambda at, rng: at),
+    ("optimizer.filter", "optimizer", lambda at, rng: _pick(at, "Therapeutic Area", rng)),
+    ("optimizer.filter", "optimizer", lambda at, rng: _pick(at, "Pharma Partner", rng)),
+    ("optimizer.filter", "optimizer", lambda at, rng: _pick(at, "Time Period", rng)),
+    ("optimizer.bid", "optimizer", lambda at, rng: _button(at, "🎯 Get Optimal Bid")),
+    ("explorer.load", "explorer", lambda at, rng: at),
+    ("explorer.query", "explorer", lambda at, rng: _widget(at, "text_input", "Search for ad placements")
+     .input(rng.choice(SEARCHES))),
+    ("explorer.filter", "explorer", lambda at, rng: _pick(at, "Region", rng)),
+    ("explorer.search", "explorer", lambda at, rng: _button(at, "🔍 Search")),
+    ("chat.load", "chat", lambda at, rng: at),
+    ("chat.verified", "chat", lambda at, rng: at.chat_input[0].set_value(rng.choice(VERIFIED_PROMPTS))),
+    ("chat.agent", "chat", lambda at, rng: at.chat_input[0].set_value(rng.choice(AGENT_PROMPTS))),
+]
+
+
+def fake_agent(median_seconds: float, seed: int = 0):
+    """Agent handler answering with demo responses after a lognormal delay."""
+    from .agent import check_budget, generate_demo_response
+
+    rng = random.Random(seed)
+    lock = threading.Lock()
+
+    def handler(prompt: str, timeout: float, cancel_event: Optional[threading.Event] = None) -> str:
+        check_budget(prompt)
+        with lock:
+            delay = min(timeout, rng.lognormvariate(math.log(median_seconds), 0.4)) if median_seconds > 0 else 0.0
+        if cancel_event is not None:
+            cancel_event.wait(delay)
+        else:
+            time.sleep(delay)
+        return generate_demo_response(prompt)
+
+    return handler
+
+
+def _rss_bytes() -> int:
+    """Current resident set size (peak RSS where /proc is unavailable)."""
+    try:
+        with open("/proc/self/statm") as fh:
+            return int(fh.read().split()[1]) * resource.getpagesize()
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+# =============================================================================
+# Reports
+# =============================================================================
+@dataclass
+class LevelReport:
+    """One ramp level: ``users`` concurrent sessions for ``duration_s``."""
+    users: int
+    duration_s: float = 0.0
+    reruns: int = 0
+    errors: int = 0
+    shed: int = 0                       # chat prompts the agent queue turned away
+    cpu_seconds: float = 0.0
+    memory_bytes: int = 0               # RSS growth while the sessions were open
+    latency: LatencyHistogram = field(default_factory=LatencyHistogram)
+    steps: Dict[str, LatencyHistogram] = field(default_factory=dict)
+
+    @property
+    def throughput(self) -> float:
+        return self.reruns / self.duration_s if self.duration_s else 0.0
+
+    @property
+    def cpu_per_session(self) -> float:
+        """CPU-seconds per session per minute of activity."""
+        return self.cpu_seconds / self.users / self.duration_s * 60 if self.duration_s else 0.0
+
+    @property
+    def memory_per_session(self) -> float:
+        return self.memory_bytes / self.users
+
+    def to_dict(self) -> Dict[str, object]:
+        return {
+            "users": self.users,
+            "duration_s": round(self.duration_s, 2),
+            "reruns": self.reruns,
+            "reruns_per_s": round(self.throughput, 2),
+            "errors": self.errors,
+            "shed": self.shed,
+            "cpu_cores": round(self.cpu_seconds / self.duration_s, 2) if self.duration_s else 0.0,
+            "cpu_s_per_session_minute": round(self.cpu_per_session, 3),
+            "memory_mb_per_session": round(self.memory_per_session / 2**20, 2),
+            "latency": {k: round(v, 1) for k, v in self.latency.summary((50, 95, 99)).items()},
+            "steps": {name: {k: round(v, 1) for k, v in h.summary((50, 95)).items()}
+                      for name, h in sorted(self.steps.items())},
+        }
+
+    def format(self) -> str:
+        lat = self.latency.summary((50, 95, 99))
+        return (f"{self.users:>5} | {self.throughput:>8.2f} | {lat['p50_ms']:>7.0f} | {lat['p95_ms']:>7.0f} | "
+                f"{lat['p99_ms']:>7.0f} | {self.cpu_seconds / self.duration_s:>5.2f} | "
+                f"{self.cpu_per_session:>9.2f} | {self.memory_per_session / 2**20:>8.1f} | "
+                f"{self.errors:>6} | {self.shed:>4}")
+
+    @staticmethod
+    def header() -> str:
+        return (f"{'users':>5} | {'reruns/s':>8} | {'p50 ms':>7} | {'p95 ms':>7} | {'p99 ms':>7} | "
+                f"{'cores':>5} | {'CPU s/min':>9} | {'MB/sess':>8} | {'errors':>6} | {'shed':>4}\n" + "-" * 92)
+
+
+# =============================================================================
+# Load loop
+# =============================================================================
+@contextmanager
+def concurrent_app_tests():
+    """
+    AppTest assumes one run at a time: each run installs a mock Streamlit
+    Runtime and clears it at the end, patches the config, and compiles the
+    page into its own script cache (and CPython 3.11's parser is not safe
+    to call from overlapping threads). While this is active an overlapping
+    run falls back to the last mock Runtime, the config stays patched, and
+    every run shares one script cache, as sessions of a real server do.
+    """
+    from unittest.mock import patch
+
+    from streamlit import config
+    from streamlit.runtime import Runtime
+    from streamlit.runtime.scriptrunner.script_cache import ScriptCache
+    from streamlit.testing.v1.util import build_mock_config_get_option
+
+    last: List[object] = [None]
+    scripts = ScriptCache()
+    get_bytecode = ScriptCache.get_bytecode
+
+    def instance(cls):
+        current = cls._instance
+        if current is not None:
+            last[0] = current
+            return current
+        if last[0] is None:
+            raise RuntimeError("Runtime hasn't been created!")
+        return last[0]
+
+    def exists(cls):
+        return cls._instance is not None or last[0] is not None
+
+    with patch.object(Runtime, "instance", classmethod(instance)), \
+            patch.object(Runtime, "exists", classmethod(exists)), \
+            patch.object(ScriptCache, "get_bytecode", lambda self, path: get_bytecode(scripts, path)), \
+            patch.object(config, "get_option", build_mock_config_get_option({"global.appTest": True})):
+        yield
+
+
+class VirtualUser:
+    """One browser: an AppTest per page, opened on first visit and kept."""
+
+    def __init__(self, rng: random.Random, timeout: float):
+        from streamlit.testing.v1 import AppTest
+
+        self._app_test = AppTest
+        self.rng = rng
+        self.timeout = timeout
+        self.pages: Dict[str, object] = {}
+
+    def step(self, page: str, action: Callable):
+        """Run one step; returns the AppTest after its rerun."""
+        at = self.pages.get(page)
+        if at is None:
+            at = self.pages[page] = self._app_test.from_file(str(APP_DIR / PAGES[page]),
+                                                             default_timeout=self.timeout)
+            return at.run()
+        return action(at, self.rng).run()
+
+
+def run_level(users: int, duration: float, think_seconds: float = 2.0, seed: int = 0,
+              timeout: float = 120.0, journey: Sequence[Step] = PLANNER_JOURNEY) -> LevelReport:
+    """``users`` virtual users looping ``journey`` for ``duration`` seconds."""
+    report = LevelReport(users=users)
+    lock = threading.Lock()
+    clock = time.perf_counter
+    stop_at = clock() + duration
+    sessions: List[VirtualUser] = []
+
+    def user(index: int) -> None:
+        rng = random.Random(seed * 1000 + index)
+        vu = VirtualUser(rng, timeout)
+        with lock:
+            sessions.append(vu)
+        # Stagger arrivals so the users don't move in lockstep
+        time.sleep(rng.uniform(0, think_seconds))
+        while clock() < stop_at:
+            for name, page, action in journey:
+                if clock() >= stop_at:
+                    return
+                began = clock()
+                error = shed = False
+                try:
+                    at = vu.step(page, action)
+                    error = bool(at.exception)
+                    shed = any("⏳" in w.value for w in at.warning)
+                except Exception:
+                    error = True
+                elapsed = clock() - began
+                with lock:
+                    report.reruns += 1
+                    report.errors += error
+                    report.shed += shed
+                    if name not in AGENT_STEPS:
+                        report.latency.record(elapsed)
+                    report.steps.setdefault(name, LatencyHistogram()).record(elapsed)
+                time.sleep(rng.expovariate(1 / think_seconds) if think_seconds > 0 else 0)
+
+    rss = _rss_bytes()
+    cpu = time.process_time()
+    started = clock()
+    threads = [threading.Thread(target=user, args=(i,), name=f"load-user-{i}", daemon=True) for i in range(users)]
+    with concurrent_app_tests():
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    report.duration_s = clock() - started
+    report.cpu_seconds = time.process_time() - cpu
+    report.memory_bytes = max(0, _rss_bytes() - rss)
+    sessions.clear()
+    return report
+
+
+def warm_up(journey: Sequence[Step] = PLANNER_JOURNEY, timeout: float = 120.0) -> None:
+    """One pass of ``journey`` so provider start-up isn't charged to the first level."""
+    vu = VirtualUser(random.Random(0), timeout)
+    for _, page, action in journey:
+        vu.step(page, action)
+
+
+def saturated(previous: Optional[LevelReport], current: LevelReport, p95_budget_ms: float) -> bool:
+    if current.errors or current.latency.percentile(95) * 1e3 > p95_budget_ms:
+        return True
+    return previous is not None and current.throughput < previous.throughput * _MIN_SCALING
+
+
+def ramp(levels: Sequence[int], duration: float, p95_budget_ms: float = 2000.0,
+         **level_kwargs) -> Dict[str, object]:
+    """
+    Run each level in turn, stopping after the first saturated one. Returns
+    the largest unsaturated user count and every level's report.
+    """
+    reports: List[LevelReport] = []
+    capacity = 0
+    for users in levels:
+        report = run_level(users, duration, **level_kwargs)
+        if saturated(reports[-1] if reports else None, report, p95_budget_ms):
+            reports.append(report)
+            break
+        reports.append(report)
+        capacity = users
+    return {"capacity_users": capacity, "levels": reports}
+
+
+def setup_runtime(agent_seconds: float, seed: int = 0) -> None:
+    """LocalEngine as the 'Snowflake' session and a fake agent behind the real queue."""
+    from . import runtime
+    from .agent_queue import AgentRequestQueue
+
+    engine = runtime.get_local_engine()
+    runtime.reset(session=engine, local_engine=engine,
+                  agent_queue=AgentRequestQueue(fake_agent(agent_seconds, seed)))
+
+
+# =============================================================================
+# CLI
+# =============================================================================
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("Usage")[0].strip("=\n "),
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", default="1,2,4,8,16", help="comma-separated concurrent user levels")
+    parser.add_argument("--duration", type=float, default=20.0, help="seconds per level")
+    parser.add_argument("--think-seconds", type=float, default=2.0, help="mean pause between steps")
+    parser.add_argument("--agent-seconds", type=float, default=3.0, help="median fake agent answer time")
+    parser.add_argument("--p95-budget-ms", type=float, default=2000.0,
+                        help="p95 rerun latency that counts as saturated")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--json", action="store_true", help="print a JSON report")
+    args = parser.parse_args(argv)
+
+    setup_runtime(args.agent_seconds, args.seed)
+    warm_up()
+    levels = [int(u) for u in args.users.split(",") if u.strip()]
+    result = ramp(levels, args.duration, p95_budget_ms=args.p95_budget_ms,
+                  think_seconds=args.think_seconds, seed=args.seed)
+
+    if args.json:
+        print(json.dumps({"capacity_users": result["capacity_users"],
+                          "levels": [r.to_dict() for r in result["levels"]]}, indent=2))
+        return 0
+    print(LevelReport.header())
+    for report in result["levels"]:
+        print(report.format())
+    last = result["levels"][-1]
+    print(f"\nrerun latency by step at {last.users} users (p50 / p95 ms):")
+    for name, hist in sorted(last.steps.items()):
+        summary = hist.summary((50, 95))
+        print(f"  {name:<18} {summary['p50_ms']:>7.0f} / {summary['p95_ms']:>7.0f}  ({hist.count} reruns)")
+    print(f"\nSaturation point: {result['capacity_users']} concurrent users "
+          f"(p95 budget {args.p95_budget_ms:.0f} ms)")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,641 @@
+"""
+=============================================================================
+PatientPoint Ad Tech Demo - Multi-Touch Attribution
+=============================================================================
+Recomputes conversions and revenue per campaign and slot from raw events
+(RAW.T_IMPRESSION_EVENTS / RAW.T_CONVERSION_EVENTS, setup/11_attribution.sql)
+instead of trusting the precomputed totals in T_CAMPAIGN_PERFORMANCE.
+
+A conversion's path is the same person's impressions for the converted
+brand in the --lookback window before it (at most MAX_TOUCHES, latest
+first). Its revenue is split across the path by each model:
+
+  last_touch : all to the latest touch
+  linear     : evenly over the touches
+  time_decay : 2^(-age / half-life), normalized over the path
+  shapley    : per brand, the Shapley value of each channel (slot
+               placement area by default) in the game whose coalition
+               value is the conversion rate of paths using only those
+               channels - exact up to MAX_EXACT_CHANNELS channels,
+               permutation-sampled above. A path's revenue is split
+               across its channels by value, then evenly within one.
+
+Event chunks stream in (from the warehouse with Arrow batches, or from
+simulate_events()) and are hash-partitioned by person into column files on
+disk, so memory is bounded by one partition, not the event volume. Each
+partition holds every event of its people and is processed independently
+with numpy in a process pool, in two passes:
+
+  1. path statistics: channel sets and conversions per (person, brand),
+     summed across partitions to compute the Shapley channel values
+  2. the join and all four models; per-partition credits are summed
+
+Usage (from the streamlit/ directory):
+    python -m ad_tech.attribution --people 2000000 --exposures 50000000
+    python -m ad_tech.attribution --source warehouse --write
+=============================================================================
+"""
+
+from __future__ import annotations
+
+import argparse
+import math
+import multiprocessing
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from .data_access import fetch_arrow, iter_arrow_batches
+from .sketches import hash64
+
+MODELS = ("last_touch", "linear", "time_decay", "shapley")
+RESULTS_TABLE = "AD_TECH.ANALYTICS.T_ATTRIBUTED_REVENUE"
+CHANNEL_COLUMN = "placement_area"
+DEFAULT_LOOKBACK_DAYS = 30
+DEFAULT_HALF_LIFE_DAYS = 7
+DEFAULT_PARTITIONS = 16
+MAX_TOUCHES = 50
+MAX_EXACT_CHANNELS = 12
+SHAPLEY_PERMUTATIONS = 2000
+DAY = 86_400
+
+CAMPAIGNS_QUERY = """
+SELECT campaign_id, drug_name, total_impressions, total_conversions, total_revenue, total_spend, target_specialty
+FROM AD_TECH.ANALYTICS.T_CAMPAIGN_PERFORMANCE
+ORDER BY campaign_id
+"""
+SLOTS_QUERY = f"""
+SELECT slot_id, specialty_name, estimated_daily_impressions, {CHANNEL_COLUMN}
+FROM AD_TECH.ANALYTICS.T_INVENTORY_ANALYTICS
+ORDER BY slot_id
+"""
+EXPOSURES_QUERY = "SELECT person_id, campaign_id, slot_id, event_ts FROM AD_TECH.RAW.T_IMPRESSION_EVENTS"
+CONVERSIONS_QUERY = "SELECT person_id, drug_name, event_ts, revenue FROM AD_TECH.RAW.T_CONVERSION_EVENTS"
+
+# The LocalEngine has no setup scripts; Snowflake gets the table from setup/11
+LOCAL_DDL = """
+CREATE TABLE IF NOT EXISTS T_ATTRIBUTED_REVENUE (
+    model TEXT, level TEXT, key_id TEXT, attributed_conversions REAL,
+    attributed_revenue REAL, lookback_days INTEGER, computed_at TEXT
+)
+"""
+INSERT_BATCH_ROWS = 500
+
+EXPOSURE_COLUMNS = (("person", np.int64), ("campaign", np.int32), ("slot", np.int32), ("ts", np.int64))
+CONVERSION_COLUMNS = (("person", np.int64), ("brand", np.int32), ("ts", np.int64), ("revenue", np.float64))
+
+
+# =============================================================================
+# Catalog and events
+# =============================================================================
+@dataclass
+class Catalog:
+    """Code tables: campaigns and their brand, slots and their channel."""
+    campaigns: List[str]
+    campaign_brand: np.ndarray
+    brands: List[str]
+    slots: List[str]
+    slot_channel: np.ndarray
+    channels: List[str]
+    campaign_info: Dict[str, Dict[str, object]] = field(default_factory=dict)
+    slot_info: Dict[str, Dict[str, object]] = field(default_factory=dict)
+
+    @classmethod
+    def from_rows(cls, campaigns: Sequence[Dict[str, object]], slots: Sequence[Dict[str, object]],
+                  channel_column: str = CHANNEL_COLUMN) -> "Catalog":
+        brands = sorted({str(c["drug_name"]) for c in campaigns})
+        channels = sorted({str(s.get(channel_column)) for s in slots})
+        return cls(
+            campaigns=[str(c["campaign_id"]) for c in campaigns],
+            campaign_brand=np.array([brands.index(str(c["drug_name"])) for c in campaigns], dtype=np.int32),
+            brands=brands,
+            slots=[str(s["slot_id"]) for s in slots],
+            slot_channel=np.array([channels.index(str(s.get(channel_column))) for s in slots], dtype=np.int32),
+            channels=channels,
+            campaign_info={str(c["campaign_id"]): c for c in campaigns},
+            slot_info={str(s["slot_id"]): s for s in slots},
+        )
+
+    def encode(self, values, known: List[str]) -> np.ndarray:
+        """Codes of ``values`` in ``known``; -1 for unknown values."""
+        codes = pc.index_in(pa.array(values).cast(pa.string()), value_set=pa.array(known, pa.string()))
+        return codes.fill_null(-1).to_numpy(zero_copy_only=False).astype(np.int32)
+
+
+@dataclass
+class EventChunk:
+    """Parallel arrays of impressions and conversions; timestamps in epoch seconds."""
+    person: np.ndarray
+    campaign: np.ndarray            # campaign codes
+    slot: np.ndarray                # slot codes
+    ts: np.ndarray
+    conversion_person: np.ndarray
+    conversion_brand: np.ndarray    # brand codes
+    conversion_ts: np.ndarray
+    revenue: np.ndarray
+
+
+def _empty_chunk() -> Dict[str, np.ndarray]:
+    return {"person": np.empty(0, np.int64), "campaign": np.empty(0, np.int32), "slot": np.empty(0, np.int32),
+            "ts": np.empty(0, np.int64), "conversion_person": np.empty(0, np.int64),
+            "conversion_brand": np.empty(0, np.int32), "conversion_ts": np.empty(0, np.int64),
+            "revenue": np.empty(0, np.float64)}
+
+
+def _seconds(column) -> np.ndarray:
+    """Epoch seconds from a timestamp, ISO string or integer column."""
+    if pa.types.is_timestamp(column.type):
+        column = column.cast(pa.timestamp("s", tz=column.type.tz)).cast(pa.int64())
+    elif pa.types.is_string(column.type) or pa.types.is_large_string(column.type):
+        column = pc.strptime(pc.utf8_slice_codeunits(column, 0, 19), "%Y-%m-%d %H:%M:%S", "s").cast(pa.int64())
+    return column.to_numpy(zero_copy_only=False).astype(np.int64)
+
+
+def stream_events(engine, catalog: Catalog) -> Iterator[EventChunk]:
+    """Raw events from the warehouse as chunks, one Arrow batch at a time."""
+    for batch in iter_arrow_batches(engine, EXPOSURES_QUERY):
+        columns = {name.upper(): batch.column(i) for i, name in enumerate(batch.schema.names)}
+        chunk = _empty_chunk()
+        chunk.update(
+            person=columns["PERSON_ID"].to_numpy(zero_copy_only=False).astype(np.int64),
+            campaign=catalog.encode(columns["CAMPAIGN_ID"], catalog.campaigns),
+            slot=catalog.encode(columns["SLOT_ID"], catalog.slots),
+            ts=_seconds(columns["EVENT_TS"]),
+        )
+        yield EventChunk(**chunk)
+    for batch in iter_arrow_batches(engine, CONVERSIONS_QUERY):
+        columns = {name.upper(): batch.column(i) for i, name in enumerate(batch.schema.names)}
+        chunk = _empty_chunk()
+        chunk.update(
+            conversion_person=columns["PERSON_ID"].to_numpy(zero_copy_only=False).astype(np.int64),
+            conversion_brand=catalog.encode(columns["DRUG_NAME"], catalog.brands),
+            conversion_ts=_seconds(columns["EVENT_TS"]),
+            revenue=columns["REVENUE"].cast(pa.float64()).to_numpy(zero_copy_only=False),
+        )
+        yield EventChunk(**chunk)
+
+
+# Relative conversion lift by placement area in simulate_events(), so the
+# models have a channel effect to disagree about
+SIMULATED_LIFT = {"Exam Room": 1.8, "Waiting Room": 1.0, "Check-in": 0.6, "Hallway": 0.4}
+
+
+def simulate_events(catalog: Catalog, people: int = 200_000, exposures: int = 5_000_000, days: int = 90,
+                    chunk_people: int = 100_000, end: Optional[datetime] = None, seed: int = 0) -> Iterator[EventChunk]:
+    """
+    Synthetic events in blocks of ``chunk_people`` people: impressions split
+    across campaigns by total_impressions and across the slots of each
+    campaign's target specialty by volume; each impression converts at the
+    campaign's conversions-per-impression rate times SIMULATED_LIFT for its
+    channel, a few days later, for the campaign's revenue per conversion.
+    """
+    rng = np.random.default_rng(seed)
+    end_ts = int((end or datetime.now()).timestamp())
+    start_ts = end_ts - days * DAY
+    info = [catalog.campaign_info[c] for c in catalog.campaigns]
+    weights = np.array([float(c.get("total_impressions") or 1) for c in info])
+    rate = np.array([float(c.get("total_conversions") or 0) / max(float(c.get("total_impressions") or 1), 1)
+                     for c in info])
+    value = np.array([float(c.get("total_revenue") or 0) / max(float(c.get("total_conversions") or 1), 1)
+                      for c in info])
+    lift = np.array([SIMULATED_LIFT.get(channel, 1.0) for channel in catalog.channels])
+    volume = np.array([float(catalog.slot_info[s].get("estimated_daily_impressions") or 1) for s in catalog.slots])
+    specialty = np.array([str(catalog.slot_info[s].get("specialty_name")) for s in catalog.slots])
+    targets = []
+    for c in info:
+        eligible = np.flatnonzero(specialty == str(c.get("target_specialty")))
+        eligible = eligible if len(eligible) else np.arange(len(catalog.slots))
+        targets.append((eligible, np.cumsum(volume[eligible]) / volume[eligible].sum()))
+
+    for block_start in range(0, people, chunk_people):
+        block = min(chunk_people, people - block_start)
+        count = int(round(exposures * block / people))
+        # Skewed exposure counts per person: a few heavy visitors, many light ones
+        person = block_start + (block * rng.random(count) ** 2).astype(np.int64)
+        campaign = rng.choice(len(info), size=count, p=weights / weights.sum()).astype(np.int32)
+        slot = np.empty(count, dtype=np.int32)
+        for c, (eligible, cumulative) in enumerate(targets):
+            rows = np.flatnonzero(campaign == c)
+            slot[rows] = eligible[np.searchsorted(cumulative, rng.random(len(rows)), side="right").clip(
+                max=len(eligible) - 1)]
+        ts = start_ts + rng.integers(0, days * DAY, size=count)
+        converts = rng.random(count) < rate[campaign] * lift[catalog.slot_channel[slot]]
+        conversion_ts = ts[converts] + (rng.exponential(3.0, size=int(converts.sum())) * DAY).astype(np.int64)
+        keep = conversion_ts <= end_ts
+        yield EventChunk(
+            person=person, campaign=campaign, slot=slot, ts=ts,
+            conversion_person=person[converts][keep],
+            conversion_brand=catalog.campaign_brand[campaign[converts][keep]],
+            conversion_ts=conversion_ts[keep],
+            revenue=value[campaign[converts][keep]],
+        )
+
+
+# =============================================================================
+# Partitioning
+# =============================================================================
+class PartitionWriter:
+    """
+    Appends event chunks to per-partition column files under ``directory``;
+    a person's events always land in the same partition.
+    """
+
+    def __init__(self, directory: Path, partitions: int = DEFAULT_PARTITIONS):
+        self.directory = Path(directory)
+        self.partitions = partitions
+        self.exposures = 0
+        self.conversions = 0
+        self.dropped = 0            # events for unknown campaigns, slots or brands
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def add(self, chunk: EventChunk) -> None:
+        known = (chunk.campaign >= 0) & (chunk.slot >= 0)
+        self._write("exposure", EXPOSURE_COLUMNS,
+                    (chunk.person[known], chunk.campaign[known], chunk.slot[known], chunk.ts[known]))
+        converted = chunk.conversion_brand >= 0
+        self._write("conversion", CONVERSION_COLUMNS,
+                    (chunk.conversion_person[converted], chunk.conversion_brand[converted],
+                     chunk.conversion_ts[converted], chunk.revenue[converted]))
+        self.exposures += int(known.sum())
+        self.conversions += int(converted.sum())
+        self.dropped += int((~known).sum() + (~converted).sum())
+
+    def _write(self, kind: str, columns, arrays) -> None:
+        if not len(arrays[0]):
+            return
+        partition = (hash64(arrays[0]) % np.uint64(self.partitions)).astype(np.int64)
+        order = np.argsort(partition, kind="stable")
+        bounds = np.searchsorted(partition[order], np.arange(self.partitions + 1))
+        for (name, dtype), values in zip(columns, arrays):
+            values = values[order].astype(dtype, copy=False)
+            for p in np.flatnonzero(np.diff(bounds)).tolist():
+                with open(self.directory / f"{kind}-{p:04d}.{name}", "ab") as f:
+                    f.write(values[bounds[p]:bounds[p + 1]].tobytes())
+
+
+def _read(directory: Path, kind: str, partition: int, columns) -> Dict[str, np.ndarray]:
+    arrays = {}
+    for name, dtype in columns:
+        path = Path(directory) / f"{kind}-{partition:04d}.{name}"
+        arrays[name] = np.fromfile(path, dtype=dtype) if path.exists() else np.empty(0, dtype=dtype)
+    return arrays
+
+
+# =============================================================================
+# Per-partition work (runs in the process pool)
+# =============================================================================
+@dataclass
+class PartitionTask:
+    directory: str
+    partition: int
+    campaign_brand: np.ndarray
+    slot_channel: np.ndarray
+    n_slots: int
+    n_brands: int
+    n_channels: int
+    lookback: int = DEFAULT_LOOKBACK_DAYS * DAY
+    half_life: int = DEFAULT_HALF_LIFE_DAYS * DAY
+    max_touches: int = MAX_TOUCHES
+    shares: Optional[np.ndarray] = None         # (brands, channels) Shapley shares, pass 2
+
+
+def _load(task: PartitionTask):
+    """Events of one partition with dense (person, brand) group ids."""
+    exposures = _read(task.directory, "exposure", task.partition, EXPOSURE_COLUMNS)
+    conversions = _read(task.directory, "conversion", task.partition, CONVERSION_COLUMNS)
+    _, person = np.unique(np.concatenate([exposures["person"], conversions["person"]]), return_inverse=True)
+    n = len(exposures["person"])
+    exposures["group"] = person[:n] * task.n_brands + task.campaign_brand[exposures["campaign"]]
+    conversions["group"] = person[n:] * task.n_brands + conversions["brand"]
+    return exposures, conversions
+
+
+def path_stats(task: PartitionTask) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Pass 1: (brand, channel set) keys with the number of (person, brand)
+    paths and of converted paths using exactly that channel set.
+    """
+    exposures, conversions = _load(task)
+    if not len(exposures["group"]):
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty, empty
+    order = np.argsort(exposures["group"], kind="stable")
+    group = exposures["group"][order]
+    starts = np.flatnonzero(np.r_[True, group[1:] != group[:-1]])
+    bits = np.left_shift(1, task.slot_channel[exposures["slot"][order]].astype(np.int64))
+    masks = np.bitwise_or.reduceat(bits, starts)
+    groups = group[starts]
+    converted = np.isin(groups, conversions["group"])
+    keys = (groups % task.n_brands) << task.n_channels | masks
+    keys, inverse, paths = np.unique(keys, return_inverse=True, return_counts=True)
+    return keys, paths, np.bincount(inverse, weights=converted, minlength=len(keys)).astype(np.int64)
+
+
+def attribute_partition(task: PartitionTask) -> Dict[str, object]:
+    """
+    Pass 2: join conversions to their touches and credit every model.
+    Returns per-model (campaign conversions, campaign revenue, slot
+    conversions, slot revenue) arrays plus unattributed totals.
+    """
+    exposures, conversions = _load(task)
+    n_campaigns = len(task.campaign_brand)
+    credits = {model: np.zeros((4, max(n_campaigns, task.n_slots))) for model in MODELS}
+    result = {"credits": credits, "exposures": len(exposures["ts"]), "conversions": len(conversions["ts"]),
+              "unattributed": 0, "unattributed_revenue": 0.0}
+    if not len(conversions["ts"]):
+        return result
+
+    # Sort touches by (group, time) on one int64 key; conversion windows are key ranges
+    t0 = min(exposures["ts"].min(initial=conversions["ts"].min()), conversions["ts"].min())
+    span = int(max(exposures["ts"].max(initial=t0), conversions["ts"].max()) - t0 + 1)
+    key = exposures["group"] * span + (exposures["ts"] - t0)
+    order = np.argsort(key, kind="stable")
+    key = key[order]
+    touch_ts, campaign, slot = exposures["ts"][order], exposures["campaign"][order], exposures["slot"][order]
+    base = conversions["group"] * span
+    hi = np.searchsorted(key, base + (conversions["ts"] - t0), side="right")
+    lo = np.searchsorted(key, base + np.maximum(conversions["ts"] - task.lookback - t0, 0), side="left")
+    lo = np.maximum(lo, hi - task.max_touches)
+    length = hi - lo
+
+    missing = length == 0
+    result["unattributed"] = int(missing.sum())
+    result["unattributed_revenue"] = float(conversions["revenue"][missing].sum())
+
+    # One row per (conversion, touch)
+    conv = np.repeat(np.arange(len(length)), length)
+    n = length[conv]
+    within = np.arange(len(conv)) - np.repeat(np.cumsum(length) - length, length)
+    touch = lo[conv] + within
+    revenue = conversions["revenue"][conv]
+    n_conv = len(length)
+
+    weights = {
+        "last_touch": (within == n - 1).astype(np.float64),
+        "linear": 1.0 / n,
+    }
+    decay = np.exp2(-(conversions["ts"][conv] - touch_ts[touch]) / task.half_life)
+    weights["time_decay"] = decay / np.bincount(conv, weights=decay, minlength=n_conv)[conv]
+    channel = task.slot_channel[slot[touch]].astype(np.int64)
+    shares = task.shares if task.shares is not None else np.ones((task.n_brands, task.n_channels))
+    same_channel = np.bincount(conv * task.n_channels + channel, minlength=n_conv * task.n_channels)
+    value = shares[conversions["brand"][conv], channel] / same_channel[conv * task.n_channels + channel]
+    total = np.bincount(conv, weights=value, minlength=n_conv)[conv]
+    weights["shapley"] = np.where(total > 0, value / np.where(total > 0, total, 1), 1.0 / n)
+
+    for model, weight in weights.items():
+        credit = credits[model]
+        credit[0, :n_campaigns] = np.bincount(campaign[touch], weights=weight, minlength=n_campaigns)
+        credit[1, :n_campaigns] = np.bincount(campaign[touch], weights=weight * revenue, minlength=n_campaigns)
+        credit[2, :task.n_slots] = np.bincount(slot[touch], weights=weight, minlength=task.n_slots)
+        credit[3, :task.n_slots] = np.bincount(slot[touch], weights=weight * revenue, minlength=task.n_slots)
+    return result
+
+
+# =============================================================================
+# Shapley channel values
+# =============================================================================
+def _coalition_values(masks: np.ndarray, paths: np.ndarray, converted: np.ndarray, n_channels: int) -> np.ndarray:
+    """v(S) for every channel set S: conversion rate of paths using only channels in S."""
+    size = 1 << n_channels
+    p = np.bincount(masks, weights=paths, minlength=size)
+    c = np.bincount(masks, weights=converted, minlength=size)
+    for bit in range(n_channels):               # subset sums (zeta transform)
+        for table in (p, c):
+            view = table.reshape(-1, 2, 1 << bit)
+            view[:, 1, :] += view[:, 0, :]
+    return np.divide(c, p, out=np.zeros(size), where=p > 0)
+
+
+def shapley_values(masks: np.ndarray, paths: np.ndarray, converted: np.ndarray, n_channels: int,
+                   permutations: int = SHAPLEY_PERMUTATIONS, seed: int = 0) -> np.ndarray:
+    """Shapley value of each channel; exact up to MAX_EXACT_CHANNELS, sampled above."""
+    if n_channels <= MAX_EXACT_CHANNELS:
+        v = _coalition_values(masks, paths, converted, n_channels)
+        coalitions = np.arange(1 << n_channels)
+        sizes = np.array([bin(s).count("1") for s in range(1 << n_channels)])
+        weight = np.array([math.factorial(k) * math.factorial(n_channels - k - 1) / math.factorial(n_channels)
+                           for k in range(n_channels)])
+        values = np.zeros(n_channels)
+        for i in range(n_channels):
+            without = coalitions[(coalitions >> i) & 1 == 0]
+            values[i] = (weight[sizes[without]] * (v[without | (1 << i)] - v[without])).sum()
+        return values
+
+    def v(coalition: int) -> float:
+        inside = (masks & ~coalition) == 0
+        total = paths[inside].sum()
+        return converted[inside].sum() / total if total else 0.0
+
+    rng = np.random.default_rng(seed)
+    values = np.zeros(n_channels)
+    for _ in range(permutations):
+        coalition, before = 0, 0.0
+        for i in rng.permutation(n_channels).tolist():
+            coalition |= 1 << i
+            after = v(coalition)
+            values[i] += after - before
+            before = after
+    return values / permutations
+
+
+def channel_shares(keys: np.ndarray, paths: np.ndarray, converted: np.ndarray, n_brands: int,
+                   n_channels: int) -> np.ndarray:
+    """(brands, channels) Shapley values clipped at zero and normalized per brand."""
+    shares = np.ones((n_brands, n_channels)) / n_channels
+    brand, masks = keys >> n_channels, keys & ((1 << n_channels) - 1)
+    for b in np.unique(brand).tolist():
+        rows = brand == b
+        values = np.maximum(shapley_values(masks[rows], paths[rows], converted[rows], n_channels), 0)
+        if values.sum() > 0:
+            shares[b] = values / values.sum()
+    return shares
+
+
+# =============================================================================
+# Driver
+# =============================================================================
+@dataclass
+class AttributionResult:
+    catalog: Catalog
+    credits: Dict[str, np.ndarray]          # model -> (4, n) as in attribute_partition()
+    shares: np.ndarray
+    exposures: int
+    conversions: int
+    unattributed: int
+    unattributed_revenue: float
+    seconds: float
+    partitions: int
+    workers: int
+    lookback_days: int
+
+    def by_campaign(self, model: str) -> Dict[str, Tuple[float, float]]:
+        """campaign_id -> (attributed conversions, attributed revenue)."""
+        credit = self.credits[model]
+        return {c: (float(credit[0, i]), float(credit[1, i])) for i, c in enumerate(self.catalog.campaigns)}
+
+    def by_slot(self, model: str) -> Dict[str, Tuple[float, float]]:
+        credit = self.credits[model]
+        return {s: (float(credit[2, i]), float(credit[3, i])) for i, s in enumerate(self.catalog.slots)}
+
+    def by_channel(self, model: str) -> Dict[str, float]:
+        """Attributed revenue per channel."""
+        revenue = np.bincount(self.catalog.slot_channel, weights=self.credits[model][3, :len(self.catalog.slots)],
+                              minlength=len(self.catalog.channels))
+        return dict(zip(self.catalog.channels, revenue.tolist()))
+
+    def records(self, computed_at: Optional[datetime] = None) -> List[tuple]:
+        """Rows for T_ATTRIBUTED_REVENUE."""
+        stamp = (computed_at or datetime.now()).strftime("%Y-%m-%d %H:%M:%S")
+        rows = []
+        for model in self.credits:
+            for level, values in (("campaign", self.by_campaign(model)), ("slot", self.by_slot(model))):
+                rows.extend((model, level, key, round(conversions, 4), round(revenue, 2), self.lookback_days, stamp)
+                            for key, (conversions, revenue) in values.items())
+        return rows
+
+
+def _pool(workers: int) -> ProcessPoolExecutor:
+    # spawn: the app and load tests run threads, which fork does not mix well with
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+
+
+def attribute(directory: Path, catalog: Catalog, partitions: int = DEFAULT_PARTITIONS, workers: int = 1,
+              lookback_days: int = DEFAULT_LOOKBACK_DAYS, half_life_days: float = DEFAULT_HALF_LIFE_DAYS,
+              max_touches: int = MAX_TOUCHES) -> AttributionResult:
+    """Run both passes over partitioned events in ``directory``; workers=1 stays in-process."""
+    t0 = time.perf_counter()
+    tasks = [
+        PartitionTask(str(directory), p, catalog.campaign_brand, catalog.slot_channel, len(catalog.slots),
+                      len(catalog.brands), len(catalog.channels), lookback=lookback_days * DAY,
+                      half_life=int(half_life_days * DAY), max_touches=max_touches)
+        for p in range(partitions)
+    ]
+    pool = _pool(workers) if workers > 1 else None
+    run = pool.map if pool is not None else map
+    try:
+        stats = list(run(path_stats, tasks))
+        keys = np.concatenate([s[0] for s in stats])
+        keys, inverse = np.unique(keys, return_inverse=True)
+        paths = np.bincount(inverse, weights=np.concatenate([s[1] for s in stats]), minlength=len(keys))
+        converted = np.bincount(inverse, weights=np.concatenate([s[2] for s in stats]), minlength=len(keys))
+        shares = channel_shares(keys, paths, converted, len(catalog.brands), len(catalog.channels))
+        for task in tasks:
+            task.shares = shares
+        parts = list(run(attribute_partition, tasks))
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    n = max(len(catalog.campaigns), len(catalog.slots))
+    credits = {model: sum((p["credits"][model] for p in parts), np.zeros((4, n))) for model in MODELS}
+    return AttributionResult(
+        catalog=catalog, credits=credits, shares=shares,
+        exposures=sum(p["exposures"] for p in parts), conversions=sum(p["conversions"] for p in parts),
+        unattributed=sum(p["unattributed"] for p in parts),
+        unattributed_revenue=sum(p["unattributed_revenue"] for p in parts),
+        seconds=time.perf_counter() - t0, partitions=partitions, workers=workers, lookback_days=lookback_days,
+    )
+
+
+def run_attribution(chunks: Iterable[EventChunk], catalog: Catalog, partitions: int = DEFAULT_PARTITIONS,
+                    workers: int = 1, spill_dir: Optional[Path] = None, **options) -> AttributionResult:
+    """Partition ``chunks`` to a temporary directory, attribute, and clean up."""
+    directory = Path(tempfile.mkdtemp(prefix="attribution-", dir=spill_dir))
+    try:
+        writer = PartitionWriter(directory, partitions)
+        for chunk in chunks:
+            writer.add(chunk)
+        return attribute(directory, catalog, partitions, workers, **options)
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def load_catalog(engine) -> Catalog:
+    campaigns = fetch_arrow(engine, CAMPAIGNS_QUERY)
+    slots = fetch_arrow(engine, SLOTS_QUERY)
+    lower = lambda table: table.rename_columns([c.lower() for c in table.column_names]).to_pylist()  # noqa: E731
+    return Catalog.from_rows(lower(campaigns), lower(slots))
+
+
+def write_attribution(engine, result: AttributionResult) -> int:
+    """Replace the models' rows in T_ATTRIBUTED_REVENUE; returns rows written."""
+    rows = result.records()
+    in_snowflake = getattr(engine, "connection", None) is not None
+    if not in_snowflake:
+        engine.execute(LOCAL_DDL)
+    statements = [(f"DELETE FROM {RESULTS_TABLE} WHERE model IN ({', '.join('?' for _ in result.credits)})",
+                   list(result.credits))]
+    for i in range(0, len(rows), INSERT_BATCH_ROWS):
+        batch = rows[i:i + INSERT_BATCH_ROWS]
+        statements.append((
+            f"INSERT INTO {RESULTS_TABLE} (model, level, key_id, attributed_conversions, attributed_revenue, "
+            f"lookback_days, computed_at) VALUES {', '.join('(?, ?, ?, ?, ?, ?, ?)' for _ in batch)}",
+            [value for row in batch for value in row],
+        ))
+    if in_snowflake:
+        statements = [("BEGIN", [])] + statements + [("COMMIT", [])]
+    for sql, params in statements:
+        engine.sql(sql, params).collect()
+    return len(rows)
+
+
+# ============================================================================
+# CLI
+# ============================================================================
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("Usage")[0].strip("=\n "),
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--source", choices=("simulate", "warehouse"), default="simulate")
+    parser.add_argument("--people", type=int, default=200_000, help="simulated people")
+    parser.add_argument("--exposures", type=int, default=5_000_000, help="simulated impressions")
+    parser.add_argument("--days", type=int, default=90, help="simulated days")
+    parser.add_argument("--lookback-days", type=int, default=DEFAULT_LOOKBACK_DAYS)
+    parser.add_argument("--half-life-days", type=float, default=DEFAULT_HALF_LIFE_DAYS)
+    parser.add_argument("--partitions", type=int, default=DEFAULT_PARTITIONS)
+    parser.add_argument("--workers", type=int, default=multiprocessing.cpu_count())
+    parser.add_argument("--spill-dir", type=Path, help="where partition files go (default: system temp)")
+    parser.add_argument("--write", action="store_true", help="write results to T_ATTRIBUTED_REVENUE")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    from .runtime import get_engine
+
+    engine = get_engine()
+    catalog = load_catalog(engine)
+    if args.source == "warehouse":
+        chunks = stream_events(engine, catalog)
+    else:
+        chunks = simulate_events(catalog, args.people, args.exposures, args.days, seed=args.seed)
+    result = run_attribution(chunks, catalog, args.partitions, args.workers, args.spill_dir,
+                             lookback_days=args.lookback_days, half_life_days=args.half_life_days)
+
+    print(f"{result.exposures:,} impressions, {result.conversions:,} conversions "
+          f"({result.unattributed:,} with no touch in {args.lookback_days} days) in {result.seconds:.1f} s, "
+          f"{result.partitions} partitions on {result.workers} workers "
+          f"({result.exposures / result.seconds:,.0f} impressions/s)\n")
+    print(f"{'campaign':<12}" + "".join(f"{model:>14}" for model in MODELS))
+    by_model = {model: result.by_campaign(model) for model in MODELS}
+    for campaign in catalog.campaigns:
+        print(f"{campaign:<12}" + "".join(f"{by_model[m][campaign][1]:>14,.0f}" for m in MODELS))
+    print(f"\n{'channel':<12}" + "".join(f"{model:>14}" for model in MODELS))
+    by_channel = {model: result.by_channel(model) for model in MODELS}
+    for channel in catalog.channels:
+        total = {m: sum(by_channel[m].values()) or 1.0 for m in MODELS}
+        print(f"{channel:<12}" + "".join(f"{by_channel[m][channel] / total[m]:>14.1%}" for m in MODELS))
+    if args.write:
+        print(f"\nWrote {write_attribution(engine, result):,} rows to {RESULTS_TABLE}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,361 @@
+"""
+=============================================================================
+PatientPoint Ad Tech Demo - Bid Request Replay / Load Generator
+=============================================================================
+Drives RTB-style bid requests through the bid recommendation path at a fixed
+offered rate and reports latency percentiles, throughput and drops.
+
+Requests are either synthesized from T_INVENTORY_ANALYTICS (slot_id, daypart,
+specialty_name, weighted by estimated_daily_impressions) or replayed from a
+JSONL/CSV capture with the same keys. The generator is open-loop: latency is
+measured from each request's *scheduled* send time, so a stalled handler
+shows up as queueing delay instead of silently lowering the offered load.
+
+Everything runs on one asyncio event loop, i.e. one core, so the sustainable
+rate reported by --find-capacity is a per-core capacity number.
+
+Usage (from the streamlit/ directory):
+    python -m ad_tech.bid_replay --rate 5000 --duration 10
+    python -m ad_tech.bid_replay --replay bids.jsonl --rate 20000
+    python -m ad_tech.bid_replay --find-capacity --deadline-ms 50
+    python -m ad_tech.bid_replay --experiments 2000   # bid strategy A/B tests on the path
+=============================================================================
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import csv
+import inspect
+import json
+import random
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence
+
+from .metrics import LatencyHistogram
+
+SLOTS_QUERY = """
+SELECT
+    slot_id,
+    daypart,
+    specialty_name,
+    region,
+    base_cpm,
+    estimated_daily_impressions
+FROM AD_TECH.ANALYTICS.T_INVENTORY_ANALYTICS
+"""
+
+# Yield to the event loop every N synchronous handler calls so the producer
+# keeps its schedule even when the handler never awaits.
+_YIELD_EVERY = 32
+
+
+@dataclass(frozen=True)
+class BidRequest:
+    """One bid request as seen by the bid path."""
+    request_id: int
+    slot_id: str
+    daypart: str
+    specialty_name: str
+    region: Optional[str] = None
+    floor_cpm: float = 0.0
+
+
+@dataclass
+class ReplayReport:
+    """Outcome of one replay run at a fixed offered rate."""
+    target_rate: float
+    duration_s: float = 0.0
+    offered: int = 0
+    completed: int = 0
+    no_bids: int = 0
+    dropped_queue_full: int = 0
+    dropped_expired: int = 0
+    late: int = 0
+    errors: int = 0
+    latency: LatencyHistogram = field(default_factory=LatencyHistogram)
+    service: LatencyHistogram = field(default_factory=LatencyHistogram)
+
+    @property
+    def dropped(self) -> int:
+        return self.dropped_queue_full + self.dropped_expired
+
+    @property
+    def throughput(self) -> float:
+        return self.completed / self.duration_s if self.duration_s else 0.0
+
+    @property
+    def drop_rate_pct(self) -> float:
+        return 100.0 * self.dropped / self.offered if self.offered else 0.0
+
+    def to_dict(self) -> Dict[str, object]:
+        return {
+            "target_rate": self.target_rate,
+            "duration_s": round(self.duration_s, 3),
+            "offered": self.offered,
+            "completed": self.completed,
+            "throughput_rps": round(self.throughput, 1),
+            "no_bids": self.no_bids,
+            "dropped": self.dropped,
+            "dropped_queue_full": self.dropped_queue_full,
+            "dropped_expired": self.dropped_expired,
+            "drop_rate_pct": round(self.drop_rate_pct, 3),
+            "late": self.late,
+            "errors": self.errors,
+            "latency": {k: round(v, 4) for k, v in self.latency.summary().items()},
+            "service": {k: round(v, 4) for k, v in self.service.summary().items()},
+        }
+
+    def format(self) -> str:
+        lat = self.latency.summary()
+        svc = self.service.summary()
+        return "\n".join([
+            f"offered rate   : {self.target_rate:,.0f} req/s for {self.duration_s:.2f}s",
+            f"throughput     : {self.throughput:,.0f} req/s ({self.completed:,} completed, "
+            f"{self.no_bids:,} no-bid)",
+            f"dropped        : {self.dropped:,} ({self.drop_rate_pct:.2f}%) "
+            f"[queue full {self.dropped_queue_full:,}, expired {self.dropped_expired:,}]",
+            f"late responses : {self.late:,}   errors: {self.errors:,}",
+            f"latency ms     : p50 {lat['p50_ms']:.3f}  p90 {lat['p90_ms']:.3f}  "
+            f"p99 {lat['p99_ms']:.3f}  p99.9 {lat['p99.9_ms']:.3f}  max {lat['max_ms']:.3f}",
+            f"service ms     : p50 {svc['p50_ms']:.4f}  p99 {svc['p99_ms']:.4f}",
+        ])
+
+
+# ============================================================================
+# Request sources
+# ============================================================================
+def inventory_slots(session) -> List[Dict[str, object]]:
+    """Slot keys and weights from T_INVENTORY_ANALYTICS."""
+    return [
+        {
+            "slot_id": row["SLOT_ID"],
+            "daypart": row["DAYPART"],
+            "specialty_name": row["SPECIALTY_NAME"],
+            "region": row["REGION"],
+            "base_cpm": float(row["BASE_CPM"]),
+            "weight": float(row["ESTIMATED_DAILY_IMPRESSIONS"] or 1),
+        }
+        for row in session.sql(SLOTS_QUERY).collect()
+    ]
+
+
+def synthesize_requests(slots: Sequence[Dict[str, object]], count: int,
+                        seed: int = 7, floor_jitter: float = 0.25) -> List[BidRequest]:
+    """
+    Draw ``count`` requests from ``slots`` proportionally to their daily
+    impressions, with the seller floor jittered around each slot's base CPM.
+    """
+    rng = random.Random(seed)
+    picks = rng.choices(slots, weights=[s.get("weight", 1.0) for s in slots], k=count)
+    return [
+        BidRequest(
+            request_id=i,
+            slot_id=s["slot_id"],
+            daypart=s["daypart"],
+            specialty_name=s["specialty_name"],
+            region=s.get("region"),
+            floor_cpm=round(float(s.get("base_cpm") or 0) * rng.uniform(1 - floor_jitter, 1 + floor_jitter), 2),
+        )
+        for i, s in enumerate(picks)
+    ]
+
+
+def load_requests(path: Path) -> List[BidRequest]:
+    """Replay a capture: JSONL (one object per line) or CSV with a header row."""
+    path = Path(path)
+    with path.open(encoding="utf-8", newline="") as fh:
+        if path.suffix.lower() == ".csv":
+            records = list(csv.DictReader(fh))
+        else:
+            records = [json.loads(line) for line in fh if line.strip()]
+    return [
+        BidRequest(
+            request_id=int(r.get("request_id", i)),
+            slot_id=r["slot_id"],
+            daypart=r["daypart"],
+            specialty_name=r["specialty_name"],
+            region=r.get("region") or None,
+            floor_cpm=float(r.get("floor_cpm") or 0.0),
+        )
+        for i, r in enumerate(records)
+    ]
+
+
+def recommender_handler(recommender) -> Callable[[BidRequest], Optional[float]]:
+    """Adapt ``BidRecommender.price`` to the replay handler signature."""
+    price = recommender.price
+    return lambda req: price(req.specialty_name, req.region, req.daypart, req.floor_cpm)
+
+
+# ============================================================================
+# Replay loop
+# ============================================================================
+async def replay(requests: Sequence[BidRequest], handler: Callable, rate: float,
+                 duration: float = 5.0, workers: int = 4, queue_size: int = 1024,
+                 deadline_ms: float = 100.0) -> ReplayReport:
+    """
+    Offer ``requests`` (cycled) at ``rate`` req/s for ``duration`` seconds.
+
+    ``handler`` may be a plain function or a coroutine function. Requests that
+    find the queue full, or that wait past ``deadline_ms`` before a worker
+    picks them up, are dropped; responses finishing after the deadline are
+    counted as late.
+    """
+    if not requests:
+        raise ValueError("no bid requests to replay")
+    report = ReplayReport(target_rate=rate)
+    queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+    deadline = deadline_ms / 1000.0
+    is_async = inspect.iscoroutinefunction(handler)
+    clock = time.perf_counter
+    total = int(rate * duration)
+
+    async def produce():
+        start = clock()
+        sent = 0
+        n = len(requests)
+        while sent < total:
+            due = min(total, int((clock() - start) * rate) + 1)
+            while sent < due:
+                scheduled = start + sent / rate
+                try:
+                    queue.put_nowait((requests[sent % n], scheduled))
+                except asyncio.QueueFull:
+                    report.dropped_queue_full += 1
+                sent += 1
+            report.offered = sent
+            await asyncio.sleep(max(0.0, start + sent / rate - clock()))
+        for _ in range(workers):
+            await queue.put(None)
+
+    async def consume():
+        handled = 0
+        while True:
+            item = await queue.get()
+            if item is None:
+                return
+            request, scheduled = item
+            began = clock()
+            if began - scheduled > deadline:
+                report.dropped_expired += 1
+                continue
+            try:
+                result = await handler(request) if is_async else handler(request)
+            except Exception:
+                report.errors += 1
+                continue
+            finished = clock()
+            report.service.record(finished - began)
+            report.latency.record(finished - scheduled)
+            report.completed += 1
+            if result is None:
+                report.no_bids += 1
+            if finished - scheduled > deadline:
+                report.late += 1
+            handled += 1
+            if not is_async and handled % _YIELD_EVERY == 0:
+                await asyncio.sleep(0)
+
+    started = clock()
+    await asyncio.gather(produce(), *(consume() for _ in range(workers)))
+    report.duration_s = clock() - started
+    return report
+
+
+def find_capacity(requests: Sequence[BidRequest], handler: Callable, start_rate: float = 1000.0,
+                  max_rate: float = 1_000_000.0, growth: float = 1.5, duration: float = 2.0,
+                  max_drop_pct: float = 0.1, p99_budget_ms: float = 10.0,
+                  **replay_kwargs) -> Dict[str, object]:
+    """
+    Ramp the offered rate geometrically until drops or p99 latency exceed
+    their budgets; return the last passing rate and every step's report.
+    """
+    steps = []
+    sustained = 0.0
+    rate = start_rate
+    while rate <= max_rate:
+        report = asyncio.run(replay(requests, handler, rate, duration, **replay_kwargs))
+        steps.append(report)
+        ok = (report.drop_rate_pct <= max_drop_pct
+              and report.latency.percentile(99) * 1e3 <= p99_budget_ms)
+        if not ok:
+            break
+        sustained = rate
+        rate *= growth
+    return {"capacity_rps_per_core": sustained, "steps": steps}
+
+
+# ============================================================================
+# CLI
+# ============================================================================
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("Usage")[0].strip("=\n "),
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rate", type=float, default=5000, help="offered requests per second")
+    parser.add_argument("--duration", type=float, default=5.0, help="seconds per run")
+    parser.add_argument("--workers", type=int, default=4, help="concurrent asyncio workers")
+    parser.add_argument("--queue-size", type=int, default=1024, help="bounded queue depth")
+    parser.add_argument("--deadline-ms", type=float, default=100.0, help="RTB response deadline")
+    parser.add_argument("--requests", type=int, default=100_000, help="synthetic requests to generate")
+    parser.add_argument("--replay", type=Path, help="JSONL/CSV capture to replay instead")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--find-capacity", action="store_true",
+                        help="ramp the rate to find sustainable req/s on one core")
+    parser.add_argument("--p99-budget-ms", type=float, default=10.0)
+    parser.add_argument("--max-drop-pct", type=float, default=0.1)
+    parser.add_argument("--experiments", type=int, default=0,
+                        help="bid strategy experiments (random scopes) to route requests through")
+    parser.add_argument("--json", action="store_true", help="print a JSON report")
+    args = parser.parse_args(argv)
+
+    from .bidding import BidRecommender
+    from .engine import LocalEngine
+
+    engine = LocalEngine()
+    recommender = BidRecommender.from_session(engine)
+    if args.replay:
+        requests = load_requests(args.replay)
+    else:
+        requests = synthesize_requests(inventory_slots(engine), args.requests, seed=args.seed)
+    handler = recommender_handler(recommender)
+    if args.experiments:
+        from .experiments import ExperimentEngine, experiment_handler
+
+        experiments = ExperimentEngine(capacity=args.experiments)
+        rng = random.Random(args.seed)
+        scopes = [(r.specialty_name, r.region, r.daypart) for r in requests[:1000]]
+        for i in range(args.experiments):
+            scope = [v if rng.random() < 0.7 else None for v in rng.choice(scopes)]
+            experiments.create(f"replay {i}", ("sweet_spot", rng.choice(("shaded", "aggressive"))),
+                               specialty_name=scope[0], region=scope[1], daypart=scope[2])
+        handler = experiment_handler(experiments, recommender)
+    replay_kwargs = dict(workers=args.workers, queue_size=args.queue_size, deadline_ms=args.deadline_ms)
+
+    if args.find_capacity:
+        result = find_capacity(requests, handler, start_rate=args.rate, duration=args.duration,
+                               max_drop_pct=args.max_drop_pct, p99_budget_ms=args.p99_budget_ms,
+                               **replay_kwargs)
+        if args.json:
+            print(json.dumps({"capacity_rps_per_core": result["capacity_rps_per_core"],
+                              "steps": [s.to_dict() for s in result["steps"]]}, indent=2))
+        else:
+            for step in result["steps"]:
+                print(step.format(), end="\n\n")
+            print(f"Sustainable capacity: {result['capacity_rps_per_core']:,.0f} req/s per core")
+        return 0
+
+    report = asyncio.run(replay(requests, handler, args.rate, args.duration, **replay_kwargs))
+    print(json.dumps(report.to_dict(), indent=2) if args.json else report.format())
+    routed = getattr(handler, "routed", None)
+    if routed and not args.json:
+        print(f"experiments    : {routed['in_experiment']:,} of {routed['requests']:,} requests "
+              f"priced by an experiment arm ({args.experiments:,} experiments)")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
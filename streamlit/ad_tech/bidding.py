@@ -0,0 +1,184 @@
+"""
+=============================================================================
+PatientPoint Ad Tech Demo - Bid Price Recommendation
+=============================================================================
+Derives a recommended CPM range from T_INVENTORY_ANALYTICS history.
+
+All aggregates are precomputed once per (specialty, region, daypart) key,
+including every wildcard combination, so a recommendation on the bid path
+is a dictionary lookup rather than a scan. When an exact key has no
+history the recommender widens the match (drop region, then daypart, then
+specialty) and reports which level it used.
+=============================================================================
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from itertools import product
+from typing import Dict, Iterable, Mapping, Optional, Tuple
+
+INVENTORY_QUERY = """
+SELECT
+    slot_id,
+    specialty_name,
+    region,
+    daypart,
+    base_cpm,
+    avg_winning_cpm,
+    fill_rate_pct,
+    engagement_rate_pct,
+    delivered_impressions
+FROM AD_TECH.ANALYTICS.T_INVENTORY_ANALYTICS
+"""
+
+ROAS_QUERY = """
+SELECT
+    therapeutic_area,
+    SUM(total_revenue) / NULLIF(SUM(total_spend), 0) AS roas
+FROM AD_TECH.ANALYTICS.T_CAMPAIGN_PERFORMANCE
+GROUP BY therapeutic_area
+"""
+
+Key = Tuple[Optional[str], Optional[str], Optional[str]]
+
+# Matching levels tried in order when the exact key has no history
+_FALLBACKS = (
+    ("exact", (True, True, True)),
+    ("specialty + daypart", (True, False, True)),
+    ("specialty", (True, False, False)),
+    ("network", (False, False, False)),
+)
+
+
+@dataclass(frozen=True)
+class BidRecommendation:
+    """Recommended CPM range for one targeting combination."""
+    floor_cpm: float
+    low_cpm: float
+    sweet_spot_cpm: float
+    high_cpm: float
+    historical_avg_cpm: float
+    expected_fill_rate_pct: float       # impression-weighted fill rate of the comparable slots
+    expected_engagement_pct: float
+    expected_roas: Optional[float]
+    competition: str
+    slots: int
+    match_level: str
+
+
+class _Accumulator:
+    __slots__ = ("weight", "winning", "base", "fill", "engagement", "max_winning", "slots")
+
+    def __init__(self):
+        self.weight = self.winning = self.base = self.fill = self.engagement = 0.0
+        self.max_winning = 0.0
+        self.slots = 0
+
+    def add(self, weight, winning, base, fill, engagement):
+        self.weight += weight
+        self.winning += weight * winning
+        self.base += weight * base
+        self.fill += weight * fill
+        self.engagement += weight * engagement
+        self.max_winning = max(self.max_winning, winning)
+        self.slots += 1
+
+    def finish(self, match_level: str, roas: Optional[float]) -> BidRecommendation:
+        w = self.weight or 1.0
+        sweet = self.winning / w
+        floor = min(self.base / w, sweet)
+        ceiling = max(self.max_winning, sweet)
+        ratio = sweet / floor if floor else 1.0
+        competition = "Low" if ratio < 1.1 else "Moderate" if ratio < 1.25 else "High"
+        return BidRecommendation(
+            floor_cpm=round(floor, 2),
+            low_cpm=round((floor + sweet) / 2, 2),
+            sweet_spot_cpm=round(sweet, 2),
+            high_cpm=round((sweet + ceiling) / 2, 2),
+            historical_avg_cpm=round(sweet, 2),
+            expected_fill_rate_pct=round(self.fill / w, 1),
+            expected_engagement_pct=round(self.engagement / w, 2),
+            expected_roas=round(roas, 2) if roas is not None else None,
+            competition=competition,
+            slots=self.slots,
+            match_level=match_level,
+        )
+
+
+def _norm(value: Optional[str]) -> Optional[str]:
+    return value.strip().lower() if value else None
+
+
+class BidRecommender:
+    """Precomputed bid recommendations keyed on specialty, region and daypart."""
+
+    def __init__(self, inventory: Iterable[Mapping], roas_by_area: Optional[Mapping[str, float]] = None):
+        accumulators: Dict[Key, _Accumulator] = {}
+        for row in inventory:
+            key = (_norm(row["specialty_name"]), _norm(row["region"]), _norm(row["daypart"]))
+            weight = float(row["delivered_impressions"] or 0) or 1.0
+            values = (
+                weight,
+                float(row["avg_winning_cpm"]),
+                float(row["base_cpm"]),
+                float(row["fill_rate_pct"]),
+                float(row["engagement_rate_pct"]),
+            )
+            # Feed every wildcard combination of the key
+            for mask in product((True, False), repeat=3):
+                masked = tuple(k if keep else None for k, keep in zip(key, mask))
+                accumulators.setdefault(masked, _Accumulator()).add(*values)
+
+        self._roas = {_norm(k): float(v) for k, v in (roas_by_area or {}).items() if v is not None}
+        self._accumulators = accumulators
+        self._cache: Dict[Tuple[Key, Optional[str]], BidRecommendation] = {}
+
+    @classmethod
+    def from_session(cls, session) -> "BidRecommender":
+        """Build from a Snowpark session or the local engine."""
+        inventory = [
+            {name.lower(): row[name.upper()] for name in (
+                "specialty_name", "region", "daypart", "base_cpm", "avg_winning_cpm",
+                "fill_rate_pct", "engagement_rate_pct", "delivered_impressions")}
+            for row in session.sql(INVENTORY_QUERY).collect()
+        ]
+        roas = {row["THERAPEUTIC_AREA"]: row["ROAS"] for row in session.sql(ROAS_QUERY).collect()}
+        return cls(inventory, roas)
+
+    def recommend(self, specialty: Optional[str] = None, region: Optional[str] = None,
+                  daypart: Optional[str] = None,
+                  therapeutic_area: Optional[str] = None) -> Optional[BidRecommendation]:
+        """
+        Recommend a CPM range. ``None`` for any argument means "any".
+        Returns ``None`` only when there is no inventory at all.
+        """
+        requested = (_norm(specialty), _norm(region), _norm(daypart))
+        area = _norm(therapeutic_area)
+        cached = self._cache.get((requested, area))
+        if cached is not None:
+            return cached
+
+        tried = set()
+        for level, mask in _FALLBACKS:
+            key = tuple(k if keep else None for k, keep in zip(requested, mask))
+            if key in tried:
+                continue
+            tried.add(key)
+            accumulator = self._accumulators.get(key)
+            if accumulator is not None:
+                result = accumulator.finish(level, self._roas.get(area))
+                self._cache[(requested, area)] = result
+                return result
+        return None
+
+    def price(self, specialty: Optional[str], region: Optional[str], daypart: Optional[str],
+              floor_cpm: float = 0.0) -> Optional[float]:
+        """
+        Bid-path entry point: the CPM to bid for one request, or ``None`` for
+        no bid when the seller's floor is above the recommended range.
+        """
+        rec = self.recommend(specialty, region, daypart)
+        if rec is None or floor_cpm > rec.high_cpm:
+            return None
+        return max(rec.sweet_spot_cpm, floor_cpm)
@@ -0,0 +1,514 @@
+"""
+=============================================================================
+PatientPoint Ad Tech Demo - Inventory Booking
+=============================================================================
+Availability calendars and reservations for the inventory slots:
+
+- CapacityCalendar : reserved impressions per slot per day over a fixed
+                     horizon, one range-max segment tree per booked slot,
+                     stored together as rows of one numpy array. A range
+                     query reads the O(log days) nodes covering the range
+                     for every slot in one gather.
+- BookingEngine    : free(slot, day) = estimated_daily_impressions minus the
+                     reserved amount. Answers bulk questions such as
+                     "premium Cardiology slots with >= 200 free impressions
+                     a day next month" and books several slots at once.
+                     Bookings are all-or-nothing: every slot and day is
+                     checked under one lock, and the booking is written
+                     only if none of them would be oversold.
+
+Reservations live in T_SLOT_RESERVATIONS (setup/10_inventory_bookings.sql).
+The calendars are this process's view of that table. Other app processes
+book too, so the write is checked again inside the warehouse transaction
+that inserts it: holding T_SLOT_BOOKING_LOCK, the stored reservations of
+the booked slots are re-read and summed, and the insert happens only if
+no day is oversold. The calendars take the booking (and the reservations
+read from the table) only after the transaction commits.
+=============================================================================
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import date, timedelta
+from typing import Callable, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+from .data_access import fetch_arrow
+from .metrics import MetricsRegistry, registry
+
+BOOKINGS_TABLE = "AD_TECH.ANALYTICS.T_SLOT_RESERVATIONS"
+LOCK_TABLE = "AD_TECH.ANALYTICS.T_SLOT_BOOKING_LOCK"
+HORIZON_DAYS = 366
+
+# Slot attributes available as filters in BookingEngine.available()
+FILTER_COLUMNS = ("specialty_name", "region", "state", "daypart", "screen_type", "placement_area", "is_premium")
+BOOLEAN_COLUMNS = ("is_premium",)           # 1/0 in SQLite, TRUE/FALSE in Snowflake
+
+SLOTS_QUERY = f"""
+SELECT slot_id, slot_name, estimated_daily_impressions, {", ".join(FILTER_COLUMNS)}
+FROM AD_TECH.ANALYTICS.T_INVENTORY_ANALYTICS
+ORDER BY slot_id
+"""
+
+RESERVATIONS_QUERY = f"""
+SELECT booking_id, slot_id, start_date, end_date, daily_impressions, campaign_id
+FROM {BOOKINGS_TABLE}
+WHERE end_date >= ?
+"""
+
+# The stored reservations of some slots that overlap a date range
+OVERLAP_QUERY = f"""
+SELECT booking_id, slot_id, start_date, end_date, daily_impressions, campaign_id
+FROM {BOOKINGS_TABLE}
+WHERE slot_id IN ({{slots}}) AND end_date >= ? AND start_date <= ?
+"""
+
+# Row lock held until COMMIT: bookings from every process run one at a time
+LOCK_SQL = f"UPDATE {LOCK_TABLE} SET locked_at = CURRENT_TIMESTAMP() WHERE lock_name = 'reservations'"
+
+INSERT_SQL = (
+    f"INSERT INTO {BOOKINGS_TABLE} "
+    "(booking_id, slot_id, start_date, end_date, daily_impressions, campaign_id) VALUES "
+)
+
+DELETE_SQL = f"DELETE FROM {BOOKINGS_TABLE} WHERE booking_id = ?"
+
+# The LocalEngine has no setup scripts; Snowflake gets the table from setup/10
+LOCAL_DDL = """
+CREATE TABLE IF NOT EXISTS T_SLOT_RESERVATIONS (
+    booking_id TEXT, slot_id TEXT, start_date TEXT, end_date TEXT,
+    daily_impressions INTEGER, campaign_id TEXT, created_at TEXT DEFAULT CURRENT_TIMESTAMP
+)
+"""
+
+
+@dataclass(frozen=True)
+class Reservation:
+    booking_id: str
+    slot_id: str
+    start: date
+    end: date                       # inclusive
+    daily_impressions: int
+    campaign_id: Optional[str] = None
+
+
+@dataclass(frozen=True)
+class Conflict:
+    """A slot that cannot take ``requested`` impressions a day over the range."""
+    slot_id: str
+    first_day: date                 # first oversold day
+    days: int                       # oversold days in the range
+    requested: int
+    free: int                       # least free impressions on any day
+
+    def __str__(self) -> str:
+        return (f"{self.slot_id}: short of {self.requested:,}/day on {self.days} "
+                f"day{'s' if self.days != 1 else ''} from {self.first_day:%b %d} (as little as {self.free:,} free)")
+
+
+class BookingConflict(Exception):
+    """Raised by BookingEngine.reserve() when any slot of a booking is oversold."""
+
+    def __init__(self, conflicts: List[Conflict]):
+        self.conflicts = conflicts
+        super().__init__("; ".join(str(c) for c in conflicts))
+
+
+# =============================================================================
+# Segment trees
+# =============================================================================
+class CapacityCalendar:
+    """
+    Reserved impressions for ``n_slots`` slots over ``days`` days. Slots get
+    a tree row on their first reservation; unbooked slots cost nothing.
+    Row layout is the usual implicit heap: node i covers the union of nodes
+    2i and 2i+1, and leaf ``size + d`` holds day d.
+    """
+
+    def __init__(self, n_slots: int, days: int = HORIZON_DAYS):
+        self.days = days
+        self.size = 1 << max(days - 1, 1).bit_length()
+        self.row_of = np.full(n_slots, -1, dtype=np.int64)
+        self.trees = np.zeros((0, 2 * self.size), dtype=np.int32)
+        self.rows = 0
+
+    def _row(self, slot: int) -> int:
+        row = int(self.row_of[slot])
+        if row < 0:
+            if self.rows == len(self.trees):
+                grown = np.zeros((max(16, 2 * len(self.trees)), 2 * self.size), dtype=np.int32)
+                grown[:self.rows] = self.trees[:self.rows]
+                self.trees = grown
+            row = self.row_of[slot] = self.rows
+            self.rows += 1
+        return row
+
+    def cover(self, first: int, last: int) -> np.ndarray:
+        """Node indexes whose union is exactly days ``first..last``."""
+        nodes = []
+        lo, hi = first + self.size, last + self.size + 1
+        while lo < hi:
+            if lo & 1:
+                nodes.append(lo)
+                lo += 1
+            if hi & 1:
+                hi -= 1
+                nodes.append(hi)
+            lo >>= 1
+            hi >>= 1
+        return np.array(nodes, dtype=np.int64)
+
+    def add(self, slot: int, first: int, last: int, amount: int) -> None:
+        """Add ``amount`` to days ``first..last`` and rebuild their ancestors."""
+        row = self._row(slot)           # may grow self.trees
+        tree = self.trees[row]
+        lo, hi = first + self.size, last + self.size
+        tree[lo:hi + 1] += amount
+        while lo > 1:
+            lo >>= 1
+            hi >>= 1
+            tree[lo:hi + 1] = np.maximum(tree[2 * lo:2 * hi + 2:2], tree[2 * lo + 1:2 * hi + 2:2])
+
+    def peak(self, slots: np.ndarray, first: int, last: int) -> np.ndarray:
+        """Most impressions reserved on any day in ``first..last``, per slot."""
+        peak = np.zeros(len(slots), dtype=np.int64)
+        rows = self.row_of[slots]
+        booked = np.flatnonzero(rows >= 0)
+        if len(booked):
+            nodes = self.trees[np.ix_(rows[booked], self.cover(first, last))]
+            peak[booked] = nodes.max(axis=1)
+        return peak
+
+    def daily(self, slot: int, first: int, last: int) -> np.ndarray:
+        """Reserved impressions for each day in ``first..last``."""
+        row = int(self.row_of[slot])
+        if row < 0:
+            return np.zeros(last - first + 1, dtype=np.int64)
+        return self.trees[row, self.size + first:self.size + last + 1].astype(np.int64)
+
+    @property
+    def nbytes(self) -> int:
+        return self.trees[:self.rows].nbytes + self.row_of.nbytes
+
+
+# =============================================================================
+# Booking engine
+# =============================================================================
+class BookingEngine:
+    """
+    Capacity calendars for every slot from ``origin`` (today by default) for
+    ``horizon`` days. ``persist(reservations, check)`` writes a booking to
+    the reservations table in one transaction: it reads the stored
+    reservations of the booked slots that overlap the booking, calls
+    ``check(stored)`` (which raises BookingConflict), inserts, commits and
+    returns ``stored``. ``cancel_store(booking_id)`` deletes one. Both may
+    raise; the calendars change only after they succeed.
+    """
+
+    def __init__(self, slots: Sequence[Dict[str, object]], reservations: Iterable[Reservation] = (),
+                 origin: Optional[date] = None, horizon: int = HORIZON_DAYS,
+                 persist: Optional[Callable[[List[Reservation], Callable[[List[Reservation]], None]],
+                                            List[Reservation]]] = None,
+                 cancel_store: Optional[Callable[[str], None]] = None,
+                 metrics: MetricsRegistry = registry):
+        self.origin = origin or date.today()
+        self.horizon = horizon
+        self.persist = persist
+        self.cancel_store = cancel_store
+        self.metrics = metrics
+        self.slot_ids = [str(s["slot_id"]) for s in slots]
+        self.index = {slot_id: i for i, slot_id in enumerate(self.slot_ids)}
+        self.names = [str(s.get("slot_name") or s["slot_id"]) for s in slots]
+        self.capacity = np.array([int(s.get("estimated_daily_impressions") or 0) for s in slots], dtype=np.int64)
+        # Dictionary-encoded filter columns: a filter compares small ints
+        self._values: Dict[str, np.ndarray] = {}
+        self._codes: Dict[str, np.ndarray] = {}
+        for column in FILTER_COLUMNS:
+            if slots and column in slots[0]:
+                keys = np.array([_key(column, s[column]) for s in slots])
+                values, codes = np.unique(keys, return_inverse=True)
+                self._values[column], self._codes[column] = values, codes
+        self.calendar = CapacityCalendar(len(self.slot_ids), horizon)
+        self.reservations: Dict[str, List[Reservation]] = {}
+        self._slot_bookings: Dict[str, Dict[str, Reservation]] = {}   # slot_id -> booking_id -> reservation
+        self._lock = threading.Lock()
+        for reservation in reservations:
+            self._apply(reservation, 1)
+
+    @classmethod
+    def from_engine(cls, engine, **kwargs) -> "BookingEngine":
+        """Slots and open reservations from ``engine``, writing bookings back to it."""
+        if getattr(engine, "connection", None) is None:
+            engine.execute(LOCAL_DDL)
+        slots = _lower(fetch_arrow(engine, SLOTS_QUERY))
+        origin = kwargs.get("origin") or date.today()
+        rows = _lower(fetch_arrow(engine, RESERVATIONS_QUERY, [origin.isoformat()]))
+        reservations = [
+            Reservation(r["booking_id"], r["slot_id"], _date(r["start_date"]), _date(r["end_date"]),
+                        int(r["daily_impressions"]), r["campaign_id"])
+            for r in rows
+        ]
+
+        def persist(booked: List[Reservation], check: Callable[[List[Reservation]], None]) -> List[Reservation]:
+            slot_ids = [r.slot_id for r in booked]
+            values = ", ".join("(?, ?, ?, ?, ?, ?)" for _ in booked)
+            params = [v for r in booked for v in (r.booking_id, r.slot_id, r.start.isoformat(),
+                                                  r.end.isoformat(), r.daily_impressions, r.campaign_id)]
+            with _transaction(engine):
+                rows = engine.sql(OVERLAP_QUERY.format(slots=", ".join("?" for _ in slot_ids)),
+                                  [*slot_ids, booked[0].start.isoformat(), booked[0].end.isoformat()]).collect()
+                stored = [
+                    Reservation(r["BOOKING_ID"], r["SLOT_ID"], _date(r["START_DATE"]), _date(r["END_DATE"]),
+                                int(r["DAILY_IMPRESSIONS"]), r["CAMPAIGN_ID"])
+                    for r in rows
+                ]
+                check(stored)
+                engine.sql(INSERT_SQL + values, params).collect()
+            return stored
+
+        def cancel_store(booking_id: str) -> None:
+            engine.sql(DELETE_SQL, [booking_id]).collect()
+
+        kwargs.setdefault("persist", persist)
+        kwargs.setdefault("cancel_store", cancel_store)
+        return cls(slots, reservations, **kwargs)
+
+    # ------------------------------------------------------------------
+    # Days and slots
+    # ------------------------------------------------------------------
+    @property
+    def last_day(self) -> date:
+        return self.origin + timedelta(days=self.horizon - 1)
+
+    def _days(self, start: date, end: date):
+        """Calendar indexes of ``start..end``, clipped to the horizon."""
+        if end < start:
+            raise ValueError("end date is before start date")
+        if end < self.origin or start > self.last_day:
+            raise ValueError(f"dates must fall between {self.origin} and {self.last_day}")
+        return max((start - self.origin).days, 0), min((end - self.origin).days, self.horizon - 1)
+
+    def _slots(self, slot_ids: Iterable[str]) -> np.ndarray:
+        unknown = [s for s in slot_ids if s not in self.index]
+        if unknown:
+            raise KeyError(f"unknown slots: {', '.join(unknown)}")
+        return np.array([self.index[s] for s in slot_ids], dtype=np.int64)
+
+    def mask(self, **filters) -> np.ndarray:
+        """Slots matching every filter; a filter value may be one value or a list."""
+        mask = np.ones(len(self.slot_ids), dtype=bool)
+        for column, wanted in filters.items():
+            if wanted is None:
+                continue
+            if column not in self._codes:
+                raise KeyError(f"cannot filter on {column}")
+            wanted = [_key(column, w) for w in (wanted if isinstance(wanted, (list, tuple, set)) else [wanted])]
+            mask &= np.isin(self._values[column], wanted)[self._codes[column]]
+        return mask
+
+    # ------------------------------------------------------------------
+    # Availability
+    # ------------------------------------------------------------------
+    def free(self, slot_ids: Sequence[str], start: date, end: date) -> Dict[str, int]:
+        """Least free impressions on any day of ``start..end``, per slot."""
+        first, last = self._days(start, end)
+        slots = self._slots(slot_ids)
+        free = self.capacity[slots] - self.calendar.peak(slots, first, last)
+        return dict(zip(slot_ids, free.tolist()))
+
+    def find(self, start: date, end: date, min_free: int = 1, **filters):
+        """
+        Slots matching ``filters`` with at least ``min_free`` impressions free
+        on every day of ``start..end``: (slot indexes, free) arrays, most free
+        first.
+        """
+        first, last = self._days(start, end)
+        t0 = time.perf_counter()
+        # Capacity bounds free from above, so only those slots need their trees read
+        candidates = np.flatnonzero(self.mask(**filters) & (self.capacity >= min_free))
+        free = self.capacity[candidates] - self.calendar.peak(candidates, first, last)
+        keep = free >= min_free
+        candidates, free = candidates[keep], free[keep]
+        order = np.argsort(-free, kind="stable")
+        self.metrics.observe("booking.available.seconds", time.perf_counter() - t0)
+        return candidates[order], free[order]
+
+    def available(self, start: date, end: date, min_free: int = 1, limit: Optional[int] = None,
+                  **filters) -> List[Dict[str, object]]:
+        """find() as records, at most ``limit`` of them."""
+        slots, free = self.find(start, end, min_free, **filters)
+        slots, free = slots[:limit], free[:limit]
+        return [
+            {"slot_id": self.slot_ids[i], "slot_name": self.names[i], "free": f, "capacity": c}
+            for i, f, c in zip(slots.tolist(), free.tolist(), self.capacity[slots].tolist())
+        ]
+
+    def conflicts(self, slot_ids: Sequence[str], start: date, end: date, daily_impressions: int) -> List[Conflict]:
+        """Slots of a prospective booking that would be oversold, with their first short day."""
+        first, last = self._days(start, end)
+        slots = self._slots(slot_ids)
+        free = self.capacity[slots] - self.calendar.peak(slots, first, last)
+        return [
+            self._conflict(slot, first, self.capacity[slot] - self.calendar.daily(slot, first, last),
+                           daily_impressions)
+            for slot in slots[free < daily_impressions].tolist()
+        ]
+
+    def stored_conflicts(self, stored: Iterable[Reservation], slot_ids: Sequence[str], start: date, end: date,
+                         daily_impressions: int) -> List[Conflict]:
+        """conflicts() against ``stored`` reservations instead of the calendars."""
+        first, last = self._days(start, end)
+        reserved = {slot_id: np.zeros(last - first + 1, dtype=np.int64) for slot_id in slot_ids}
+        for r in stored:
+            lo = max((r.start - self.origin).days, first)
+            hi = min((r.end - self.origin).days, last)
+            if r.slot_id in reserved and lo <= hi:
+                reserved[r.slot_id][lo - first:hi - first + 1] += r.daily_impressions
+        found = []
+        for slot in self._slots(slot_ids).tolist():
+            daily_free = self.capacity[slot] - reserved[self.slot_ids[slot]]
+            if (daily_free < daily_impressions).any():
+                found.append(self._conflict(slot, first, daily_free, daily_impressions))
+        return found
+
+    def _conflict(self, slot: int, first: int, daily_free: np.ndarray, daily_impressions: int) -> Conflict:
+        short = np.flatnonzero(daily_free < daily_impressions)
+        return Conflict(
+            self.slot_ids[slot], self.origin + timedelta(days=first + int(short[0])), len(short),
+            daily_impressions, int(daily_free.min()),
+        )
+
+    # ------------------------------------------------------------------
+    # Reservations
+    # ------------------------------------------------------------------
+    def reserve(self, slot_ids: Sequence[str], start: date, end: date, daily_impressions: int,
+                campaign_id: Optional[str] = None) -> List[Reservation]:
+        """
+        Book ``daily_impressions`` a day on every slot for ``start..end``, or
+        nothing: raises BookingConflict listing every slot that is short.
+        Without a store the calendars decide; with one, the stored
+        reservations do, inside the transaction that writes the booking.
+        """
+        if daily_impressions <= 0:
+            raise ValueError("daily impressions must be positive")
+        slot_ids = list(dict.fromkeys(slot_ids))
+        if not slot_ids:
+            raise ValueError("no slots to book")
+        self._days(start, end)
+        self._slots(slot_ids)
+        start, end = max(start, self.origin), min(end, self.last_day)
+        t0 = time.perf_counter()
+        with self._lock:
+            booking_id = f"BKG-{uuid.uuid4().hex[:12].upper()}"
+            booked = [Reservation(booking_id, s, start, end, daily_impressions, campaign_id) for s in slot_ids]
+            if self.persist is None:
+                conflicts = self.conflicts(slot_ids, start, end, daily_impressions)
+                if conflicts:
+                    self.metrics.inc("booking.conflicts")
+                    raise BookingConflict(conflicts)
+            else:
+                seen: List[List[Reservation]] = []
+
+                def check(stored: List[Reservation]) -> None:
+                    seen.append(stored)
+                    found = self.stored_conflicts(stored, slot_ids, start, end, daily_impressions)
+                    if found:
+                        raise BookingConflict(found)
+
+                try:
+                    stored = self.persist(booked, check)
+                except BookingConflict:
+                    # The table may hold bookings made elsewhere: catch the calendars up
+                    self.metrics.inc("booking.conflicts")
+                    self._sync(slot_ids, start, end, seen[-1])
+                    raise
+                self._sync(slot_ids, start, end, stored)
+            for reservation in booked:
+                self._apply(reservation, 1)
+        self.metrics.inc("booking.reservations")
+        self.metrics.observe("booking.reserve.seconds", time.perf_counter() - t0)
+        return booked
+
+    def cancel(self, booking_id: str) -> int:
+        """Release every slot of ``booking_id``; returns the number released."""
+        with self._lock:
+            booked = list(self.reservations.get(booking_id, []))
+            if booked and self.cancel_store is not None:
+                self.cancel_store(booking_id)
+            for reservation in booked:
+                self._apply(reservation, -1)
+        return len(booked)
+
+    def _sync(self, slot_ids: Sequence[str], start: date, end: date, stored: Iterable[Reservation]) -> None:
+        """
+        Make the calendars of ``slot_ids`` over ``start..end`` match ``stored``
+        (read from the table): add bookings made elsewhere, drop ones
+        cancelled elsewhere.
+        """
+        by_slot: Dict[str, Dict[str, Reservation]] = {slot_id: {} for slot_id in slot_ids}
+        for r in stored:
+            if r.slot_id in by_slot:
+                by_slot[r.slot_id][r.booking_id] = r
+        for slot_id, table in by_slot.items():
+            local = {booking_id: r for booking_id, r in self._slot_bookings.get(slot_id, {}).items()
+                     if r.end >= start and r.start <= end}
+            for booking_id in local.keys() - table.keys():
+                self._apply(local[booking_id], -1)
+            for booking_id in table.keys() - local.keys():
+                self._apply(table[booking_id], 1)
+
+    def _apply(self, reservation: Reservation, sign: int) -> None:
+        slot = self.index.get(reservation.slot_id)
+        if slot is None or reservation.end < self.origin or reservation.start > self.last_day:
+            return
+        first = max((reservation.start - self.origin).days, 0)
+        last = min((reservation.end - self.origin).days, self.horizon - 1)
+        self.calendar.add(slot, first, last, sign * reservation.daily_impressions)
+        booked = self.reservations.setdefault(reservation.booking_id, [])
+        by_booking = self._slot_bookings.setdefault(reservation.slot_id, {})
+        if sign > 0:
+            booked.append(reservation)
+            by_booking[reservation.booking_id] = reservation
+        else:
+            booked.remove(reservation)
+            by_booking.pop(reservation.booking_id, None)
+            if not booked:
+                del self.reservations[reservation.booking_id]
+
+    def bookings(self) -> List[Reservation]:
+        return [r for booked in self.reservations.values() for r in booked]
+
+
+@contextmanager
+def _transaction(engine):
+    """One warehouse transaction holding the booking lock; the LocalEngine's own lock locally."""
+    if getattr(engine, "connection", None) is None:
+        with engine.transaction():
+            yield
+        return
+    engine.sql("BEGIN").collect()
+    try:
+        engine.sql(LOCK_SQL).collect()
+        yield
+    except BaseException:
+        engine.sql("ROLLBACK").collect()
+        raise
+    engine.sql("COMMIT").collect()
+
+
+def _key(column: str, value) -> str:
+    return str(bool(value)) if column in BOOLEAN_COLUMNS else str(value)
+
+
+def _lower(table) -> List[Dict[str, object]]:
+    return table.rename_columns([c.lower() for c in table.column_names]).to_pylist()
+
+
+def _date(value) -> date:
+    return value if isinstance(value, date) else date.fromisoformat(str(value)[:10])
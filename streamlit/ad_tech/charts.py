@@ -0,0 +1,303 @@
+"""
+=============================================================================
+PatientPoint Ad Tech Demo - Chart Data Reduction
+=============================================================================
+st.line_chart / st.bar_chart send every row they are given to the browser,
+where Vega-Lite lays out one mark per row. A chart is never wider than the
+page, so rows beyond a few per pixel add payload and render time without
+changing what is drawn. The helpers here size a chart's data from its
+viewport before it leaves the server:
+
+- Viewport        : chart width in pixels -> points for a line chart,
+                    bars for a bar chart. Widths are rounded to 100 px so
+                    similar layouts share cached results.
+- time_series()   : aggregates the source query per x value in the
+                    warehouse. With more than OVERSAMPLE x values per
+                    point, it also keeps only each time bucket's first,
+                    last, lowest and highest rows there (M4). Then it keeps
+                    the points that preserve the shape of each line
+                    (Largest-Triangle-Three-Buckets, lttb()).
+- category_bars() : totals (or averages) per category in the warehouse,
+                    keeping the top bars - 1 categories and folding the
+                    rest into one "Other" bar.
+- downsample() /
+  reduce_bars()   : the same reductions for a table already fetched (a
+                    snapshot route or a small per-day query).
+
+time_series() and category_bars() results are cached in the shared Arrow
+result cache under the query, the column spec and the resolution, so a
+rerun hands back the reduced table without touching the warehouse.
+=============================================================================
+"""
+
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass
+from typing import Hashable, Optional, Sequence
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from .data_access import ArrowResultCache, fetch_arrow, result_cache
+
+OVERSAMPLE = 4          # x values per point above which the warehouse buckets (M4) before LTTB
+OTHER = "Other"
+MIN_POINTS = 16
+MAX_BARS = 25
+_WIDTH_STEP = 100
+
+
+@dataclass(frozen=True)
+class Viewport:
+    """A chart's width; ``px_per_point`` / ``px_per_bar`` set how dense it is drawn."""
+    width_px: int
+    px_per_point: int = 3
+    px_per_bar: int = 40
+
+    @property
+    def width(self) -> int:
+        return max(_WIDTH_STEP, round(self.width_px / _WIDTH_STEP) * _WIDTH_STEP)
+
+    @property
+    def points(self) -> int:
+        return max(MIN_POINTS, self.width // self.px_per_point)
+
+    @property
+    def bars(self) -> int:
+        return max(3, min(MAX_BARS, self.width // self.px_per_bar))
+
+
+# Chart widths on the pages' layout="wide" grid
+FULL_WIDTH = Viewport(1200)
+HALF_WIDTH = Viewport(600)
+
+
+@dataclass(frozen=True)
+class ChartData:
+    """A reduced chart table and the number of x values / categories it was reduced from."""
+    table: pa.Table
+    source_points: int
+    seconds: float
+    cached: bool
+
+
+# =============================================================================
+# In-memory reductions
+# =============================================================================
+def lttb(x: np.ndarray, y: np.ndarray, points: int) -> np.ndarray:
+    """
+    Indices of the ``points`` samples of (x, y) that Largest-Triangle-Three-
+    Buckets keeps: the first and last sample, and in each of ``points - 2``
+    equal buckets between them the sample forming the largest triangle
+    with the previously kept one and the next bucket's mean.
+    """
+    n = len(x)
+    if points >= n or points < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=np.float64)
+    y = np.nan_to_num(np.asarray(y, dtype=np.float64))
+    edges = np.floor(np.linspace(1, n - 1, points - 1)).astype(np.int64)
+    keep = np.empty(points, dtype=np.int64)
+    keep[0], keep[-1] = 0, n - 1
+    a = 0
+    for i in range(points - 2):
+        lo, hi = edges[i], edges[i + 1]
+        if i + 2 < len(edges):
+            next_x, next_y = x[hi:edges[i + 2]].mean(), y[hi:edges[i + 2]].mean()
+        else:
+            next_x, next_y = x[n - 1], y[n - 1]
+        area = np.abs((x[a] - next_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (next_y - y[a]))
+        a = lo + int(np.argmax(area))
+        keep[i + 1] = a
+    return keep
+
+
+def _numeric(column: pa.ChunkedArray) -> np.ndarray:
+    """x values as numbers: dates and timestamps (or their ISO strings) as epoch seconds."""
+    kind = column.type
+    if pa.types.is_string(kind) or pa.types.is_large_string(kind):
+        column = pc.cast(column, pa.timestamp("s"))
+        kind = column.type
+    if pa.types.is_date(kind):
+        column = pc.cast(pc.cast(column, pa.date32()), pa.int32())
+        return column.to_numpy().astype(np.float64) * 86400.0
+    if pa.types.is_timestamp(kind):
+        return pc.cast(column, pa.int64()).to_numpy().astype(np.float64)
+    return pc.cast(column, pa.float64()).to_numpy(zero_copy_only=False)
+
+
+def downsample(table: pa.Table, x: str, ys: Sequence[str], points: int) -> pa.Table:
+    """
+    At most ``points`` rows per series of ``table`` (sorted by ``x``): the
+    union of the rows LTTB keeps for each column in ``ys``.
+    """
+    if table.num_rows <= points:
+        return table
+    xs = _numeric(table.column(x))
+    keep = np.unique(np.concatenate([
+        lttb(xs, table.column(y).to_numpy(zero_copy_only=False), points) for y in ys
+    ]))
+    return table.take(pa.array(keep))
+
+
+def reduce_bars(table: pa.Table, category: str, value: str, bars: int,
+                weight: Optional[str] = None) -> pa.Table:
+    """
+    ``table`` (one row per category) cut to its ``bars - 1`` largest
+    ``value`` rows plus one "Other" row. "Other" is the sum of the rest,
+    or their ``weight``-weighted mean when ``value`` is an average.
+    """
+    if table.num_rows <= bars:
+        return table
+    schema = table.schema
+    for name, kind in ((category, pa.string()), (value, pa.float64()), (weight, pa.float64())):
+        if name is not None:
+            schema = schema.set(schema.get_field_index(name), pa.field(name, kind))
+    table = table.cast(schema).sort_by([(value, "descending")])
+    head, rest = table.slice(0, bars - 1), table.slice(bars - 1)
+    values = rest.column(value).to_numpy(zero_copy_only=False)
+    tail = {field.name: pa.nulls(1, field.type) for field in schema}
+    tail[category] = pa.array([OTHER])
+    if weight is None:
+        tail[value] = pa.array([float(np.nansum(values))])
+    else:
+        weights = rest.column(weight).to_numpy(zero_copy_only=False)
+        mask = ~np.isnan(values) & ~np.isnan(weights)
+        total = float(weights[mask].sum())
+        tail[value] = pa.array([float((values[mask] * weights[mask]).sum()) / total if total else None], pa.float64())
+        tail[weight] = pa.array([total])
+    return pa.concat_tables([head, pa.table(list(tail.values()), schema=schema)])
+
+
+# =============================================================================
+# Warehouse-side reductions
+# =============================================================================
+def _is_snowflake(engine) -> bool:
+    return getattr(engine, "connection", None) is not None
+
+
+def _epoch_sql(engine, column: str) -> str:
+    if _is_snowflake(engine):
+        return f"DATE_PART(EPOCH_SECOND, {column}::TIMESTAMP_NTZ)"
+    return f"CAST(strftime('%s', {column}) AS INTEGER)"
+
+
+def _bucket_sql(engine, epoch: str, low: int, span: int, buckets: int) -> str:
+    if _is_snowflake(engine):
+        return f"FLOOR(({epoch} - {low}) * {buckets} / {span})"
+    return f"(({epoch} - {low}) * {buckets}) / {span}"    # integer division
+
+
+def series_sql(engine, sql: str, x: str, ys: Sequence[str], agg: str = "sum",
+               bucket: Optional[tuple] = None) -> str:
+    """
+    One row per ``x`` value of ``sql`` with ``agg`` of each of ``ys``. With
+    ``bucket = (low, span, buckets)`` (epoch seconds), only the first, last,
+    lowest and highest rows of each series in each of ``buckets`` equal
+    time buckets (M4), so spikes and dips survive the cut.
+    """
+    if agg not in ("sum", "avg"):
+        raise ValueError(f"Unsupported aggregate: {agg!r}")
+    X, Ys = x.upper(), [y.upper() for y in ys]
+    per_x = (f"SELECT {x} AS {X}, {', '.join(f'{agg.upper()}({y}) AS {Y}' for y, Y in zip(ys, Ys))} "
+             f"FROM ({sql}) src WHERE {x} IS NOT NULL GROUP BY {x}")
+    if bucket is None:
+        return f"{per_x} ORDER BY {X}"
+    group = _bucket_sql(engine, _epoch_sql(engine, X), *bucket)
+    orders = [f"{X}", f"{X} DESC"] + [f"{Y}{d} NULLS LAST" for Y in Ys for d in ("", " DESC")]
+    ranks = ", ".join(f"ROW_NUMBER() OVER (PARTITION BY bucket ORDER BY {o}) AS r{i}" for i, o in enumerate(orders))
+    return f"""
+    SELECT {X}, {", ".join(Ys)}
+    FROM (
+        SELECT {X}, {", ".join(Ys)}, {ranks}
+        FROM (SELECT per_x.*, {group} AS bucket FROM ({per_x}) per_x) bucketed
+    ) ranked
+    WHERE {" OR ".join(f"r{i} = 1" for i in range(len(orders)))}
+    ORDER BY {X}
+    """
+
+
+def bars_sql(sql: str, category: str, value: str, bars: int, agg: str = "sum") -> str:
+    """
+    The top ``bars - 1`` categories of ``sql`` by ``agg`` of ``value``, then
+    one "Other" row for the rest (only when there are more than ``bars``).
+    An "avg" Other is the mean over the rest's rows, not of their means.
+    """
+    if agg not in ("sum", "avg"):
+        raise ValueError(f"Unsupported aggregate: {agg!r}")
+    C, V = category.upper(), value.upper()
+    metric, outer = ("s", "SUM(s)") if agg == "sum" else ("1.0 * s / NULLIF(c, 0)", "1.0 * SUM(s) / NULLIF(SUM(c), 0)")
+    return f"""
+    SELECT CASE WHEN rn < {bars} OR n <= {bars} THEN label ELSE '{OTHER}' END AS {C},
+           {outer} AS {V}, MAX(n) AS source_categories
+    FROM (
+        SELECT label, s, c,
+               ROW_NUMBER() OVER (ORDER BY {metric} DESC NULLS LAST, label) AS rn,
+               COUNT(*) OVER () AS n
+        FROM (
+            SELECT {category} AS label, SUM({value}) AS s, COUNT({value}) AS c
+            FROM ({sql}) src
+            GROUP BY {category}
+        ) per_category
+    ) ranked
+    GROUP BY 1
+    ORDER BY MIN(rn)
+    """
+
+
+def _cached(cache: Optional[ArrowResultCache], key: tuple, tenant: Hashable, ttl: Optional[float],
+            build) -> ChartData:
+    cache = result_cache() if cache is None else cache
+    start = time.perf_counter()
+    table = cache.get(key, tenant)
+    if table is not None:
+        return ChartData(table, int(table.schema.metadata[b"source_points"]), time.perf_counter() - start, True)
+    table, source_points = build()
+    table = table.replace_schema_metadata({"source_points": str(source_points)})
+    table = cache.put(key, table, ttl, cost=time.perf_counter() - start, tenant=tenant)
+    return ChartData(table, source_points, time.perf_counter() - start, False)
+
+
+def time_series(engine, sql: str, x: str, ys: Sequence[str], viewport: Viewport = FULL_WIDTH,
+                params: Sequence = (), agg: str = "sum", cache: Optional[ArrowResultCache] = None,
+                tenant: Hashable = None, ttl: Optional[float] = None) -> ChartData:
+    """
+    ``agg`` of ``ys`` per ``x`` (a DATE or TIMESTAMP column of ``sql``) with
+    at most ``viewport.points`` rows per series, whatever the source size.
+    """
+    points = viewport.points
+
+    def build():
+        X = x.upper()
+        stats = fetch_arrow(engine, f"SELECT COUNT(DISTINCT {x}) AS n, MIN({x}) AS lo, MAX({x}) AS hi "
+                                    f"FROM ({sql}) src", params)
+        n = stats.column(0)[0].as_py()
+        if not n:
+            return fetch_arrow(engine, series_sql(engine, sql, x, ys, agg), params), 0
+        bucket = None
+        if n > points * OVERSAMPLE:
+            low, high = (int(v) for v in _numeric(pa.chunked_array([stats.column(1).combine_chunks(),
+                                                                    stats.column(2).combine_chunks()])))
+            bucket = (low, high - low + 1, points)
+        table = fetch_arrow(engine, series_sql(engine, sql, x, ys, agg, bucket), params)
+        return downsample(table, X, [y.upper() for y in ys], points), int(n)
+
+    key = ("chart:series", id(engine), sql, tuple(params), x, tuple(ys), agg, points)
+    return _cached(cache, key, tenant, ttl, build)
+
+
+def category_bars(engine, sql: str, category: str, value: str, viewport: Viewport = HALF_WIDTH,
+                  params: Sequence = (), agg: str = "sum", cache: Optional[ArrowResultCache] = None,
+                  tenant: Hashable = None, ttl: Optional[float] = None) -> ChartData:
+    """At most ``viewport.bars`` bars of ``agg`` of ``value`` per ``category``, the smallest as "Other"."""
+    bars = viewport.bars
+
+    def build():
+        table = fetch_arrow(engine, bars_sql(sql, category, value, bars, agg), params)
+        source = pc.max(table.column("SOURCE_CATEGORIES")).as_py() if table.num_rows else 0
+        return table.drop_columns(["SOURCE_CATEGORIES"]), int(source or 0)
+
+    key = ("chart:bars", id(engine), sql, tuple(params), category, value, agg, bars)
+    return _cached(cache, key, tenant, ttl, build)
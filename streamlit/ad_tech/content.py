@@ -0,0 +1,295 @@
+"""
+=============================================================================
+PatientPoint Ad Tech Demo - Static Page Content
+=============================================================================
+Constant markdown, CSS and demo-mode placeholder data for the pages. Kept in
+an imported module so it is built once per process instead of on every
+Streamlit rerun of the page scripts.
+=============================================================================
+"""
+
+# ============================================================================
+# Home
+# ============================================================================
+HOME_CSS = """
+<style>
+    .main-header {
+        font-size: 2.5rem;
+        font-weight: 700;
+        color: #1E3A5F;
+        margin-bottom: 0.5rem;
+    }
+    .sub-header {
+        font-size: 1.2rem;
+        color: #666;
+        margin-bottom: 2rem;
+    }
+    .metric-card {
+        background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
+        padding: 1.5rem;
+        border-radius: 12px;
+        color: white;
+        text-align: center;
+    }
+    .feature-card {
+        background: #f8f9fa;
+        padding: 1.5rem;
+        border-radius: 12px;
+        border-left: 4px solid #667eea;
+        margin-bottom: 1rem;
+    }
+    .stButton>button {
+        background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
+        color: white;
+        border: none;
+        padding: 0.5rem 2rem;
+        border-radius: 8px;
+        font-weight: 600;
+    }
+</style>
+"""
+
+FEATURE_CAMPAIGN_OPTIMIZER = """
+    <div class="feature-card">
+        <h3>📈 Campaign Optimizer</h3>
+        <p>Real-time bid optimization and campaign performance analytics. 
+        Get AI-powered pricing recommendations based on historical data.</p>
+        <ul>
+            <li>Optimal bid price predictions</li>
+            <li>ROAS analysis by therapeutic area</li>
+            <li>Partner performance comparisons</li>
+        </ul>
+    </div>
+    """
+
+FEATURE_INVENTORY_EXPLORER = """
+    <div class="feature-card">
+        <h3>🔍 Inventory Explorer</h3>
+        <p>Natural language search to discover available ad placements 
+        across medical facilities nationwide.</p>
+        <ul>
+            <li>Search by specialty (Cardiology, Endocrinology, etc.)</li>
+            <li>Filter by region, screen type, daypart</li>
+            <li>View pricing and performance metrics</li>
+        </ul>
+    </div>
+    """
+
+FEATURE_AGENT_CHAT = """
+    <div class="feature-card">
+        <h3>🤖 AI Agent Chat</h3>
+        <p>Conversational AI assistant powered by Snowflake Cortex Agent 
+        for intelligent campaign optimization.</p>
+        <ul>
+            <li>Natural language queries</li>
+            <li>Multi-tool orchestration</li>
+            <li>Automated visualizations</li>
+        </ul>
+    </div>
+    """
+
+FEATURE_AUDIENCE_INSIGHTS = """
+    <div class="feature-card">
+        <h3>👥 Audience Insights</h3>
+        <p>Privacy-safe audience cohort discovery with HIPAA-compliant 
+        analytics (k-anonymity enforced).</p>
+        <ul>
+            <li>Demographic segmentation</li>
+            <li>Engagement pattern analysis</li>
+            <li>Lookalike cohort discovery</li>
+        </ul>
+    </div>
+    """
+
+DEMO_SCENARIOS = """
+**Try these questions with the AI Agent:**
+
+1. **Pricing Optimization:** "What's the optimal bid price for a diabetes campaign in cardiology waiting rooms?"
+
+2. **Audience Targeting:** "Which audience segments have the highest engagement for heart medications?"
+
+3. **Campaign Analysis:** "Compare Q4 2024 vs Q3 2024 campaign performance across all partners"
+
+4. **Inventory Discovery:** "Find premium morning slots in Texas endocrinology clinics"
+
+5. **Cross-functional:** "I'm launching a new GLP-1 drug. Recommend inventory and target audiences."
+"""
+
+ARCHITECTURE = """
+    ### Snowflake Capabilities Demonstrated
+    
+    | Component | Snowflake Feature | Purpose |
+    |-----------|-------------------|---------|
+    | Data Model | Dynamic Tables & Views | Real-time aggregations |
+    | Semantic Layer | Semantic Views | Natural language to SQL |
+    | Search | Cortex Search Services | Unstructured data discovery |
+    | AI Assistant | Cortex Agents | Multi-tool orchestration |
+    | Visualization | Data to Chart | Automated chart generation |
+    | Application | Streamlit in Snowflake | Interactive demo UI |
+    
+    ### Data Pipeline
+    ```
+    Raw Data → Bronze Layer → Silver (Dim/Fact) → Gold (Aggregates) → Semantic Views → Cortex Agent
+    ```
+    
+    ### Privacy & Compliance
+    - All patient data is synthetic (HIPAA-safe demo)
+    - K-anonymity enforced (minimum cohort size = 50)
+    - Row-level security ready (partner logins read partner-scoped tables)
+    - Audit logging enabled
+    """
+
+
+# ============================================================================
+# Campaign Optimizer
+# ============================================================================
+DEMO_CAMPAIGNS = {
+        "Campaign": ["Jardiance Awareness 2024", "Ozempic Education Q4", "Entresto HCP Engagement", 
+                    "Keytruda Patient Support", "Humira Launch 2024"],
+        "Drug": ["Jardiance", "Ozempic", "Entresto", "Keytruda", "Humira"],
+        "Therapeutic Area": ["Diabetes", "Diabetes", "Cardiology", "Oncology", "Immunology"],
+        "Partner": ["Eli Lilly", "Novo Nordisk", "Novartis", "Merck", "AbbVie"],
+        "Impressions": [245000, 312000, 189000, 156000, 278000],
+        "Win Rate %": [68.5, 72.1, 61.3, 58.9, 65.7],
+        "CTR %": [0.045, 0.052, 0.038, 0.041, 0.048],
+        "ROAS": [3.2, 2.9, 2.5, 2.3, 2.1]
+}
+
+DEMO_THERAPEUTIC_ROAS = {
+        "Area": ["Diabetes", "Cardiology", "Oncology", "Immunology", "Neurology"],
+        "ROAS": [2.8, 2.4, 2.2, 2.0, 1.8]
+}
+
+DEMO_TIER_ROAS = {
+        "Tier": ["Platinum", "Gold", "Silver", "Bronze"],
+        "ROAS": [2.6, 2.3, 1.9, 1.5]
+}
+
+
+# ============================================================================
+# Inventory Explorer
+# ============================================================================
+EXAMPLE_SEARCHES_BY_SPECIALTY_LOCATION = """
+        **By Specialty:**
+        - "Cardiology waiting room displays"
+        - "Endocrinology clinics for diabetes campaigns"
+        - "Oncology facilities with premium screens"
+        
+        **By Location:**
+        - "Ad slots in Texas"
+        - "Northeast region hospitals"
+        - "Miami medical centers"
+        """
+
+EXAMPLE_SEARCHES_BY_SCREEN_COMBINED = """
+        **By Screen Type:**
+        - "Digital displays in waiting rooms"
+        - "Exam room tablets"
+        - "Check-in kiosk advertising"
+        
+        **Combined:**
+        - "Premium morning slots in cardiology"
+        - "High-volume facilities in Southeast"
+        - "Affordable inventory for awareness campaigns"
+        """
+
+DEMO_SLOTS = [
+        {
+            "slot_name": "Austin Heart Hospital - Waiting Room TV 55\"",
+            "specialty": "Cardiology",
+            "facility_name": "Austin Heart Hospital",
+            "city": "Austin",
+            "state": "TX",
+            "region": "Southwest",
+            "screen_type": "Waiting Room TV",
+            "daypart": "Morning",
+            "base_cpm": 18.50,
+            "daily_impressions": 245,
+            "is_premium": True
+        },
+        {
+            "slot_name": "Houston Medical Center - Digital Display 65\"",
+            "specialty": "Cardiology",
+            "facility_name": "Houston Regional Medical Center",
+            "city": "Houston",
+            "state": "TX",
+            "region": "Southwest",
+            "screen_type": "Digital Display",
+            "daypart": "All Day",
+            "base_cpm": 22.00,
+            "daily_impressions": 320,
+            "is_premium": True
+        },
+        {
+            "slot_name": "Dallas Cardiology Clinic - Check-in Kiosk",
+            "specialty": "Cardiology",
+            "facility_name": "Dallas Cardiology Associates",
+            "city": "Dallas",
+            "state": "TX",
+            "region": "Southwest",
+            "screen_type": "Check-in Kiosk",
+            "daypart": "Morning",
+            "base_cpm": 12.00,
+            "daily_impressions": 150,
+            "is_premium": False
+        },
+        {
+            "slot_name": "San Antonio Heart Center - Exam Room Display",
+            "specialty": "Cardiology",
+            "facility_name": "San Antonio Heart Center",
+            "city": "San Antonio",
+            "state": "TX",
+            "region": "Southwest",
+            "screen_type": "Exam Room Display",
+            "daypart": "Afternoon",
+            "base_cpm": 25.00,
+            "daily_impressions": 80,
+            "is_premium": True
+        },
+        {
+            "slot_name": "Phoenix Cardiology - Waiting Room TV",
+            "specialty": "Cardiology",
+            "facility_name": "Phoenix Cardiology Group",
+            "city": "Phoenix",
+            "state": "AZ",
+            "region": "Southwest",
+            "screen_type": "Waiting Room TV",
+            "daypart": "Morning",
+            "base_cpm": 16.00,
+            "daily_impressions": 200,
+            "is_premium": False
+        }
+]
+
+DEMO_REGIONS = {
+        "Region": ["Southwest", "Southeast", "West", "Northeast", "Midwest"],
+        "Slots": [1200, 1100, 950, 900, 850],
+        "Facilities": [120, 110, 95, 90, 85],
+        "Avg CPM": [15.20, 14.80, 16.50, 17.20, 13.50],
+        "Daily Impressions": [180000, 165000, 142500, 135000, 127500]
+}
+
+
+# ============================================================================
+# Agent Chat
+# ============================================================================
+AGENT_TOOLS = """
+- **CampaignAnalyst**: Query campaign metrics
+- **InventoryAnalyst**: Analyze ad slot performance
+- **AudienceAnalyst**: Cohort engagement data
+- **InventorySearch**: Find available placements
+- **CampaignSearch**: Search campaign history
+- **AudienceSearch**: Discover target segments
+- **DataToChart**: Generate visualizations
+"""
+
+SUGGESTED_PROMPTS = [
+        "What's the optimal bid price for a diabetes campaign in cardiology waiting rooms?",
+        "Which audience segments have the highest engagement for heart medications?",
+        "Compare Q4 2024 vs Q3 2024 campaign performance",
+        "Find premium morning slots in Texas endocrinology clinics",
+        "What's driving the ROAS improvement for Pfizer campaigns?",
+        "Show me high-conversion audience cohorts in the Southwest",
+        "Which therapeutic areas have the best CTR?",
+        "Recommend inventory for a new GLP-1 drug launch"
+]
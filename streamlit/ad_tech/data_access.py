@@ -0,0 +1,413 @@
+"""
+=============================================================================
+PatientPoint Ad Tech Demo - Arrow Data Access
+=============================================================================
+Query results travel as Apache Arrow from the warehouse to the browser:
+
+    Snowflake (Arrow result chunks) -> pyarrow.Table -> shared cache
+        -> st.dataframe / st.bar_chart (serialized straight to Arrow IPC)
+
+instead of Row objects from ``collect()`` or a pandas copy from
+``to_pandas()`` that Streamlit then converts back to Arrow.
+
+- fetch_arrow()          : one query as a pyarrow.Table, T_* columns cast
+                           to compact types from the seed DDL (schema.py)
+- iter_arrow_batches()   : the same, as RecordBatches for large results
+- query_arrow()          : fetch_arrow() through a process-wide cache; every
+                           session gets the same immutable Table (no
+                           pickling or copying on a cache hit). ``tenant``
+                           puts the entry in that tenant's namespace, with
+                           its own hit rate, latency and byte budget
+- first_row()            : a dict for single-row KPI queries
+- compress_table()       : the compact form results are cached in
+                           (dictionary-encoded categoricals, narrow numbers)
+
+Works with a Snowpark session (DataFrame.to_arrow on newer Snowpark, the
+connector's fetch_arrow_all on older ones) and with the LocalEngine.
+=============================================================================
+"""
+
+from __future__ import annotations
+
+import heapq
+import itertools
+import threading
+import time
+from typing import Dict, Hashable, Iterator, List, Optional, Sequence, Tuple
+
+from .metrics import LatencyHistogram
+from .runtime import lazy_module
+
+# Imported on first use so pages that never query stay light at startup
+pa = lazy_module("pyarrow")
+pc = lazy_module("pyarrow.compute")
+
+DEFAULT_TTL_SECONDS = 600
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+_ALL = object()
+
+
+# Methods are looked up on the class: Snowpark's DataFrame.__getattr__ resolves
+# unknown attributes as column names, which costs a describe round trip.
+def _dataframe(engine, query: str, params: Sequence = ()):
+    return engine.sql(query, params=list(params)) if params else engine.sql(query)
+
+
+def _connector_cursor(engine, query: str, params: Sequence):
+    """Snowflake connector cursor for ``query``, or None if unavailable."""
+    connection = getattr(engine, "connection", None)
+    if connection is None or params:
+        return None
+    cursor = connection.cursor()
+    cursor.execute(query)
+    return cursor
+
+
+def fetch_arrow(engine, query: str, params: Sequence = ()) -> pa.Table:
+    """
+    Run ``query`` and return the result as a pyarrow.Table, T_* columns in
+    the compact types of their DDL (schema.cast_result).
+    """
+    return _cast(_fetch_table(engine, query, params))
+
+
+def _fetch_table(engine, query: str, params: Sequence) -> pa.Table:
+    df = _dataframe(engine, query, params)
+    if hasattr(type(df), "to_arrow"):
+        return df.to_arrow()
+
+    # Older Snowpark: the connector already receives Arrow chunks
+    cursor = _connector_cursor(engine, query, params)
+    if cursor is not None:
+        try:
+            table = cursor.fetch_arrow_all()
+            if table is not None:
+                return table
+        finally:
+            cursor.close()
+    return pa.Table.from_pandas(df.to_pandas(), preserve_index=False)
+
+
+def _cast(data):
+    from .schema import cast_result   # schema reads CATEGORICAL_COLUMNS from here
+
+    return cast_result(data)
+
+
+def iter_arrow_batches(engine, query: str, params: Sequence = ()) -> Iterator[pa.RecordBatch]:
+    """Stream ``query`` as RecordBatches (cast like fetch_arrow) without holding the whole result."""
+    for batch in _fetch_batches(engine, query, params):
+        yield _cast(batch)
+
+
+def _fetch_batches(engine, query: str, params: Sequence) -> Iterator[pa.RecordBatch]:
+    df = _dataframe(engine, query, params)
+    if hasattr(type(df), "to_arrow_batches"):
+        for batch in df.to_arrow_batches():
+            yield from (batch.to_batches() if isinstance(batch, pa.Table) else [batch])
+        return
+
+    cursor = _connector_cursor(engine, query, params)
+    if cursor is not None:
+        try:
+            for table in cursor.fetch_arrow_batches():
+                yield from table.to_batches()
+        finally:
+            cursor.close()
+        return
+
+    for frame in df.to_pandas_batches():
+        yield pa.RecordBatch.from_pandas(frame, preserve_index=False)
+
+
+def first_row(table: pa.Table) -> Optional[Dict[str, object]]:
+    """The first row as ``{COLUMN: value}``, or None for an empty result."""
+    if table.num_rows == 0:
+        return None
+    return {name: column[0].as_py() for name, column in zip(table.column_names, table.columns)}
+
+
+# =============================================================================
+# Compact storage
+# =============================================================================
+# Always dictionary-encoded; other string columns are when mostly repeats
+CATEGORICAL_COLUMNS = ("THERAPEUTIC_AREA", "PARTNER_NAME", "REGION", "SPECIALTY_NAME")
+CATEGORICAL_MAX_RATIO = 0.5
+CATEGORICAL_MIN_ROWS = 64
+_INT_TYPES = ((-2**7, 2**7 - 1, "int8"), (-2**15, 2**15 - 1, "int16"), (-2**31, 2**31 - 1, "int32"))
+
+
+def _narrow_int(column):
+    """Smallest signed integer type that holds every value of ``column``."""
+    if column.null_count == len(column):
+        return column
+    bounds = pc.min_max(column)
+    low, high = bounds["min"].as_py(), bounds["max"].as_py()
+    for lo, hi, name in _INT_TYPES:
+        if lo <= low and high <= hi:
+            return column.cast(getattr(pa, name)())
+    return column.cast(pa.int64())
+
+
+def compress_table(table: pa.Table) -> pa.Table:
+    """
+    Same values in fewer bytes: dictionary-encoded repeated strings,
+    NUMBER(p,0) / integers in the narrowest integer type and NUMBER(p,s)
+    decimals as float64 instead of 16-byte decimal128.
+    """
+    columns = []
+    for name, column in zip(table.column_names, table.columns):
+        kind = column.type
+        if pa.types.is_string(kind) or pa.types.is_large_string(kind):
+            distinct = pc.count_distinct(column).as_py() if len(column) else 0
+            if name.upper() in CATEGORICAL_COLUMNS or (
+                len(column) >= CATEGORICAL_MIN_ROWS and distinct <= len(column) * CATEGORICAL_MAX_RATIO
+            ):
+                index = pa.int8() if distinct < 2**7 else pa.int16() if distinct < 2**15 else pa.int32()
+                column = column.cast(pa.dictionary(index, pa.string()))
+        elif pa.types.is_dictionary(kind) and pa.types.is_string(kind.value_type):
+            # Already categorical (schema.cast_result): narrow the indices
+            chunks = column.chunks if isinstance(column, pa.ChunkedArray) else [column]
+            distinct = max((len(chunk.dictionary) for chunk in chunks), default=0)
+            index = pa.int8() if distinct < 2**7 else pa.int16() if distinct < 2**15 else pa.int32()
+            column = column.cast(pa.dictionary(index, pa.string()))
+        elif pa.types.is_decimal(kind):
+            column = _narrow_int(column.cast(pa.int64())) if kind.scale == 0 else column.cast(pa.float64())
+        elif pa.types.is_integer(kind) and kind.bit_width > 8:
+            column = _narrow_int(column)
+        columns.append(column)
+    return pa.table(columns, names=table.column_names, metadata=table.schema.metadata)
+
+
+# =============================================================================
+# Shared result cache
+# =============================================================================
+class _Entry:
+    __slots__ = ("table", "expires", "size", "raw_size", "cost", "hits", "priority", "seq", "tenant")
+
+    def __init__(self, table, expires, raw_size, cost, tenant=None):
+        self.table = table
+        self.expires = expires
+        self.size = table.nbytes
+        self.raw_size = raw_size
+        self.cost = cost
+        self.hits = 1
+        self.priority = 0.0
+        self.seq = 0            # of the entry's current heap item; older items are stale
+        self.tenant = tenant
+
+
+class _Tenant:
+    """Per-namespace accounting: resident entries (and their eviction heap), bytes, hits, misses, latency."""
+    __slots__ = ("entries", "heap", "nbytes", "hits", "misses", "latency")
+
+    def __init__(self):
+        self.entries = 0
+        self.heap: List[Tuple[float, int, Tuple]] = []
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.latency = LatencyHistogram()
+
+
+class ArrowResultCache:
+    """
+    Arrow tables bounded by total buffer size, with a TTL. Tables are
+    stored compressed (compress_table) and are immutable, so a hit hands
+    back the cached object itself.
+
+    Eviction is size-aware (GreedyDual-Size-Frequency): an entry's priority
+    is hits x fetch cost / bytes on top of a clock that advances on every
+    eviction, so one large, cheap result goes before many small, expensive
+    ones, and entries nobody touches age out. Priorities live in a min-heap
+    (a hit pushes a new item and leaves the old one stale), so an eviction
+    is O(log n) rather than a scan of every entry.
+
+    Results fetched for a tenant are stored under that tenant (their
+    cache_key() includes it too, so namespaces never share entries) and
+    each tenant's hits, misses and latency are tracked separately. With
+    ``max_tenant_bytes`` set, a tenant over its budget evicts its own
+    entries first, from a heap of its own, so one busy tenant cannot flush
+    the others.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES, ttl: float = DEFAULT_TTL_SECONDS,
+                 clock=time.monotonic, compress: bool = True, max_tenant_bytes: Optional[int] = None):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.clock = clock
+        self.compress = compress
+        self.max_tenant_bytes = max_tenant_bytes
+        self._entries: Dict[Tuple, _Entry] = {}
+        self._tenants: Dict[Hashable, _Tenant] = {}
+        self._heap: List[Tuple[float, int, Tuple]] = []
+        self._seq = itertools.count(1)
+        self._lock = threading.Lock()
+        self._age = 0.0
+        self.nbytes = 0
+        self.raw_nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.evicted_bytes = 0
+
+    def _tenant(self, tenant: Hashable) -> _Tenant:
+        stats = self._tenants.get(tenant)
+        if stats is None:
+            stats = self._tenants[tenant] = _Tenant()
+        return stats
+
+    def _live(self, item: Tuple[float, int, Tuple]) -> bool:
+        entry = self._entries.get(item[2])
+        return entry is not None and entry.seq == item[1]
+
+    def _prioritize(self, key: Tuple, entry: _Entry) -> None:
+        entry.priority = self._age + entry.hits * (entry.cost + 1e-3) / max(entry.size, 1) * 1e6
+        entry.seq = next(self._seq)
+        item = (entry.priority, entry.seq, key)
+        stats = self._tenants[entry.tenant]
+        for heap in (self._heap, stats.heap):
+            heapq.heappush(heap, item)
+        # Stale items (from hits and drops) are skipped lazily; compact
+        # once they outnumber the live ones, keeping pushes amortized O(log n)
+        if len(self._heap) > 2 * len(self._entries) + 64:
+            self._heap = [i for i in self._heap if self._live(i)]
+            heapq.heapify(self._heap)
+        if len(stats.heap) > 2 * stats.entries + 64:
+            stats.heap = [i for i in stats.heap if self._live(i)]
+            heapq.heapify(stats.heap)
+
+    def get(self, key: Tuple, tenant: Hashable = None) -> Optional[pa.Table]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.expires < self.clock():
+                if entry is not None:
+                    self._drop(key)
+                self.misses += 1
+                self._tenant(tenant).misses += 1
+                return None
+            entry.hits += 1
+            self._prioritize(key, entry)
+            self.hits += 1
+            self._tenant(tenant).hits += 1
+            return entry.table
+
+    def put(self, key: Tuple, table: pa.Table, ttl: Optional[float] = None, cost: float = 0.0,
+            tenant: Hashable = None) -> pa.Table:
+        """Cache ``table`` (fetched in ``cost`` seconds) for ``tenant``; returns the stored table."""
+        raw_size = table.nbytes
+        if self.compress:
+            table = compress_table(table)
+        entry = _Entry(table, self.clock() + (self.ttl if ttl is None else ttl), raw_size, cost, tenant)
+        budget = self.max_bytes
+        if tenant is not None and self.max_tenant_bytes is not None:
+            budget = min(budget, self.max_tenant_bytes)
+        if entry.size > budget:
+            return table
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = entry
+            self.nbytes += entry.size
+            self.raw_nbytes += raw_size
+            stats = self._tenant(tenant)
+            stats.entries += 1
+            stats.nbytes += entry.size
+            self._prioritize(key, entry)
+            if tenant is not None and self.max_tenant_bytes is not None:
+                while stats.nbytes > self.max_tenant_bytes:
+                    self._evict(stats.heap)
+            while self.nbytes > self.max_bytes:
+                self._evict(self._heap)
+        return table
+
+    def _evict(self, heap: List[Tuple[float, int, Tuple]]) -> None:
+        """Drop the lowest-priority live entry in ``heap``."""
+        while True:
+            item = heapq.heappop(heap)
+            if self._live(item):
+                break
+        priority, _, victim = item
+        self._age = priority
+        self.evictions += 1
+        self.evicted_bytes += self._entries[victim].size
+        self._drop(victim)
+
+    def _drop(self, key: Tuple) -> None:
+        entry = self._entries.pop(key)
+        self.nbytes -= entry.size
+        self.raw_nbytes -= entry.raw_size
+        stats = self._tenants[entry.tenant]
+        stats.entries -= 1
+        stats.nbytes -= entry.size
+
+    def clear(self, tenant: Hashable = _ALL) -> None:
+        """Drop every entry, or only ``tenant``'s namespace."""
+        with self._lock:
+            if tenant is _ALL:
+                self._entries.clear()
+                self._tenants.clear()
+                self._heap = []
+                self.nbytes = 0
+                self.raw_nbytes = 0
+                return
+            stats = self._tenants.get(tenant)
+            if stats is None:
+                return
+            for key in {item[2] for item in stats.heap if self._live(item)}:
+                self._drop(key)
+            stats.heap = []
+
+    def observe(self, tenant: Hashable, seconds: float) -> None:
+        """Record one query_arrow() call's latency (hit or miss) for ``tenant``."""
+        with self._lock:
+            self._tenant(tenant).latency.record(seconds)
+
+    def stats(self) -> Dict[str, float]:
+        """Resident (compressed) and uncompressed bytes, hits and evictions."""
+        with self._lock:
+            return {"entries": len(self._entries), "bytes": self.nbytes, "raw_bytes": self.raw_nbytes,
+                    "compression": self.raw_nbytes / self.nbytes if self.nbytes else 1.0,
+                    "hits": self.hits, "misses": self.misses,
+                    "evictions": self.evictions, "evicted_bytes": self.evicted_bytes}
+
+    def tenant_stats(self) -> Dict[Hashable, Dict[str, float]]:
+        """Per tenant namespace: resident entries and bytes, hit rate and latency (ms)."""
+        with self._lock:
+            report = {}
+            for tenant, stats in self._tenants.items():
+                if tenant is None:
+                    continue
+                lookups = stats.hits + stats.misses
+                report[tenant] = {"entries": stats.entries, "bytes": stats.nbytes,
+                                  "hits": stats.hits, "misses": stats.misses,
+                                  "hit_rate": stats.hits / lookups if lookups else 0.0,
+                                  **stats.latency.summary((50, 99))}
+            return report
+
+
+_results = ArrowResultCache()
+
+
+def cache_key(engine, query: str, params: Sequence = (), tenant: Hashable = None) -> Tuple:
+    """``(tenant, engine, query, params)``; ``tenant`` is None for shared results."""
+    return (tenant, id(engine), query, tuple(params))
+
+
+def query_arrow(engine, query: str, params: Sequence = (), ttl: Optional[float] = None,
+                cache: Optional[ArrowResultCache] = None, tenant: Hashable = None) -> pa.Table:
+    """fetch_arrow() through the process-wide (or the given) result cache."""
+    cache = _results if cache is None else cache
+    start = time.perf_counter()
+    key = cache_key(engine, query, params, tenant)
+    table = cache.get(key, tenant)
+    if table is None:
+        table = fetch_arrow(engine, query, params)
+        table = cache.put(key, table, ttl, cost=time.perf_counter() - start, tenant=tenant)
+    if tenant is not None:
+        cache.observe(tenant, time.perf_counter() - start)
+    return table
+
+
+def result_cache() -> ArrowResultCache:
+    return _results
@@ -0,0 +1,599 @@
+"""
+=============================================================================
+PatientPoint Ad Tech Demo - Deployment Runner
+=============================================================================
+Deploys the setup scripts (setup/01-05 by default) as a dependency graph
+of objects instead of replaying every file in order:
+
+1. parse   : scripts are split into statements (strings, ``$$`` blocks and
+             comments respected). Each CREATE becomes an object node keyed by
+             kind and qualified name, e.g. ``TABLE AD_TECH.ANALYTICS.X``.
+             INSERT / ALTER / DELETE statements join their object's node,
+             GRANTs become nodes of their own, and USE statements set the
+             context later statements run in. Verification statements
+             (SELECT, SHOW, DESCRIBE) are dropped.
+2. graph   : a node depends on its database, schema and warehouse, and on
+             every earlier object its text names (the agent's spec names
+             the search services and semantic views).
+3. diff    : a node's fingerprint hashes its normalized statements, its
+             context and the fingerprints of the objects it references, so
+             changing a table also changes everything built on it. The
+             target's state table holds the fingerprint each object was last
+             deployed with; SHOW commands confirm the object still exists.
+4. apply   : only new, changed or missing nodes run, on a thread pool, as
+             soon as the nodes they depend on are done. Independent nodes
+             (the three search services, the three semantic views) run
+             side by side. A failed node skips the nodes that depend on it.
+
+Targets:
+  LocalTarget     : a LocalEngine. Tables the seed parser reads (CREATE OR
+                    REPLACE TABLE + INSERT ... VALUES) are built for real;
+                    other objects are recorded in a catalog table, optionally
+                    with a simulated build time per kind.
+  SnowflakeTarget : a Snowpark session. Each worker thread gets its own
+                    session from ``session_factory`` and sets the node's
+                    USE context before running it.
+
+Usage (from the streamlit/ directory):
+    python -m ad_tech.deploy --dry-run
+    python -m ad_tech.deploy --target snowflake --connection demo --workers 6
+=============================================================================
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import re
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+SETUP_DIR = Path(__file__).resolve().parents[2] / "setup"
+DEFAULT_SCRIPTS = tuple(sorted(SETUP_DIR.glob("0[1-5]_*.sql")))
+DEFAULT_WORKERS = 4
+
+# Longest first, so "DYNAMIC TABLE" wins over "TABLE"
+KINDS = (
+    "CORTEX SEARCH SERVICE", "ROW ACCESS POLICY", "SEMANTIC VIEW", "DYNAMIC TABLE",
+    "DATABASE", "WAREHOUSE", "SCHEMA", "TABLE", "VIEW", "STREAM", "TASK", "AGENT",
+)
+# Created IF NOT EXISTS and never rebuilt: ordering dependencies, not part of fingerprints
+STRUCTURAL = frozenset({"DATABASE", "SCHEMA", "WAREHOUSE"})
+SHOW_PLURALS = {
+    "TABLE": "TABLES", "DYNAMIC TABLE": "DYNAMIC TABLES", "VIEW": "VIEWS", "STREAM": "STREAMS",
+    "TASK": "TASKS", "CORTEX SEARCH SERVICE": "CORTEX SEARCH SERVICES", "SEMANTIC VIEW": "SEMANTIC VIEWS",
+    "AGENT": "AGENTS", "ROW ACCESS POLICY": "ROW ACCESS POLICIES",
+}
+
+_KIND_RE = "|".join(k.replace(" ", r"\s+") for k in KINDS)
+_NAME = r"([\w$.]+)"
+_USE_RE = re.compile(r"USE\s+(ROLE|DATABASE|SCHEMA|WAREHOUSE)\s+" + _NAME, re.IGNORECASE)
+_CREATE_RE = re.compile(
+    r"CREATE\s+(?:OR\s+REPLACE\s+)?(?:(?:SECURE|TRANSIENT)\s+)?(" + _KIND_RE + r")\s+"
+    r"(?:IF\s+NOT\s+EXISTS\s+)?" + _NAME, re.IGNORECASE,
+)
+_ATTACH_RE = re.compile(
+    r"(?:INSERT\s+(?:OVERWRITE\s+)?INTO|DELETE\s+FROM|MERGE\s+INTO|UPDATE|ALTER\s+(?:" + _KIND_RE + r"))"
+    r"\s+(?:IF\s+EXISTS\s+)?" + _NAME, re.IGNORECASE,
+)
+_GRANT_RE = re.compile(r"(?:GRANT|REVOKE)\b", re.IGNORECASE)
+_GRANT_IN_DATABASE_RE = re.compile(r"\bIN\s+DATABASE\s+" + _NAME, re.IGNORECASE)
+_SKIP_RE = re.compile(r"(?:SELECT|WITH|SHOW|DESCRIBE|DESC|LIST)\b", re.IGNORECASE)
+_CONTEXT_KEYS = ("role", "database", "schema", "warehouse")
+
+
+class DeployError(ValueError):
+    """A setup script statement the runner cannot place in the graph."""
+
+
+# =============================================================================
+# Parsing
+# =============================================================================
+
+def split_statements(sql: str) -> List[Tuple[str, int]]:
+    """
+    ``(statement, line)`` for each ``;``-terminated statement, with comments
+    removed. Quotes (``''`` escapes) and ``$$`` blocks are kept verbatim.
+    """
+    statements, buf = [], []
+    line, start = 1, None
+    i, n = 0, len(sql)
+    while i < n:
+        ch = sql[i]
+        if ch == "'" or sql.startswith("$$", i):
+            if ch == "'":
+                j = i + 1
+                while j < n:
+                    if sql.startswith("''", j):
+                        j += 2
+                    elif sql[j] == "'":
+                        break
+                    else:
+                        j += 1
+                j += 1
+            else:
+                j = sql.find("$$", i + 2)
+                j = n if j < 0 else j + 2
+            start = line if start is None else start
+            buf.append(sql[i:j])
+            line += sql.count("\n", i, j)
+            i = j
+        elif sql.startswith("--", i):
+            i = sql.find("\n", i)
+            i = n if i < 0 else i
+        elif sql.startswith("/*", i):
+            j = sql.find("*/", i)
+            j = n if j < 0 else j + 2
+            line += sql.count("\n", i, j)
+            buf.append(" ")
+            i = j
+        elif ch == ";":
+            text = "".join(buf).strip()
+            if text:
+                statements.append((text, start))
+            buf, start = [], None
+            i += 1
+        else:
+            if ch == "\n":
+                line += 1
+            elif start is None and not ch.isspace():
+                start = line
+            buf.append(ch)
+            i += 1
+    text = "".join(buf).strip()
+    if text:
+        statements.append((text, start))
+    return statements
+
+
+def normalize(statement: str) -> str:
+    """Statement text for fingerprinting: trailing spaces and blank lines dropped."""
+    return "\n".join(line.rstrip() for line in statement.strip().splitlines() if line.strip())
+
+
+@dataclass
+class Node:
+    """One deployable object (or grant) and the statements that build it."""
+    key: str
+    kind: str
+    name: str
+    context: Dict[str, str]
+    source: str
+    order: int                                         # statement index of the CREATE
+    last: int = 0                                      # statement index of the last statement
+    statements: List[str] = field(default_factory=list)
+    deps: Set[str] = field(default_factory=set)        # must be applied first
+    refs: Set[str] = field(default_factory=set)        # non-structural deps, part of the fingerprint
+    fingerprint: str = ""
+
+
+def qualify(kind: str, name: str, context: Dict[str, str]) -> str:
+    """Fully qualified upper-case name of ``name`` created in ``context``."""
+    parts = name.upper().split(".")
+    if kind in ("DATABASE", "WAREHOUSE"):
+        return parts[-1]
+    if kind == "SCHEMA":
+        return ".".join(parts) if len(parts) > 1 else f"{context.get('database')}.{parts[0]}"
+    if len(parts) == 1:
+        return f"{context.get('database')}.{context.get('schema')}.{parts[0]}"
+    if len(parts) == 2:
+        return f"{context.get('database')}.{parts[0]}.{parts[1]}"
+    return ".".join(parts)
+
+
+def _name_pattern(node: Node) -> re.Pattern:
+    """Matches ``node``'s name bare or with any prefix of its qualifiers."""
+    parts = node.name.split(".")
+    prefix = ""
+    for part in parts[:-1]:
+        prefix = f"(?:{prefix}{re.escape(part)}\\.)?"
+    return re.compile(rf"(?<![\w$.]){prefix}{re.escape(parts[-1])}(?![\w$])", re.IGNORECASE)
+
+
+def parse_scripts(paths: Iterable[Path] = DEFAULT_SCRIPTS) -> Dict[str, Node]:
+    """Object and grant nodes of the setup scripts, keyed by node key, in script order."""
+    nodes: Dict[str, Node] = {}
+    context: Dict[str, str] = {}
+    index = 0
+    for path in paths:
+        path = Path(path)
+        for statement, line in split_statements(path.read_text(encoding="utf-8")):
+            index += 1
+            source = f"{path.name}:{line}"
+            use = _USE_RE.match(statement)
+            create = _CREATE_RE.match(statement)
+            attach = _ATTACH_RE.match(statement)
+            if use:
+                scope, name = use.group(1).lower(), use.group(2).upper()
+                if scope == "schema" and "." in name:
+                    context["database"], name = name.split(".", 1)
+                context[scope] = name
+            elif create:
+                kind = " ".join(create.group(1).upper().split())
+                name = qualify(kind, create.group(2), context)
+                key = f"{kind} {name}"
+                # A later script redefining an object replaces its earlier definition
+                nodes.pop(key, None)
+                nodes[key] = Node(key, kind, name, dict(context), source, index, index, [statement])
+            elif _GRANT_RE.match(statement):
+                key = " ".join(statement.split()).upper()
+                nodes[key] = Node(key, "GRANT", key, dict(context), source, index, index, [statement])
+            elif attach:
+                name = attach.group(1).upper()
+                owner = next((n for n in nodes.values() if n.kind not in STRUCTURAL and n.kind != "GRANT"
+                              and n.name in (name, qualify(n.kind, name, context))), None)
+                if owner is None:
+                    raise DeployError(f"{source}: {name} is not created by the deployed scripts")
+                owner.statements.append(statement)
+                owner.last = index
+            elif not _SKIP_RE.match(statement):
+                raise DeployError(f"{source}: unsupported statement: {statement.splitlines()[0][:80]}")
+    _link(nodes)
+    return nodes
+
+
+def _link(nodes: Dict[str, Node]) -> None:
+    """Fill in containment and reference dependencies, then fingerprints in script order."""
+    ordered = sorted(nodes.values(), key=lambda n: n.order)
+    patterns = {n.key: _name_pattern(n) for n in ordered if n.kind != "GRANT"}
+    for node in ordered:
+        context = node.context
+        if node.kind == "SCHEMA":
+            node.deps.add(f"DATABASE {node.name.split('.')[0]}")
+        elif node.kind not in ("DATABASE", "WAREHOUSE"):
+            node.deps.update({f"DATABASE {context.get('database')}", f"WAREHOUSE {context.get('warehouse')}",
+                              f"SCHEMA {context.get('database')}.{context.get('schema')}"})
+            if node.kind != "GRANT":
+                node.deps.add(f"SCHEMA {node.name.rsplit('.', 1)[0]}")
+        text = "\n".join(node.statements)
+        for other in ordered:
+            # Objects created later count only when a statement attached after them names them
+            # (e.g. ALTER ... ADD ROW ACCESS POLICY); they order the apply but stay out of the fingerprint
+            if other is not node and other.kind != "GRANT" and other.order < node.last \
+                    and patterns[other.key].search(text):
+                node.deps.add(other.key)
+        if node.kind == "GRANT":
+            for match in _GRANT_IN_DATABASE_RE.finditer(text):
+                prefix = match.group(1).upper() + "."
+                node.deps.update(n.key for n in ordered if n.kind == "SCHEMA" and n.order < node.order
+                                 and n.name.startswith(prefix))
+        node.deps = {d for d in node.deps if d in nodes and d != node.key}
+        node.refs = {d for d in node.deps if nodes[d].kind not in STRUCTURAL and nodes[d].order < node.order}
+
+        digest = hashlib.sha256()
+        for part in (node.key, *(f"{k}={context.get(k)}" for k in _CONTEXT_KEYS),
+                     *(normalize(s) for s in node.statements),
+                     *sorted(d for d in node.deps if d not in node.refs),
+                     *(f"{d}@{nodes[d].fingerprint}" for d in sorted(node.refs))):
+            digest.update(part.encode("utf-8"))
+            digest.update(b"\0")
+        node.fingerprint = digest.hexdigest()[:16]
+
+
+# =============================================================================
+# Targets
+# =============================================================================
+
+def _sql_list(values: Iterable[str]) -> str:
+    return ", ".join("'" + v.replace("'", "''") + "'" for v in values)
+
+
+class LocalTarget:
+    """
+    Deploys into a LocalEngine (an empty one by default). ``latency`` maps a
+    kind to seconds slept per node, to stand in for Snowflake build times.
+    """
+
+    STATE_TABLE = "_DEPLOY_STATE"
+    CATALOG_TABLE = "_DEPLOY_CATALOG"
+
+    def __init__(self, engine=None, latency: Optional[Dict[str, float]] = None):
+        from .engine import LocalEngine
+
+        self.engine = engine if engine is not None else LocalEngine(tables={})
+        self.latency = dict(latency or {})
+        self.engine.executescript(
+            f"CREATE TABLE IF NOT EXISTS {self.STATE_TABLE} "
+            "(object_key TEXT PRIMARY KEY, kind TEXT, fingerprint TEXT, deployed_at TEXT);"
+            f"CREATE TABLE IF NOT EXISTS {self.CATALOG_TABLE} (object_key TEXT PRIMARY KEY, kind TEXT);"
+        )
+
+    def deployed(self) -> Dict[str, str]:
+        rows = self.engine.execute(f"SELECT object_key, fingerprint FROM {self.STATE_TABLE}")
+        return {r[0]: r[1] for r in rows}
+
+    def existing(self, nodes: Sequence[Node]) -> Set[str]:
+        tables = {r[0].upper() for r in self.engine.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        catalog = {r[0] for r in self.engine.execute(f"SELECT object_key FROM {self.CATALOG_TABLE}")}
+        return {n.key for n in nodes
+                if n.key in catalog or (n.kind == "TABLE" and n.name.split(".")[-1] in tables)}
+
+    def apply(self, node: Node) -> None:
+        from .seed import parse_seed_sql
+
+        time.sleep(self.latency.get(node.kind, 0.0))
+        table = None
+        if node.kind == "TABLE":
+            table = parse_seed_sql(";\n".join(node.statements) + ";").get(node.name.split(".")[-1])
+        if table is not None:
+            self.engine.load_table(table.name, table.columns, table.rows)
+        else:
+            self.engine.execute(f"INSERT OR REPLACE INTO {self.CATALOG_TABLE} VALUES (?, ?)", [node.key, node.kind])
+
+    def record(self, node: Node) -> None:
+        self.engine.execute(f"INSERT OR REPLACE INTO {self.STATE_TABLE} VALUES (?, ?, ?, ?)",
+                            [node.key, node.kind, node.fingerprint, datetime.now().isoformat()])
+
+
+class SnowflakeTarget:
+    """
+    Deploys through Snowpark. With a ``session_factory`` each worker thread
+    opens its own session; without one every node runs on ``session``, one
+    at a time, since USE statements change the session's context.
+    """
+
+    def __init__(self, session, session_factory: Optional[Callable[[], object]] = None,
+                 state_table: str = "AD_TECH.PUBLIC.DEPLOY_STATE"):
+        self.session = session
+        self.session_factory = session_factory
+        self.state_table = state_table
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._state_ready = False
+
+    def _worker_session(self):
+        if self.session_factory is None:
+            return self.session
+        if getattr(self._local, "session", None) is None:
+            self._local.session = self.session_factory()
+        return self._local.session
+
+    def deployed(self) -> Dict[str, str]:
+        try:
+            rows = self.session.sql(f"SELECT object_key, fingerprint FROM {self.state_table}").collect()
+        except Exception:
+            return {}    # first deployment: no state table yet
+        return {r[0]: r[1] for r in rows}
+
+    def _show(self, command: str) -> Set[str]:
+        try:
+            return {str(r["name"]).upper() for r in self._worker_session().sql(command).collect()}
+        except Exception:
+            return set()    # the container does not exist yet
+
+    def existing(self, nodes: Sequence[Node]) -> Set[str]:
+        """One SHOW per kind and container (run on the worker sessions); grants count as existing."""
+        commands: Dict[str, List[Node]] = {}
+        for node in nodes:
+            if node.kind == "DATABASE":
+                command = "SHOW DATABASES"
+            elif node.kind == "WAREHOUSE":
+                command = "SHOW WAREHOUSES"
+            elif node.kind == "SCHEMA":
+                command = f"SHOW SCHEMAS IN DATABASE {node.name.split('.')[0]}"
+            elif node.kind in SHOW_PLURALS:
+                command = f"SHOW {SHOW_PLURALS[node.kind]} IN SCHEMA {node.name.rsplit('.', 1)[0]}"
+            else:
+                continue
+            commands.setdefault(command, []).append(node)
+        checked = {n.key for group in commands.values() for n in group}
+        present = {n.key for n in nodes if n.key not in checked}
+        workers = 1 if self.session_factory is None else min(DEFAULT_WORKERS, max(len(commands), 1))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            names = dict(zip(commands, pool.map(self._show, commands)))
+        for command, group in commands.items():
+            present.update(n.key for n in group if n.name.split(".")[-1] in names[command])
+        return present
+
+    def apply(self, node: Node) -> None:
+        if self.session_factory is None:
+            with self._lock:
+                self._run(self.session, node)
+        else:
+            self._run(self._worker_session(), node)
+
+    @staticmethod
+    def _run(session, node: Node) -> None:
+        for scope in _CONTEXT_KEYS:
+            if node.context.get(scope) and not (scope != "role" and node.kind in ("DATABASE", "WAREHOUSE")):
+                session.sql(f"USE {scope.upper()} {node.context[scope]}").collect()
+        for statement in node.statements:
+            session.sql(statement).collect()
+
+    def record(self, node: Node) -> None:
+        session = self._worker_session()
+        with self._lock:
+            if not self._state_ready:
+                session.sql(f"CREATE TABLE IF NOT EXISTS {self.state_table} (object_key VARCHAR, kind VARCHAR, "
+                            "fingerprint VARCHAR, deployed_at TIMESTAMP_NTZ)").collect()
+                self._state_ready = True
+        session.sql(
+            f"MERGE INTO {self.state_table} t USING (SELECT {_sql_list([node.key])} AS object_key) s "
+            "ON t.object_key = s.object_key "
+            f"WHEN MATCHED THEN UPDATE SET fingerprint = '{node.fingerprint}', deployed_at = CURRENT_TIMESTAMP() "
+            f"WHEN NOT MATCHED THEN INSERT VALUES ({_sql_list([node.key, node.kind, node.fingerprint])}, "
+            "CURRENT_TIMESTAMP())"
+        ).collect()
+
+
+# =============================================================================
+# Plan and apply
+# =============================================================================
+
+@dataclass
+class Step:
+    """What a deployment does with one node."""
+    node: Node
+    action: str                   # create | update | unchanged
+    reason: str = ""
+    status: str = "pending"       # pending | done | failed | skipped | planned
+    seconds: float = 0.0
+    error: str = ""
+
+
+@dataclass
+class DeployReport:
+    steps: List[Step]
+    orphaned: List[str]           # deployed earlier, no longer in the scripts (never dropped)
+    plan_seconds: float
+    apply_seconds: float
+    workers: int
+
+    @property
+    def applied(self) -> List[Step]:
+        return [s for s in self.steps if s.status == "done"]
+
+    @property
+    def ok(self) -> bool:
+        return not any(s.status in ("failed", "skipped") for s in self.steps)
+
+    @property
+    def serial_seconds(self) -> float:
+        """Sum of node apply times: the wall time of running them one by one."""
+        return sum(s.seconds for s in self.steps)
+
+
+def plan(nodes: Dict[str, Node], target, adopt: bool = False) -> Tuple[List[Step], List[str]]:
+    """
+    Steps in script order and the orphaned state keys. With ``adopt``,
+    objects that exist but were never deployed by the runner (e.g. created
+    by hand in Snowsight) are taken as up to date.
+    """
+    deployed = target.deployed()
+    existing = target.existing(list(nodes.values()))
+    steps = []
+    for node in sorted(nodes.values(), key=lambda n: n.order):
+        if node.key not in existing:
+            steps.append(Step(node, "create", "missing"))
+        elif node.key not in deployed:
+            steps.append(Step(node, "unchanged" if adopt else "update", "adopted" if adopt else "no deploy record"))
+        elif deployed[node.key] != node.fingerprint:
+            steps.append(Step(node, "update", "definition or upstream changed"))
+        else:
+            steps.append(Step(node, "unchanged"))
+    return steps, sorted(set(deployed) - set(nodes))
+
+
+def apply_steps(steps: List[Step], target, workers: int = DEFAULT_WORKERS) -> None:
+    """Run the create/update steps on ``workers`` threads as their dependencies complete."""
+    todo = {s.node.key: s for s in steps if s.action != "unchanged"}
+    for step in steps:
+        if step.action == "unchanged":
+            step.status = "unchanged"
+    waiting = {key: {d for d in s.node.deps if d in todo} for key, s in todo.items()}
+    dependents: Dict[str, Set[str]] = {key: set() for key in todo}
+    for key, deps in waiting.items():
+        for dep in deps:
+            dependents[dep].add(key)
+
+    def run(step: Step) -> None:
+        t0 = time.perf_counter()
+        try:
+            target.apply(step.node)
+            target.record(step.node)
+            step.status = "done"
+        except Exception as exc:
+            step.status, step.error = "failed", str(exc).splitlines()[0] if str(exc) else type(exc).__name__
+        step.seconds = time.perf_counter() - t0
+
+    def skip(key: str, cause: str) -> None:
+        for child in dependents[key]:
+            if todo[child].status == "pending":
+                todo[child].status, todo[child].error = "skipped", f"depends on failed {cause}"
+                skip(child, cause)
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        running = {}
+        while True:
+            for key, deps in list(waiting.items()):
+                if not deps and todo[key].status == "pending":
+                    running[pool.submit(run, todo[key])] = key
+                    del waiting[key]
+            if not running:
+                break
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                key = running.pop(future)
+                if todo[key].status == "failed":
+                    skip(key, key)
+                for child in dependents[key]:
+                    waiting.get(child, set()).discard(key)
+            waiting = {k: d for k, d in waiting.items() if todo[k].status == "pending"}
+    for key in waiting:
+        todo[key].status, todo[key].error = "skipped", "dependency cycle"
+
+
+def deploy(target, scripts: Iterable[Path] = DEFAULT_SCRIPTS, workers: int = DEFAULT_WORKERS,
+           dry_run: bool = False, adopt: bool = False) -> DeployReport:
+    """Parse ``scripts``, diff them against ``target`` and apply what changed."""
+    t0 = time.perf_counter()
+    nodes = parse_scripts(scripts)
+    steps, orphaned = plan(nodes, target, adopt=adopt)
+    plan_seconds = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    if dry_run:
+        for step in steps:
+            step.status = "planned" if step.action != "unchanged" else "unchanged"
+    else:
+        apply_steps(steps, target, workers)
+        if adopt:
+            for step in steps:
+                if step.reason == "adopted":
+                    target.record(step.node)
+    return DeployReport(steps, orphaned, plan_seconds, time.perf_counter() - t0, workers)
+
+
+# =============================================================================
+# CLI
+# =============================================================================
+
+def print_report(report: DeployReport) -> None:
+    print(f"{'object':<64} | {'action':<9} | {'status':<9} | {'seconds':>7}")
+    print("-" * 100)
+    for step in report.steps:
+        label = step.node.key if len(step.node.key) <= 64 else step.node.key[:61] + "..."
+        print(f"{label:<64} | {step.action:<9} | {step.status:<9} | {step.seconds:>7.2f}")
+        if step.error:
+            print(f"{'':<4}{step.error}")
+    for key in report.orphaned:
+        print(f"{key:<64} | orphaned  | (not dropped)")
+    print(f"\n{len(report.applied)} of {len(report.steps)} objects applied; plan {report.plan_seconds:.2f} s, "
+          f"apply {report.apply_seconds:.2f} s on {report.workers} workers "
+          f"({report.serial_seconds:.2f} s of object time)")
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("Usage")[0].strip("=\n "),
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("scripts", nargs="*", type=Path, help="setup scripts (default: setup/01-05)")
+    parser.add_argument("--target", choices=("local", "snowflake"), default="local")
+    parser.add_argument("--connection", help="Snowflake connection name (connections.toml)")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+    parser.add_argument("--dry-run", action="store_true", help="print the plan without applying it")
+    parser.add_argument("--adopt", action="store_true",
+                        help="take existing objects without a deploy record as up to date")
+    args = parser.parse_args(argv)
+
+    if args.target == "snowflake":
+        from snowflake.snowpark import Session
+
+        def connect():
+            builder = Session.builder
+            return (builder.config("connection_name", args.connection) if args.connection else builder).create()
+
+        target = SnowflakeTarget(connect(), session_factory=connect)
+    else:
+        target = LocalTarget()
+    report = deploy(target, args.scripts or DEFAULT_SCRIPTS, workers=args.workers, dry_run=args.dry_run,
+                    adopt=args.adopt)
+    print_report(report)
+    return 0 if report.ok else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,187 @@
+"""
+=============================================================================
+PatientPoint Ad Tech Demo - Local Query Engine
+=============================================================================
+An in-process stand-in for the Snowpark session, backed by SQLite and loaded
+from setup/02_demo_data.sql. It exposes the small part of the Snowpark API
+the app uses (``session.sql(query).collect()`` / ``.to_pandas()`` and the
+Arrow exports ``.to_arrow()`` / ``.to_arrow_batches()``) so that pages, tools
+and benchmarks can run against the curated demo rows without a Snowflake
+connection.
+
+Only the SQL dialect the app actually issues is translated: fully qualified
+``AD_TECH.ANALYTICS.`` names and ``DATEADD(day, n, CURRENT_DATE)``.
+=============================================================================
+"""
+
+from __future__ import annotations
+
+import re
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import date
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence
+
+from .seed import SeedTable, load_seed_tables
+
+# Views the pages were written against that map 1:1 onto the curated tables
+VIEW_ALIASES = {
+    "V_CAMPAIGN_PERFORMANCE": "T_CAMPAIGN_PERFORMANCE",
+    "V_INVENTORY_ANALYTICS": "T_INVENTORY_ANALYTICS",
+    "V_AUDIENCE_INSIGHTS": "T_AUDIENCE_INSIGHTS",
+}
+
+_QUALIFIED_RE = re.compile(r"\bAD_TECH\.(?:ANALYTICS|RAW|CORTEX)\.", re.IGNORECASE)
+_SCHEMA_RE = re.compile(r"\b(?:ANALYTICS|RAW)\.(?=[A-Z_]+\b)", re.IGNORECASE)
+_DATEADD_RE = re.compile(
+    r"DATEADD\(\s*day\s*,\s*(-?\d+)\s*,\s*CURRENT_DATE\s*\)", re.IGNORECASE
+)
+
+_SQLITE_TYPES = {
+    "VARCHAR": "TEXT",
+    "STRING": "TEXT",
+    "TEXT": "TEXT",
+    "DATE": "TEXT",
+    "TIMESTAMP": "TEXT",
+    "TIMESTAMP_NTZ": "TEXT",
+    "INT": "INTEGER",
+    "INTEGER": "INTEGER",
+    "BIGINT": "INTEGER",
+    "BOOLEAN": "INTEGER",
+    "NUMBER": "REAL",
+    "FLOAT": "REAL",
+}
+
+
+def translate_sql(query: str) -> str:
+    """Rewrite the Snowflake-specific bits of ``query`` for SQLite."""
+    query = _QUALIFIED_RE.sub("", query)
+    query = _SCHEMA_RE.sub("", query)
+    return _DATEADD_RE.sub(lambda m: f"date('now', '{int(m.group(1)):+d} days')", query)
+
+
+class LocalDataFrame:
+    """Lazy query result mirroring ``snowflake.snowpark.DataFrame``."""
+
+    def __init__(self, engine: "LocalEngine", query: str, params: Sequence = ()):
+        self._engine = engine
+        self._query = query
+        self._params = tuple(params)
+
+    def collect(self) -> List[sqlite3.Row]:
+        """Rows support ``row['COLUMN']`` lookups, case-insensitively."""
+        return self._engine.execute(self._query, self._params)
+
+    def to_pandas(self):
+        import pandas as pd
+
+        with self._engine._lock:
+            cursor = self._engine.cursor(self._query, self._params)
+            columns = [d[0].upper() for d in cursor.description]
+            rows = cursor.fetchall()
+        return pd.DataFrame.from_records(rows, columns=columns)
+
+    def to_arrow_batches(self, batch_rows: int = 65536) -> Iterator:
+        """
+        Columnar ``pyarrow.RecordBatch`` chunks built straight from the
+        cursor, without materializing Row objects or a pandas frame.
+        """
+        import pyarrow as pa
+
+        lock = self._engine._lock
+        with lock:
+            cursor = self._engine.cursor(self._query, self._params)
+        columns = [d[0].upper() for d in cursor.description]
+        while True:
+            with lock:
+                rows = cursor.fetchmany(batch_rows)
+            if not rows:
+                break
+            yield pa.RecordBatch.from_arrays(
+                [pa.array(values) for values in zip(*rows)], names=columns
+            )
+
+    def to_arrow(self):
+        import pyarrow as pa
+
+        lock = self._engine._lock
+        with lock:
+            cursor = self._engine.cursor(self._query, self._params)
+            columns = [d[0].upper() for d in cursor.description]
+            rows = cursor.fetchall()
+        if not rows:
+            return pa.table({c: pa.array([], pa.null()) for c in columns})
+        return pa.Table.from_arrays([pa.array(values) for values in zip(*rows)], names=columns)
+
+
+class LocalEngine:
+    """
+    SQLite-backed engine loaded with the curated demo tables.
+    Thread-safe: queries are serialized on one in-memory connection.
+    """
+
+    def __init__(self, tables: Optional[Dict[str, SeedTable]] = None,
+                 seed_path: Optional[Path] = None):
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(":memory:", check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self.tables = tables if tables is not None else load_seed_tables(seed_path)
+        for table in self.tables.values():
+            self.load_table(table.name, table.columns, table.rows)
+        for view, table in VIEW_ALIASES.items():
+            if table in self.tables:
+                self._conn.execute(f"CREATE VIEW {view} AS SELECT * FROM {table}")
+
+    # ------------------------------------------------------------------
+    # Snowpark-compatible surface
+    # ------------------------------------------------------------------
+    def sql(self, query: str, params: Sequence = ()) -> LocalDataFrame:
+        return LocalDataFrame(self, query, params)
+
+    # ------------------------------------------------------------------
+    # Direct access
+    # ------------------------------------------------------------------
+    def cursor(self, query: str, params: Sequence = ()) -> sqlite3.Cursor:
+        with self._lock:
+            return self._conn.execute(translate_sql(query), tuple(params))
+
+    def execute(self, query: str, params: Sequence = ()) -> List[sqlite3.Row]:
+        with self._lock:
+            return self._conn.execute(translate_sql(query), tuple(params)).fetchall()
+
+    @contextmanager
+    def transaction(self):
+        """
+        Run a read-check-write sequence without other threads' statements in
+        between (the stand-in for a warehouse transaction).
+        """
+        with self._lock:
+            yield self
+
+    def executescript(self, script: str) -> None:
+        with self._lock:
+            self._conn.executescript(translate_sql(script))
+
+    def load_table(self, name: str, columns, rows: Iterable[Sequence], replace: bool = True) -> None:
+        """Create ``name`` from seed ``Column`` definitions and bulk-insert ``rows``."""
+        ddl = ", ".join(
+            f"{c.name} {_SQLITE_TYPES.get(c.type_name, 'TEXT')}" for c in columns
+        )
+        placeholders = ", ".join("?" for _ in columns)
+        with self._lock:
+            if replace:
+                self._conn.execute(f"DROP TABLE IF EXISTS {name}")
+            self._conn.execute(f"CREATE TABLE IF NOT EXISTS {name} ({ddl})")
+            self._conn.executemany(
+                f"INSERT INTO {name} VALUES ({placeholders})",
+                (tuple(_adapt(v) for v in row) for row in rows),
+            )
+            self._conn.commit()
+
+
+def _adapt(value):
+    if isinstance(value, date):
+        return value.isoformat()
+    return value
@@ -0,0 +1,697 @@
+"""
+=============================================================================
+PatientPoint Ad Tech Demo - Bid Strategy Experiments
+=============================================================================
+A/B tests of bid strategies (BID_STRATEGIES: how a BidRecommendation
+becomes a bid) on live bid traffic, stopped as soon as the data decide:
+
+  assignment : each experiment hashes the unit (slot_id, or request_id)
+               with its own salt into 10,000 buckets split by arm weight,
+               so a unit always sees the same arm and experiments split
+               independently of each other. A bid request joins the most
+               specific running experiment whose scope (specialty,
+               region, daypart) matches it.
+  statistics : per arm, the sufficient statistics of the metric's
+               numerator and denominator (n, sums, squares, cross
+               products) in preallocated numpy arrays - one row per
+               experiment - so logging an outcome is O(1) and a batch of
+               outcomes for any number of experiments is one np.add.at.
+  test       : mSPRT (mixture sequential probability ratio test) of each
+               treatment arm against control on the ratio metric (delta
+               method variance), with a normal mixture of width
+               MIXING_LIFT x the control's value. The test may be checked
+               after every outcome: its p-values and confidence intervals
+               are always valid, however often anyone peeks.
+  decisions  : once every arm has MIN_UNITS outcomes, a treatment arm
+               beating control at ALPHA (Bonferroni across arms) is
+               promoted and takes all traffic; one losing to control is
+               stopped and its traffic returns to control. At MAX_UNITS
+               without a decision the experiment ends inconclusive.
+
+Outcomes are treated as independent. With slot-level assignment that
+holds when the experiment spans many slots; use request_id otherwise.
+Experiments live in T_BID_EXPERIMENTS and outcomes in
+T_BID_EXPERIMENT_OUTCOMES (setup/13_bid_experiments.sql); on start the
+statistics are summed back from the outcome log in SQL, and experiments
+they decide are written back as decided.
+=============================================================================
+"""
+
+from __future__ import annotations
+
+import bisect
+import hashlib
+import math
+import threading
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .bidding import BidRecommendation
+from .data_access import fetch_arrow
+from .metrics import MetricsRegistry, registry
+
+EXPERIMENTS_TABLE = "AD_TECH.ANALYTICS.T_BID_EXPERIMENTS"
+OUTCOMES_TABLE = "AD_TECH.ANALYTICS.T_BID_EXPERIMENT_OUTCOMES"
+ALPHA = 0.05
+MIXING_LIFT = 0.10              # mixture width as a fraction of the control's value
+MIN_UNITS = 500                 # outcomes per arm before any decision
+MAX_UNITS = 200_000             # outcomes per arm before an inconclusive stop
+BUCKETS = 10_000
+FLUSH_ROWS = 5_000              # outcomes buffered before a write to the log
+CHECK_EVERY = 64                # record(): outcomes of one experiment between tests
+
+# metric -> (numerator, denominator) outcome fields
+METRICS = {
+    "roas": ("revenue", "spend"),
+    "win_rate": ("wins", "bids"),
+    "ctr": ("engagements", "impressions"),
+    "revenue": ("revenue", "bids"),
+}
+METRIC_LABELS = {"roas": "ROAS", "win_rate": "Win Rate", "ctr": "CTR", "revenue": "Revenue / Request"}
+
+STATUSES = ("running", "promoted", "stopped", "inconclusive")
+RUNNING, PROMOTED, STOPPED, INCONCLUSIVE = range(4)
+_STATS = ("n", "sx", "sy", "sxx", "syy", "sxy")
+
+
+def _sweet_spot(rec: BidRecommendation, floor_cpm: float) -> Optional[float]:
+    return None if floor_cpm > rec.high_cpm else max(rec.sweet_spot_cpm, floor_cpm)
+
+
+def _shaded(rec: BidRecommendation, floor_cpm: float) -> Optional[float]:
+    return None if floor_cpm > rec.sweet_spot_cpm else max(rec.low_cpm, floor_cpm)
+
+
+def _aggressive(rec: BidRecommendation, floor_cpm: float) -> Optional[float]:
+    return None if floor_cpm > rec.high_cpm else rec.high_cpm
+
+
+# name -> (recommendation, floor) -> CPM bid or None for no bid
+BID_STRATEGIES: Dict[str, Callable[[BidRecommendation, float], Optional[float]]] = {
+    "sweet_spot": _sweet_spot,      # BidRecommender.price(): the current strategy
+    "shaded": _shaded,              # the low end of the recommended range
+    "aggressive": _aggressive,      # the top of the recommended range
+}
+
+EXPERIMENTS_QUERY = f"""
+SELECT experiment_id, name, arms, weights, metric, unit, specialty_name, region, daypart,
+       alpha, status, winner, decided_at
+FROM {EXPERIMENTS_TABLE}
+ORDER BY created_at, experiment_id
+"""
+
+# Sufficient statistics per arm, summed from the outcome log
+STATS_QUERY = f"""
+SELECT experiment_id, arm,
+       COUNT(*) AS n,
+       SUM(numerator) AS sx,
+       SUM(denominator) AS sy,
+       SUM(numerator * numerator) AS sxx,
+       SUM(denominator * denominator) AS syy,
+       SUM(numerator * denominator) AS sxy
+FROM {OUTCOMES_TABLE}
+GROUP BY experiment_id, arm
+"""
+
+INSERT_EXPERIMENT_SQL = (
+    f"INSERT INTO {EXPERIMENTS_TABLE} (experiment_id, name, arms, weights, metric, unit, specialty_name, "
+    "region, daypart, alpha, status) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+)
+INSERT_OUTCOMES_SQL = f"INSERT INTO {OUTCOMES_TABLE} (experiment_id, arm, unit_id, numerator, denominator) VALUES "
+UPDATE_STATUS_SQL = f"UPDATE {EXPERIMENTS_TABLE} SET status = ?, winner = ?, decided_at = ? WHERE experiment_id = ?"
+
+# The LocalEngine has no setup scripts; Snowflake gets the tables from setup/13
+LOCAL_DDL = """
+CREATE TABLE IF NOT EXISTS T_BID_EXPERIMENTS (
+    experiment_id TEXT, name TEXT, arms TEXT, weights TEXT, metric TEXT, unit TEXT,
+    specialty_name TEXT, region TEXT, daypart TEXT, alpha REAL, status TEXT, winner TEXT,
+    decided_at TEXT, created_at TEXT DEFAULT CURRENT_TIMESTAMP
+);
+CREATE TABLE IF NOT EXISTS T_BID_EXPERIMENT_OUTCOMES (
+    experiment_id TEXT, arm INTEGER, unit_id TEXT, numerator REAL, denominator REAL,
+    logged_at TEXT DEFAULT CURRENT_TIMESTAMP
+);
+"""
+
+
+# ============================================================================
+# Experiments and results
+# ============================================================================
+@dataclass(frozen=True)
+class Experiment:
+    """A bid strategy test: ``arms[0]`` is the control."""
+    experiment_id: str
+    name: str
+    arms: Tuple[str, ...]
+    weights: Tuple[float, ...]
+    metric: str = "roas"
+    unit: str = "slot_id"
+    scope: Tuple[Optional[str], Optional[str], Optional[str]] = (None, None, None)
+    alpha: float = ALPHA
+
+    @property
+    def salt(self) -> str:
+        return self.experiment_id
+
+    def scope_label(self) -> str:
+        return " · ".join(v for v in self.scope if v) or "All traffic"
+
+
+@dataclass
+class ArmResult:
+    """One arm of one experiment against its control."""
+    experiment: Experiment
+    arm: int
+    n: int
+    value: float
+    lift: Optional[float] = None            # relative to control
+    ci_low: Optional[float] = None          # always-valid interval on value - control value
+    ci_high: Optional[float] = None
+    p_value: Optional[float] = None         # always-valid
+    state: str = "running"
+
+    @property
+    def strategy(self) -> str:
+        return self.experiment.arms[self.arm]
+
+
+@dataclass
+class Decision:
+    experiment_id: str
+    status: str
+    winner: Optional[str]
+    decided_at: datetime = field(default_factory=datetime.now)
+
+
+def bucket(salt: str, unit_id: str) -> int:
+    """Stable bucket in [0, BUCKETS) of ``unit_id`` for one experiment."""
+    digest = hashlib.blake2b(f"{salt}:{unit_id}".encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big") % BUCKETS
+
+
+# Scope fields kept, most specific first
+_MASKS = sorted(((a, b, c) for a in (1, 0) for b in (1, 0) for c in (1, 0)), key=lambda m: -sum(m))
+
+
+def _scope_keys(specialty: Optional[str], region: Optional[str], daypart: Optional[str]):
+    """Experiment scopes matching a request, most specific first."""
+    return [(specialty if a else None, region if b else None, daypart if c else None) for a, b, c in _MASKS]
+
+
+# ============================================================================
+# Engine
+# ============================================================================
+class ExperimentEngine:
+    """
+    Assignment, outcome statistics and sequential decisions for any number
+    of concurrent experiments. ``persist(experiment)`` stores a new
+    experiment, ``log(rows)`` appends outcome rows and ``decide(decision)``
+    records a status change; any of them may be None.
+    """
+
+    def __init__(self, max_arms: int = 4, capacity: int = 1024, min_units: int = MIN_UNITS,
+                 max_units: int = MAX_UNITS, mixing_lift: float = MIXING_LIFT,
+                 persist: Optional[Callable[[Experiment], None]] = None,
+                 log: Optional[Callable[[List[tuple]], None]] = None,
+                 decide: Optional[Callable[[Decision], None]] = None,
+                 metrics: MetricsRegistry = registry):
+        self.max_arms = max_arms
+        self.min_units = min_units
+        self.max_units = max_units
+        self.mixing_lift = mixing_lift
+        self.persist = persist
+        self.log = log
+        self.on_decision = decide
+        self.metrics = metrics
+        self.experiments: List[Experiment] = []
+        self.index: Dict[str, int] = {}
+        self.by_scope: Dict[Tuple, List[int]] = {}
+        self._bounds: List[List[int]] = []                        # cumulative bucket bounds per experiment
+        self._stats = {name: np.zeros((capacity, max_arms)) for name in _STATS}
+        self._active = np.zeros((capacity, max_arms), dtype=bool)
+        self._arms = np.zeros(capacity, dtype=np.int64)
+        self._status = np.zeros(capacity, dtype=np.int8)
+        self._winner = np.zeros(capacity, dtype=np.int64)
+        self._tau2 = np.full(capacity, np.nan)
+        self._log_alpha = np.zeros(capacity)
+        self._max_log_lr = np.full((capacity, max_arms), -np.inf)   # running max, for the p-values
+        self._pending = np.zeros(capacity, dtype=np.int64)      # outcomes since the last test
+        self._buffer: List[tuple] = []
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.experiments)
+
+    def _grow(self, rows: int) -> None:
+        capacity = len(self._arms)
+        if rows <= capacity:
+            return
+        extra = max(rows, 2 * capacity) - capacity
+
+        def pad(array, fill):
+            shape = (extra,) + array.shape[1:]
+            return np.concatenate([array, np.full(shape, fill, dtype=array.dtype)])
+
+        self._stats = {name: pad(a, 0.0) for name, a in self._stats.items()}
+        self._active = pad(self._active, False)
+        self._arms = pad(self._arms, 0)
+        self._status = pad(self._status, 0)
+        self._winner = pad(self._winner, 0)
+        self._tau2 = pad(self._tau2, np.nan)
+        self._log_alpha = pad(self._log_alpha, 0.0)
+        self._max_log_lr = pad(self._max_log_lr, -np.inf)
+        self._pending = pad(self._pending, 0)
+
+    # ------------------------------------------------------------------
+    # Experiments
+    # ------------------------------------------------------------------
+    def add(self, experiment: Experiment, status: str = "running", winner: Optional[str] = None) -> Experiment:
+        """Register an experiment (new, or loaded with its status)."""
+        arms = len(experiment.arms)
+        if not 2 <= arms <= self.max_arms:
+            raise ValueError(f"experiments need 2 to {self.max_arms} arms")
+        if len(experiment.weights) != arms or min(experiment.weights) <= 0:
+            raise ValueError("one positive weight per arm")
+        if experiment.metric not in METRICS:
+            raise ValueError(f"Unknown metric: {experiment.metric!r}")
+        unknown = set(experiment.arms) - set(BID_STRATEGIES)
+        if unknown:
+            raise ValueError(f"Unknown bid strategies: {sorted(unknown)}")
+        with self._lock:
+            if experiment.experiment_id in self.index:
+                raise ValueError(f"Duplicate experiment: {experiment.experiment_id}")
+            row = len(self.experiments)
+            self._grow(row + 1)
+            weights = np.asarray(experiment.weights, dtype=float)
+            self._bounds.append([int(b) for b in np.round(np.cumsum(weights) / weights.sum() * BUCKETS)])
+            self._active[row, :arms] = True
+            self._arms[row] = arms
+            self._status[row] = STATUSES.index(status)
+            self._winner[row] = experiment.arms.index(winner) if winner in experiment.arms else 0
+            # Bonferroni across the treatment arms
+            self._log_alpha[row] = math.log((arms - 1) / experiment.alpha)
+            self.experiments.append(experiment)
+            self.index[experiment.experiment_id] = row
+            self.by_scope.setdefault(experiment.scope, []).append(row)
+        return experiment
+
+    def create(self, name: str, arms: Sequence[str], weights: Optional[Sequence[float]] = None,
+               metric: str = "roas", unit: str = "slot_id", specialty_name: Optional[str] = None,
+               region: Optional[str] = None, daypart: Optional[str] = None,
+               alpha: float = ALPHA) -> Experiment:
+        """A new running experiment with equal weights unless given."""
+        experiment = Experiment(
+            f"EXP-{uuid.uuid4().hex[:12].upper()}", name, tuple(arms),
+            tuple(float(w) for w in (weights or [1.0] * len(arms))), metric, unit,
+            (specialty_name, region, daypart), alpha,
+        )
+        if self.persist is not None:
+            self.persist(experiment)
+        return self.add(experiment)
+
+    def status(self, experiment_id: str) -> str:
+        return STATUSES[self._status[self.index[experiment_id]]]
+
+    def winner(self, experiment_id: str) -> Optional[str]:
+        row = self.index[experiment_id]
+        return self.experiments[row].arms[self._winner[row]] if self._status[row] == PROMOTED else None
+
+    # ------------------------------------------------------------------
+    # Assignment
+    # ------------------------------------------------------------------
+    def arm(self, experiment_id: str, unit_id: str) -> int:
+        """The arm ``unit_id`` is served: its hashed arm while running, else the decided one."""
+        row = self.index[experiment_id]
+        if self._status[row] != RUNNING:
+            return int(self._winner[row])
+        arm = bisect.bisect_right(self._bounds[row], bucket(self.experiments[row].salt, unit_id))
+        return arm if self._active[row, arm] else 0
+
+    def route(self, specialty: Optional[str], region: Optional[str], daypart: Optional[str],
+              request_id: object, slot_id: str) -> Optional[Tuple[Experiment, int]]:
+        """The experiment a bid request joins and its arm, or None."""
+        for key in _scope_keys(specialty, region, daypart):
+            rows = self.by_scope.get(key)
+            if rows:
+                row = next((r for r in rows if self._status[r] == RUNNING), rows[-1])
+                experiment = self.experiments[row]
+                unit = slot_id if experiment.unit == "slot_id" else str(request_id)
+                return experiment, self.arm(experiment.experiment_id, unit)
+        return None
+
+    # ------------------------------------------------------------------
+    # Outcomes
+    # ------------------------------------------------------------------
+    def record(self, experiment_id: str, arm: int, numerator: float, denominator: float = 1.0,
+               unit_id: Optional[str] = None) -> Optional[Decision]:
+        """
+        Log one outcome: an O(1) statistics update, and a test of this
+        experiment every CHECK_EVERY of its outcomes. The test is valid at
+        any stopping time, so checking every outcome would only decide
+        (at most CHECK_EVERY outcomes) sooner.
+        """
+        row = self.index[experiment_id]
+        x, y = float(numerator), float(denominator)
+        with self._lock:
+            s = self._stats
+            s["n"][row, arm] += 1
+            s["sx"][row, arm] += x
+            s["sy"][row, arm] += y
+            s["sxx"][row, arm] += x * x
+            s["syy"][row, arm] += y * y
+            s["sxy"][row, arm] += x * y
+            if self.log is not None:
+                self._buffer.append((experiment_id, arm, unit_id, x, y))
+            self._pending[row] += 1
+            decisions = []
+            if self._pending[row] >= CHECK_EVERY:
+                self._pending[row] = 0
+                decisions = self._evaluate(np.array([row]))
+        self.metrics.inc("experiments.outcomes")
+        self._after(decisions)
+        return decisions[0] if decisions else None
+
+    def record_batch(self, experiment_ids: Sequence[str], arms: Sequence[int], numerators: Sequence[float],
+                     denominators: Optional[Sequence[float]] = None,
+                     unit_ids: Optional[Sequence[str]] = None) -> List[Decision]:
+        """Log many outcomes across any experiments at once."""
+        rows = np.fromiter((self.index[e] for e in experiment_ids), dtype=np.int64, count=len(experiment_ids))
+        arms = np.asarray(arms, dtype=np.int64)
+        x = np.asarray(numerators, dtype=float)
+        y = np.ones_like(x) if denominators is None else np.asarray(denominators, dtype=float)
+        with self._lock:
+            s = self._stats
+            for name, values in (("n", 1.0), ("sx", x), ("sy", y), ("sxx", x * x), ("syy", y * y),
+                                 ("sxy", x * y)):
+                np.add.at(s[name], (rows, arms), values)
+            if self.log is not None:
+                units = unit_ids if unit_ids is not None else [None] * len(rows)
+                self._buffer.extend(zip(experiment_ids, arms.tolist(), units, x.tolist(), y.tolist()))
+            touched = np.unique(rows)
+            self._pending[touched] = 0
+            decisions = self._evaluate(touched)
+        self.metrics.inc("experiments.outcomes", len(rows))
+        self._after(decisions)
+        return decisions
+
+    def _after(self, decisions: List[Decision]) -> None:
+        for decision in decisions:
+            self.metrics.inc(f"experiments.{decision.status}")
+            if self.on_decision is not None:
+                self.on_decision(decision)
+        if decisions or len(self._buffer) >= FLUSH_ROWS:
+            self.flush()
+
+    def flush(self) -> int:
+        """Write buffered outcomes to the log."""
+        with self._lock:
+            rows, self._buffer = self._buffer, []
+        if rows and self.log is not None:
+            self.log(rows)
+        return len(rows)
+
+    # ------------------------------------------------------------------
+    # Sequential test
+    # ------------------------------------------------------------------
+    def _ratio(self, rows: np.ndarray):
+        """Per arm: n, ratio value and its delta-method variance."""
+        s = {name: a[rows] for name, a in self._stats.items()}
+        n = s["n"]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            mx, my = s["sx"] / n, s["sy"] / n
+            vx = s["sxx"] / n - mx * mx
+            vy = s["syy"] / n - my * my
+            cxy = s["sxy"] / n - mx * my
+            ratio = mx / my
+            var = (vx - 2 * ratio * cxy + ratio * ratio * vy) / (my * my * n)
+        return n, ratio, np.maximum(var, 0.0)
+
+    def _test(self, rows: np.ndarray):
+        """mSPRT log likelihood ratio and always-valid interval half-width, treatment arms vs control."""
+        n, ratio, var = self._ratio(rows)
+        tau2 = self._tau2[rows]
+        # The mixture is fixed once the control has MIN_UNITS outcomes
+        unset = np.isnan(tau2) & (n[:, 0] >= self.min_units) & np.isfinite(ratio[:, 0])
+        tau2[unset] = (self.mixing_lift * np.maximum(np.abs(ratio[unset, 0]), 1e-9)) ** 2
+        self._tau2[rows] = tau2
+        theta = ratio - ratio[:, :1]
+        v = var + var[:, :1]
+        t2 = tau2[:, None]
+        log_alpha = self._log_alpha[rows][:, None]
+        with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+            log_lr = 0.5 * np.log(v / (v + t2)) + theta * theta * t2 / (2 * v * (v + t2))
+            half = np.sqrt(v * (v + t2) / t2 * (np.log((v + t2) / v) + 2 * log_alpha))
+        valid = np.isfinite(log_lr) & (v > 0)
+        log_lr = np.where(valid, log_lr, -np.inf)
+        log_lr[:, 0] = -np.inf
+        return n, ratio, theta, log_lr, np.where(valid, half, np.nan)
+
+    def _evaluate(self, rows: np.ndarray) -> List[Decision]:
+        """Update the running statistics of ``rows`` and decide the ones that are done (lock held)."""
+        rows = rows[self._status[rows] == RUNNING]
+        if not len(rows):
+            return []
+        n, ratio, theta, log_lr, _ = self._test(rows)
+        self._max_log_lr[rows] = np.maximum(self._max_log_lr[rows], log_lr)
+        arms = self._arms[rows]
+        in_use = np.arange(self.max_arms)[None, :] < arms[:, None]
+        active = self._active[rows] & in_use
+        ready = np.where(active, n, np.inf).min(axis=1) >= self.min_units
+        significant = active & (log_lr >= self._log_alpha[rows][:, None]) & ready[:, None]
+        better = significant & (theta > 0)
+        worse = significant & (theta < 0)
+        decisions = []
+        for i in np.flatnonzero(better.any(axis=1) | worse.any(axis=1) |
+                                (np.where(active, n, np.inf).min(axis=1) >= self.max_units)):
+            row = int(rows[i])
+            experiment = self.experiments[row]
+            self._active[row] &= ~worse[i]
+            self._active[row, 0] = True
+            if better[i].any():
+                winner = int(np.argmax(np.where(better[i], theta[i], -np.inf)))
+                status = PROMOTED
+            elif not self._active[row, 1:arms[i]].any():
+                winner, status = 0, STOPPED
+            elif np.where(active[i], n[i], np.inf).min() >= self.max_units:
+                winner, status = 0, INCONCLUSIVE
+            else:
+                continue            # a losing arm was dropped, the others keep running
+            self._status[row] = status
+            self._winner[row] = winner
+            decisions.append(Decision(experiment.experiment_id, STATUSES[status],
+                                      experiment.arms[winner] if status == PROMOTED else None))
+        return decisions
+
+    def results(self, experiment_ids: Optional[Iterable[str]] = None) -> List[ArmResult]:
+        """Every arm of the given (default: all) experiments, with lift, interval and p-value."""
+        with self._lock:
+            rows = np.array([self.index[e] for e in experiment_ids] if experiment_ids is not None
+                            else range(len(self.experiments)), dtype=np.int64)
+            if not len(rows):
+                return []
+            n, ratio, theta, _, half = self._test(rows)
+            max_log_lr = self._max_log_lr[rows]
+            status, winner, active = self._status[rows], self._winner[rows], self._active[rows]
+        out = []
+        for i, row in enumerate(rows):
+            experiment = self.experiments[row]
+            for arm in range(len(experiment.arms)):
+                value = float(ratio[i, arm]) if n[i, arm] else math.nan
+                if status[i] == PROMOTED:
+                    state = "promoted" if arm == winner[i] else "replaced" if arm == 0 else "stopped"
+                elif arm == 0:
+                    state = "control"
+                elif status[i] == RUNNING:
+                    state = "running" if active[i, arm] else "stopped"
+                else:
+                    state = STATUSES[status[i]]
+                result = ArmResult(experiment, arm, int(n[i, arm]), value, state=state)
+                if arm and n[i, 0] and n[i, arm] and np.isfinite(half[i, arm]):
+                    control = float(ratio[i, 0])
+                    result.lift = float(theta[i, arm]) / control if control else None
+                    result.ci_low = float(theta[i, arm] - half[i, arm])
+                    result.ci_high = float(theta[i, arm] + half[i, arm])
+                    result.p_value = float(min(1.0, math.exp(-max_log_lr[i, arm])))
+                out.append(result)
+        return out
+
+    def summary(self) -> Dict[str, int]:
+        """Experiments per status."""
+        with self._lock:
+            counts = np.bincount(self._status[:len(self.experiments)], minlength=len(STATUSES))
+        return {name: int(c) for name, c in zip(STATUSES, counts)}
+
+    # ------------------------------------------------------------------
+    # Loading
+    # ------------------------------------------------------------------
+    def load_stats(self, rows: Iterable[Mapping]) -> List[Decision]:
+        """
+        Sufficient statistics summed from the outcome log (STATS_QUERY rows).
+        Experiments they decide are dispatched like record()'s decisions.
+        """
+        with self._lock:
+            touched = []
+            for r in rows:
+                row = self.index.get(r["experiment_id"])
+                if row is None:
+                    continue
+                for name in _STATS:
+                    self._stats[name][row, int(r["arm"])] = float(r[name] or 0.0)
+                touched.append(row)
+            decisions = self._evaluate(np.unique(np.array(touched, dtype=np.int64))) if touched else []
+        self._after(decisions)
+        return decisions
+
+    @classmethod
+    def from_engine(cls, engine, **kwargs) -> "ExperimentEngine":
+        """Experiments and outcome statistics from ``engine``, logging outcomes and decisions back to it."""
+        if getattr(engine, "connection", None) is None:
+            engine.executescript(LOCAL_DDL)
+
+        def persist(experiment: Experiment) -> None:
+            engine.sql(INSERT_EXPERIMENT_SQL, [
+                experiment.experiment_id, experiment.name, ",".join(experiment.arms),
+                ",".join(f"{w:g}" for w in experiment.weights), experiment.metric, experiment.unit,
+                *experiment.scope, experiment.alpha, "running",
+            ]).collect()
+
+        def log(rows: List[tuple]) -> None:
+            for start in range(0, len(rows), 500):
+                chunk = rows[start:start + 500]
+                values = ", ".join("(?, ?, ?, ?, ?)" for _ in chunk)
+                engine.sql(INSERT_OUTCOMES_SQL + values, [v for r in chunk for v in r]).collect()
+
+        def decide(decision: Decision) -> None:
+            engine.sql(UPDATE_STATUS_SQL, [decision.status, decision.winner,
+                                           decision.decided_at.isoformat(timespec="seconds"),
+                                           decision.experiment_id]).collect()
+
+        kwargs.setdefault("persist", persist)
+        kwargs.setdefault("log", log)
+        kwargs.setdefault("decide", decide)
+        experiments = cls(**kwargs)
+        for r in _lower(fetch_arrow(engine, EXPERIMENTS_QUERY)):
+            experiments.add(Experiment(
+                r["experiment_id"], r["name"], tuple(r["arms"].split(",")),
+                tuple(float(w) for w in r["weights"].split(",")), r["metric"], r["unit"],
+                (r["specialty_name"], r["region"], r["daypart"]), float(r["alpha"] or ALPHA),
+            ), status=r["status"] or "running", winner=r["winner"])
+        experiments.load_stats(_lower(fetch_arrow(engine, STATS_QUERY)))
+        return experiments
+
+
+def _lower(table) -> List[Dict[str, object]]:
+    return table.rename_columns([c.lower() for c in table.column_names]).to_pylist()
+
+
+# ============================================================================
+# Bid path
+# ============================================================================
+def experiment_handler(experiments: ExperimentEngine, recommender) -> Callable:
+    """
+    Replay handler (bid_replay.py) pricing each request with the strategy
+    of its experiment arm, and with BidRecommender.price() outside any
+    experiment. Request counts are kept in ``handler.routed``.
+    """
+    price = recommender.price
+    routed = {"requests": 0, "in_experiment": 0}
+
+    def handler(req):
+        routed["requests"] += 1
+        found = experiments.route(req.specialty_name, req.region, req.daypart, req.request_id, req.slot_id)
+        if found is None:
+            return price(req.specialty_name, req.region, req.daypart, req.floor_cpm)
+        experiment, arm = found
+        routed["in_experiment"] += 1
+        rec = recommender.recommend(req.specialty_name, req.region, req.daypart)
+        return None if rec is None else BID_STRATEGIES[experiment.arms[arm]](rec, req.floor_cpm)
+
+    handler.routed = routed
+    return handler
+
+
+# ============================================================================
+# Demo traffic
+# ============================================================================
+ENGAGEMENT_VALUE = 6.0          # revenue per engagement in the simulated auctions
+IMPRESSIONS_PER_REQUEST = 1000  # each simulated request auctions one CPM block
+CLEARING_SPREAD = 0.25          # lognormal sigma of the clearing price around avg_winning_cpm
+
+DEMO_REQUESTS = 20_000          # simulated requests per demo experiment
+DEMO_SLOTS_QUERY = """
+SELECT slot_id, specialty_name, region, daypart, base_cpm, avg_winning_cpm, engagement_rate_pct
+FROM AD_TECH.ANALYTICS.T_INVENTORY_ANALYTICS
+"""
+DEMO_EXPERIMENTS = (
+    ("Shaded bids vs sweet spot (Cardiology)", ("sweet_spot", "shaded"), "Cardiology", None),
+    ("Aggressive bids vs sweet spot (Oncology)", ("sweet_spot", "aggressive"), "Oncology", None),
+    ("Three-way bid test (network)", ("sweet_spot", "shaded", "aggressive"), None, None),
+)
+
+
+def simulate_outcomes(bids: np.ndarray, slots: Sequence[Mapping], rng: np.random.Generator) -> Dict[str, np.ndarray]:
+    """
+    Second-price auctions for one CPM block each: a clearing price around
+    the slot's avg_winning_cpm, won when the bid reaches it, paid at the
+    clearing price; engagements at the slot's engagement rate.
+    """
+    winning = np.array([float(s["avg_winning_cpm"]) for s in slots])
+    rate = np.array([float(s["engagement_rate_pct"]) / 100.0 for s in slots])
+    clearing = winning * rng.lognormal(0.0, CLEARING_SPREAD, len(bids))
+    won = np.nan_to_num(bids, nan=0.0) >= clearing
+    engagements = np.where(won, rng.binomial(IMPRESSIONS_PER_REQUEST, rate), 0)
+    return {
+        "bids": np.ones(len(bids)),
+        "wins": won.astype(float),
+        "spend": np.where(won, clearing, 0.0),
+        "impressions": won * float(IMPRESSIONS_PER_REQUEST),
+        "engagements": engagements.astype(float),
+        "revenue": engagements * ENGAGEMENT_VALUE,
+    }
+
+
+def run_demo_traffic(experiments: ExperimentEngine, recommender, slots: Sequence[Mapping], requests: int,
+                     seed: int = 7, batch: int = 2_000) -> int:
+    """Feed ``requests`` simulated bid requests (per experiment scope) through every running experiment."""
+    rng = np.random.default_rng(seed)
+    logged = 0
+    for experiment in list(experiments.experiments):
+        specialty, region, daypart = experiment.scope
+        pool = [s for s in slots if (specialty is None or s["specialty_name"] == specialty)
+                and (region is None or s["region"] == region) and (daypart is None or s["daypart"] == daypart)]
+        if not pool:
+            continue
+        numerator, denominator = METRICS[experiment.metric]
+        for start in range(0, requests, batch):
+            if experiments.status(experiment.experiment_id) != "running":
+                break
+            size = min(batch, requests - start)
+            picked = [pool[i] for i in rng.integers(0, len(pool), size)]
+            ids = [f"{experiment.experiment_id}-{start + i}" for i in range(size)]
+            arms = [experiments.arm(experiment.experiment_id, s["slot_id"] if experiment.unit == "slot_id" else r)
+                    for s, r in zip(picked, ids)]
+            bids = np.full(size, np.nan)
+            for i, (s, arm) in enumerate(zip(picked, arms)):
+                rec = recommender.recommend(s["specialty_name"], s["region"], s["daypart"])
+                bid = None if rec is None else BID_STRATEGIES[experiment.arms[arm]](rec, float(s["base_cpm"]) * 0.5)
+                bids[i] = np.nan if bid is None else bid
+            outcome = simulate_outcomes(bids, picked, rng)
+            experiments.record_batch([experiment.experiment_id] * size, arms, outcome[numerator],
+                                     outcome[denominator], ids)
+            logged += size
+    experiments.flush()
+    return logged
+
+
+def seed_demo_experiments(experiments: ExperimentEngine, engine, requests: int = DEMO_REQUESTS) -> int:
+    """Create DEMO_EXPERIMENTS and run simulated traffic through them (local demo data only)."""
+    from .bidding import BidRecommender
+
+    for name, arms, specialty, region in DEMO_EXPERIMENTS:
+        experiments.create(name, arms, unit="request_id", specialty_name=specialty, region=region)
+    slots = _lower(fetch_arrow(engine, DEMO_SLOTS_QUERY))
+    return run_demo_traffic(experiments, BidRecommender.from_session(engine), slots, requests)
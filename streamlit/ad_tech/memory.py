@@ -0,0 +1,325 @@
+"""
+=============================================================================
+PatientPoint Ad Tech Demo - Conversation Memory
+=============================================================================
+Keeps chat threads bounded as they grow to hundreds of turns:
+
+- a rolling window of recent turns (by turn count and token count)
+- an incrementally updated summary of the turns that fell out of the window;
+  each compaction only summarizes the newly evicted turns
+- build_prompt() packs summary + window + question into the agent's token
+  budget, so prompt size stays flat however long the thread gets
+- ThreadStore persists threads as append-only gzip JSON lines plus a small
+  metadata file; saving writes only the turns added since the last save.
+  Threads are stored per owner, so listing reads only the viewer's own
+  threads and one viewer never sees another's
+- visible() returns the tail the page should render
+
+Token counts use agent.estimate_tokens and are computed once per turn.
+=============================================================================
+"""
+
+from __future__ import annotations
+
+import gzip
+import hashlib
+import json
+import os
+import re
+import tempfile
+import time
+import uuid
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional
+
+from .agent import BUDGET_TOKENS, estimate_tokens
+
+WINDOW_TURNS = 12
+WINDOW_TOKENS = 6000
+SUMMARY_TOKENS = 1500
+RESPONSE_RESERVE_TOKENS = 4000
+
+DEFAULT_THREAD_DIR = Path(tempfile.gettempdir()) / "ad_tech_threads"
+
+_ROLE_CODES = {"user": "u", "assistant": "a"}
+_CODE_ROLES = {v: k for k, v in _ROLE_CODES.items()}
+
+
+@dataclass
+class Turn:
+    """One chat message with its token count."""
+
+    role: str
+    content: str
+    tokens: int = -1
+    ts: float = field(default_factory=time.time)
+
+    def __post_init__(self):
+        if self.tokens < 0:
+            self.tokens = estimate_tokens(self.content)
+
+    def to_record(self) -> Dict[str, object]:
+        return {"r": _ROLE_CODES.get(self.role, self.role), "c": self.content,
+                "n": self.tokens, "t": round(self.ts, 3)}
+
+    @classmethod
+    def from_record(cls, record: Dict[str, object]) -> "Turn":
+        return cls(_CODE_ROLES.get(record["r"], record["r"]), record["c"],
+                   record.get("n", -1), record.get("t", 0.0))
+
+
+# =============================================================================
+# Summaries
+# =============================================================================
+
+# summarizer(previous_summary, newly_evicted_turns) -> updated summary
+Summarizer = Callable[[str, List[Turn]], str]
+
+_MARKDOWN = re.compile(r"[#*_`>|]+")
+
+
+def _first_sentence(text: str, limit: int) -> str:
+    for line in text.splitlines():
+        line = _MARKDOWN.sub("", line).strip()
+        if len(line) > 3 and not set(line) <= set("-: "):
+            return line if len(line) <= limit else line[: limit - 1] + "…"
+    return ""
+
+
+def extractive_summary(previous: str, turns: List[Turn], max_tokens: int = SUMMARY_TOKENS) -> str:
+    """
+    Cheap deterministic summary: one line per question and the headline of
+    each answer. The oldest lines are dropped once ``max_tokens`` is hit.
+    """
+    lines = previous.splitlines() if previous else []
+    for turn in turns:
+        if turn.role == "user":
+            lines.append(f"- Q: {_first_sentence(turn.content, 160)}")
+        else:
+            headline = _first_sentence(turn.content, 200)
+            if headline:
+                lines.append(f"  A: {headline}")
+
+    total = sum(estimate_tokens(line) + 1 for line in lines)
+    start = 0
+    while total > max_tokens and start < len(lines):
+        total -= estimate_tokens(lines[start]) + 1
+        start += 1
+    return "\n".join(lines[start:])
+
+
+# =============================================================================
+# Conversation memory
+# =============================================================================
+class ConversationMemory:
+    """Full turn log plus a bounded window and running summary."""
+
+    def __init__(
+        self,
+        thread_id: Optional[str] = None,
+        window_turns: int = WINDOW_TURNS,
+        window_tokens: int = WINDOW_TOKENS,
+        summarizer: Optional[Summarizer] = None,
+        owner: Optional[str] = None,
+    ):
+        self.thread_id = thread_id or uuid.uuid4().hex[:12]
+        self.owner = owner            # ThreadStore lists and loads by owner
+        self.window_turns = window_turns
+        self.window_tokens = window_tokens
+        self.summarizer = summarizer or extractive_summary
+        self.turns: List[Turn] = []
+        self.summary = ""
+        self.summarized_upto = 0      # turns[:summarized_upto] are in the summary
+        self.window_token_count = 0
+        self.persisted = 0            # turns[:persisted] are on disk
+        self.created_at = time.time()
+
+    def __len__(self) -> int:
+        return len(self.turns)
+
+    @property
+    def title(self) -> str:
+        for turn in self.turns:
+            if turn.role == "user":
+                return _first_sentence(turn.content, 60)
+        return "New conversation"
+
+    def add(self, role: str, content: str) -> Turn:
+        turn = Turn(role, content)
+        self.turns.append(turn)
+        self.window_token_count += turn.tokens
+        self._compact()
+        return turn
+
+    def _compact(self) -> None:
+        """Fold the oldest window turns into the summary until the window fits."""
+        start = self.summarized_upto
+        end = len(self.turns)
+        evict = start
+        tokens = self.window_token_count
+        while end - evict > 2 and (end - evict > self.window_turns or tokens > self.window_tokens):
+            tokens -= self.turns[evict].tokens
+            evict += 1
+        if evict > start:
+            self.summary = self.summarizer(self.summary, self.turns[start:evict])
+            self.summarized_upto = evict
+            self.window_token_count = tokens
+
+    @property
+    def window(self) -> List[Turn]:
+        return self.turns[self.summarized_upto:]
+
+    def visible(self, count: int) -> List[Turn]:
+        """The last ``count`` turns; the page renders only these."""
+        return self.turns[-count:] if count > 0 else []
+
+    def context_tokens(self) -> int:
+        return estimate_tokens(self.summary) + self.window_token_count
+
+    def build_prompt(
+        self,
+        question: str,
+        budget_tokens: int = BUDGET_TOKENS,
+        reserve_tokens: int = RESPONSE_RESERVE_TOKENS,
+    ) -> str:
+        """
+        Summary, recent turns and ``question`` packed into the token budget.
+        Window turns that do not fit are dropped oldest-first; the summary
+        and question always go in.
+        """
+        available = budget_tokens - reserve_tokens - estimate_tokens(question) - estimate_tokens(self.summary)
+        recent: List[str] = []
+        for turn in reversed(self.window):
+            if turn.tokens + 4 > available:
+                break
+            available -= turn.tokens + 4
+            recent.append(f"{turn.role.upper()}: {turn.content}")
+        recent.reverse()
+
+        parts = []
+        if self.summary:
+            parts.append("Summary of earlier conversation:\n" + self.summary)
+        if recent:
+            parts.append("Recent conversation:\n" + "\n\n".join(recent))
+        parts.append("Current question: " + question)
+        return "\n\n".join(parts)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "turns": len(self.turns),
+            "window_turns": len(self.turns) - self.summarized_upto,
+            "summarized_turns": self.summarized_upto,
+            "context_tokens": self.context_tokens(),
+            "total_tokens": sum(t.tokens for t in self.turns),
+        }
+
+    # ------------------------------------------------------------------
+    # Serialization (used by ThreadStore)
+    # ------------------------------------------------------------------
+    def meta(self) -> Dict[str, object]:
+        return {
+            "thread_id": self.thread_id,
+            "owner": self.owner,
+            "title": self.title,
+            "created_at": self.created_at,
+            "updated_at": self.turns[-1].ts if self.turns else self.created_at,
+            "turns": len(self.turns),
+            "summary": self.summary,
+            "summarized_upto": self.summarized_upto,
+        }
+
+    @classmethod
+    def restore(cls, meta: Dict[str, object], turns: Iterable[Turn], **kwargs) -> "ConversationMemory":
+        memory = cls(thread_id=meta["thread_id"], owner=meta.get("owner"), **kwargs)
+        memory.turns = list(turns)
+        memory.created_at = meta.get("created_at", memory.created_at)
+        memory.summarized_upto = min(int(meta.get("summarized_upto", 0)), len(memory.turns))
+        memory.summary = meta.get("summary", "")
+        memory.window_token_count = sum(t.tokens for t in memory.window)
+        memory.persisted = len(memory.turns)
+        memory._compact()
+        return memory
+
+
+# =============================================================================
+# On-disk thread store
+# =============================================================================
+class ThreadStore:
+    """
+    One ``<thread_id>.jsonl.gz`` per thread (each save appends a gzip member
+    holding only the new turns) and a ``<thread_id>.meta.json`` sidecar with
+    the title, counts, owner and current summary, in a directory per owner
+    (named by a hash of the owner, which may be an email address). Threads
+    without an owner are never listed or loaded.
+    """
+
+    def __init__(self, root: Optional[os.PathLike] = None):
+        self.root = Path(root) if root else DEFAULT_THREAD_DIR
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def _owner_dir(self, owner: Optional[str]) -> Path:
+        name = hashlib.sha256(owner.encode("utf-8")).hexdigest()[:32] if owner else "unowned"
+        return self.root / name
+
+    def _turns_path(self, thread_id: str, owner: Optional[str]) -> Path:
+        return self._owner_dir(owner) / f"{thread_id}.jsonl.gz"
+
+    def _meta_path(self, thread_id: str, owner: Optional[str]) -> Path:
+        return self._owner_dir(owner) / f"{thread_id}.meta.json"
+
+    def save(self, memory: ConversationMemory) -> int:
+        """Append unsaved turns; returns how many were written."""
+        new = memory.turns[memory.persisted:]
+        self._owner_dir(memory.owner).mkdir(exist_ok=True)
+        if new:
+            payload = "".join(
+                json.dumps(t.to_record(), separators=(",", ":"), ensure_ascii=False) + "\n" for t in new
+            )
+            with open(self._turns_path(memory.thread_id, memory.owner), "ab") as f:
+                f.write(gzip.compress(payload.encode("utf-8"), compresslevel=6))
+            memory.persisted = len(memory.turns)
+        meta_path = self._meta_path(memory.thread_id, memory.owner)
+        tmp = meta_path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(memory.meta(), ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp, meta_path)
+        return len(new)
+
+    def load(self, thread_id: str, owner: str, **kwargs) -> Optional[ConversationMemory]:
+        """The thread, or None if it does not exist or belongs to someone else."""
+        if not owner:
+            return None
+        meta_path = self._meta_path(thread_id, owner)
+        if not meta_path.exists():
+            return None
+        meta = json.loads(meta_path.read_text(encoding="utf-8"))
+        if meta.get("owner") != owner:
+            return None
+        turns: List[Turn] = []
+        path = self._turns_path(thread_id, owner)
+        if path.exists():
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                turns = [Turn.from_record(json.loads(line)) for line in f if line.strip()]
+        return ConversationMemory.restore(meta, turns, **kwargs)
+
+    def list_threads(self, owner: str, limit: int = 20) -> List[Dict[str, object]]:
+        """``owner``'s thread metadata (without summaries), most recently updated first."""
+        threads = []
+        if not owner:
+            return threads
+        for path in self._owner_dir(owner).glob("*.meta.json"):
+            try:
+                meta = json.loads(path.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                continue
+            if meta.get("owner") != owner:
+                continue
+            meta.pop("summary", None)
+            threads.append(meta)
+        threads.sort(key=lambda m: m.get("updated_at", 0), reverse=True)
+        return threads[:limit]
+
+    def delete(self, thread_id: str, owner: str) -> None:
+        for path in (self._turns_path(thread_id, owner), self._meta_path(thread_id, owner)):
+            if path.exists():
+                path.unlink()
@@ -0,0 +1,152 @@
+"""
+=============================================================================
+PatientPoint Ad Tech Demo - Metrics Primitives
+=============================================================================
+Lightweight, dependency-free counters and latency histograms used by the
+load tools and the app's instrumentation.
+
+LatencyHistogram uses fixed log-spaced buckets (~5% relative error), so
+recording is O(log buckets), memory is constant and histograms from
+different workers can be merged by adding bucket counts.
+
+``registry`` is the process-wide MetricsRegistry the app reports into
+(counters, float totals and named latency histograms).
+=============================================================================
+"""
+
+from __future__ import annotations
+
+import bisect
+import math
+import threading
+from typing import Dict, Iterable, List, Optional
+
+# Bucket upper bounds in microseconds: 1 us .. ~120 s, ratio 1.05
+_MIN_US = 1.0
+_RATIO = 1.05
+_BOUNDS: List[float] = []
+_b = _MIN_US
+while _b < 120_000_000:
+    _BOUNDS.append(_b)
+    _b *= _RATIO
+_BOUNDS.append(math.inf)
+
+
+class LatencyHistogram:
+    """Mergeable latency histogram; values are recorded in seconds."""
+
+    __slots__ = ("counts", "count", "total", "min", "max")
+
+    def __init__(self):
+        self.counts = [0] * len(_BOUNDS)
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = 0.0
+
+    def record(self, seconds: float) -> None:
+        us = seconds * 1e6
+        self.counts[bisect.bisect_left(_BOUNDS, us)] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds < self.min:
+            self.min = seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def merge(self, other: "LatencyHistogram") -> "LatencyHistogram":
+        for i, c in enumerate(other.counts):
+            if c:
+                self.counts[i] += c
+        self.count += other.count
+        self.total += other.total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def percentile(self, pct: float) -> float:
+        """Approximate percentile in seconds (bucket upper bound, clamped to max)."""
+        if not self.count:
+            return 0.0
+        rank = max(1, math.ceil(self.count * pct / 100.0))
+        seen = 0
+        for i, c in enumerate(self.counts):
+            seen += c
+            if seen >= rank:
+                return min(_BOUNDS[i] / 1e6, self.max)
+        return self.max
+
+    def summary(self, percentiles: Iterable[float] = (50, 90, 99, 99.9)) -> Dict[str, float]:
+        """Milliseconds, keyed ``p50`` / ``p99.9`` / ``mean`` / ``max``."""
+        out = {"count": self.count, "mean_ms": self.mean * 1e3,
+               "max_ms": self.max * 1e3 if self.count else 0.0}
+        for p in percentiles:
+            out[f"p{p:g}_ms"] = self.percentile(p) * 1e3
+        return out
+
+    def buckets(self, min_count: int = 1) -> List[tuple]:
+        """Non-empty buckets as ``(upper_bound_ms, count)`` pairs."""
+        return [(_BOUNDS[i] / 1e3, c) for i, c in enumerate(self.counts) if c >= min_count]
+
+
+class Counter:
+    """Named monotonically increasing counters."""
+
+    def __init__(self, initial: Optional[Dict[str, int]] = None):
+        self.values: Dict[str, int] = dict(initial or {})
+
+    def inc(self, name: str, amount: int = 1) -> None:
+        self.values[name] = self.values.get(name, 0) + amount
+
+    def get(self, name: str) -> int:
+        return self.values.get(name, 0)
+
+    def __repr__(self) -> str:
+        return f"Counter({self.values!r})"
+
+
+class MetricsRegistry:
+    """Thread-safe named counters, float totals and latency histograms."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters = Counter()
+        self.totals: Dict[str, float] = {}
+        self.histograms: Dict[str, LatencyHistogram] = {}
+
+    def inc(self, name: str, amount: int = 1) -> None:
+        with self._lock:
+            self.counters.inc(name, amount)
+
+    def add(self, name: str, value: float) -> None:
+        with self._lock:
+            self.totals[name] = self.totals.get(name, 0.0) + value
+
+    def observe(self, name: str, seconds: float) -> None:
+        with self._lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = LatencyHistogram()
+            histogram.record(seconds)
+
+    def get(self, name: str) -> float:
+        with self._lock:
+            if name in self.totals:
+                return self.totals[name]
+            return self.counters.get(name)
+
+    def snapshot(self, prefix: str = "") -> Dict[str, object]:
+        """Everything whose name starts with ``prefix``, histograms summarized."""
+        with self._lock:
+            return {
+                "counters": {k: v for k, v in self.counters.values.items() if k.startswith(prefix)},
+                "totals": {k: v for k, v in self.totals.items() if k.startswith(prefix)},
+                "histograms": {k: h.summary() for k, h in self.histograms.items() if k.startswith(prefix)},
+            }
+
+
+registry = MetricsRegistry()
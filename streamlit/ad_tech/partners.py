@@ -0,0 +1,174 @@
+"""
+=============================================================================
+PatientPoint Ad Tech Demo - Partner Dashboards
+=============================================================================
+A pharma partner's dashboard reads only that partner's rows of the
+partner-scoped tables (setup/12_partner_views.sql), which are clustered by
+partner_id:
+
+- resolve_partner()    : the logged-in user's partner_id from
+                         T_PARTNER_USERS, or None for internal users
+- partner_directory()  : every partner with campaigns (internal view)
+- PartnerScope         : kpis(), campaigns() and daily() for one partner
+
+Every PartnerScope query filters on ``partner_id = ?``, which prunes to
+the partner's micro-partitions in Snowflake. It goes through query_arrow()
+in the partner's tenant namespace (``partner:<id>``). The result cache then
+reports hit rate and latency per partner, and invalidate() drops only that
+partner's entries.
+
+On the local engine, load_local_partner_tables() builds the same tables
+as SQLite WITHOUT ROWID tables whose primary key starts with partner_id,
+so each partner's rows are stored together, as clustering does.
+=============================================================================
+"""
+
+from __future__ import annotations
+
+from datetime import date
+from typing import Dict, Hashable, List, Optional
+
+import pyarrow as pa
+
+from .data_access import ArrowResultCache, fetch_arrow, first_row, query_arrow, result_cache
+
+PARTNER_CAMPAIGNS_TABLE = "AD_TECH.ANALYTICS.T_PARTNER_CAMPAIGNS"
+PARTNER_DAILY_TABLE = "AD_TECH.ANALYTICS.T_PARTNER_DAILY"
+
+USER_QUERY = """
+SELECT partner_id
+FROM AD_TECH.ANALYTICS.T_PARTNER_USERS
+WHERE user_name = CURRENT_USER()
+"""
+DIRECTORY_QUERY = f"""
+SELECT partner_id, partner_name, partner_tier, COUNT(*) AS campaigns
+FROM {PARTNER_CAMPAIGNS_TABLE}
+GROUP BY partner_id, partner_name, partner_tier
+ORDER BY partner_name
+"""
+KPI_QUERY = f"""
+SELECT
+    MAX(partner_name) AS partner_name,
+    COUNT(*) AS campaigns,
+    SUM(CASE WHEN status = 'Active' THEN 1 ELSE 0 END) AS active_campaigns,
+    SUM(total_impressions) AS impressions,
+    SUM(total_revenue) AS revenue,
+    SUM(total_spend) AS spend,
+    ROUND(SUM(total_revenue) / NULLIF(SUM(total_spend), 0), 2) AS roas,
+    ROUND(100.0 * SUM(winning_bids) / NULLIF(SUM(total_bids), 0), 1) AS win_rate_pct
+FROM {PARTNER_CAMPAIGNS_TABLE}
+WHERE partner_id = ?
+"""
+CAMPAIGNS_QUERY = f"""
+SELECT campaign_name, drug_name, therapeutic_area, status,
+       total_impressions, total_revenue, ROUND(roas, 2) AS roas
+FROM {PARTNER_CAMPAIGNS_TABLE}
+WHERE partner_id = ?
+ORDER BY total_revenue DESC
+"""
+DAILY_QUERY = f"""
+SELECT date_day, SUM(impressions) AS impressions, SUM(revenue) AS revenue, SUM(spend) AS spend
+FROM {PARTNER_DAILY_TABLE}
+WHERE partner_id = ? AND date_day >= ? AND date_day <= ?
+GROUP BY date_day
+ORDER BY date_day
+"""
+
+_MEASURES = ("total_bids", "winning_bids", "impressions", "engagements", "conversions", "revenue", "spend")
+
+LOCAL_DDL = f"""
+DROP TABLE IF EXISTS T_PARTNER_CAMPAIGNS;
+CREATE TABLE T_PARTNER_CAMPAIGNS (
+    partner_id INTEGER, partner_name TEXT, partner_tier TEXT,
+    campaign_id TEXT, campaign_name TEXT, drug_name TEXT, therapeutic_area TEXT, campaign_type TEXT, status TEXT,
+    start_date TEXT, end_date TEXT, budget REAL,
+    total_bids INTEGER, winning_bids INTEGER, total_impressions INTEGER, total_engagements INTEGER,
+    total_conversions INTEGER, total_revenue REAL, total_spend REAL, roas REAL,
+    PRIMARY KEY (partner_id, campaign_id)
+) WITHOUT ROWID;
+INSERT INTO T_PARTNER_CAMPAIGNS
+SELECT partner_id, partner_name, partner_tier,
+       campaign_id, campaign_name, drug_name, therapeutic_area, campaign_type, status,
+       start_date, end_date, budget,
+       total_bids, winning_bids, total_impressions, total_engagements,
+       total_conversions, total_revenue, total_spend, roas
+FROM T_CAMPAIGN_PERFORMANCE;
+
+DROP TABLE IF EXISTS T_PARTNER_DAILY;
+CREATE TABLE T_PARTNER_DAILY (
+    partner_id INTEGER, date_day TEXT, campaign_id TEXT,
+    total_bids INTEGER, winning_bids INTEGER, impressions INTEGER, engagements INTEGER,
+    conversions INTEGER, revenue REAL, spend REAL,
+    PRIMARY KEY (partner_id, date_day, campaign_id)
+) WITHOUT ROWID;
+INSERT INTO T_PARTNER_DAILY
+SELECT partner_id, date_day, campaign_id, {", ".join(f"SUM({m})" for m in _MEASURES)}
+FROM T_CAMPAIGN_DAILY
+GROUP BY partner_id, date_day, campaign_id;
+"""
+
+
+def load_local_partner_tables(engine) -> None:
+    """Rebuild T_PARTNER_CAMPAIGNS / T_PARTNER_DAILY from the shared tables on the local engine."""
+    engine.executescript(LOCAL_DDL)
+
+
+def _lower(table) -> List[Dict[str, object]]:
+    return table.rename_columns([c.lower() for c in table.column_names]).to_pylist()
+
+
+def resolve_partner(engine) -> Optional[int]:
+    """The current Snowflake user's partner_id; None for internal users and locally."""
+    if getattr(engine, "connection", None) is None:
+        return None
+    try:
+        row = first_row(fetch_arrow(engine, USER_QUERY))    # per user: never through the shared cache
+    except Exception:
+        return None    # 12_partner_views.sql not run: nobody is a partner
+    if row is None:
+        return None
+    return int({k.lower(): v for k, v in row.items()}["partner_id"])
+
+
+def partner_directory(engine) -> List[Dict[str, object]]:
+    """``partner_id``, ``partner_name``, ``partner_tier`` and ``campaigns`` per partner."""
+    return _lower(query_arrow(engine, DIRECTORY_QUERY))
+
+
+class PartnerScope:
+    """One partner's dashboard queries, cached in its own tenant namespace."""
+
+    def __init__(self, engine, partner_id: int, cache: Optional[ArrowResultCache] = None,
+                 ttl: Optional[float] = None):
+        self.engine = engine
+        self.partner_id = int(partner_id)
+        self.cache = cache or result_cache()
+        self.ttl = ttl
+
+    @property
+    def tenant(self) -> Hashable:
+        return f"partner:{self.partner_id}"
+
+    def _query(self, sql: str, *params) -> pa.Table:
+        return query_arrow(self.engine, sql, [self.partner_id, *params], ttl=self.ttl, cache=self.cache,
+                           tenant=self.tenant)
+
+    def kpis(self) -> Optional[Dict[str, object]]:
+        """Headline totals across the partner's campaigns (lower-case keys)."""
+        row = first_row(self._query(KPI_QUERY))
+        kpis = {k.lower(): v for k, v in (row or {}).items()}
+        return kpis if kpis.get("campaigns") else None
+
+    def campaigns(self) -> pa.Table:
+        return self._query(CAMPAIGNS_QUERY)
+
+    def daily(self, start: date, end: date) -> pa.Table:
+        """Impressions, revenue and spend per day in ``start``..``end`` (inclusive)."""
+        return self._query(DAILY_QUERY, start.isoformat(), end.isoformat())
+
+    def stats(self) -> Dict[str, float]:
+        """This partner's cache entries, hit rate and latency (see ArrowResultCache.tenant_stats)."""
+        return self.cache.tenant_stats().get(self.tenant, {})
+
+    def invalidate(self) -> None:
+        self.cache.clear(self.tenant)
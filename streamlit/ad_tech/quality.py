@@ -0,0 +1,744 @@
+"""
+=============================================================================
+PatientPoint Ad Tech Demo - Data Quality Checks
+=============================================================================
+Checks the metric invariants promised in the header of
+setup/02_demo_data.sql (ROAS = revenue / spend, CTR = engagements /
+impressions x 100, conversion rate = conversions / engagements x 100,
+inventory revenue = impressions x CPM / 1000) and the key, reference and
+range constraints of the analytics tables, on every row.
+
+Rules are data (RULES). A row rule's predicate is written once with Col /
+Lit expressions and can be evaluated two ways:
+
+  vectorized : the table streams in as Arrow batches. Predicates run as
+               numpy over whole columns, reference checks as an Arrow
+               is_in against the parent keys, and unique keys are compared
+               row to row over the key-ordered scan, so memory stays at one
+               batch.
+  pushdown   : one set-based query per table counts every rule's
+               violations in a single scan (unique keys with a GROUP BY).
+               Samples are fetched only for rules that failed.
+
+Predicates follow SQL semantics in both modes: a NULL operand (or a zero
+divisor) makes the result unknown, and unknown passes.
+
+Partitioned tables (T_CAMPAIGN_DAILY by date_day) can be checked
+incrementally. QualityMonitor.poll() checks only partitions newer than the
+last complete one it checked; today's partition is still being loaded, so
+it is checked again on every poll. Every rule on them is partition-local
+(the unique key includes date_day).
+
+Usage (from the streamlit/ directory):
+    python -m ad_tech.quality
+    python -m ad_tech.quality --mode pushdown --json
+=============================================================================
+"""
+
+from __future__ import annotations
+
+import abc
+import argparse
+import json
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from .data_access import fetch_arrow, iter_arrow_batches
+
+MAX_SAMPLES = 5
+REL_TOLERANCE = 0.01     # stored ratios are rounded (some percentages to whole numbers)
+ABS_TOLERANCE = 0.005    # half a unit in the second decimal
+_EPOCH = date(1970, 1, 1)
+
+TABLE_PREFIX = "AD_TECH.ANALYTICS."
+TABLE_KEYS = {
+    "T_CAMPAIGN_PERFORMANCE": ("campaign_id",),
+    "T_INVENTORY_ANALYTICS": ("slot_id",),
+    "T_AUDIENCE_INSIGHTS": ("cohort_id",),
+    "T_CAMPAIGN_DAILY": ("date_day", "campaign_id", "slot_id"),
+}
+PARTITION_COLUMNS = {"T_CAMPAIGN_DAILY": "date_day"}
+
+
+# =============================================================================
+# Expressions
+# =============================================================================
+
+def _unknown(*arrays: np.ndarray) -> np.ndarray:
+    mask = np.isnan(arrays[0])
+    for array in arrays[1:]:
+        mask |= np.isnan(array)
+    return mask
+
+
+class Expr(abc.ABC):
+    """
+    A numeric or boolean expression over table columns. eval() returns
+    float64 arrays: NaN is NULL, and predicates are 1.0 / 0.0 / NaN.
+    """
+
+    @abc.abstractmethod
+    def columns(self) -> Dict[str, str]:
+        """Column name -> kind ("number", "date" or "any") read by the expression."""
+
+    @abc.abstractmethod
+    def sql(self) -> str:
+        ...
+
+    @abc.abstractmethod
+    def eval(self, values: Dict[str, np.ndarray]) -> np.ndarray:
+        ...
+
+    def __add__(self, other):
+        return Binary("+", self, _expr(other))
+
+    def __sub__(self, other):
+        return Binary("-", self, _expr(other))
+
+    def __mul__(self, other):
+        return Binary("*", self, _expr(other))
+
+    def __truediv__(self, other):
+        return Binary("/", self, _expr(other))
+
+    def __lt__(self, other):
+        return Compare("<", self, _expr(other))
+
+    def __le__(self, other):
+        return Compare("<=", self, _expr(other))
+
+    def __gt__(self, other):
+        return Compare(">", self, _expr(other))
+
+    def __ge__(self, other):
+        return Compare(">=", self, _expr(other))
+
+    def __and__(self, other):
+        return Logical("AND", self, other)
+
+    def __or__(self, other):
+        return Logical("OR", self, other)
+
+    def between(self, low, high) -> "Expr":
+        return (self >= low) & (self <= high)
+
+    def close_to(self, other, rel: float = REL_TOLERANCE, abs_: float = ABS_TOLERANCE) -> "Expr":
+        """|self - other| <= abs_ + rel * |other|."""
+        other = _expr(other)
+        return Compare("<=", Abs(self - other), Lit(abs_) + Abs(other) * rel)
+
+    def not_null(self) -> "Expr":
+        return NotNull(self)
+
+
+def _expr(value) -> Expr:
+    return value if isinstance(value, Expr) else Lit(value)
+
+
+@dataclass(frozen=True, eq=False)
+class Col(Expr):
+    name: str
+    kind: str = "number"     # "date" columns compare as days; "any" columns only support not_null()
+
+    def columns(self) -> Dict[str, str]:
+        return {self.name: self.kind}
+
+    def sql(self) -> str:
+        return self.name
+
+    def eval(self, values):
+        return values[self.name]
+
+
+@dataclass(frozen=True, eq=False)
+class Lit(Expr):
+    value: float
+
+    def columns(self):
+        return {}
+
+    def sql(self) -> str:
+        return repr(float(self.value))
+
+    def eval(self, values):
+        return np.float64(self.value)
+
+
+@dataclass(frozen=True, eq=False)
+class Binary(Expr):
+    op: str
+    left: Expr
+    right: Expr
+
+    def columns(self):
+        return {**self.left.columns(), **self.right.columns()}
+
+    def sql(self) -> str:
+        if self.op == "/":
+            return f"(1.0 * {self.left.sql()} / NULLIF({self.right.sql()}, 0))"    # no integer division
+        return f"({self.left.sql()} {self.op} {self.right.sql()})"
+
+    def eval(self, values):
+        left, right = self.left.eval(values), self.right.eval(values)
+        if self.op == "+":
+            return left + right
+        if self.op == "-":
+            return left - right
+        if self.op == "*":
+            return left * right
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(right == 0, np.nan, left / right)
+
+
+@dataclass(frozen=True, eq=False)
+class Abs(Expr):
+    operand: Expr
+
+    def columns(self):
+        return self.operand.columns()
+
+    def sql(self) -> str:
+        return f"ABS({self.operand.sql()})"
+
+    def eval(self, values):
+        return np.abs(self.operand.eval(values))
+
+
+_COMPARE = {"<": np.less, "<=": np.less_equal, ">": np.greater, ">=": np.greater_equal}
+
+
+@dataclass(frozen=True, eq=False)
+class Compare(Expr):
+    op: str
+    left: Expr
+    right: Expr
+
+    def columns(self):
+        return {**self.left.columns(), **self.right.columns()}
+
+    def sql(self) -> str:
+        return f"({self.left.sql()} {self.op} {self.right.sql()})"
+
+    def eval(self, values):
+        left, right = np.broadcast_arrays(self.left.eval(values), self.right.eval(values))
+        with np.errstate(invalid="ignore"):
+            result = _COMPARE[self.op](left, right).astype(np.float64)
+        result[_unknown(left, right)] = np.nan
+        return result
+
+
+@dataclass(frozen=True, eq=False)
+class Logical(Expr):
+    op: str
+    left: Expr
+    right: Expr
+
+    def columns(self):
+        return {**self.left.columns(), **self.right.columns()}
+
+    def sql(self) -> str:
+        return f"({self.left.sql()} {self.op} {self.right.sql()})"
+
+    def eval(self, values):
+        left, right = self.left.eval(values), self.right.eval(values)
+        decided = 0.0 if self.op == "AND" else 1.0     # FALSE decides AND, TRUE decides OR
+        return np.where((left == decided) | (right == decided), decided,
+                        np.where(_unknown(left, right), np.nan, 1.0 - decided))
+
+
+@dataclass(frozen=True, eq=False)
+class NotNull(Expr):
+    operand: Expr
+
+    def columns(self):
+        return {name: "any" for name in self.operand.columns()}
+
+    def sql(self) -> str:
+        return f"({self.operand.sql()} IS NOT NULL)"
+
+    def eval(self, values):
+        return (~np.isnan(self.operand.eval(values))).astype(np.float64)
+
+
+# =============================================================================
+# Rules
+# =============================================================================
+
+@dataclass(frozen=True)
+class Rule:
+    name: str
+    table: str
+    description: str
+
+    def columns(self) -> Dict[str, str]:
+        return {}
+
+
+@dataclass(frozen=True)
+class Check(Rule):
+    """Every row satisfies ``predicate`` (or it is unknown)."""
+    predicate: Expr = None
+
+    def columns(self):
+        return self.predicate.columns()
+
+
+@dataclass(frozen=True)
+class Unique(Rule):
+    """No two rows share ``key``."""
+    key: Tuple[str, ...] = ()
+
+    def columns(self):
+        return {name: "any" for name in self.key}
+
+
+@dataclass(frozen=True)
+class Reference(Rule):
+    """Every non-null ``column`` value is a ``parent_column`` value of ``parent``."""
+    column: str = ""
+    parent: str = ""
+    parent_column: str = ""
+
+    def columns(self):
+        return {self.column: "any"}
+
+
+def _percentages(table: str, *columns: str) -> List[Rule]:
+    return [Check(f"{c}_range", table, f"{c} is between 0 and 100", Col(c).between(0, 100)) for c in columns]
+
+
+def _non_negative(table: str, *columns: str) -> List[Rule]:
+    return [Check(f"{c}_non_negative", table, f"{c} >= 0", Col(c) >= 0) for c in columns]
+
+
+def _funnel(table: str, *steps: str) -> List[Rule]:
+    """Each step is at most the one before it (bids >= wins, impressions >= engagements, ...)."""
+    return [Check(f"{later}_le_{earlier}", table, f"{later} <= {earlier}", Col(later) <= Col(earlier))
+            for earlier, later in zip(steps, steps[1:])]
+
+
+CAMPAIGNS, INVENTORY, AUDIENCE, DAILY = TABLE_KEYS
+
+RULES: Tuple[Rule, ...] = (
+    # T_CAMPAIGN_PERFORMANCE
+    Unique("campaign_id_unique", CAMPAIGNS, "one row per campaign_id", key=("campaign_id",)),
+    Check("campaign_id_not_null", CAMPAIGNS, "campaign_id is set", Col("campaign_id").not_null()),
+    Check("roas_formula", CAMPAIGNS, "roas = total_revenue / total_spend",
+          Col("roas").close_to(Col("total_revenue") / Col("total_spend"))),
+    Check("ctr_formula", CAMPAIGNS, "ctr_pct = total_engagements / total_impressions x 100",
+          Col("ctr_pct").close_to(Col("total_engagements") / Col("total_impressions") * 100)),
+    Check("conversion_rate_formula", CAMPAIGNS, "conversion_rate_pct = total_conversions / total_engagements x 100",
+          Col("conversion_rate_pct").close_to(Col("total_conversions") / Col("total_engagements") * 100)),
+    Check("win_rate_formula", CAMPAIGNS, "win_rate_pct = winning_bids / total_bids x 100",
+          Col("win_rate_pct").close_to(Col("winning_bids") / Col("total_bids") * 100)),
+    *_funnel(CAMPAIGNS, "total_bids", "winning_bids"),
+    *_funnel(CAMPAIGNS, "total_impressions", "total_engagements", "total_conversions"),
+    *_percentages(CAMPAIGNS, "win_rate_pct", "ctr_pct", "conversion_rate_pct", "avg_completion_rate_pct",
+                  "avg_viewability_pct"),
+    *_non_negative(CAMPAIGNS, "budget", "total_revenue", "total_spend"),
+    Check("spend_within_budget", CAMPAIGNS, "total_spend <= budget", Col("total_spend") <= Col("budget")),
+    Check("dates_ordered", CAMPAIGNS, "end_date >= start_date",
+          Col("end_date", "date") >= Col("start_date", "date")),
+
+    # T_INVENTORY_ANALYTICS
+    Unique("slot_id_unique", INVENTORY, "one row per slot_id", key=("slot_id",)),
+    Check("revenue_formula", INVENTORY, "total_revenue = delivered_impressions x avg_winning_cpm / 1000",
+          Col("total_revenue").close_to(Col("delivered_impressions") * Col("avg_winning_cpm") / 1000)),
+    Check("engagement_rate_formula", INVENTORY, "engagement_rate_pct = total_engagements / delivered_impressions x 100",
+          Col("engagement_rate_pct").close_to(Col("total_engagements") / Col("delivered_impressions") * 100)),
+    *_funnel(INVENTORY, "delivered_impressions", "total_engagements"),
+    *_percentages(INVENTORY, "fill_rate_pct", "avg_completion_pct", "avg_viewability_pct"),
+    Check("base_cpm_positive", INVENTORY, "base_cpm > 0", Col("base_cpm") > 0),
+
+    # T_AUDIENCE_INSIGHTS
+    Unique("cohort_id_unique", AUDIENCE, "one row per cohort_id", key=("cohort_id",)),
+    Check("engagement_rate_formula", AUDIENCE, "engagement_rate_pct = total_engagements / total_impressions x 100",
+          Col("engagement_rate_pct").close_to(Col("total_engagements") / Col("total_impressions") * 100)),
+    Check("conversion_rate_formula", AUDIENCE, "conversion_rate_pct = total_conversions / total_engagements x 100",
+          Col("conversion_rate_pct").close_to(Col("total_conversions") / Col("total_engagements") * 100)),
+    Check("revenue_per_member_formula", AUDIENCE, "revenue_per_member = cohort_revenue / cohort_size",
+          Col("revenue_per_member").close_to(Col("cohort_revenue") / Col("cohort_size"))),
+    *_funnel(AUDIENCE, "total_impressions", "total_engagements", "total_conversions"),
+    *_percentages(AUDIENCE, "avg_ad_completion_pct"),
+
+    # T_CAMPAIGN_DAILY
+    Unique("day_campaign_slot_unique", DAILY, "one row per (date_day, campaign_id, slot_id)",
+           key=("date_day", "campaign_id", "slot_id")),
+    Check("date_day_not_null", DAILY, "date_day is set", Col("date_day", "date").not_null()),
+    Reference("campaign_exists", DAILY, "campaign_id is in T_CAMPAIGN_PERFORMANCE",
+              column="campaign_id", parent=CAMPAIGNS, parent_column="campaign_id"),
+    Reference("slot_exists", DAILY, "slot_id is in T_INVENTORY_ANALYTICS",
+              column="slot_id", parent=INVENTORY, parent_column="slot_id"),
+    *_funnel(DAILY, "total_bids", "winning_bids"),
+    *_funnel(DAILY, "impressions", "engagements", "conversions"),
+    *_non_negative(DAILY, "total_bids", "impressions", "revenue", "spend"),
+)
+
+
+# =============================================================================
+# Results
+# =============================================================================
+
+@dataclass
+class RuleResult:
+    rule: str
+    table: str
+    description: str
+    rows_checked: int = 0
+    violations: int = 0
+    samples: List[Dict[str, object]] = field(default_factory=list)
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None and self.violations == 0
+
+
+@dataclass
+class QualityReport:
+    results: List[RuleResult]
+    rows: Dict[str, int]                         # rows checked per table
+    seconds: float
+    mode: str
+    since: Dict[str, Optional[str]] = field(default_factory=dict)    # partition watermark per table
+
+    @property
+    def ok(self) -> bool:
+        return all(r.ok for r in self.results)
+
+    @property
+    def failed(self) -> List[RuleResult]:
+        return [r for r in self.results if not r.ok]
+
+    def to_dict(self) -> Dict[str, object]:
+        return {
+            "ok": self.ok, "mode": self.mode, "seconds": round(self.seconds, 4), "rows": self.rows,
+            "since": self.since,
+            "results": [{"rule": r.rule, "table": r.table, "description": r.description,
+                         "rows_checked": r.rows_checked, "violations": r.violations, "ok": r.ok,
+                         "samples": r.samples, "error": r.error} for r in self.results],
+        }
+
+
+def _jsonable(value):
+    return value.isoformat() if isinstance(value, date) else value
+
+
+# =============================================================================
+# Vectorized checks
+# =============================================================================
+
+def _days(column) -> np.ndarray:
+    """Days since 1970-01-01 (NaN for NULL) from a date, timestamp or ISO string column."""
+    if pa.types.is_string(column.type) or pa.types.is_large_string(column.type):
+        column = pc.strptime(pc.utf8_slice_codeunits(column, 0, 10), "%Y-%m-%d", "s")
+    if pa.types.is_timestamp(column.type):
+        column = column.cast(pa.date32())
+    return column.cast(pa.int32()).cast(pa.float64()).to_numpy(zero_copy_only=False)
+
+
+def _values(column, kind: str) -> np.ndarray:
+    if kind == "date":
+        return _days(column)
+    if kind == "any":
+        return np.where(column.is_null().to_numpy(zero_copy_only=False), np.nan, 0.0)
+    return column.cast(pa.float64()).to_numpy(zero_copy_only=False)
+
+
+class BatchChecker:
+    """
+    Runs one table's rules over a stream of RecordBatches. For a Unique
+    rule the batches must arrive ordered by its key (see scan_query()).
+    """
+
+    def __init__(self, table: str, rules: Sequence[Rule], parents: Optional[Dict[Tuple[str, str], pa.Array]] = None,
+                 max_samples: int = MAX_SAMPLES):
+        self.table = table
+        self.rules = [r for r in rules if r.table == table]
+        if sum(isinstance(r, Unique) for r in self.rules) > 1:
+            raise ValueError(f"{table}: at most one unique key per table can be checked in one scan")
+        self.parents = parents or {}
+        self.max_samples = max_samples
+        self.results = {r.name: RuleResult(r.name, table, r.description) for r in self.rules}
+        self.rows = 0
+        self.max_partition: Optional[float] = None
+        self._last_key: Optional[Tuple] = None
+        self.columns: Dict[str, str] = {}
+        for rule in self.rules:
+            for name, kind in rule.columns().items():
+                self.columns[name] = kind if self.columns.get(name, "any") == "any" else self.columns[name]
+        self.key = TABLE_KEYS.get(table, ())
+
+    def _sample(self, result: RuleResult, batch: pa.RecordBatch, rows: np.ndarray, rule: Rule) -> None:
+        room = self.max_samples - len(result.samples)
+        if room <= 0 or not len(rows):
+            return
+        names = list(dict.fromkeys([*self.key, *rule.columns()]))
+        picked = batch.select(names).take(pa.array(rows[:room]))
+        result.samples.extend({k: _jsonable(v) for k, v in row.items()} for row in picked.to_pylist())
+
+    def feed(self, batch: pa.RecordBatch) -> None:
+        batch = batch.rename_columns([c.lower() for c in batch.column_names])
+        n = batch.num_rows
+        if not n:
+            return
+        self.rows += n
+        values = {name: _values(batch.column(name), kind) for name, kind in self.columns.items()}
+        partition = PARTITION_COLUMNS.get(self.table)
+        if partition is not None:
+            days = values[partition] if self.columns.get(partition) == "date" else _days(batch.column(partition))
+            top = np.nanmax(days) if not np.isnan(days).all() else None
+            if top is not None and (self.max_partition is None or top > self.max_partition):
+                self.max_partition = float(top)
+
+        for rule in self.rules:
+            result = self.results[rule.name]
+            result.rows_checked += n
+            if isinstance(rule, Check):
+                bad = np.flatnonzero(rule.predicate.eval(values) == 0)
+            elif isinstance(rule, Reference):
+                column = batch.column(rule.column)
+                found = pc.is_in(column, value_set=self.parents[(rule.parent, rule.parent_column)])
+                bad = np.flatnonzero(pc.and_(column.is_valid(), pc.invert(found)).to_numpy(zero_copy_only=False))
+            else:
+                bad = self._duplicates(batch, rule.key)
+            result.violations += len(bad)
+            self._sample(result, batch, bad, rule)
+
+    def _duplicates(self, batch: pa.RecordBatch, key: Tuple[str, ...]) -> np.ndarray:
+        """Rows equal to the row before them in key order (the previous batch's last row included)."""
+        n = batch.num_rows
+        same = np.ones(n - 1, dtype=bool)
+        for name in key:
+            column = batch.column(name)
+            same &= pc.fill_null(pc.equal(column.slice(1), column.slice(0, n - 1)), False) \
+                .to_numpy(zero_copy_only=False)
+        first = tuple(batch.column(name)[0].as_py() for name in key)
+        bad = np.flatnonzero(same) + 1
+        if self._last_key is not None and first == self._last_key and None not in first:
+            bad = np.concatenate([[0], bad])
+        self._last_key = tuple(batch.column(name)[n - 1].as_py() for name in key)
+        return bad
+
+
+def scan_query(table: str, columns: Iterable[str], rules: Sequence[Rule], since: bool = False) -> str:
+    """The vectorized scan of ``table``: needed columns only, ordered by its unique key."""
+    sql = f"SELECT {', '.join(columns)}\nFROM {TABLE_PREFIX}{table}"
+    if since:
+        sql += f"\nWHERE {PARTITION_COLUMNS[table]} > ?"
+    unique = next((r for r in rules if isinstance(r, Unique) and r.table == table), None)
+    if unique is not None:
+        sql += f"\nORDER BY {', '.join(unique.key)}"
+    return sql
+
+
+def _parent_keys(engine, rules: Sequence[Rule]) -> Dict[Tuple[str, str], pa.Array]:
+    parents = {}
+    for rule in rules:
+        key = (getattr(rule, "parent", ""), getattr(rule, "parent_column", ""))
+        if isinstance(rule, Reference) and key not in parents:
+            table = fetch_arrow(engine, f"SELECT DISTINCT {rule.parent_column} FROM {TABLE_PREFIX}{rule.parent}")
+            parents[key] = pc.drop_null(table.column(0).combine_chunks())
+    return parents
+
+
+def _check_vectorized(engine, table: str, rules: Sequence[Rule], since: Optional[str],
+                      parents) -> Tuple[List[RuleResult], int, Optional[float]]:
+    checker = BatchChecker(table, rules, parents)
+    columns = list(dict.fromkeys([*checker.key, *checker.columns, *([PARTITION_COLUMNS[table]]
+                                                                   if table in PARTITION_COLUMNS else [])]))
+    query = scan_query(table, columns, checker.rules, since is not None)
+    for batch in iter_arrow_batches(engine, query, [since] if since is not None else []):
+        checker.feed(batch)
+    return list(checker.results.values()), checker.rows, checker.max_partition
+
+
+# =============================================================================
+# Pushdown checks
+# =============================================================================
+
+def pushdown_query(table: str, rules: Sequence[Rule], since: bool = False) -> str:
+    """One scan counting every Check and Reference rule's violations (``v0``, ``v1``, ...)."""
+    counts, joins = ["COUNT(*) AS rows_checked"], []
+    partition = PARTITION_COLUMNS.get(table)
+    if partition:
+        counts.append(f"MAX(t.{partition}) AS max_partition")
+    for i, rule in enumerate(rules):
+        if isinstance(rule, Check):
+            counts.append(f"SUM(CASE WHEN NOT {rule.predicate.sql()} THEN 1 ELSE 0 END) AS v{i}")
+        elif isinstance(rule, Reference):
+            joins.append(f"LEFT JOIN (SELECT DISTINCT {rule.parent_column} AS ref_key "
+                         f"FROM {TABLE_PREFIX}{rule.parent}) r{i} ON r{i}.ref_key = t.{rule.column}")
+            counts.append(f"SUM(CASE WHEN t.{rule.column} IS NOT NULL AND r{i}.ref_key IS NULL "
+                          f"THEN 1 ELSE 0 END) AS v{i}")
+    sql = f"SELECT {', '.join(counts)}\nFROM {TABLE_PREFIX}{table} t"
+    sql += "".join(f"\n{j}" for j in joins)
+    if since:
+        sql += f"\nWHERE t.{partition} > ?"
+    return sql
+
+
+def _where(rule: Rule, table: str, since: bool) -> Tuple[str, str]:
+    """(joins, condition) selecting the rows that violate a Check or Reference rule."""
+    if isinstance(rule, Check):
+        joins, condition = "", f"NOT {rule.predicate.sql()}"
+    else:
+        joins = (f"\nLEFT JOIN (SELECT DISTINCT {rule.parent_column} AS ref_key "
+                 f"FROM {TABLE_PREFIX}{rule.parent}) r ON r.ref_key = t.{rule.column}")
+        condition = f"t.{rule.column} IS NOT NULL AND r.ref_key IS NULL"
+    if since:
+        condition += f" AND t.{PARTITION_COLUMNS[table]} > ?"
+    return joins, condition
+
+
+def _lower_rows(table: pa.Table) -> List[Dict[str, object]]:
+    rows = table.rename_columns([c.lower() for c in table.column_names]).to_pylist()
+    return [{k: _jsonable(v) for k, v in row.items()} for row in rows]
+
+
+def _check_pushdown(engine, table: str, rules: Sequence[Rule], since: Optional[str],
+                    max_samples: int = MAX_SAMPLES) -> Tuple[List[RuleResult], int, Optional[str]]:
+    rules = [r for r in rules if r.table == table]
+    params = [since] if since is not None else []
+    key = TABLE_KEYS.get(table, ())
+    counts = _lower_rows(fetch_arrow(engine, pushdown_query(table, rules, since is not None), params))[0]
+    rows = int(counts["rows_checked"] or 0)
+    results = []
+    for i, rule in enumerate(rules):
+        result = RuleResult(rule.name, table, rule.description, rows_checked=rows)
+        if isinstance(rule, Unique):
+            group = ", ".join(rule.key)
+            where = f"\nWHERE {PARTITION_COLUMNS[table]} > ?" if since is not None else ""
+            duplicates = (f"SELECT {group}, COUNT(*) AS copies FROM {TABLE_PREFIX}{table}{where}\n"
+                          f"GROUP BY {group} HAVING COUNT(*) > 1")
+            total = _lower_rows(fetch_arrow(engine, f"SELECT SUM(copies - 1) AS extra FROM ({duplicates}) d",
+                                            params))[0]
+            result.violations = int(total["extra"] or 0)
+            if result.violations:
+                result.samples = _lower_rows(fetch_arrow(engine, f"{duplicates}\nLIMIT {max_samples}", params))
+        else:
+            result.violations = int(counts[f"v{i}"] or 0)
+            if result.violations:
+                joins, condition = _where(rule, table, since is not None)
+                names = ", ".join(f"t.{c}" for c in dict.fromkeys([*key, *rule.columns()]))
+                result.samples = _lower_rows(fetch_arrow(
+                    engine, f"SELECT {names}\nFROM {TABLE_PREFIX}{table} t{joins}\nWHERE {condition}\n"
+                            f"LIMIT {max_samples}", params))
+        results.append(result)
+    return results, rows, _jsonable(counts.get("max_partition"))
+
+
+# =============================================================================
+# Entry points
+# =============================================================================
+
+def validate(engine, rules: Sequence[Rule] = RULES, mode: str = "auto",
+             since: Optional[Dict[str, Optional[str]]] = None,
+             today: Optional[date] = None) -> Tuple[QualityReport, Dict[str, Optional[str]]]:
+    """
+    Check ``rules`` table by table. ``since`` maps a partitioned table to the
+    last partition already checked (ISO date); only newer partitions are
+    read. Returns the report and, per table, the newest complete partition
+    seen: partitions from ``today`` (default: the current date) on may
+    still receive rows, so the watermark stays before them.
+
+    ``mode`` is "vectorized", "pushdown" or "auto" (pushdown on Snowflake,
+    vectorized on the local engine). A table that cannot be read reports its
+    error on each of its rules.
+    """
+    if mode == "auto":
+        mode = "pushdown" if getattr(engine, "connection", None) is not None else "vectorized"
+    since = dict(since or {})
+    last_complete = ((today or date.today()) - timedelta(days=1)).isoformat()
+    t0 = time.perf_counter()
+    parents = _parent_keys(engine, rules) if mode == "vectorized" else {}
+    results, rows, watermarks = [], {}, {}
+    for table in dict.fromkeys(r.table for r in rules):
+        start = since.get(table) if table in PARTITION_COLUMNS else None
+        try:
+            if mode == "vectorized":
+                table_results, rows[table], top = _check_vectorized(engine, table, rules, start, parents)
+                top = (_EPOCH + timedelta(days=int(top))).isoformat() if top is not None else None
+            else:
+                table_results, rows[table], top = _check_pushdown(engine, table, rules, start)
+        except Exception as e:
+            table_results = [RuleResult(r.name, table, r.description, error=str(e).splitlines()[0])
+                             for r in rules if r.table == table]
+            rows[table], top = 0, None
+        results.extend(table_results)
+        if table in PARTITION_COLUMNS:
+            top = min(top, last_complete) if top is not None else None
+            watermarks[table] = max(filter(None, (start, top)), default=None)
+    report = QualityReport(results, rows, time.perf_counter() - t0, mode,
+                           since={t: since.get(t) for t in PARTITION_COLUMNS if t in rows})
+    return report, watermarks
+
+
+class QualityMonitor:
+    """
+    Incremental checks after ingestion: the first poll() checks every row,
+    later ones only partitions newer than the last complete one checked
+    (plus the unpartitioned tables, which are reloaded whole).
+    """
+
+    def __init__(self, rules: Sequence[Rule] = RULES, mode: str = "auto"):
+        self.rules = tuple(rules)
+        self.mode = mode
+        self.watermarks: Dict[str, Optional[str]] = {}
+        self.last_report: Optional[QualityReport] = None
+        self._lock = threading.Lock()
+
+    def poll(self, engine, today: Optional[date] = None) -> QualityReport:
+        with self._lock:
+            report, watermarks = validate(engine, self.rules, self.mode, since=self.watermarks, today=today)
+            self.watermarks.update({t: w for t, w in watermarks.items() if w is not None})
+            self.last_report = report
+            return report
+
+
+# =============================================================================
+# CLI
+# =============================================================================
+
+def print_report(report: QualityReport) -> None:
+    tables = ", ".join(f"{t} {n:,}" for t, n in report.rows.items())
+    print(f"{report.mode}: {sum(report.rows.values()):,} rows ({tables}) in {report.seconds * 1e3:.0f} ms\n")
+    print(f"{'table':<24} | {'rule':<34} | {'violations':>10}")
+    print("-" * 74)
+    for result in report.results:
+        status = f"ERROR: {result.error}" if result.error else f"{result.violations:>10,}"
+        print(f"{result.table:<24} | {result.rule:<34} | {status}")
+        for sample in result.samples:
+            print(f"{'':<4}{sample}")
+    print(f"\n{len(report.failed)} of {len(report.results)} rules failed" if report.failed
+          else f"\nall {len(report.results)} rules pass")
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("Usage")[0].strip("=\n "),
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mode", choices=("auto", "vectorized", "pushdown"), default="auto")
+    parser.add_argument("--table", action="append", help="check only this table (repeatable)")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args(argv)
+
+    from .runtime import get_engine
+
+    rules = [r for r in RULES if not args.table or r.table in {t.upper() for t in args.table}]
+    report, _ = validate(get_engine(), rules, args.mode)
+    if args.json:
+        print(json.dumps(report.to_dict(), indent=2, default=str))
+    else:
+        print_report(report)
+    return 0 if report.ok else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
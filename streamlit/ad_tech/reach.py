@@ -0,0 +1,314 @@
+"""
+=============================================================================
+PatientPoint Ad Tech Demo - Sketch-Based Reach & Frequency
+=============================================================================
+T_AUDIENCE_INSIGHTS only carries per-cohort totals, so the unique reach of
+a *combination* of cohorts, slots and days can't be derived from it. The
+ReachStore keeps mergeable sketches per (cohort, slot, day) unit instead,
+built once from an exposure log (one row per impression: cohort, slot,
+day, person):
+
+  reach       : HyperLogLog registers per unit, max-merged across the
+                selection -> deduplicated unique reach
+  impressions : exact counts per unit, summed
+  frequency   : KLL sketch per unit of each person's exposures that day
+                on that slot, merged -> frequency quantiles
+
+Units are also rolled up per (cohort, slot) over all days, so all-time
+questions merge a few dozen register rows instead of every day's. New
+exposure batches are folded in with merge().
+
+No raw exposure feed ships with the demo. simulate_exposures() draws one
+that matches the cohort sizes, impression totals and exposure frequencies
+in T_AUDIENCE_INSIGHTS and the slot volumes in T_INVENTORY_ANALYTICS.
+=============================================================================
+"""
+
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass
+from datetime import date, timedelta
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .sketches import DEFAULT_PRECISION, KLLSketch, hash64, hll_estimate, hll_slots
+
+COHORTS_QUERY = """
+SELECT cohort_id, cohort_name, age_bucket, gender, region, cohort_size, total_impressions
+FROM AD_TECH.ANALYTICS.T_AUDIENCE_INSIGHTS
+"""
+SLOTS_QUERY = """
+SELECT slot_id, slot_name, region, specialty_name, estimated_daily_impressions
+FROM AD_TECH.ANALYTICS.T_INVENTORY_ANALYTICS
+"""
+LIFETIME_DAYS = 90          # period the cohort impression totals cover
+FREQUENCY_QUANTILES = (0.5, 0.9, 0.99)
+
+
+@dataclass
+class ExposureLog:
+    """Impressions as parallel arrays; ``day`` holds date ordinals."""
+    cohort_id: np.ndarray
+    slot_id: np.ndarray
+    day: np.ndarray
+    person_id: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.person_id)
+
+
+@dataclass
+class ReachEstimate:
+    reach: float
+    impressions: int
+    frequency: float                    # impressions per reached person
+    frequency_quantiles: Dict[float, float]
+    sketches: int                       # register rows merged
+    seconds: float
+    relative_error: float
+
+    @property
+    def reach_interval(self) -> Tuple[float, float]:
+        """~95% interval on reach."""
+        spread = 2 * self.relative_error * self.reach
+        return max(0.0, self.reach - spread), self.reach + spread
+
+
+def _codes(values: np.ndarray, known: List[str]) -> np.ndarray:
+    """Index of each value in ``known``, appending unseen values."""
+    lookup = {v: i for i, v in enumerate(known)}
+    uniques, inverse = np.unique(values.astype(str), return_inverse=True)
+    for value in uniques.tolist():
+        if value not in lookup:
+            lookup[value] = len(known)
+            known.append(value)
+    return np.array([lookup[v] for v in uniques.tolist()], dtype=np.int64)[inverse]
+
+
+def _frequency_sketches(groups: np.ndarray, counts: np.ndarray, n_groups: int) -> List[KLLSketch]:
+    """One KLL per group over ``counts``; ``groups`` sorted."""
+    bounds = np.searchsorted(groups, np.arange(n_groups + 1))
+    return [KLLSketch.of(counts[bounds[g]:bounds[g + 1]]) for g in range(n_groups)]
+
+
+class ReachStore:
+    """Per (cohort, slot, day) reach / impression / frequency sketches."""
+
+    def __init__(self, precision: int = DEFAULT_PRECISION):
+        self.precision = precision
+        self.cohorts: List[str] = []
+        self.slots: List[str] = []
+        self.cohort_info: Dict[str, Dict[str, object]] = {}
+        self.slot_info: Dict[str, Dict[str, object]] = {}
+        # Units: parallel arrays, one row per (cohort, slot, day)
+        self.unit_cohort = np.empty(0, dtype=np.int64)
+        self.unit_slot = np.empty(0, dtype=np.int64)
+        self.unit_day = np.empty(0, dtype=np.int64)
+        self.registers = np.empty((0, 1 << precision), dtype=np.uint8)
+        self.impressions = np.empty(0, dtype=np.int64)
+        self.frequency: List[KLLSketch] = []
+        self._rollup()
+
+    # -------------------------------------------------------------------------
+    # Building
+    # -------------------------------------------------------------------------
+    @classmethod
+    def from_exposures(cls, log: ExposureLog, precision: int = DEFAULT_PRECISION) -> "ReachStore":
+        store = cls(precision)
+        store.merge(log)
+        return store
+
+    def _units(self, log: ExposureLog):
+        """Sketch rows for the units in ``log`` (sorted by unit key)."""
+        cohort = _codes(log.cohort_id, self.cohorts)
+        slot = _codes(log.slot_id, self.slots)
+        day = np.asarray(log.day, dtype=np.int64)
+        base = day.min() if len(day) else 0
+        n_days = int(day.max() - base + 1) if len(day) else 1
+        key = (cohort * len(self.slots) + slot) * n_days + (day - base)
+        units, unit_of = np.unique(key, return_inverse=True)
+
+        registers = np.zeros((len(units), 1 << self.precision), dtype=np.uint8)
+        index, rank = hll_slots(hash64(log.person_id), self.precision)
+        np.maximum.at(registers, (unit_of, index), rank)
+        impressions = np.bincount(unit_of, minlength=len(units)).astype(np.int64)
+
+        # Exposures per (unit, person), grouped by unit
+        pairs, counts = np.unique(unit_of.astype(np.int64) << 32 | log.person_id.astype(np.int64),
+                                  return_counts=True)
+        frequency = _frequency_sketches(pairs >> 32, counts, len(units))
+
+        day_of = units % n_days + base
+        pair = units // n_days
+        return pair // len(self.slots), pair % len(self.slots), day_of, registers, impressions, frequency
+
+    def merge(self, log: ExposureLog) -> "ReachStore":
+        """Fold a batch of exposures into the store."""
+        if not len(log):
+            return self
+        cohort, slot, day, registers, impressions, frequency = self._units(log)
+        existing = {(c, s, d): i for i, (c, s, d) in
+                    enumerate(zip(self.unit_cohort.tolist(), self.unit_slot.tolist(), self.unit_day.tolist()))}
+        new = []
+        for j, unit in enumerate(zip(cohort.tolist(), slot.tolist(), day.tolist())):
+            i = existing.get(unit)
+            if i is None:
+                new.append(j)
+                continue
+            np.maximum(self.registers[i], registers[j], out=self.registers[i])
+            self.impressions[i] += impressions[j]
+            self.frequency[i].merge(frequency[j])
+        self.unit_cohort = np.concatenate([self.unit_cohort, cohort[new]])
+        self.unit_slot = np.concatenate([self.unit_slot, slot[new]])
+        self.unit_day = np.concatenate([self.unit_day, day[new]])
+        self.registers = np.concatenate([self.registers, registers[new]])
+        self.impressions = np.concatenate([self.impressions, impressions[new]])
+        self.frequency.extend(frequency[j] for j in new)
+        self._rollup()
+        return self
+
+    def _rollup(self) -> None:
+        """All-days registers, impressions and frequency per (cohort, slot)."""
+        pair = self.unit_cohort * max(1, len(self.slots)) + self.unit_slot
+        pairs, pair_of = np.unique(pair, return_inverse=True)
+        self.pair_cohort = pairs // max(1, len(self.slots))
+        self.pair_slot = pairs % max(1, len(self.slots))
+        self.pair_registers = np.zeros((len(pairs), 1 << self.precision), dtype=np.uint8)
+        np.maximum.at(self.pair_registers, pair_of, self.registers)
+        self.pair_impressions = np.bincount(pair_of, weights=self.impressions,
+                                            minlength=len(pairs)).astype(np.int64)
+        members: List[List[int]] = [[] for _ in range(len(pairs))]
+        for unit, p in enumerate(pair_of.tolist()):
+            members[p].append(unit)
+        self.pair_frequency = [KLLSketch.merge_all(self.frequency[u] for u in units) for units in members]
+
+    # -------------------------------------------------------------------------
+    # Queries
+    # -------------------------------------------------------------------------
+    @property
+    def days(self) -> Tuple[Optional[date], Optional[date]]:
+        if not len(self.unit_day):
+            return None, None
+        return date.fromordinal(int(self.unit_day.min())), date.fromordinal(int(self.unit_day.max()))
+
+    @staticmethod
+    def _select(ids: Optional[Sequence[str]], known: List[str]) -> Optional[np.ndarray]:
+        """Boolean lookup over ``known`` codes, or None for everything."""
+        if ids is None:
+            return None
+        wanted = set(ids)
+        return np.array([value in wanted for value in known], dtype=bool)
+
+    def estimate(self, cohorts: Optional[Sequence[str]] = None, slots: Optional[Sequence[str]] = None,
+                 start: Optional[date] = None, end: Optional[date] = None,
+                 quantiles: Sequence[float] = FREQUENCY_QUANTILES) -> ReachEstimate:
+        """
+        Deduplicated reach, impressions and frequency for the selected
+        cohorts and slots between ``start`` and ``end`` (inclusive). None
+        selects everything.
+        """
+        t0 = time.perf_counter()
+        cohort_mask = self._select(cohorts, self.cohorts)
+        slot_mask = self._select(slots, self.slots)
+        first, last = self.days
+        all_days = (start is None or first is None or start <= first) and (end is None or last is None or end >= last)
+        if all_days:
+            unit_cohort, unit_slot = self.pair_cohort, self.pair_slot
+            registers, impressions, frequency = self.pair_registers, self.pair_impressions, self.pair_frequency
+            mask = np.ones(len(unit_cohort), dtype=bool)
+        else:
+            unit_cohort, unit_slot = self.unit_cohort, self.unit_slot
+            registers, impressions, frequency = self.registers, self.impressions, self.frequency
+            mask = np.ones(len(unit_cohort), dtype=bool)
+            if start is not None:
+                mask &= self.unit_day >= start.toordinal()
+            if end is not None:
+                mask &= self.unit_day <= end.toordinal()
+        if cohort_mask is not None:
+            mask &= cohort_mask[unit_cohort]
+        if slot_mask is not None:
+            mask &= slot_mask[unit_slot]
+
+        rows = np.flatnonzero(mask)
+        merged = registers[rows].max(axis=0) if len(rows) else np.zeros(1 << self.precision, dtype=np.uint8)
+        reach = hll_estimate(merged) if len(rows) else 0.0
+        total = int(impressions[rows].sum())
+        sketch = KLLSketch.merge_all(frequency[i] for i in rows.tolist())
+        return ReachEstimate(
+            reach=reach,
+            impressions=total,
+            frequency=total / reach if reach else 0.0,
+            frequency_quantiles=dict(zip(quantiles, sketch.quantiles(quantiles))),
+            sketches=len(rows),
+            seconds=time.perf_counter() - t0,
+            relative_error=1.04 / np.sqrt(1 << self.precision),
+        )
+
+    def cohorts_where(self, **attrs) -> List[str]:
+        """Cohort ids whose metadata matches every ``attr=value`` (or list of values)."""
+        def ok(info):
+            return all(info.get(k) in (v if isinstance(v, (list, tuple, set)) else [v]) for k, v in attrs.items())
+        return [c for c in self.cohorts if ok(self.cohort_info.get(c, {}))]
+
+    @property
+    def nbytes(self) -> int:
+        kll = sum(sum(level.nbytes for level in s.levels) for s in self.frequency + self.pair_frequency)
+        return self.registers.nbytes + self.pair_registers.nbytes + self.impressions.nbytes + kll
+
+
+# =============================================================================
+# Exposure feed
+# =============================================================================
+def simulate_exposures(cohorts: Sequence[Dict[str, object]], slots: Sequence[Dict[str, object]],
+                       days: int = 28, end: Optional[date] = None, seed: int = 0) -> ExposureLog:
+    """
+    Synthetic impressions: each cohort gets ``total_impressions`` scaled from
+    LIFETIME_DAYS to ``days``, spread over its ``cohort_size`` members with
+    gamma-distributed visit propensity and over the slots in its region in
+    proportion to their daily impressions.
+    """
+    rng = np.random.default_rng(seed)
+    end = end or date.today() - timedelta(days=1)
+    first = (end - timedelta(days=days - 1)).toordinal()
+    slot_ids = np.array([s["slot_id"] for s in slots])
+    slot_region = np.array([s.get("region") for s in slots])
+    slot_weight = np.array([float(s.get("estimated_daily_impressions") or 1) for s in slots])
+
+    parts, next_person = [], 0
+    for cohort in cohorts:
+        size = int(cohort["cohort_size"] or 0)
+        count = int(round(float(cohort["total_impressions"] or 0) * days / LIFETIME_DAYS))
+        if not size or not count:
+            continue
+        local = slot_region == cohort.get("region")
+        eligible = np.flatnonzero(local) if local.any() else np.arange(len(slots))
+        weights = slot_weight[eligible] / slot_weight[eligible].sum()
+        propensity = rng.gamma(0.8, size=size)
+        persons = rng.choice(size, size=count, p=propensity / propensity.sum()) + next_person
+        parts.append((
+            np.full(count, cohort["cohort_id"]),
+            slot_ids[eligible[rng.choice(len(eligible), size=count, p=weights)]],
+            first + rng.integers(0, days, size=count),
+            persons,
+        ))
+        next_person += size
+    if not parts:
+        empty = np.empty(0, dtype=np.int64)
+        return ExposureLog(np.empty(0, dtype=str), np.empty(0, dtype=str), empty, empty)
+    return ExposureLog(*(np.concatenate(column) for column in zip(*parts)))
+
+
+def _lower(table) -> List[Dict[str, object]]:
+    return table.rename_columns([c.lower() for c in table.column_names]).to_pylist()
+
+
+def build_reach_store(fetch, days: int = 28, seed: int = 0) -> ReachStore:
+    """ReachStore over simulated exposures; ``fetch(name, sql)`` returns a pyarrow.Table."""
+    cohorts = _lower(fetch("reach.cohorts", COHORTS_QUERY))
+    slots = _lower(fetch("reach.slots", SLOTS_QUERY))
+    store = ReachStore.from_exposures(simulate_exposures(cohorts, slots, days=days, seed=seed))
+    store.cohort_info = {c["cohort_id"]: c for c in cohorts}
+    store.slot_info = {s["slot_id"]: s for s in slots}
+    return store
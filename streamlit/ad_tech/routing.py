@@ -0,0 +1,350 @@
+"""
+=============================================================================
+PatientPoint Ad Tech Demo - Query Routing & Warehouse Keep-Warm
+=============================================================================
+AD_TECH_WH is MEDIUM with AUTO_SUSPEND = 60, so the first page view after a
+minute of idle pays a warehouse resume. The router decides per query:
+
+  cache      : the shared Arrow result cache already has the answer
+  snapshot   : cheap dashboard aggregate, warehouse suspended, and the local
+               snapshot is recent enough -> answer locally, no resume
+  warehouse  : expensive or must-be-fresh queries, or the warehouse is
+               already running (resumes it if needed)
+
+KeepWarmScheduler (optional) learns traffic per 5-minute slot of the week
+and pings the warehouse before it would auto-suspend, only during slots
+that usually see traffic.
+
+A snapshot read that fails (missing or half-written files, schema drift)
+falls back to the warehouse and counts as router.snapshot_fallbacks.
+Resumes, resume penalties, resumes avoided, estimated latency saved and
+keep-warm credits are reported to metrics.registry under ``router.``,
+``warehouse.`` and ``keepwarm.``.
+=============================================================================
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Sequence, Union
+
+from .data_access import ArrowResultCache, cache_key, fetch_arrow, result_cache
+from .metrics import MetricsRegistry, registry
+
+WAREHOUSE = "AD_TECH_WH"
+AUTO_SUSPEND_SECONDS = 60              # setup/01_database_setup.sql
+CREDITS_PER_HOUR = 4                   # MEDIUM
+DEFAULT_RESUME_SECONDS = 2.0           # prior until a resume is observed
+STATE_POLL_SECONDS = 15
+MAX_SNAPSHOT_STALENESS = 3600
+EWMA_ALPHA = 0.2
+
+# Non-deterministic, so it can't be answered from the result cache and
+# actually keeps the warehouse running
+KEEPALIVE_SQL = (
+    "SELECT MAX(total_impressions) + UNIFORM(0, 1, RANDOM()) AS PING "
+    "FROM AD_TECH.ANALYTICS.T_CAMPAIGN_PERFORMANCE"
+)
+
+
+def _ewma(previous: Optional[float], value: float) -> float:
+    return value if previous is None else previous + EWMA_ALPHA * (value - previous)
+
+
+# =============================================================================
+# Warehouse state
+# =============================================================================
+class WarehouseMonitor:
+    """
+    Tracks whether the warehouse is running. Our own queries mark it warm
+    for AUTO_SUSPEND seconds; beyond that, SHOW WAREHOUSES is polled (a
+    metadata query that does not resume it) at most every poll_seconds.
+    """
+
+    def __init__(self, engine, warehouse: str = WAREHOUSE,
+                 auto_suspend: float = AUTO_SUSPEND_SECONDS,
+                 poll_seconds: float = STATE_POLL_SECONDS,
+                 clock: Callable[[], float] = time.time):
+        self.engine = engine
+        self.warehouse = warehouse
+        self.auto_suspend = auto_suspend
+        self.poll_seconds = poll_seconds
+        self.clock = clock
+        self.local = getattr(engine, "connection", None) is None
+        self.last_activity: Optional[float] = None
+        self._polled_at: Optional[float] = None
+        self._polled_state = "unknown"
+        self._lock = threading.Lock()
+
+    def _poll(self) -> str:
+        try:
+            rows = self.engine.sql(f"SHOW WAREHOUSES LIKE '{self.warehouse}'").collect()
+            return str(rows[0]["state"]).lower() if rows else "unknown"
+        except Exception:
+            return "unknown"
+
+    def state(self) -> str:
+        """``local``, ``started``, ``suspended``, ``resuming`` or ``unknown``."""
+        if self.local:
+            return "local"
+        now = self.clock()
+        with self._lock:
+            if self.last_activity is not None and now - self.last_activity < self.auto_suspend:
+                return "started"
+            if self._polled_at is None or now - self._polled_at >= self.poll_seconds:
+                self._polled_state = self._poll()
+                self._polled_at = now
+            return self._polled_state
+
+    def is_warm(self) -> bool:
+        return self.state() in ("local", "started")
+
+    def note_activity(self) -> None:
+        with self._lock:
+            self.last_activity = self.clock()
+            self._polled_state = "started"
+
+
+# =============================================================================
+# Router
+# =============================================================================
+@dataclass
+class RoutedResult:
+    data: object
+    route: str           # cache | snapshot | warehouse
+    seconds: float
+    resumed: bool = False
+    reason: str = ""
+    as_of: Optional[float] = None    # when the data was read at its source; None for a cache hit
+
+
+class QueryRouter:
+    """Sends each dashboard query to the cheapest source that can answer it."""
+
+    def __init__(self, engine, snapshots=None, monitor: Optional[WarehouseMonitor] = None,
+                 cache: Optional[ArrowResultCache] = None,
+                 metrics: MetricsRegistry = registry,
+                 max_staleness: float = MAX_SNAPSHOT_STALENESS,
+                 traffic: Optional["TrafficModel"] = None,
+                 clock: Callable[[], float] = time.time):
+        self.engine = engine
+        self.snapshots = snapshots
+        self.monitor = monitor or WarehouseMonitor(engine, clock=clock)
+        self.cache = cache or result_cache()
+        self.metrics = metrics
+        self.max_staleness = max_staleness
+        self.traffic = traffic or TrafficModel()
+        self.clock = clock
+        self.resume_seconds: Optional[float] = None
+        self._warm_seconds: Dict[str, float] = {}
+        self._shadow_last: Optional[float] = None   # when the warehouse would last have run
+        self._lock = threading.Lock()
+
+    def _snapshot_age(self, table: Union[str, Sequence[str], None]) -> Optional[float]:
+        """Age of the oldest snapshot ``table`` needs, or None if one is missing or too stale."""
+        if self.snapshots is None or table is None:
+            return None
+        age = 0.0
+        for name in ((table,) if isinstance(table, str) else table):
+            freshness = self.snapshots.freshness(name)
+            if freshness is None or freshness["age_seconds"] > self.max_staleness:
+                return None
+            age = max(age, freshness["age_seconds"])
+        return age
+
+    def estimated_resume_seconds(self) -> float:
+        return self.resume_seconds if self.resume_seconds is not None else DEFAULT_RESUME_SECONDS
+
+    def fetch(self, name: str, sql: str, table: Union[str, Sequence[str], None] = None,
+              snapshot: Optional[Callable] = None, cheap: bool = True,
+              fresh: bool = False, ttl: Optional[float] = None) -> RoutedResult:
+        """
+        Answer ``sql`` (a dashboard query called ``name``). ``snapshot(store)``
+        computes the same result from the local snapshot of ``table`` (or of
+        every table in it); ``ttl`` overrides the result cache TTL.
+        """
+        start = self.clock()
+        self.traffic.record(start)
+        self.metrics.inc("router.requests")
+        key = cache_key(self.engine, sql)
+
+        if not fresh:
+            cached = self.cache.get(key)
+            if cached is not None:
+                return self._done(name, RoutedResult(cached, "cache", self.clock() - start, reason="result cache"))
+
+        state = self.monitor.state()
+        warm = state in ("local", "started")
+        fallback = ""
+        age = self._snapshot_age(table) if cheap and not fresh and not warm and snapshot is not None else None
+        if age is not None:
+            try:
+                data = snapshot(self.snapshots)
+            except Exception as e:
+                # Missing or half-written files, schema drift: the warehouse still has the answer
+                self.metrics.inc("router.snapshot_fallbacks")
+                fallback = f"snapshot failed ({type(e).__name__})"
+            else:
+                return self._snapshot_done(name, data, start, state, start - age)
+
+        data = fetch_arrow(self.engine, sql)
+        elapsed = self.clock() - start
+        data = self.cache.put(key, data, ttl, cost=elapsed)
+        # Only a known suspended warehouse resumes; with the state unknown the
+        # latency could be either, so neither estimate learns from it
+        resumed = state in ("suspended", "resuming")
+        self.monitor.note_activity()
+        with self._lock:
+            if resumed:
+                penalty = max(0.0, elapsed - self._warm_seconds.get(name, 0.0))
+                self.resume_seconds = _ewma(self.resume_seconds, penalty)
+            elif warm:
+                self._warm_seconds[name] = _ewma(self._warm_seconds.get(name), elapsed)
+        if resumed:
+            self.metrics.inc("warehouse.resumes")
+            self.metrics.observe("warehouse.resume_penalty", penalty)
+        reason = fallback or ("expensive" if not cheap else "fresh" if fresh else f"warehouse {state}")
+        return self._done(name, RoutedResult(data, "warehouse", elapsed, resumed, reason, as_of=start))
+
+    def _snapshot_done(self, name: str, data, start: float, state: str, as_of: float) -> RoutedResult:
+        result = RoutedResult(data, "snapshot", self.clock() - start, reason=f"warehouse {state}", as_of=as_of)
+        saved = self._warm_seconds.get(name, 0.0) - result.seconds
+        with self._lock:
+            # Only the first query of a would-be active period pays the resume
+            if self._shadow_last is None or start - self._shadow_last >= self.monitor.auto_suspend:
+                saved += self.estimated_resume_seconds()
+                self.metrics.inc("router.resumes_avoided")
+            self._shadow_last = start
+        self.metrics.add("router.saved_seconds", max(0.0, saved))
+        return self._done(name, result)
+
+    def _done(self, name: str, result: RoutedResult) -> RoutedResult:
+        self.metrics.inc(f"router.route.{result.route}")
+        self.metrics.observe(f"router.{result.route}", result.seconds)
+        return result
+
+    def allow_background_refresh(self) -> bool:
+        """Refresh snapshots only while warm, unless one is getting too old."""
+        if self.monitor.is_warm() or self.snapshots is None:
+            return True
+        from .snapshots import SNAPSHOT_TABLES
+
+        for table in SNAPSHOT_TABLES:
+            freshness = self.snapshots.freshness(table)
+            if freshness is None or freshness["age_seconds"] > self.max_staleness * 0.8:
+                return True
+        return False
+
+    def stats(self) -> Dict[str, object]:
+        report = self.metrics.snapshot("router.")
+        warehouse = self.metrics.snapshot("warehouse.")
+        keepwarm = self.metrics.snapshot("keepwarm.")
+        for part in (warehouse, keepwarm):
+            for section, values in part.items():
+                report[section].update(values)
+        report["state"] = self.monitor.state()
+        report["estimated_resume_seconds"] = self.estimated_resume_seconds()
+        return report
+
+
+# =============================================================================
+# Traffic-driven keep-warm
+# =============================================================================
+class TrafficModel:
+    """
+    Exponentially decayed request counts per ``slot_seconds`` slot of the
+    week (UTC). ``score(ts)`` is roughly "requests seen in this slot on a
+    typical recent week".
+    """
+
+    WEEK = 7 * 24 * 3600
+
+    def __init__(self, slot_seconds: int = 300, half_life_days: float = 7.0):
+        self.slot_seconds = slot_seconds
+        self.half_life = half_life_days * 24 * 3600
+        slots = self.WEEK // slot_seconds
+        self._values: List[float] = [0.0] * slots
+        self._updated: List[float] = [0.0] * slots
+        self._lock = threading.Lock()
+
+    def _slot(self, ts: float) -> int:
+        return int(ts % self.WEEK) // self.slot_seconds
+
+    def _decayed(self, slot: int, ts: float) -> float:
+        value = self._values[slot]
+        if value and ts > self._updated[slot]:
+            value *= 0.5 ** ((ts - self._updated[slot]) / self.half_life)
+        return value
+
+    def record(self, ts: float) -> None:
+        slot = self._slot(ts)
+        with self._lock:
+            self._values[slot] = self._decayed(slot, ts) + 1.0
+            self._updated[slot] = ts
+
+    def score(self, ts: float) -> float:
+        with self._lock:
+            return self._decayed(self._slot(ts), ts)
+
+
+class KeepWarmScheduler:
+    """
+    Pings the warehouse every ``interval`` seconds (below AUTO_SUSPEND) while
+    the current or upcoming slots usually see at least ``min_requests``.
+    Each ping's cost is booked as ``interval`` seconds of warehouse time.
+    """
+
+    def __init__(self, router: QueryRouter, min_requests: float = 2.0,
+                 lookahead_slots: int = 1, interval: Optional[float] = None,
+                 credits_per_hour: float = CREDITS_PER_HOUR):
+        self.router = router
+        self.min_requests = min_requests
+        self.lookahead_slots = lookahead_slots
+        self.interval = interval or router.monitor.auto_suspend * 0.75
+        self.credits_per_hour = credits_per_hour
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def expected(self, now: float) -> float:
+        traffic = self.router.traffic
+        return max(traffic.score(now + k * traffic.slot_seconds) for k in range(self.lookahead_slots + 1))
+
+    def tick(self, now: Optional[float] = None) -> bool:
+        """One scheduling decision; True if a keep-alive ping was sent."""
+        router = self.router
+        if router.monitor.local:
+            return False
+        now = router.clock() if now is None else now
+        if self.expected(now) < self.min_requests:
+            return False
+        last = router.monitor.last_activity
+        if last is not None and last + router.monitor.auto_suspend - now > self.interval:
+            return False   # still running at the next tick without a ping
+        was_warm = router.monitor.is_warm()
+        fetch_arrow(router.engine, KEEPALIVE_SQL)
+        router.monitor.note_activity()
+        metrics = router.metrics
+        metrics.inc("keepwarm.pings")
+        if not was_warm:
+            metrics.inc("keepwarm.resumes")
+        metrics.add("keepwarm.credits", self.interval / 3600 * self.credits_per_hour)
+        return True
+
+    def _loop(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.tick()
+            except Exception:
+                self.router.metrics.inc("keepwarm.errors")
+
+    def start(self) -> "KeepWarmScheduler":
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._loop, name="keep-warm", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
@@ -0,0 +1,399 @@
+"""
+=============================================================================
+PatientPoint Ad Tech Demo - Runtime Providers
+=============================================================================
+Process-wide, lazily created singletons shared by every page and session:
+
+- get_session()      : the Snowpark session, or None outside Snowflake.
+                       Snowpark is imported on the first call only.
+- get_local_engine() : the local demo-data engine (seed rows, daily facts
+                       and period rollups), built on first use.
+- get_engine()       : whichever of the two the app should query.
+- get_agent_queue()  : the agent request queue shared by all chat sessions,
+                       calling Cortex in Snowflake and demo answers locally.
+- get_snapshot_store(): local columnar snapshots of the analytics tables,
+                       kept fresh by a background refresher thread.
+- get_query_router() : routes dashboard queries between the result cache,
+                       the snapshots and the warehouse (see routing.py).
+- get_summary()      : headline numbers shared by every page, computed once
+                       per refresh interval in the background.
+- get_inventory_search(): the inventory search index and re-rank features,
+                       patched from table changes by a background refresher.
+- get_verified_queries(): answers hot analyst questions from the verified
+                       query repository, through the query router.
+- get_answer_engine(): answers bid, audience, comparison, inventory and
+                       partner ROAS questions from the data, without a model.
+- get_reach_store()  : per cohort / slot / day reach and frequency sketches
+                       for audience planning, built on first use.
+- get_booking_engine(): inventory capacity calendars and reservations,
+                       loaded once and written through on every booking.
+- get_kpi_monitor()  : streaming anomaly detection on campaign and slot KPIs,
+                       fed new days of T_CAMPAIGN_DAILY by a refresher.
+- get_experiments()  : bid strategy A/B tests with sequential decisions,
+                       seeded with simulated traffic in demo mode.
+- lazy_module(name)  : a module proxy that imports on first attribute access,
+                       so heavy modules (pandas, json, ...) are only loaded
+                       by the code paths that use them.
+
+Streamlit keeps imported modules alive across reruns, so each provider pays
+its setup cost once per process rather than on every rerun.
+=============================================================================
+"""
+
+from __future__ import annotations
+
+import importlib
+import threading
+from typing import Any, Optional
+
+_UNSET = object()
+_lock = threading.Lock()
+_session: Any = _UNSET
+_local_engine: Any = _UNSET
+_agent_queue: Any = _UNSET
+_snapshots: Any = _UNSET
+_router: Any = _UNSET
+_summary: Any = _UNSET
+_search: Any = _UNSET
+_verified: Any = _UNSET
+_answers: Any = _UNSET
+_reach: Any = _UNSET
+_booking: Any = _UNSET
+_monitor: Any = _UNSET
+_experiments: Any = _UNSET
+
+
+class LazyModule:
+    """Imports ``name`` the first time any attribute is read."""
+
+    def __init__(self, name: str):
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attr: str):
+        module = self._module
+        if module is None:
+            module = self._module = importlib.import_module(self._name)
+        return getattr(module, attr)
+
+    def __repr__(self) -> str:
+        state = "loaded" if self._module is not None else "not loaded"
+        return f"<lazy module {self._name!r} ({state})>"
+
+
+def lazy_module(name: str) -> LazyModule:
+    return LazyModule(name)
+
+
+def get_session():
+    """The active Snowpark session, or ``None`` when not running in Snowflake."""
+    global _session
+    if _session is _UNSET:
+        with _lock:
+            if _session is _UNSET:
+                try:
+                    from snowflake.snowpark.context import get_active_session
+                    _session = get_active_session()
+                except Exception:
+                    _session = None
+    return _session
+
+
+def in_snowflake() -> bool:
+    return get_session() is not None
+
+
+def get_local_engine():
+    """Local demo-data engine with daily facts, period rollups and partner tables loaded."""
+    global _local_engine
+    if _local_engine is _UNSET:
+        with _lock:
+            if _local_engine is _UNSET:
+                from .engine import LocalEngine
+                from .partners import load_local_partner_tables
+                from .trends import load_local_daily_facts
+
+                engine = LocalEngine()
+                load_local_daily_facts(engine)
+                load_local_partner_tables(engine)
+                _local_engine = engine
+    return _local_engine
+
+
+def get_engine():
+    """The Snowpark session when connected, otherwise the local engine."""
+    session = get_session()
+    return session if session is not None else get_local_engine()
+
+
+def get_agent_queue(**limits):
+    """
+    Process-wide agent request queue. ``limits`` (max_concurrent,
+    per_user_limit, ...) only apply on the call that creates it.
+    """
+    global _agent_queue
+    if _agent_queue is _UNSET:
+        session = get_session()
+        with _lock:
+            if _agent_queue is _UNSET:
+                from .agent import call_cortex_agent, demo_agent
+                from .agent_queue import AgentRequestQueue
+
+                if session is not None:
+                    def handler(prompt, timeout, cancel_event):
+                        return call_cortex_agent(session, prompt, timeout, cancel_event)
+                else:
+                    handler = demo_agent
+                _agent_queue = AgentRequestQueue(handler, **limits)
+    return _agent_queue
+
+
+def get_snapshot_store(refresh: bool = True):
+    """
+    Snapshot store for the dashboards. The first call starts a background
+    refresher against get_engine(); until its first export finishes,
+    ``store.available(table)`` is False and pages query the engine directly.
+    """
+    global _snapshots
+    if _snapshots is _UNSET:
+        engine = get_engine() if refresh else None
+        with _lock:
+            if _snapshots is _UNSET:
+                from .snapshots import SnapshotRefresher, SnapshotStore
+
+                store = SnapshotStore()
+                if engine is not None:
+                    store.refresher = SnapshotRefresher(engine, store.root).start()
+                _snapshots = store
+    return _snapshots
+
+
+def get_query_router(keep_warm: bool = False):
+    """
+    Process-wide query router. It also gates the snapshot refresher so a
+    refresh doesn't resume a suspended warehouse, and with ``keep_warm``
+    (first call only) starts the traffic-driven keep-warm scheduler.
+    """
+    global _router
+    if _router is _UNSET:
+        engine = get_engine()
+        store = get_snapshot_store()
+        with _lock:
+            if _router is _UNSET:
+                from .routing import KeepWarmScheduler, QueryRouter
+
+                router = QueryRouter(engine, store)
+                if store.refresher is not None:
+                    store.refresher.gate = router.allow_background_refresh
+                router.keep_warm = KeepWarmScheduler(router).start() if keep_warm else None
+                _router = router
+    return _router
+
+
+def get_summary_service():
+    """The process-wide SummaryService, loading through the query router."""
+    global _summary
+    if _summary is _UNSET:
+        router = get_query_router()
+        with _lock:
+            if _summary is _UNSET:
+                from .summary import (
+                    REFRESH_SECONDS, SUMMARY_SQL, SUMMARY_TABLES, SummaryService, summary_from_snapshots,
+                )
+
+                def load():
+                    # A TTL under the refresh interval: each refresh reads its
+                    # source again instead of the result it cached last time
+                    result = router.fetch("summary", SUMMARY_SQL, table=SUMMARY_TABLES,
+                                          snapshot=summary_from_snapshots, ttl=REFRESH_SECONDS / 2)
+                    return result.data, result.as_of
+
+                _summary = SummaryService(load).start()
+    return _summary
+
+
+def get_summary():
+    """Current SummaryStats for headline metrics, or None if unavailable."""
+    return get_summary_service().get()
+
+
+def get_inventory_search():
+    """
+    Process-wide InventorySearch over T_INVENTORY_ANALYTICS. A
+    SearchIndexRefresher applies changed rows every minute, gated by the
+    query router like the snapshot refresher.
+    """
+    global _search
+    if _search is _UNSET:
+        engine = get_engine()
+        router = get_query_router()
+        with _lock:
+            if _search is _UNSET:
+                from .search import InventorySearch
+                from .search_refresh import SearchIndexRefresher, change_source
+
+                source = change_source(engine)      # before the load, so no change is missed
+                search = InventorySearch.from_engine(engine)
+                search.refresher = SearchIndexRefresher(
+                    search, engine, source, gate=router.allow_background_refresh
+                ).start()
+                _search = search
+    return _search
+
+
+def get_verified_queries():
+    """
+    Process-wide VerifiedQueryLayer. Slot values (therapeutic areas,
+    partners, regions, ...) are read once through the query router.
+    """
+    global _verified
+    if _verified is _UNSET:
+        router = get_query_router()
+        with _lock:
+            if _verified is _UNSET:
+                from .verified_queries import (
+                    QueryMatcher, VerifiedQueryLayer, load_synonyms, load_verified_queries, load_vocabulary,
+                )
+
+                def run(name, sql, table):
+                    return router.fetch(name, sql, table=table).data
+
+                vocabulary = load_vocabulary(lambda sql: router.fetch("verified.vocabulary", sql).data)
+                matcher = QueryMatcher(load_verified_queries(), load_synonyms(), vocabulary)
+                _verified = VerifiedQueryLayer(matcher, run)
+    return _verified
+
+
+def get_answer_engine():
+    """
+    Process-wide AnswerEngine (see answers.py). Its vocabulary is read once
+    and its queries run through the query router.
+    """
+    global _answers
+    if _answers is _UNSET:
+        router = get_query_router()
+        with _lock:
+            if _answers is _UNSET:
+                from .answers import AnswerEngine, load_vocabulary
+
+                def run(name, sql, table):
+                    return router.fetch(name, sql, table=table).data
+
+                vocabulary = load_vocabulary(lambda sql: router.fetch("answers.vocabulary", sql).data)
+                _answers = AnswerEngine(vocabulary, run)
+    return _answers
+
+
+def get_reach_store():
+    """Process-wide ReachStore over the exposure feed (see reach.py)."""
+    global _reach
+    if _reach is _UNSET:
+        router = get_query_router()
+        with _lock:
+            if _reach is _UNSET:
+                from .reach import build_reach_store
+
+                _reach = build_reach_store(lambda name, sql: router.fetch(name, sql).data)
+    return _reach
+
+
+def get_booking_engine():
+    """
+    Process-wide BookingEngine (see booking.py). Reservations are read and
+    written on the engine directly, never through the result cache.
+    """
+    global _booking
+    if _booking is _UNSET:
+        engine = get_engine()
+        with _lock:
+            if _booking is _UNSET:
+                from .booking import BookingEngine
+
+                _booking = BookingEngine.from_engine(engine)
+    return _booking
+
+
+def get_kpi_monitor():
+    """
+    Process-wide KpiMonitor (see anomalies.py), replayed over the daily
+    history on first use; a MonitorRefresher ingests each new day, gated by
+    the query router like the snapshot refresher.
+    """
+    global _monitor
+    if _monitor is _UNSET:
+        engine = get_engine()
+        router = get_query_router()
+        with _lock:
+            if _monitor is _UNSET:
+                from .anomalies import KpiMonitor, MonitorRefresher
+
+                monitor = KpiMonitor.from_engine(engine)
+                monitor.poll(engine)
+                monitor.refresher = MonitorRefresher(
+                    monitor, engine, gate=router.allow_background_refresh
+                ).start()
+                _monitor = monitor
+    return _monitor
+
+
+def get_experiments():
+    """
+    Process-wide ExperimentEngine (see experiments.py), loaded from the
+    experiment tables. The local demo data gets a few experiments with
+    simulated bid traffic so the Optimizer has results to show.
+    """
+    global _experiments
+    if _experiments is _UNSET:
+        session = get_session()
+        engine = get_engine()
+        with _lock:
+            if _experiments is _UNSET:
+                from .experiments import ExperimentEngine, seed_demo_experiments
+
+                experiments = ExperimentEngine.from_engine(engine)
+                if session is None and not len(experiments):
+                    seed_demo_experiments(experiments, engine)
+                _experiments = experiments
+    return _experiments
+
+
+def reset(
+    session: Optional[object] = _UNSET,
+    local_engine: Optional[object] = _UNSET,
+    agent_queue: Optional[object] = _UNSET,
+) -> None:
+    """Replace or forget the cached providers (tools and load tests)."""
+    global _session, _local_engine, _agent_queue, _snapshots, _router, _summary, _search, _verified
+    global _answers, _reach, _booking, _monitor, _experiments
+    with _lock:
+        if hasattr(_agent_queue, "shutdown") and _agent_queue is not agent_queue:
+            _agent_queue.shutdown()
+        _session = session
+        _local_engine = local_engine
+        _agent_queue = agent_queue
+        refresher = getattr(_snapshots, "refresher", None)
+        if refresher is not None:
+            refresher.stop()
+        _snapshots = _UNSET
+        keep_warm = getattr(_router, "keep_warm", None)
+        if keep_warm is not None:
+            keep_warm.stop()
+        _router = _UNSET
+        if hasattr(_summary, "stop"):
+            _summary.stop()
+        _summary = _UNSET
+        refresher = getattr(_search, "refresher", None)
+        if refresher is not None:
+            refresher.stop()
+        _search = _UNSET
+        _verified = _UNSET
+        _answers = _UNSET
+        _reach = _UNSET
+        _booking = _UNSET
+        refresher = getattr(_monitor, "refresher", None)
+        if refresher is not None:
+            refresher.stop()
+        _monitor = _UNSET
+        if hasattr(_experiments, "flush"):
+            _experiments.flush()
+        _experiments = _UNSET
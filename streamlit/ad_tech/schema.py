@@ -0,0 +1,121 @@
+"""
+=============================================================================
+PatientPoint Ad Tech Demo - Schema-Driven Result Types
+=============================================================================
+Snowflake NUMBER(p,s) columns arrive as 16-byte decimal128 Arrow columns
+(and as Python Decimal objects once converted to pandas), which makes every
+aggregation and chart conversion slow and memory-heavy. The column types of
+the T_* tables are taken from the DDL in setup/02_demo_data.sql, and
+fetch_arrow() / iter_arrow_batches() cast each result column to a compact
+type as it is fetched:
+
+  VARCHAR(n <= 50), partner_name            -> dictionary (pandas category)
+  VARCHAR *_id and longer text              -> string (unchanged)
+  INT, NUMBER(p <= 9, 0)                    -> int32 (int64 if values overflow)
+  NUMBER(p > 9, 0)                          -> int64
+  NUMBER(p <= 10, s), e.g. roas, ctr_pct    -> float32
+  NUMBER(p > 10, s), e.g. NUMBER(18,2) money -> float64 (exact to the cent)
+  BOOLEAN                                   -> bool
+
+Columns outside the DDL (computed aliases such as AVG_ROAS) that hold
+decimals become float64; everything else, dates included, is left as
+fetched.
+=============================================================================
+"""
+
+from __future__ import annotations
+
+import functools
+from typing import Dict, Union
+
+from .data_access import CATEGORICAL_COLUMNS
+from .runtime import lazy_module
+from .seed import Column, load_seed_schema
+
+pa = lazy_module("pyarrow")
+pc = lazy_module("pyarrow.compute")
+
+CATEGORICAL_MAX_LENGTH = 50
+FLOAT32_MAX_PRECISION = 10
+INT32_MIN, INT32_MAX = -2**31, 2**31 - 1
+_WIDER = {("float32", "float64"), ("int32", "int64")}
+
+
+def column_type(column: Column) -> str:
+    """Compact type name for one DDL column: category, string, int32, int64, float32, float64 or bool."""
+    kind = column.type_name
+    if kind in ("VARCHAR", "TEXT", "STRING", "CHAR"):
+        if column.name.upper() in CATEGORICAL_COLUMNS:
+            return "category"
+        if column.name.endswith("_id") or (column.precision or 0) > CATEGORICAL_MAX_LENGTH:
+            return "string"
+        return "category"
+    if kind in ("INT", "INTEGER", "SMALLINT"):
+        return "int32"
+    if kind == "BIGINT":
+        return "int64"
+    if kind in ("NUMBER", "DECIMAL", "NUMERIC"):
+        precision = column.precision or 38
+        if not column.scale:
+            return "int32" if precision <= 9 else "int64"
+        return "float32" if precision <= FLOAT32_MAX_PRECISION else "float64"
+    if kind in ("FLOAT", "DOUBLE", "REAL"):
+        return "float64"
+    if kind == "BOOLEAN":
+        return "bool"
+    return "string"
+
+
+@functools.lru_cache(maxsize=1)
+def column_types() -> Dict[str, str]:
+    """``{COLUMN_NAME: type}`` over every T_* table (upper-case names)."""
+    types: Dict[str, str] = {}
+    for columns in load_seed_schema().values():
+        for column in columns:
+            kind = column_type(column)
+            previous = types.get(column.name.upper())
+            # Same name in two tables: keep the wider type
+            if previous is None or (previous, kind) in _WIDER:
+                types[column.name.upper()] = kind
+    return types
+
+
+def _cast(column, kind: str):
+    """``column`` as ``kind``, or None to keep it as fetched."""
+    source = column.type
+    numeric = pa.types.is_integer(source) or pa.types.is_decimal(source)
+    if kind == "category":
+        if pa.types.is_string(source) or pa.types.is_large_string(source):
+            return column.dictionary_encode()
+    elif kind in ("int32", "int64"):
+        if numeric and (not pa.types.is_decimal(source) or source.scale == 0):
+            if kind == "int32" and column.null_count < len(column):
+                bounds = pc.min_max(column)
+                if not INT32_MIN <= bounds["min"].as_py() <= bounds["max"].as_py() <= INT32_MAX:
+                    kind = "int64"    # e.g. a SUM kept the column name
+            return column.cast(getattr(pa, kind)())
+    elif kind in ("float32", "float64"):
+        if numeric or pa.types.is_floating(source):
+            return column.cast(getattr(pa, kind)(), safe=False)
+    elif kind == "bool":
+        if pa.types.is_integer(source):
+            return column.cast(pa.bool_())
+    return None
+
+
+def cast_result(data: Union["pa.Table", "pa.RecordBatch"]):
+    """A query result (Table or RecordBatch) with its columns in their compact types."""
+    types = column_types()
+    columns, changed = [], False
+    for name, column in zip(data.column_names, data.columns):
+        kind = types.get(name.upper())
+        if kind is None:
+            kind = "float64" if pa.types.is_decimal(column.type) else None
+        cast = _cast(column, kind) if kind is not None and kind != "string" else None
+        if cast is not None and cast.type != column.type:
+            column, changed = cast, True
+        columns.append(column)
+    if not changed:
+        return data
+    build = pa.RecordBatch.from_arrays if isinstance(data, pa.RecordBatch) else pa.Table.from_arrays
+    return build(columns, names=data.column_names, metadata=data.schema.metadata)
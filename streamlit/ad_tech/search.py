@@ -0,0 +1,406 @@
+"""
+=============================================================================
+PatientPoint Ad Tech Demo - Hybrid Inventory Search
+=============================================================================
+Inventory discovery as a two-stage retrieval pipeline:
+
+  1. candidates : top-N slots for the query text, from INVENTORY_SEARCH_SVC
+                  (Cortex Search) or, without it, a local BM25 index over the
+                  same search_text the service indexes
+  2. re-rank    : blend text relevance with business value from cached
+                  per-slot feature vectors, and return the top-k
+
+Features (normalized to 0..1 over the live slots):
+
+  value        : expected engagement per dollar, engagement_rate_pct / base_cpm
+                 (log scale)
+  availability : unsold share of the slot, 1 - fill_rate_pct / 100
+  reach        : estimated daily impressions (log scale)
+  premium      : is_premium
+
+Re-ranking is one gather plus a matrix-vector product over the candidate
+rows, so 1,000 candidates take well under a millisecond.
+
+Both the index and the features take changed rows in place
+(InventorySearch.apply), so search_refresh.py can keep them current from
+change streams instead of rebuilding on a timer.
+=============================================================================
+"""
+
+from __future__ import annotations
+
+import json
+import math
+import re
+import threading
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .data_access import fetch_arrow
+
+SEARCH_SERVICE = "AD_TECH.CORTEX.INVENTORY_SEARCH_SVC"
+INVENTORY_QUERY = "SELECT * FROM AD_TECH.ANALYTICS.T_INVENTORY_ANALYTICS"
+DEFAULT_CANDIDATES = 200
+DEFAULT_TOP_K = 20
+
+# Same concatenation as INVENTORY_SEARCH_SVC (setup/03_cortex_search.sql)
+SEARCH_TEXT_COLUMNS = ("slot_name", "facility_name", "facility_type", "city", "state", "region",
+                       "specialty_name", "screen_type", "placement_area", "daypart")
+# UI filter -> attribute
+FILTER_COLUMNS = {"specialty": "specialty_name", "region": "region", "daypart": "daypart"}
+FEATURES = ("value", "availability", "reach", "premium")
+RAW_FEATURES = ("base_cpm", "engagement_rate_pct", "fill_rate_pct", "estimated_daily_impressions", "is_premium")
+COMPACT_DEAD_RATIO = 0.25              # rebuild once this share of rows is deleted
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lower-case words with a plural 's' stripped ('displays' -> 'display')."""
+    return [t[:-1] if len(t) > 3 and t.endswith("s") and not t.endswith("ss") else t
+            for t in _TOKEN_RE.findall(text.lower())]
+
+
+def search_text(slot: Dict[str, object]) -> str:
+    text = " ".join(str(slot.get(c) or "") for c in SEARCH_TEXT_COLUMNS)
+    return text + (" premium" if slot.get("is_premium") else "")
+
+
+def _unit(values: np.ndarray, alive: Optional[np.ndarray] = None) -> np.ndarray:
+    live = values if alive is None else values[alive]
+    if not len(live):
+        return np.zeros_like(values, dtype=np.float32)
+    low, high = float(live.min()), float(live.max())
+    if high - low < 1e-12:
+        return np.zeros_like(values, dtype=np.float32)
+    return ((values - low) / (high - low)).astype(np.float32)
+
+
+# =============================================================================
+# Stage 1: candidates
+# =============================================================================
+class LocalSearchIndex:
+    """
+    BM25 over search_text. Postings hold (row ids, term frequencies) per
+    token and idf / length normalization are applied at query time, so
+    changed rows are patched in with add() / remove() instead of a rebuild.
+    """
+
+    def __init__(self, texts: Sequence[str], k1: float = 1.2, b: float = 0.75):
+        self.k1, self.b = k1, b
+        self.size = 0                       # live documents
+        self.lengths = np.zeros(0, dtype=np.float32)
+        self._total_length = 0.0
+        self._postings: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        self.add(range(len(texts)), texts)
+
+    def add(self, rows: Iterable[int], texts: Sequence[str]) -> None:
+        """Index ``texts`` as documents ``rows`` (rows not currently indexed)."""
+        rows = list(rows)
+        if not rows:
+            return
+        counts: Dict[str, Dict[int, int]] = defaultdict(dict)
+        lengths = np.empty(len(rows), dtype=np.float32)
+        for i, (row, text) in enumerate(zip(rows, texts)):
+            tokens = tokenize(text)
+            lengths[i] = len(tokens)
+            for token in tokens:
+                counts[token][row] = counts[token].get(row, 0) + 1
+
+        ids = np.asarray(rows, dtype=np.int32)
+        if ids.max() >= len(self.lengths):
+            self.lengths = np.concatenate([self.lengths, np.zeros(ids.max() + 1 - len(self.lengths), np.float32)])
+        self.lengths[ids] = lengths
+        self.size += len(rows)
+        self._total_length += float(lengths.sum())
+
+        for token, by_row in counts.items():
+            new_ids = np.fromiter(by_row.keys(), dtype=np.int32, count=len(by_row))
+            new_tf = np.fromiter(by_row.values(), dtype=np.float32, count=len(by_row))
+            current = self._postings.get(token)
+            if current is not None:
+                new_ids, new_tf = np.concatenate([current[0], new_ids]), np.concatenate([current[1], new_tf])
+            self._postings[token] = (new_ids, new_tf)
+
+    def remove(self, rows: Iterable[int], texts: Sequence[str]) -> None:
+        """Drop documents ``rows``; ``texts`` are what they were indexed with."""
+        rows = list(rows)
+        if not rows:
+            return
+        ids = np.asarray(rows, dtype=np.int32)
+        for token in {t for text in texts for t in tokenize(text)}:
+            posting = self._postings.get(token)
+            if posting is None:
+                continue
+            keep = ~np.isin(posting[0], ids)
+            if keep.all():
+                continue
+            if keep.any():
+                self._postings[token] = (posting[0][keep], posting[1][keep])
+            else:
+                del self._postings[token]
+        self.size -= len(rows)
+        self._total_length -= float(self.lengths[ids].sum())
+        self.lengths[ids] = 0
+
+    def scores(self, query: str) -> np.ndarray:
+        scores = np.zeros(len(self.lengths), dtype=np.float32)
+        k1, b = self.k1, self.b
+        avg_length = self._total_length / self.size if self.size else 1.0
+        for token in set(tokenize(query)):
+            posting = self._postings.get(token)
+            if posting is None:
+                continue
+            ids, tf = posting
+            idf = math.log(1 + (self.size - len(ids) + 0.5) / (len(ids) + 0.5))
+            norm = k1 * (1 - b + b * self.lengths[ids] / avg_length)
+            scores[ids] += idf * tf * (k1 + 1) / (tf + norm)
+        return scores
+
+    def top(self, query: str, limit: int, mask: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Row indices and BM25 scores of the best ``limit`` matches."""
+        scores = self.scores(query)
+        if mask is not None:
+            scores = np.where(mask, scores, 0.0)
+        hits = np.flatnonzero(scores > 0)
+        if len(hits) > limit:
+            hits = hits[np.argpartition(-scores[hits], limit - 1)[:limit]]
+        hits = hits[np.argsort(-scores[hits], kind="stable")]
+        return hits, scores[hits]
+
+
+def _sql_literal(text: str) -> str:
+    return "'" + text.replace("\\", "\\\\").replace("'", "''") + "'"
+
+
+def cortex_candidates(session, query: str, filters: Dict[str, object], limit: int) -> List[str]:
+    """Slot ids from INVENTORY_SEARCH_SVC, best first."""
+    request = {"query": query, "columns": ["slot_id"], "limit": limit}
+    clauses = [{"@eq": {FILTER_COLUMNS.get(k, k): v}} for k, v in filters.items()]
+    if clauses:
+        request["filter"] = clauses[0] if len(clauses) == 1 else {"@and": clauses}
+    sql = f"SELECT SNOWFLAKE.CORTEX.SEARCH_PREVIEW('{SEARCH_SERVICE}', {_sql_literal(json.dumps(request))}) AS RESULTS"
+    rows = session.sql(sql).collect()
+    if not rows:
+        return []
+    return [r["slot_id"] for r in json.loads(rows[0]["RESULTS"]).get("results", [])]
+
+
+# =============================================================================
+# Stage 2: re-rank
+# =============================================================================
+@dataclass
+class RerankWeights:
+    relevance: float = 0.55
+    value: float = 0.25
+    availability: float = 0.10
+    reach: float = 0.05
+    premium: float = 0.05
+
+    def vector(self) -> np.ndarray:
+        return np.array([getattr(self, f) for f in FEATURES], dtype=np.float32)
+
+
+class SlotFeatures:
+    """
+    Normalized feature matrix, one row per slot, plus slot_id -> row. The
+    raw inputs are kept so changed slots are patched in and the matrix
+    re-normalized over the live rows.
+    """
+
+    def __init__(self, slots: List[Dict[str, object]]):
+        self.raw = np.zeros((0, len(RAW_FEATURES)), dtype=np.float64)
+        self.alive = np.zeros(0, dtype=bool)
+        self.row: Dict[str, int] = {}
+        self.update(range(len(slots)), slots)
+
+    def update(self, rows: Iterable[int], slots: Sequence[Dict[str, object]]) -> None:
+        rows = np.fromiter(rows, dtype=np.int64)
+        if len(rows) and rows.max() >= len(self.raw):
+            grow = rows.max() + 1 - len(self.raw)
+            self.raw = np.vstack([self.raw, np.zeros((grow, len(RAW_FEATURES)))])
+            self.alive = np.concatenate([self.alive, np.zeros(grow, dtype=bool)])
+        if len(rows):
+            self.raw[rows] = [[float(s.get(c) or 0.0) for c in RAW_FEATURES] for s in slots]
+            self.alive[rows] = True
+        self.row.update((s["slot_id"], row) for s, row in zip(slots, rows.tolist()))
+        self._normalize()
+
+    def remove(self, slot_ids: Iterable[str]) -> List[int]:
+        rows = [self.row.pop(s) for s in slot_ids if s in self.row]
+        self.alive[rows] = False
+        self._normalize()
+        return rows
+
+    def _normalize(self) -> None:
+        cpm, engagement, fill, impressions, premium = self.raw.T
+        alive = self.alive
+        self.matrix = np.column_stack([
+            _unit(np.log1p(engagement / np.maximum(cpm, 0.01) * 100), alive),
+            _unit(1 - np.clip(fill, 0, 100) / 100, alive),
+            _unit(np.log1p(impressions), alive),
+            premium > 0,
+        ]).astype(np.float32)
+
+    def rows(self, slot_ids: Sequence[str]) -> np.ndarray:
+        row = self.row
+        return np.fromiter((row.get(s, -1) for s in slot_ids), dtype=np.int64, count=len(slot_ids))
+
+
+def rerank(features: SlotFeatures, rows: np.ndarray, relevance: np.ndarray, k: int,
+           weights: Optional[RerankWeights] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Top-``k`` of the candidate ``rows`` by blended score, best first; returns
+    (rows, scores). ``relevance`` is any monotone text score, scaled to 0..1.
+    """
+    weights = weights or RerankWeights()
+    relevance = np.asarray(relevance, dtype=np.float32)
+    top = float(relevance.max()) if len(relevance) else 0.0
+    blended = features.matrix[rows] @ weights.vector()
+    if top > 0:
+        blended += weights.relevance * (relevance / top)
+    if len(rows) > k:
+        keep = np.argpartition(-blended, k - 1)[:k]
+        rows, blended = rows[keep], blended[keep]
+    order = np.argsort(-blended, kind="stable")
+    return rows[order], blended[order]
+
+
+# =============================================================================
+# Pipeline
+# =============================================================================
+@dataclass
+class SearchResult:
+    slots: List[Dict[str, object]]
+    candidates: int
+    source: str            # cortex | local
+    retrieve_ms: float
+    rerank_ms: float
+
+
+def load_slots(engine) -> List[Dict[str, object]]:
+    """Every T_INVENTORY_ANALYTICS row as a dict with lower-case keys."""
+    table = fetch_arrow(engine, INVENTORY_QUERY)
+    return table.rename_columns([c.lower() for c in table.column_names]).to_pylist()
+
+
+class InventorySearch:
+    """
+    Candidates from Cortex Search or the local index, then re-ranked.
+    apply() patches changed slots into the index and features in place
+    (see search_refresh.py); searches and updates are serialized.
+    """
+
+    def __init__(self, slots: List[Dict[str, object]]):
+        self._lock = threading.RLock()
+        self.changes_applied = 0
+        self._build(slots)
+
+    def _build(self, slots: List[Dict[str, object]]) -> None:
+        self.slots = list(slots)
+        self.features = SlotFeatures(self.slots)
+        self.index = LocalSearchIndex([search_text(s) for s in self.slots])
+        self._columns = {a: np.array([s.get(a) for s in self.slots], dtype=object)
+                         for a in set(FILTER_COLUMNS.values())}
+        self.built_at = self.updated_at = time.time()
+
+    @classmethod
+    def from_engine(cls, engine) -> "InventorySearch":
+        return cls(load_slots(engine))
+
+    def reload(self, slots: List[Dict[str, object]]) -> None:
+        """Replace the whole inventory (full refresh)."""
+        with self._lock:
+            self._build(slots)
+
+    def apply(self, upserts: Sequence[Dict[str, object]], deletes: Sequence[str] = ()) -> int:
+        """
+        Apply changed rows: ``upserts`` are full slot rows (new or changed),
+        ``deletes`` slot ids. Only the touched postings and feature rows are
+        rewritten. Returns the number of slots changed.
+        """
+        latest = {s["slot_id"]: s for s in upserts}
+        with self._lock:
+            row_of = self.features.row
+            gone = [s for s in deletes if s in row_of and s not in latest]
+            changed = [row_of[s] for s in latest if s in row_of]
+            stale = [row_of[s] for s in gone] + changed
+            self.index.remove(stale, [search_text(self.slots[r]) for r in stale])
+            self.features.remove(gone)
+
+            new = [s for s in latest if s not in row_of]
+            rows = changed + list(range(len(self.slots), len(self.slots) + len(new)))
+            self.slots.extend(latest[s] for s in new)
+            for row, slot_id in zip(changed, (s for s in latest if s in row_of)):
+                self.slots[row] = latest[slot_id]
+            slots = [self.slots[r] for r in rows]
+            self.index.add(rows, [search_text(s) for s in slots])
+            self.features.update(rows, slots)
+            for attribute, values in self._columns.items():
+                if len(values) < len(self.slots):
+                    values = self._columns[attribute] = np.concatenate(
+                        [values, np.empty(len(self.slots) - len(values), dtype=object)])
+                values[rows] = [s.get(attribute) for s in slots]
+
+            if len(self.slots) - len(row_of) > COMPACT_DEAD_RATIO * len(self.slots):
+                self._build([self.slots[r] for r in sorted(row_of.values())])
+            self.changes_applied += len(latest) + len(gone)
+            self.updated_at = time.time()
+        return len(latest) + len(gone)
+
+    def _mask(self, filters: Dict[str, object], premium: Optional[bool]) -> Optional[np.ndarray]:
+        mask = None
+        for key, value in filters.items():
+            term = self._columns[FILTER_COLUMNS[key]] == value
+            mask = term if mask is None else mask & term
+        if premium is not None:
+            term = (self.features.matrix[:, FEATURES.index("premium")] > 0) == premium
+            mask = term if mask is None else mask & term
+        return mask
+
+    def search(self, query: str, filters: Optional[Dict[str, object]] = None,
+               premium: Optional[bool] = None, k: int = DEFAULT_TOP_K,
+               candidates: int = DEFAULT_CANDIDATES, session=None,
+               weights: Optional[RerankWeights] = None) -> SearchResult:
+        """
+        ``filters`` maps specialty / region / daypart to a value; ``premium``
+        keeps only premium (True) or standard (False) slots. With a
+        ``session`` the candidates come from Cortex Search.
+        """
+        filters = filters or {}
+        t0 = time.perf_counter()
+        ids = None
+        if session is not None:
+            try:
+                ids = cortex_candidates(session, query, filters, candidates)
+            except Exception:
+                ids = None
+
+        # The service call stays outside the lock so apply() is never held up by it
+        with self._lock:
+            if ids is not None:
+                rows = self.features.rows(ids)
+                rows = rows[rows >= 0]
+                if premium is not None:
+                    rows = rows[(self.features.matrix[rows, FEATURES.index("premium")] > 0) == premium]
+                # Service order is the relevance signal: 1.0 for the first hit
+                relevance = 1.0 - np.arange(len(rows), dtype=np.float32) / max(len(rows), 1)
+                source = "cortex"
+            else:
+                rows, relevance = self.index.top(query, candidates, self._mask(filters, premium))
+                source = "local"
+            t1 = time.perf_counter()
+            rows, scores = rerank(self.features, rows, relevance, k, weights)
+            t2 = time.perf_counter()
+
+            slots = []
+            for row, score in zip(rows.tolist(), scores.tolist()):
+                slot = dict(self.slots[row])
+                slot["score"] = round(score, 3)
+                slot.update({f: round(float(v), 2) for f, v in zip(FEATURES, self.features.matrix[row])})
+                slots.append(slot)
+        return SearchResult(slots, len(relevance), source, (t1 - t0) * 1e3, (t2 - t1) * 1e3)
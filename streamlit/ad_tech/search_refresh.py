@@ -0,0 +1,208 @@
+"""
+=============================================================================
+PatientPoint Ad Tech Demo - Change-Driven Search Index Refresh
+=============================================================================
+Keeps the app's InventorySearch (local BM25 index and re-rank features) as
+fresh as the Cortex Search services without rebuilding it. Every interval
+the refresher reads the rows of T_INVENTORY_ANALYTICS that changed since
+its last read and patches only those into the index:
+
+  Snowflake : CHANGES(INFORMATION => DEFAULT) since a server-time watermark
+              (change tracking from setup/07 or setup/08)
+  local     : LocalTableStream - SQLite triggers log the key of every
+              inserted, updated or deleted row, like a Snowflake stream
+
+A read that fails (change tracking off, watermark past retention) falls
+back to one full reload. Freshness and cost are recorded in the metrics
+registry:
+
+  search.refresh.runs / .rows / .full   counters
+  search.refresh.seconds                histogram of refresh time
+=============================================================================
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+
+from .data_access import fetch_arrow
+from .metrics import MetricsRegistry, registry
+from .search import InventorySearch, load_slots
+from .snapshots import _fetch_changes, _server_timestamp
+
+DEFAULT_REFRESH_SECONDS = 60           # matches the services' TARGET_LAG in setup/08
+SEARCH_TABLE = "T_INVENTORY_ANALYTICS"
+SEARCH_KEY = "slot_id"
+_KEY_CHUNK = 500                       # keys per IN (...) lookup
+
+
+@dataclass
+class ChangeBatch:
+    """Net changes: full rows for inserts / updates, keys for deletes."""
+    upserts: List[Dict[str, object]] = field(default_factory=list)
+    deletes: List[str] = field(default_factory=list)
+
+    def __len__(self) -> int:
+        return len(self.upserts) + len(self.deletes)
+
+
+def _lower(table) -> List[Dict[str, object]]:
+    return table.rename_columns([c.lower() for c in table.column_names]).to_pylist()
+
+
+# =============================================================================
+# Change sources
+# =============================================================================
+class TableChanges:
+    """Net changes from Snowflake's CHANGES clause since the previous read."""
+
+    def __init__(self, engine, table: str = SEARCH_TABLE, key: str = SEARCH_KEY):
+        self.engine, self.table, self.key = engine, table, key
+        self.watermark = _server_timestamp(engine)
+
+    def read(self) -> ChangeBatch:
+        # Take the new watermark first: a change racing the read shows up
+        # again next time, and applying it twice is harmless
+        watermark = _server_timestamp(self.engine)
+        rows = _lower(_fetch_changes(self.engine, self.table, self.watermark))
+        self.watermark = watermark
+        batch = ChangeBatch()
+        for row in rows:
+            if row.pop("metadata$action") == "INSERT":
+                row.pop("metadata$isupdate", None)
+                row.pop("metadata$row_id", None)
+                batch.upserts.append(row)
+        upserted = {row[self.key] for row in batch.upserts}
+        batch.deletes = sorted({row[self.key] for row in rows} - upserted)
+        return batch
+
+
+class LocalTableStream:
+    """
+    Stream stand-in for the LocalEngine: triggers log the key of every
+    inserted, updated or deleted row, and read() returns the current rows
+    for the keys logged since the previous read.
+    """
+
+    def __init__(self, engine, table: str = SEARCH_TABLE, key: str = SEARCH_KEY):
+        self.engine, self.table, self.key = engine, table, key
+        self.log = f"{table}__STREAM"
+        engine.executescript(f"""
+            CREATE TABLE IF NOT EXISTS {self.log} (seq INTEGER PRIMARY KEY AUTOINCREMENT, {key} TEXT);
+            CREATE TRIGGER IF NOT EXISTS {self.log}_INSERT AFTER INSERT ON {table}
+                BEGIN INSERT INTO {self.log} ({key}) VALUES (NEW.{key}); END;
+            CREATE TRIGGER IF NOT EXISTS {self.log}_UPDATE AFTER UPDATE ON {table}
+                BEGIN INSERT INTO {self.log} ({key}) VALUES (OLD.{key}), (NEW.{key}); END;
+            CREATE TRIGGER IF NOT EXISTS {self.log}_DELETE AFTER DELETE ON {table}
+                BEGIN INSERT INTO {self.log} ({key}) VALUES (OLD.{key}); END;
+        """)
+        self.offset = engine.execute(f"SELECT COALESCE(MAX(seq), 0) AS seq FROM {self.log}")[0]["seq"]
+
+    def read(self) -> ChangeBatch:
+        logged = self.engine.execute(
+            f"SELECT seq, {self.key} AS key FROM {self.log} WHERE seq > ? ORDER BY seq", [self.offset]
+        )
+        if not logged:
+            return ChangeBatch()
+        keys = list(dict.fromkeys(r["key"] for r in logged))
+        batch = ChangeBatch()
+        for i in range(0, len(keys), _KEY_CHUNK):
+            chunk = keys[i:i + _KEY_CHUNK]
+            marks = ", ".join("?" for _ in chunk)
+            batch.upserts.extend(_lower(fetch_arrow(
+                self.engine, f"SELECT * FROM {self.table} WHERE {self.key} IN ({marks})", chunk
+            )))
+        present = {row[self.key] for row in batch.upserts}
+        batch.deletes = [k for k in keys if k not in present]
+        self.offset = logged[-1]["seq"]
+        self.engine.execute(f"DELETE FROM {self.log} WHERE seq <= ?", [self.offset])
+        return batch
+
+
+def change_source(engine, table: str = SEARCH_TABLE, key: str = SEARCH_KEY):
+    """TableChanges on a Snowflake session, LocalTableStream on the LocalEngine."""
+    if getattr(engine, "connection", None) is not None:
+        return TableChanges(engine, table, key)
+    return LocalTableStream(engine, table, key)
+
+
+# =============================================================================
+# Refresher
+# =============================================================================
+class SearchIndexRefresher:
+    """
+    Daemon thread that applies change batches to ``search`` every
+    ``interval`` seconds. ``gate`` works as for the SnapshotRefresher.
+    Create the source before loading ``search`` so no change falls between.
+    """
+
+    def __init__(self, search: InventorySearch, engine, source=None,
+                 interval: float = DEFAULT_REFRESH_SECONDS,
+                 gate: Optional[Callable[[], bool]] = None,
+                 metrics: MetricsRegistry = registry,
+                 clock: Callable[[], float] = time.time):
+        self.search = search
+        self.engine = engine
+        self.source = source if source is not None else change_source(engine)
+        self.interval = interval
+        self.gate = gate
+        self.metrics = metrics
+        self.clock = clock
+        self.last_run: Optional[float] = None
+        self.last_rows = 0
+        self.last_error: Optional[str] = None
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def refresh(self) -> int:
+        """Apply pending changes now; returns the number of slots changed."""
+        t0 = time.perf_counter()
+        try:
+            batch = self.source.read()
+            applied = self.search.apply(batch.upserts, batch.deletes) if batch else 0
+            self.last_error = None
+        except Exception as e:
+            self.last_error = str(e)
+            self.source = change_source(self.engine)
+            slots = load_slots(self.engine)
+            self.search.reload(slots)
+            applied = len(slots)
+            self.metrics.inc("search.refresh.full")
+        self.metrics.inc("search.refresh.runs")
+        self.metrics.inc("search.refresh.rows", applied)
+        self.metrics.observe("search.refresh.seconds", time.perf_counter() - t0)
+        self.last_run = self.clock()
+        self.last_rows = applied
+        return applied
+
+    def lag(self) -> Optional[float]:
+        """Upper bound on index staleness: seconds since the last refresh."""
+        return None if self.last_run is None else self.clock() - self.last_run
+
+    def _loop(self) -> None:
+        while not self._stop.is_set():
+            if self.gate is None or self.gate():
+                try:
+                    self.refresh()
+                except Exception as e:
+                    self.last_error = str(e)
+            self._wake.wait(self.interval)
+            self._wake.clear()
+
+    def start(self) -> "SearchIndexRefresher":
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._loop, name="search-refresh", daemon=True)
+            self._thread.start()
+        return self
+
+    def trigger(self) -> None:
+        self._wake.set()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._wake.set()
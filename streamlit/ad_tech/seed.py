@@ -0,0 +1,195 @@
+"""
+=============================================================================
+PatientPoint Ad Tech Demo - Seed Script Parser
+=============================================================================
+Reads the curated tables straight out of setup/02_demo_data.sql so that
+local tooling (the local engine, load tests, benchmarks) works from exactly
+the same rows that get loaded into Snowflake. Only the small SQL subset used
+by that script is understood: CREATE OR REPLACE TABLE column lists and
+multi-row INSERT ... VALUES statements.
+=============================================================================
+"""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+SEED_SCRIPT = Path(__file__).resolve().parents[2] / "setup" / "02_demo_data.sql"
+
+_CREATE_RE = re.compile(
+    r"CREATE\s+OR\s+REPLACE\s+TABLE\s+(\w+)\s*\((.*?)\);",
+    re.IGNORECASE | re.DOTALL,
+)
+_INSERT_RE = re.compile(r"INSERT\s+INTO\s+(\w+)\s+VALUES", re.IGNORECASE)
+_COLUMN_RE = re.compile(r"^\s*(\w+)\s+(\w+)(?:\(([\d,\s]+)\))?", re.IGNORECASE)
+_DATEADD_RE = re.compile(
+    r"DATEADD\(\s*day\s*,\s*(-?\d+)\s*,\s*CURRENT_DATE\s*\)", re.IGNORECASE
+)
+
+
+@dataclass(frozen=True)
+class Column:
+    """A column from the seed DDL, e.g. ``budget NUMBER(18,2)``."""
+    name: str
+    type_name: str
+    precision: Optional[int] = None
+    scale: Optional[int] = None
+
+
+@dataclass
+class SeedTable:
+    """One curated table: its DDL columns and the literal rows inserted."""
+    name: str
+    columns: List[Column]
+    rows: List[Tuple] = field(default_factory=list)
+
+    @property
+    def column_names(self) -> List[str]:
+        return [c.name for c in self.columns]
+
+    def records(self) -> List[Dict[str, object]]:
+        """Rows as dicts keyed by lower-case column name."""
+        names = self.column_names
+        return [dict(zip(names, row)) for row in self.rows]
+
+
+def _strip_comments(sql: str) -> str:
+    """Remove ``--`` line comments and ``/* */`` blocks outside of strings."""
+    out = []
+    i, n = 0, len(sql)
+    while i < n:
+        ch = sql[i]
+        if ch == "'":
+            j = i + 1
+            while j < n:
+                if sql[j] == "'" and j + 1 < n and sql[j + 1] == "'":
+                    j += 2
+                elif sql[j] == "'":
+                    break
+                else:
+                    j += 1
+            out.append(sql[i:j + 1])
+            i = j + 1
+        elif sql.startswith("--", i):
+            i = sql.find("\n", i)
+            i = n if i < 0 else i
+        elif sql.startswith("/*", i):
+            i = sql.find("*/", i)
+            i = n if i < 0 else i + 2
+        else:
+            out.append(ch)
+            i += 1
+    return "".join(out)
+
+
+def _parse_columns(body: str) -> List[Column]:
+    columns = []
+    for line in re.split(r",\s*\n", body):
+        match = _COLUMN_RE.match(line)
+        if not match:
+            continue
+        name, type_name, args = match.groups()
+        precision = scale = None
+        if args:
+            parts = [int(p) for p in args.split(",")]
+            precision = parts[0]
+            scale = parts[1] if len(parts) > 1 else 0
+        columns.append(Column(name.lower(), type_name.upper(), precision, scale))
+    return columns
+
+
+def _split_tuples(values: str) -> List[List[str]]:
+    """Split ``(a, 'b', f(c, d)), (...)`` into lists of raw field strings."""
+    tuples, fields, buf = [], [], []
+    depth, i, n = 0, 0, len(values)
+    while i < n:
+        ch = values[i]
+        if ch == "'":
+            j = i + 1
+            while j < n:
+                if values[j] == "'" and j + 1 < n and values[j + 1] == "'":
+                    j += 2
+                elif values[j] == "'":
+                    break
+                else:
+                    j += 1
+            buf.append(values[i:j + 1])
+            i = j + 1
+            continue
+        if ch == "(":
+            depth += 1
+            if depth > 1:
+                buf.append(ch)
+        elif ch == ")":
+            depth -= 1
+            if depth == 0:
+                fields.append("".join(buf).strip())
+                tuples.append(fields)
+                fields, buf = [], []
+            else:
+                buf.append(ch)
+        elif ch == "," and depth == 1:
+            fields.append("".join(buf).strip())
+            buf = []
+        elif ch == ";" and depth == 0:
+            break
+        elif depth >= 1:
+            buf.append(ch)
+        i += 1
+    return tuples
+
+
+def _literal(raw: str, today: date):
+    """Convert one SQL literal from the seed script to a Python value."""
+    upper = raw.upper()
+    if raw.startswith("'"):
+        return raw[1:-1].replace("''", "'")
+    if upper == "NULL":
+        return None
+    if upper in ("TRUE", "FALSE"):
+        return upper == "TRUE"
+    match = _DATEADD_RE.fullmatch(raw)
+    if match:
+        return today + timedelta(days=int(match.group(1)))
+    if upper == "CURRENT_DATE":
+        return today
+    if re.fullmatch(r"-?\d+", raw):
+        return int(raw)
+    return float(raw)
+
+
+def parse_seed_sql(sql: str, today: Optional[date] = None) -> Dict[str, SeedTable]:
+    """
+    Parse CREATE TABLE / INSERT statements into ``SeedTable`` objects.
+    ``CURRENT_DATE`` arithmetic is evaluated relative to ``today``.
+    """
+    today = today or date.today()
+    sql = _strip_comments(sql)
+    tables: Dict[str, SeedTable] = {}
+
+    for match in _CREATE_RE.finditer(sql):
+        name = match.group(1).upper()
+        tables[name] = SeedTable(name, _parse_columns(match.group(2)))
+
+    for match in _INSERT_RE.finditer(sql):
+        table = tables[match.group(1).upper()]
+        for fields in _split_tuples(sql[match.end():]):
+            table.rows.append(tuple(_literal(f, today) for f in fields))
+    return tables
+
+
+def load_seed_tables(path: Optional[Path] = None, today: Optional[date] = None) -> Dict[str, SeedTable]:
+    """Load the curated demo tables from ``setup/02_demo_data.sql``."""
+    path = Path(path) if path else SEED_SCRIPT
+    return parse_seed_sql(path.read_text(encoding="utf-8"), today=today)
+
+
+def load_seed_schema(path: Optional[Path] = None) -> Dict[str, List[Column]]:
+    """Column definitions of every table in the seed script (no rows)."""
+    path = Path(path) if path else SEED_SCRIPT
+    sql = _strip_comments(path.read_text(encoding="utf-8"))
+    return {m.group(1).upper(): _parse_columns(m.group(2)) for m in _CREATE_RE.finditer(sql)}
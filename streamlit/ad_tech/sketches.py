@@ -0,0 +1,185 @@
+"""
+=============================================================================
+PatientPoint Ad Tech Demo - Mergeable Sketches
+=============================================================================
+Small, mergeable summaries of exposure streams (used by reach.py):
+
+- HyperLogLog : distinct count (unique reach). 2^p one-byte registers,
+                merged by element-wise max; relative standard error
+                1.04 / sqrt(2^p), ~1.6% at the default p = 12.
+- KLLSketch   : quantiles of a numeric stream (exposure frequency). Items
+                live in levels of weight 2^level; a full level is sorted and
+                every other item promoted. Rank error ~1.7 / k.
+
+Both are built from numpy arrays in bulk and merge in any order, so a
+selection's sketch is the merge of its parts.
+=============================================================================
+"""
+
+from __future__ import annotations
+
+import math
+import random
+from typing import Iterable, List, Sequence
+
+import numpy as np
+
+DEFAULT_PRECISION = 12
+DEFAULT_K = 200
+
+_U64 = np.uint64
+_coin = random.Random(0x5EED)
+_INV_POW2 = np.ldexp(1.0, -np.arange(66))       # 2^-rank by register value
+
+
+def hash64(values) -> np.ndarray:
+    """splitmix64 finalizer over integer ids: well-mixed, deterministic 64-bit hashes."""
+    x = np.asarray(values).astype(np.uint64) + _U64(0x9E3779B97F4A7C15)
+    x = (x ^ (x >> _U64(30))) * _U64(0xBF58476D1CE4E5B9)
+    x = (x ^ (x >> _U64(27))) * _U64(0x94D049BB133111EB)
+    return x ^ (x >> _U64(31))
+
+
+def hll_slots(hashes: np.ndarray, precision: int = DEFAULT_PRECISION):
+    """Register index and rank (position of the first 1-bit) for each hash."""
+    index = (hashes >> _U64(64 - precision)).astype(np.int64)
+    rest = hashes & _U64((1 << (64 - precision)) - 1)
+    _, bits = np.frexp(rest.astype(np.float64))       # bit length; 0 for rest == 0
+    rank = (64 - precision + 1 - bits).astype(np.uint8)
+    return index, rank
+
+
+def hll_estimate(registers: np.ndarray) -> float:
+    """Cardinality from one register array (bias-corrected, linear counting when small)."""
+    m = registers.shape[-1]
+    alpha = 0.7213 / (1 + 1.079 / m)
+    raw = alpha * m * m / _INV_POW2[registers].sum()
+    zeros = int(np.count_nonzero(registers == 0))
+    if raw <= 2.5 * m and zeros:
+        return m * math.log(m / zeros)
+    return float(raw)
+
+
+class HyperLogLog:
+    """Distinct-count sketch over integer ids."""
+
+    def __init__(self, precision: int = DEFAULT_PRECISION, registers: np.ndarray = None):
+        self.precision = precision
+        self.registers = registers if registers is not None else np.zeros(1 << precision, dtype=np.uint8)
+
+    def add(self, ids) -> "HyperLogLog":
+        index, rank = hll_slots(hash64(ids), self.precision)
+        np.maximum.at(self.registers, index, rank)
+        return self
+
+    def merge(self, other: "HyperLogLog") -> "HyperLogLog":
+        if other.precision != self.precision:
+            raise ValueError("cannot merge HyperLogLogs of different precision")
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    def estimate(self) -> float:
+        return hll_estimate(self.registers)
+
+    @property
+    def relative_error(self) -> float:
+        return 1.04 / math.sqrt(1 << self.precision)
+
+    def __len__(self) -> int:
+        return int(round(self.estimate()))
+
+
+class KLLSketch:
+    """Quantile sketch; exact until more than ``k`` items arrive."""
+
+    __slots__ = ("k", "n", "levels")
+
+    def __init__(self, k: int = DEFAULT_K):
+        self.k = k
+        self.n = 0
+        self.levels: List[np.ndarray] = [np.empty(0, dtype=np.float64)]
+
+    @classmethod
+    def of(cls, values, k: int = DEFAULT_K) -> "KLLSketch":
+        return cls(k).update(values)
+
+    def _capacity(self, level: int) -> int:
+        depth = len(self.levels) - level - 1
+        return max(2, int(math.ceil(self.k * (2 / 3) ** depth)))
+
+    def update(self, values) -> "KLLSketch":
+        values = np.asarray(values, dtype=np.float64)
+        self.levels[0] = np.concatenate([self.levels[0], values]) if len(self.levels[0]) else values
+        self.n += len(values)
+        self._compress()
+        return self
+
+    def merge(self, other: "KLLSketch") -> "KLLSketch":
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0, dtype=np.float64))
+        for level, items in enumerate(other.levels):
+            if len(items):
+                self.levels[level] = np.concatenate([self.levels[level], items])
+        self.n += other.n
+        self._compress()
+        return self
+
+    @classmethod
+    def merge_all(cls, sketches: Iterable["KLLSketch"], k: int = DEFAULT_K) -> "KLLSketch":
+        """One sketch for many; level-wise concatenation, then a single compaction."""
+        merged = cls(k)
+        parts: List[List[np.ndarray]] = [[]]
+        for sketch in sketches:
+            while len(parts) < len(sketch.levels):
+                parts.append([])
+            for level, items in enumerate(sketch.levels):
+                if len(items):
+                    parts[level].append(items)
+            merged.n += sketch.n
+        merged.levels = [np.concatenate(p) if p else np.empty(0, dtype=np.float64) for p in parts]
+        merged._compress()
+        return merged
+
+    def _compress(self) -> None:
+        level = 0
+        while level < len(self.levels):
+            items = self.levels[level]
+            if len(items) > self._capacity(level):
+                if level + 1 == len(self.levels):
+                    self.levels.append(np.empty(0, dtype=np.float64))
+                items = np.sort(items)
+                # An odd item out stays behind at its weight
+                keep, items = (items[:1], items[1:]) if len(items) % 2 else (items[:0], items)
+                promoted = items[_coin.getrandbits(1)::2]
+                self.levels[level] = keep
+                self.levels[level + 1] = np.concatenate([self.levels[level + 1], promoted])
+            level += 1
+
+    def _sorted(self):
+        values = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(items), 1 << level, dtype=np.int64)
+                                  for level, items in enumerate(self.levels)])
+        order = np.argsort(values, kind="stable")
+        return values[order], np.cumsum(weights[order])
+
+    def quantiles(self, qs: Sequence[float]) -> List[float]:
+        if not self.n:
+            return [float("nan")] * len(qs)
+        values, cumulative = self._sorted()
+        ranks = np.asarray(qs, dtype=np.float64) * cumulative[-1]
+        index = np.minimum(np.searchsorted(cumulative, ranks, side="left"), len(values) - 1)
+        return values[index].tolist()
+
+    def quantile(self, q: float) -> float:
+        return self.quantiles([q])[0]
+
+    def cdf(self, value: float) -> float:
+        """Fraction of items <= ``value``."""
+        if not self.n:
+            return float("nan")
+        values, cumulative = self._sorted()
+        index = np.searchsorted(values, value, side="right")
+        return float(cumulative[index - 1] / cumulative[-1]) if index else 0.0
+
+    def __len__(self) -> int:
+        return self.n
@@ -0,0 +1,560 @@
+"""
+=============================================================================
+PatientPoint Ad Tech Demo - Columnar Snapshots
+=============================================================================
+Local, partitioned copies of the three analytics tables so dashboards can
+render without waking AD_TECH_WH (AUTO_SUSPEND = 60 means most page views
+would otherwise pay a cold resume):
+
+    <root>/<TABLE>/_manifest.json
+    <root>/<TABLE>/<partition>.arrow      (Arrow IPC, or .parquet)
+
+- export_snapshot()   : full export, one file per partition value
+- refresh_snapshot()  : pulls only the rows changed since the last export
+                        (Snowflake CHANGES clause on change-tracked tables;
+                        the local engine is diffed per partition) and
+                        writes new files for the affected partitions only;
+                        the files they replace are deleted once the new
+                        manifest is in place
+- SnapshotStore.scan(): memory-mapped reads with column projection,
+                        partition / min-max pruning and row filters
+- SnapshotRefresher   : background thread calling refresh_snapshot()
+- freshness()         : snapshot age and provenance for the UI
+
+Column names are upper case, matching Snowflake result sets, so dashboard
+helpers at the bottom return the same shape as the pages' SQL.
+=============================================================================
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from .data_access import fetch_arrow
+from .runtime import lazy_module
+
+pa = lazy_module("pyarrow")
+pc = lazy_module("pyarrow.compute")
+ipc = lazy_module("pyarrow.ipc")
+pq = lazy_module("pyarrow.parquet")
+
+DEFAULT_SNAPSHOT_DIR = Path(tempfile.gettempdir()) / "ad_tech_snapshots"
+DEFAULT_REFRESH_SECONDS = 900
+MANIFEST = "_manifest.json"
+
+
+@dataclass(frozen=True)
+class SnapshotSpec:
+    table: str
+    key: str
+    partition_by: str
+
+
+SNAPSHOT_TABLES: Dict[str, SnapshotSpec] = {
+    spec.table: spec
+    for spec in (
+        SnapshotSpec("T_CAMPAIGN_PERFORMANCE", "CAMPAIGN_ID", "THERAPEUTIC_AREA"),
+        SnapshotSpec("T_INVENTORY_ANALYTICS", "SLOT_ID", "REGION"),
+        SnapshotSpec("T_AUDIENCE_INSIGHTS", "COHORT_ID", "REGION"),
+    )
+}
+
+# (column, op, value); a list of them is ANDed, as in pyarrow's filters
+Filter = Tuple[str, str, object]
+
+_COMPARE = {
+    "=": "equal", "==": "equal", "!=": "not_equal",
+    "<": "less", "<=": "less_equal", ">": "greater", ">=": "greater_equal",
+}
+
+
+def _utcnow() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+
+def _file_stem(value) -> str:
+    if value is None:
+        return "__null__"
+    return re.sub(r"[^A-Za-z0-9]+", "_", str(value)).strip("_") or "_"
+
+
+# =============================================================================
+# Writing
+# =============================================================================
+def _write_file(table, path: Path, fmt: str) -> None:
+    tmp = path.with_name(path.name + ".tmp")
+    if fmt == "parquet":
+        pq.write_table(table, tmp, compression="zstd")
+    else:
+        # Uncompressed so readers can memory-map the buffers directly
+        with pa.OSFile(str(tmp), "wb") as sink, ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    os.replace(tmp, path)
+
+
+def _column_stats(table) -> Dict[str, List[object]]:
+    """Min / max of numeric columns, used to skip files."""
+    stats = {}
+    for name, column in zip(table.column_names, table.columns):
+        if pa.types.is_integer(column.type) or pa.types.is_floating(column.type):
+            bounds = pc.min_max(column)
+            stats[name] = [bounds["min"].as_py(), bounds["max"].as_py()]
+    return stats
+
+
+def _write_partition(table_dir: Path, value, rows, fmt: str) -> dict:
+    suffix = ".parquet" if fmt == "parquet" else ".arrow"
+    # Always a new file: the current manifest may still point at the old one,
+    # which _remove_unreferenced() deletes after the manifest swap
+    name = _file_stem(value) + suffix
+    used = {p.name for p in table_dir.iterdir()}
+    n = len(used)
+    while name in used:
+        name = f"{_file_stem(value)}_{n}{suffix}"
+        n += 1
+    _write_file(rows, table_dir / name, fmt)
+    return {"value": value, "file": name, "rows": rows.num_rows, "stats": _column_stats(rows)}
+
+
+def _split(table, column: str) -> Dict[object, object]:
+    """Partition ``table`` by the distinct values of ``column``."""
+    parts = {}
+    for value in pc.unique(table[column]).to_pylist():
+        mask = pc.is_null(table[column]) if value is None else pc.equal(table[column], value)
+        parts[value] = table.filter(mask)
+    return parts
+
+
+def _save_manifest(table_dir: Path, manifest: dict) -> None:
+    tmp = table_dir / (MANIFEST + ".tmp")
+    tmp.write_text(json.dumps(manifest, default=str, indent=1), encoding="utf-8")
+    os.replace(tmp, table_dir / MANIFEST)
+
+
+def _remove_unreferenced(table_dir: Path, manifest: dict) -> None:
+    """
+    Delete partition files the (already saved) manifest no longer lists.
+    Runs after the manifest swap, so a reader holding the previous manifest
+    finds its files until then.
+    """
+    keep = {p["file"] for p in manifest["partitions"]} | {MANIFEST}
+    for path in table_dir.glob("*.*"):
+        if path.name not in keep and not path.name.endswith(".tmp"):
+            path.unlink(missing_ok=True)
+
+
+def _server_timestamp(engine) -> Optional[str]:
+    """Snowflake's clock, used as the CHANGES watermark (None locally)."""
+    if getattr(engine, "connection", None) is None:
+        return None
+    row = engine.sql("SELECT TO_VARCHAR(CURRENT_TIMESTAMP(), 'YYYY-MM-DD HH24:MI:SS.FF3 TZHTZM') AS TS").collect()
+    return row[0]["TS"]
+
+
+def _normalize(table):
+    return table.rename_columns([c.upper() for c in table.column_names])
+
+
+def export_snapshot(engine, table: str, root: Optional[os.PathLike] = None, fmt: str = "ipc") -> dict:
+    """Full export of ``table`` into per-partition files; returns the manifest."""
+    spec = SNAPSHOT_TABLES[table]
+    table_dir = Path(root or DEFAULT_SNAPSHOT_DIR) / table
+    table_dir.mkdir(parents=True, exist_ok=True)
+
+    watermark = _server_timestamp(engine)
+    data = _normalize(fetch_arrow(engine, f"SELECT * FROM AD_TECH.ANALYTICS.{table}"))
+    partitions = [
+        _write_partition(table_dir, value, rows, fmt)
+        for value, rows in _split(data, spec.partition_by).items()
+    ]
+    manifest = {
+        "table": table,
+        "key": spec.key,
+        "partition_by": spec.partition_by,
+        "format": fmt,
+        "source": "snowflake" if watermark else "local",
+        "snapshot_at": _utcnow(),
+        "exported_at": _utcnow(),
+        "watermark": watermark,
+        "rows": data.num_rows,
+        "refreshes": 0,
+        "last_delta_rows": data.num_rows,
+        "partitions": partitions,
+    }
+    _save_manifest(table_dir, manifest)
+    _remove_unreferenced(table_dir, manifest)
+    return manifest
+
+
+# =============================================================================
+# Delta refresh
+# =============================================================================
+def _fetch_changes(engine, table: str, watermark: str):
+    """Net row changes since ``watermark`` (needs CHANGE_TRACKING = TRUE)."""
+    return _normalize(fetch_arrow(engine, f"""
+        SELECT * FROM AD_TECH.ANALYTICS.{table}
+            CHANGES(INFORMATION => DEFAULT)
+            AT(TIMESTAMP => TO_TIMESTAMP_TZ('{watermark}', 'YYYY-MM-DD HH24:MI:SS.FF3 TZHTZM'))
+    """))
+
+
+def _apply_changes(store: "SnapshotStore", manifest: dict, changes) -> int:
+    """Merge a CHANGES result into the affected partition files."""
+    if changes.num_rows == 0:
+        return 0
+    key, part_col = manifest["key"], manifest["partition_by"]
+    actions = changes["METADATA$ACTION"]
+    inserts = changes.filter(pc.equal(actions, "INSERT")).drop_columns(
+        [c for c in changes.column_names if c.startswith("METADATA$")]
+    )
+    touched_keys = pc.unique(changes[key])
+
+    by_value = {p["value"]: p for p in manifest["partitions"]}
+    affected = set(pc.unique(inserts[part_col]).to_pylist())
+    for value, part in by_value.items():
+        keys = store._read(manifest, part, [key])[key]
+        if pc.any(pc.is_in(keys, value_set=touched_keys)).as_py():
+            affected.add(value)
+
+    table_dir = store.root / manifest["table"]
+    new_inserts = _split(inserts, part_col)
+    for value in affected:
+        existing = by_value.get(value)
+        current = store._read(manifest, existing) if existing else None
+        pieces = []
+        if current is not None:
+            pieces.append(current.filter(pc.invert(pc.is_in(current[key], value_set=touched_keys))))
+        if value in new_inserts:
+            pieces.append(new_inserts[value].cast(pieces[0].schema) if pieces else new_inserts[value])
+        merged = pa.concat_tables(pieces) if pieces else None
+        if merged is None or merged.num_rows == 0:
+            if existing:
+                by_value.pop(value)
+            continue
+        by_value[value] = _write_partition(table_dir, value, merged, manifest["format"])
+    manifest["partitions"] = list(by_value.values())
+    return changes.num_rows
+
+
+def _diff_partitions(store: "SnapshotStore", manifest: dict, engine) -> int:
+    """Without CHANGES (local engine): rewrite only partitions whose rows differ."""
+    part_col = manifest["partition_by"]
+    fresh = _normalize(fetch_arrow(engine, f"SELECT * FROM AD_TECH.ANALYTICS.{manifest['table']}"))
+    table_dir = store.root / manifest["table"]
+    by_value = {p["value"]: p for p in manifest["partitions"]}
+    fresh_parts = _split(fresh, part_col)
+    changed = 0
+    for value, rows in fresh_parts.items():
+        existing = by_value.get(value)
+        if existing:
+            current = store._read(manifest, existing)
+            if current.num_rows == rows.num_rows and current.equals(rows.cast(current.schema)):
+                continue
+        by_value[value] = _write_partition(table_dir, value, rows, manifest["format"])
+        changed += rows.num_rows
+    for value in set(by_value) - set(fresh_parts):
+        by_value.pop(value)
+        changed += 1
+    manifest["partitions"] = list(by_value.values())
+    return changed
+
+
+def refresh_snapshot(engine, table: str, root: Optional[os.PathLike] = None) -> dict:
+    """Bring an existing snapshot up to date, exporting it if missing."""
+    store = SnapshotStore(root)
+    manifest = store.manifest(table)
+    if manifest is None:
+        return export_snapshot(engine, table, root)
+
+    watermark = _server_timestamp(engine)
+    if watermark and manifest.get("watermark"):
+        try:
+            delta = _apply_changes(store, manifest, _fetch_changes(engine, table, manifest["watermark"]))
+        except Exception:
+            # Change tracking off or the watermark is past retention
+            return export_snapshot(engine, table, root, manifest["format"])
+    else:
+        delta = _diff_partitions(store, manifest, engine)
+
+    manifest.update(
+        watermark=watermark,
+        snapshot_at=_utcnow(),
+        rows=sum(p["rows"] for p in manifest["partitions"]),
+        refreshes=manifest.get("refreshes", 0) + 1,
+        last_delta_rows=delta,
+    )
+    _save_manifest(store.root / table, manifest)
+    _remove_unreferenced(store.root / table, manifest)
+    return manifest
+
+
+# =============================================================================
+# Reading
+# =============================================================================
+def _may_match(part: dict, part_col: str, filters: Sequence[Filter]) -> bool:
+    """False when the partition value or min/max stats rule the file out."""
+    for column, op, value in filters:
+        if column == part_col:
+            candidate = part["value"]
+            if op in ("=", "==") and candidate != value:
+                return False
+            if op == "in" and candidate not in value:
+                return False
+            if op == "!=" and candidate == value:
+                return False
+        elif column in part["stats"] and op in _COMPARE and op != "!=":
+            low, high = part["stats"][column]
+            if low is None:
+                continue
+            if (op in ("=", "==") and not low <= value <= high) \
+                    or (op == "<" and low >= value) or (op == "<=" and low > value) \
+                    or (op == ">" and high <= value) or (op == ">=" and high < value):
+                return False
+    return True
+
+
+def _mask(table, filters: Sequence[Filter]):
+    mask = None
+    for column, op, value in filters:
+        if op == "in":
+            term = pc.is_in(table[column], value_set=pa.array(list(value)))
+        else:
+            term = getattr(pc, _COMPARE[op])(table[column], value)
+        mask = term if mask is None else pc.and_(mask, term)
+    return mask
+
+
+class SnapshotStore:
+    """Reads snapshot files through memory maps, cached per file version."""
+
+    def __init__(self, root: Optional[os.PathLike] = None):
+        self.root = Path(root or DEFAULT_SNAPSHOT_DIR)
+        self._lock = threading.Lock()
+        self._open: Dict[Path, Tuple[Tuple[int, int], object]] = {}
+        self.refresher: Optional["SnapshotRefresher"] = None
+
+    def manifest(self, table: str) -> Optional[dict]:
+        path = self.root / table / MANIFEST
+        try:
+            return json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+
+    def available(self, table: str) -> bool:
+        return self.manifest(table) is not None
+
+    def _forget_removed(self, manifest: dict) -> None:
+        """Drop cached maps of ``manifest["table"]`` files the manifest no longer lists."""
+        table_dir = self.root / manifest["table"]
+        live = {table_dir / p["file"] for p in manifest["partitions"]}
+        with self._lock:
+            for path in [p for p in self._open if p.parent == table_dir and p not in live]:
+                del self._open[path]
+
+    def _read(self, manifest: dict, part: dict, columns: Optional[Sequence[str]] = None):
+        path = self.root / manifest["table"] / part["file"]
+        if manifest["format"] == "parquet":
+            return pq.read_table(path, columns=columns, memory_map=True)
+        stat = path.stat()
+        version = (stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            cached = self._open.get(path)
+            if cached is None or cached[0] != version:
+                # Zero-copy: buffers point into the mapping, pages load on touch
+                table = ipc.open_file(pa.memory_map(str(path), "r")).read_all()
+                cached = self._open[path] = (version, table)
+        table = cached[1]
+        return table.select(list(columns)) if columns else table
+
+    def scan(
+        self,
+        table: str,
+        columns: Optional[Sequence[str]] = None,
+        filters: Sequence[Filter] = (),
+    ):
+        """
+        Rows of ``table`` matching every filter, limited to ``columns``.
+        Files are skipped using the partition value and min/max stats; only
+        the projected and filtered columns are touched.
+        """
+        manifest = self.manifest(table)
+        if manifest is None:
+            raise FileNotFoundError(f"No snapshot for {table} in {self.root}")
+        self._forget_removed(manifest)
+        filter_cols = [c for c, _, _ in filters]
+        needed = None if columns is None else list(dict.fromkeys(list(columns) + filter_cols))
+
+        pieces = []
+        for part in manifest["partitions"]:
+            if not _may_match(part, manifest["partition_by"], filters):
+                continue
+            rows = self._read(manifest, part, needed)
+            if filters:
+                rows = rows.filter(_mask(rows, filters))
+            pieces.append(rows.select(list(columns)) if columns else rows)
+        if not pieces:
+            schema = self._read(manifest, manifest["partitions"][0], columns).schema \
+                if manifest["partitions"] else pa.schema([])
+            return schema.empty_table()
+        return pa.concat_tables(pieces, promote_options="permissive")
+
+    def freshness(self, table: str) -> Optional[Dict[str, object]]:
+        """Age and provenance of a snapshot for display."""
+        manifest = self.manifest(table)
+        if manifest is None:
+            return None
+        taken = datetime.fromisoformat(manifest["snapshot_at"])
+        return {
+            "table": table,
+            "snapshot_at": manifest["snapshot_at"],
+            "age_seconds": (datetime.now(timezone.utc) - taken).total_seconds(),
+            "rows": manifest["rows"],
+            "source": manifest["source"],
+            "refreshes": manifest.get("refreshes", 0),
+            "last_delta_rows": manifest.get("last_delta_rows", 0),
+        }
+
+
+def format_age(seconds: float) -> str:
+    if seconds < 90:
+        return f"{seconds:.0f}s"
+    if seconds < 5400:
+        return f"{seconds / 60:.0f} min"
+    if seconds < 172800:
+        return f"{seconds / 3600:.1f} h"
+    return f"{seconds / 86400:.0f} days"
+
+
+# =============================================================================
+# Background refresh
+# =============================================================================
+class SnapshotRefresher:
+    """
+    Daemon thread that keeps every snapshot table up to date. ``gate``, if
+    set, is asked before each cycle (the query router uses it to avoid
+    resuming the warehouse just to refresh).
+    """
+
+    def __init__(self, engine, root: Optional[os.PathLike] = None,
+                 interval: float = DEFAULT_REFRESH_SECONDS,
+                 tables: Sequence[str] = tuple(SNAPSHOT_TABLES),
+                 gate: Optional[Callable[[], bool]] = None):
+        self.engine = engine
+        self.gate = gate
+        self.root = root
+        self.interval = interval
+        self.tables = list(tables)
+        self.last_run: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def refresh_all(self) -> None:
+        for table in self.tables:
+            try:
+                refresh_snapshot(self.engine, table, self.root)
+                self.last_error = None
+            except Exception as e:
+                self.last_error = f"{table}: {e}"
+        self.last_run = time.time()
+
+    def _loop(self) -> None:
+        while not self._stop.is_set():
+            if self.gate is None or self.gate():
+                self.refresh_all()
+            self._wake.wait(self.interval)
+            self._wake.clear()
+
+    def start(self) -> "SnapshotRefresher":
+        # Finish importing pyarrow here: importing it concurrently from the
+        # refresher and a page thread can expose a half-initialized module
+        import pyarrow.compute  # noqa: F401
+        import pyarrow.ipc  # noqa: F401
+
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._loop, name="snapshot-refresh", daemon=True)
+            self._thread.start()
+        return self
+
+    def trigger(self) -> None:
+        """Refresh now instead of waiting for the next interval."""
+        self._wake.set()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._wake.set()
+
+
+# =============================================================================
+# Dashboard reads (same columns as the pages' SQL)
+# =============================================================================
+def _aggregate(rows, key: str, outputs: Dict[str, Tuple[str, str]]):
+    """GROUP BY ``key`` with ``{output: (column, function)}``, key first."""
+    grouped = rows.group_by(key).aggregate(list(outputs.values()))
+    return pa.table(
+        [grouped[key]] + [grouped[f"{col}_{fn}"] for col, fn in outputs.values()],
+        names=[key] + list(outputs),
+    )
+
+
+def campaign_kpis(store: SnapshotStore):
+    """One-row table, like the KPI query."""
+    active = store.scan(
+        "T_CAMPAIGN_PERFORMANCE",
+        ["CAMPAIGN_ID", "TOTAL_IMPRESSIONS", "WIN_RATE_PCT", "ROAS", "TOTAL_REVENUE"],
+        [("STATUS", "=", "Active")],
+    )
+    return pa.Table.from_pylist([{
+        "CAMPAIGNS": pc.count_distinct(active["CAMPAIGN_ID"]).as_py(),
+        "IMPRESSIONS": pc.sum(active["TOTAL_IMPRESSIONS"]).as_py() or 0,
+        "AVG_WIN_RATE": round(pc.mean(active["WIN_RATE_PCT"]).as_py() or 0, 1),
+        "AVG_ROAS": round(pc.mean(active["ROAS"]).as_py() or 0, 2),
+        "TOTAL_REVENUE": pc.sum(active["TOTAL_REVENUE"]).as_py() or 0,
+    }])
+
+
+def top_campaigns(store: SnapshotStore, limit: int = 10):
+    columns = ["CAMPAIGN_NAME", "DRUG_NAME", "THERAPEUTIC_AREA", "PARTNER_NAME", "STATUS",
+               "TOTAL_IMPRESSIONS", "WIN_RATE_PCT", "CTR_PCT", "ROAS", "TOTAL_REVENUE"]
+    rows = store.scan("T_CAMPAIGN_PERFORMANCE", columns)
+    rows = rows.sort_by([("ROAS", "descending")]).slice(0, limit)
+    rows = rows.set_column(6, "WIN_RATE", pc.round(rows["WIN_RATE_PCT"], 1))
+    rows = rows.set_column(7, "CTR", pc.round(rows["CTR_PCT"], 3))
+    return rows.set_column(8, "ROAS", pc.round(rows["ROAS"], 2))
+
+
+def roas_by(store: SnapshotStore, column: str):
+    """Campaign count, average ROAS and impressions/revenue per ``column``."""
+    rows = store.scan("T_CAMPAIGN_PERFORMANCE", [column, "CAMPAIGN_ID", "ROAS", "TOTAL_IMPRESSIONS", "TOTAL_REVENUE"])
+    grouped = _aggregate(rows, column, {
+        "CAMPAIGNS": ("CAMPAIGN_ID", "count_distinct"),
+        "AVG_ROAS": ("ROAS", "mean"),
+        "IMPRESSIONS": ("TOTAL_IMPRESSIONS", "sum"),
+        "REVENUE": ("TOTAL_REVENUE", "sum"),
+    })
+    grouped = grouped.set_column(2, "AVG_ROAS", pc.round(grouped["AVG_ROAS"], 2))
+    return grouped.sort_by([("AVG_ROAS", "descending")])
+
+
+def inventory_by_region(store: SnapshotStore):
+    rows = store.scan("T_INVENTORY_ANALYTICS",
+                      ["REGION", "SLOT_ID", "FACILITY_NAME", "BASE_CPM", "ESTIMATED_DAILY_IMPRESSIONS"])
+    grouped = _aggregate(rows, "REGION", {
+        "SLOTS": ("SLOT_ID", "count_distinct"),
+        "FACILITIES": ("FACILITY_NAME", "count_distinct"),
+        "AVG_CPM": ("BASE_CPM", "mean"),
+        "DAILY_IMPRESSIONS": ("ESTIMATED_DAILY_IMPRESSIONS", "sum"),
+    })
+    grouped = grouped.set_column(3, "AVG_CPM", pc.round(grouped["AVG_CPM"], 2))
+    return grouped.sort_by([("SLOTS", "descending")])
@@ -0,0 +1,185 @@
+"""
+=============================================================================
+PatientPoint Ad Tech Demo - Headline Summary Statistics
+=============================================================================
+Home, the Campaign Optimizer sidebar and the Inventory Explorer all show
+headline numbers (active campaigns, slots, facilities, cohorts, ...). Instead
+of each page scanning the T_* tables on every view, one SummaryService per
+process computes all of them in a single query and refreshes them in the
+background every REFRESH_SECONDS; every session reads the same SummaryStats.
+
+The query goes through the QueryRouter, so while AD_TECH_WH is suspended the
+numbers are computed from the local snapshots instead of resuming it. Their
+age is that of the data: a snapshot's export time, not the refresh's.
+=============================================================================
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import dataclass, fields
+from datetime import date, timedelta
+from typing import Callable, Optional, Tuple
+
+from .runtime import lazy_module
+
+pa = lazy_module("pyarrow")
+pc = lazy_module("pyarrow.compute")
+
+REFRESH_SECONDS = 300
+NEW_CAMPAIGN_DAYS = 30
+SUMMARY_TABLES = ("T_CAMPAIGN_PERFORMANCE", "T_INVENTORY_ANALYTICS", "T_AUDIENCE_INSIGHTS")
+
+# One round trip, one scan per table
+SUMMARY_SQL = f"""
+WITH c AS (
+    SELECT
+        COUNT(DISTINCT CASE WHEN status = 'Active' THEN campaign_id END) AS active_campaigns,
+        COUNT(DISTINCT CASE WHEN start_date >= DATEADD(day, -{NEW_CAMPAIGN_DAYS}, CURRENT_DATE)
+                            THEN campaign_id END) AS new_campaigns,
+        COUNT(DISTINCT partner_id) AS partners,
+        ROUND(AVG(CASE WHEN status = 'Active' THEN win_rate_pct END), 1) AS avg_win_rate,
+        ROUND(AVG(CASE WHEN status = 'Active' THEN roas END), 2) AS avg_roas
+    FROM AD_TECH.ANALYTICS.T_CAMPAIGN_PERFORMANCE
+), i AS (
+    SELECT
+        COUNT(DISTINCT slot_id) AS slots,
+        COUNT(DISTINCT facility_name) AS facilities,
+        ROUND(AVG(base_cpm), 2) AS avg_cpm,
+        SUM(estimated_daily_impressions) AS daily_impressions
+    FROM AD_TECH.ANALYTICS.T_INVENTORY_ANALYTICS
+), a AS (
+    SELECT
+        COUNT(DISTINCT cohort_id) AS cohorts,
+        SUM(cohort_size) AS audience_members
+    FROM AD_TECH.ANALYTICS.T_AUDIENCE_INSIGHTS
+)
+SELECT * FROM c, i, a
+"""
+
+
+@dataclass(frozen=True)
+class SummaryStats:
+    active_campaigns: int
+    new_campaigns: int
+    partners: int
+    avg_win_rate: float
+    avg_roas: float
+    slots: int
+    facilities: int
+    avg_cpm: float
+    daily_impressions: int
+    cohorts: int
+    audience_members: int
+    computed_at: float = 0.0
+
+    @classmethod
+    def from_table(cls, table, computed_at: Optional[float] = None) -> "SummaryStats":
+        row = {name.lower(): column[0].as_py() for name, column in zip(table.column_names, table.columns)}
+        values = {f.name: row.get(f.name) or 0 for f in fields(cls) if f.name != "computed_at"}
+        return cls(**values, computed_at=time.time() if computed_at is None else computed_at)
+
+    def age(self) -> float:
+        return time.time() - self.computed_at
+
+
+def summary_from_snapshots(store):
+    """The SUMMARY_SQL row computed from the local snapshots."""
+    def mean(column, digits):
+        value = pc.mean(column).as_py()
+        return round(value, digits) if value is not None else None
+
+    campaigns = store.scan("T_CAMPAIGN_PERFORMANCE",
+                           ["CAMPAIGN_ID", "STATUS", "START_DATE", "PARTNER_ID", "WIN_RATE_PCT", "ROAS"])
+    active = campaigns.filter(pc.equal(campaigns["STATUS"], "Active"))
+    cutoff = (date.today() - timedelta(days=NEW_CAMPAIGN_DAYS)).isoformat()
+    recent = campaigns.filter(pc.greater_equal(pc.cast(campaigns["START_DATE"], pa.string()), cutoff))
+    inventory = store.scan("T_INVENTORY_ANALYTICS",
+                           ["SLOT_ID", "FACILITY_NAME", "BASE_CPM", "ESTIMATED_DAILY_IMPRESSIONS"])
+    audience = store.scan("T_AUDIENCE_INSIGHTS", ["COHORT_ID", "COHORT_SIZE"])
+    return pa.Table.from_pylist([{
+        "ACTIVE_CAMPAIGNS": pc.count_distinct(active["CAMPAIGN_ID"]).as_py(),
+        "NEW_CAMPAIGNS": pc.count_distinct(recent["CAMPAIGN_ID"]).as_py(),
+        "PARTNERS": pc.count_distinct(campaigns["PARTNER_ID"]).as_py(),
+        "AVG_WIN_RATE": mean(active["WIN_RATE_PCT"], 1),
+        "AVG_ROAS": mean(active["ROAS"], 2),
+        "SLOTS": pc.count_distinct(inventory["SLOT_ID"]).as_py(),
+        "FACILITIES": pc.count_distinct(inventory["FACILITY_NAME"]).as_py(),
+        "AVG_CPM": mean(inventory["BASE_CPM"], 2),
+        "DAILY_IMPRESSIONS": pc.sum(inventory["ESTIMATED_DAILY_IMPRESSIONS"]).as_py(),
+        "COHORTS": pc.count_distinct(audience["COHORT_ID"]).as_py(),
+        "AUDIENCE_MEMBERS": pc.sum(audience["COHORT_SIZE"]).as_py(),
+    }])
+
+
+# =============================================================================
+# Service
+# =============================================================================
+class SummaryService:
+    """
+    Holds the current SummaryStats. The first get() computes them (one
+    caller computes, concurrent callers wait for that computation and share
+    its result); a daemon thread then recomputes every ``interval`` seconds,
+    so page views never do. ``loader`` returns the SUMMARY_SQL table and
+    when its data was read (epoch seconds, None for now).
+    """
+
+    def __init__(self, loader: Callable[[], Tuple[object, Optional[float]]], interval: float = REFRESH_SECONDS):
+        self.loader = loader
+        self.interval = interval
+        self.computations = 0
+        self.last_error: Optional[str] = None
+        self._stats: Optional[SummaryStats] = None
+        self._compute_lock = threading.Lock()
+        self._state_lock = threading.Lock()
+        self._inflight: Optional[threading.Event] = None    # set when the get() computing them ends
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def refresh(self) -> Optional[SummaryStats]:
+        with self._compute_lock:
+            try:
+                table, as_of = self.loader()
+                self._stats = SummaryStats.from_table(table, as_of)
+                self.computations += 1
+                self.last_error = None
+            except Exception as e:
+                self.last_error = str(e)
+            return self._stats
+
+    def get(self) -> Optional[SummaryStats]:
+        """Current stats, or None if they could not be computed yet."""
+        stats = self._stats
+        if stats is not None:
+            return stats
+        with self._state_lock:
+            if self._stats is not None:
+                return self._stats
+            done = self._inflight
+            leader = done is None
+            if leader:
+                done = self._inflight = threading.Event()
+        if not leader:
+            done.wait()
+            return self._stats
+        try:
+            return self.refresh()
+        finally:
+            with self._state_lock:
+                self._inflight = None
+            done.set()
+
+    def _loop(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.refresh()
+
+    def start(self) -> "SummaryService":
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._loop, name="summary-refresh", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
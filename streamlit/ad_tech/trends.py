@@ -0,0 +1,301 @@
+"""
+=============================================================================
+PatientPoint Ad Tech Demo - Period Trends
+=============================================================================
+Period-over-period comparisons ("Compare Q4 vs Q3") served from the
+precomputed T_CAMPAIGN_PERIOD_ROLLUP (see setup/06_daily_facts.sql).
+
+Every comparison is a single statement over the rollup: both periods are
+aggregated with conditional sums in one pass and the deltas are derived in
+the outer SELECT, so the daily fact table is never scanned at query time.
+The same SQL runs on Snowflake and on the local engine, where the daily
+facts and rollups are rebuilt from the curated seed rows.
+=============================================================================
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import date, timedelta
+from typing import Dict, List, Optional, Sequence
+
+ROLLUP_TABLE = "AD_TECH.ANALYTICS.T_CAMPAIGN_PERIOD_ROLLUP"
+
+# Additive measures stored in the rollup
+MEASURES = (
+    "total_bids", "winning_bids", "impressions", "engagements",
+    "conversions", "revenue", "spend",
+)
+
+# Ratios derived at query time: name -> (numerator, denominator, scale)
+RATIOS = {
+    "roas": ("revenue", "spend", 1),
+    "ctr_pct": ("engagements", "impressions", 100),
+    "win_rate_pct": ("winning_bids", "total_bids", 100),
+    "conversion_rate_pct": ("conversions", "engagements", 100),
+}
+
+# Dimensions a comparison may be broken down by (whitelisted, never user SQL)
+DIMENSIONS = ("therapeutic_area", "partner_name", "partner_tier", "campaign_id")
+
+GRAINS = ("day", "week", "quarter")
+
+
+@dataclass(frozen=True)
+class Period:
+    label: str
+    start: date
+    end: date
+
+
+@dataclass(frozen=True)
+class Comparison:
+    """A current period, the period it is compared against, and the rollup grain."""
+    grain: str
+    current: Period
+    previous: Period
+
+
+# ============================================================================
+# Period helpers
+# ============================================================================
+def quarter_start(day: date) -> date:
+    return date(day.year, 3 * ((day.month - 1) // 3) + 1, 1)
+
+
+def _add_quarters(start: date, quarters: int) -> date:
+    months = start.year * 12 + (start.month - 1) + 3 * quarters
+    return date(months // 12, months % 12 + 1, 1)
+
+
+def _quarter(start: date) -> Period:
+    end = _add_quarters(start, 1) - timedelta(days=1)
+    return Period(f"Q{(start.month - 1) // 3 + 1} {start.year}", start, end)
+
+
+def period_options(today: Optional[date] = None) -> List[str]:
+    """Labels for the Time Period selectbox, relative to ``today``."""
+    today = today or date.today()
+    current = quarter_start(today)
+    previous = _add_quarters(current, -1)
+    return [
+        "Last 30 Days",
+        "Last 90 Days",
+        _quarter(current).label,
+        _quarter(previous).label,
+        f"YTD {today.year}",
+    ]
+
+
+def resolve_comparison(label: str, today: Optional[date] = None) -> Comparison:
+    """Map a selectbox label to the period pair and the coarsest exact grain."""
+    today = today or date.today()
+    parts = label.split()
+
+    if label.startswith("Last ") and parts[-1] == "Days":
+        days = int(parts[1])
+        current = Period(label, today - timedelta(days=days - 1), today)
+        previous = Period(f"Prior {days} Days", current.start - timedelta(days=days),
+                          current.start - timedelta(days=1))
+        return Comparison("day", current, previous)
+
+    if label.startswith("Q") and len(parts) == 2:
+        start = date(int(parts[1]), 3 * (int(parts[0][1:]) - 1) + 1, 1)
+        return Comparison("quarter", _quarter(start), _quarter(_add_quarters(start, -1)))
+
+    if label.startswith("YTD"):
+        year = int(parts[1])
+        end = min(today, date(year, 12, 31))
+        current = Period(label, date(year, 1, 1), end)
+        prev_end = end.replace(year=year - 1) if not (end.month == 2 and end.day == 29) \
+            else date(year - 1, 2, 28)
+        previous = Period(f"YTD {year - 1}", date(year - 1, 1, 1), prev_end)
+        return Comparison("day", current, previous)
+
+    raise ValueError(f"Unrecognized period label: {label!r}")
+
+
+# ============================================================================
+# Trend queries
+# ============================================================================
+def _ratio_sql(prefix: str) -> List[str]:
+    return [
+        f"{prefix}{num} * {float(scale)} / NULLIF({prefix}{den}, 0) AS {prefix}{name}"
+        for name, (num, den, scale) in RATIOS.items()
+    ]
+
+
+def comparison_sql(by: Optional[str] = None) -> str:
+    """One-pass current-vs-previous query over the rollup."""
+    if by is not None and by not in DIMENSIONS:
+        raise ValueError(f"Unsupported dimension: {by!r}")
+    dim = by or "'All'"
+    sums = []
+    for m in MEASURES:
+        sums.append(f"SUM(CASE WHEN period_start BETWEEN ? AND ? THEN {m} ELSE 0 END) AS cur_{m}")
+        sums.append(f"SUM(CASE WHEN period_start BETWEEN ? AND ? THEN {m} ELSE 0 END) AS prev_{m}")
+    deltas = [
+        f"(cur_{m} - prev_{m}) * 100.0 / NULLIF(prev_{m}, 0) AS {m}_change_pct"
+        for m in ("impressions", "revenue", "spend", "conversions")
+    ]
+    outer = (
+        ["dimension"]
+        + [f"cur_{m}" for m in MEASURES] + [f"prev_{m}" for m in MEASURES]
+        + _ratio_sql("cur_") + _ratio_sql("prev_") + deltas
+    )
+    group_by = f"    GROUP BY {by}\n" if by else ""
+    return (
+        "SELECT " + ",\n    ".join(outer) + "\nFROM (\n"
+        f"    SELECT {dim} AS dimension,\n        " + ",\n        ".join(sums) + "\n"
+        f"    FROM {ROLLUP_TABLE}\n"
+        "    WHERE period_grain = ? AND (period_start BETWEEN ? AND ? OR period_start BETWEEN ? AND ?)\n"
+        f"{group_by}"
+        ") t\nORDER BY cur_revenue DESC"
+    )
+
+
+def _comparison_params(comparison: Comparison) -> List[str]:
+    cur = (comparison.current.start.isoformat(), comparison.current.end.isoformat())
+    prev = (comparison.previous.start.isoformat(), comparison.previous.end.isoformat())
+    params: List[str] = []
+    for _ in MEASURES:
+        params.extend(cur)
+        params.extend(prev)
+    return params + [comparison.grain, *cur, *prev]
+
+
+def _records(rows) -> List[Dict[str, object]]:
+    out = []
+    for row in rows:
+        record = row.as_dict() if hasattr(row, "as_dict") else dict(zip(row.keys(), row))
+        out.append({k.lower(): v for k, v in record.items()})
+    return out
+
+
+def compare_periods(session, comparison: Comparison, by: Optional[str] = None) -> List[Dict[str, object]]:
+    """Current vs previous totals, ratios and % changes, optionally per ``by``."""
+    return _records(session.sql(comparison_sql(by), params=_comparison_params(comparison)).collect())
+
+
+def trend_series(session, grain: str, start: date, end: date,
+                 by: Optional[str] = None) -> List[Dict[str, object]]:
+    """
+    Per-period totals with period-over-period deltas (LAG over the rollup),
+    ordered by dimension then period.
+    """
+    if grain not in GRAINS:
+        raise ValueError(f"Unsupported grain: {grain!r}")
+    if by is not None and by not in DIMENSIONS:
+        raise ValueError(f"Unsupported dimension: {by!r}")
+    dim = by or "'All'"
+    group_by = f"{by}, period_start" if by else "period_start"
+    sums = ", ".join(f"SUM({m}) AS {m}" for m in MEASURES)
+    query = f"""
+    SELECT
+        dimension,
+        period_start,
+        {", ".join(MEASURES)},
+        revenue / NULLIF(spend, 0) AS roas,
+        revenue - LAG(revenue) OVER (PARTITION BY dimension ORDER BY period_start) AS revenue_delta,
+        (revenue - LAG(revenue) OVER (PARTITION BY dimension ORDER BY period_start)) * 100.0
+            / NULLIF(LAG(revenue) OVER (PARTITION BY dimension ORDER BY period_start), 0) AS revenue_change_pct
+    FROM (
+        SELECT {dim} AS dimension, period_start, {sums}
+        FROM {ROLLUP_TABLE}
+        WHERE period_grain = ? AND period_start BETWEEN ? AND ?
+        GROUP BY {group_by}
+    ) t
+    ORDER BY dimension, period_start
+    """
+    return _records(session.sql(query, params=[grain, start.isoformat(), end.isoformat()]).collect())
+
+
+# ============================================================================
+# Local engine support
+# ============================================================================
+DAILY_COLUMNS = (
+    ("date_day", "DATE"), ("campaign_id", "VARCHAR"), ("slot_id", "VARCHAR"),
+    ("therapeutic_area", "VARCHAR"), ("partner_id", "INT"), ("partner_name", "VARCHAR"),
+    ("partner_tier", "VARCHAR"), ("total_bids", "INT"), ("winning_bids", "INT"),
+    ("impressions", "INT"), ("engagements", "INT"), ("conversions", "INT"),
+    ("revenue", "NUMBER"), ("spend", "NUMBER"),
+)
+
+_LIFETIME = (
+    ("total_bids", "total_bids"), ("winning_bids", "winning_bids"),
+    ("total_impressions", "impressions"), ("total_engagements", "engagements"),
+    ("total_conversions", "conversions"), ("total_revenue", "revenue"),
+    ("total_spend", "spend"),
+)
+
+_SQLITE_WEEK = "date(date_day, '-' || ((CAST(strftime('%w', date_day) AS INTEGER) + 6) % 7) || ' days')"
+_SQLITE_QUARTER = ("printf('%s-%02d-01', strftime('%Y', date_day), "
+                   "((CAST(strftime('%m', date_day) AS INTEGER) - 1) / 3) * 3 + 1)")
+
+
+def daily_rows_from_lifetime(campaigns: Sequence[Dict[str, object]],
+                             slots: Sequence[Dict[str, object]],
+                             today: Optional[date] = None) -> List[tuple]:
+    """
+    Spread lifetime campaign totals over active days and target-specialty
+    slots, mirroring the backfill in setup/06_daily_facts.sql.
+    """
+    today = today or date.today()
+    by_specialty: Dict[str, List[Dict[str, object]]] = {}
+    for slot in slots:
+        by_specialty.setdefault(slot["specialty_name"], []).append(slot)
+
+    rows = []
+    for c in campaigns:
+        last = min(c["end_date"], today)
+        days = [c["start_date"] + timedelta(days=i) for i in range((last - c["start_date"]).days + 1)]
+        targets = by_specialty.get(c["target_specialty"], [])
+        if not days or not targets:
+            continue
+        day_weights = [0.4 if d.isoweekday() >= 6 else 1.0 for d in days]
+        day_total = sum(day_weights)
+        slot_total = sum(s["delivered_impressions"] for s in targets)
+        for d, dw in zip(days, day_weights):
+            for s in targets:
+                share = (dw / day_total) * (s["delivered_impressions"] / slot_total)
+                values = []
+                for source, target in _LIFETIME:
+                    v = c[source] * share
+                    values.append(round(v, 2) if target in ("revenue", "spend") else int(round(v)))
+                rows.append((d, c["campaign_id"], s["slot_id"], c["therapeutic_area"],
+                             c["partner_id"], c["partner_name"], c["partner_tier"], *values))
+    return rows
+
+
+def refresh_local_rollups(engine) -> None:
+    """Rebuild T_CAMPAIGN_PERIOD_ROLLUP from T_CAMPAIGN_DAILY on the local engine."""
+    dims = "campaign_id, therapeutic_area, partner_name, partner_tier"
+    sums = ", ".join(f"SUM({m}) AS {m}" for m in MEASURES)
+    selects = [
+        f"SELECT '{grain}' AS period_grain, {expr} AS period_start, {dims}, {sums} "
+        f"FROM T_CAMPAIGN_DAILY GROUP BY {expr}, {dims}"
+        for grain, expr in (("day", "date_day"), ("week", _SQLITE_WEEK), ("quarter", _SQLITE_QUARTER))
+    ]
+    engine.executescript(
+        "DROP TABLE IF EXISTS T_CAMPAIGN_PERIOD_ROLLUP;\n"
+        "CREATE TABLE T_CAMPAIGN_PERIOD_ROLLUP AS\n" + "\nUNION ALL\n".join(selects) + ";\n"
+        "CREATE INDEX IX_ROLLUP_GRAIN_START ON T_CAMPAIGN_PERIOD_ROLLUP (period_grain, period_start);"
+    )
+
+
+def load_local_daily_facts(engine, rows: Optional[Sequence[tuple]] = None,
+                           today: Optional[date] = None) -> int:
+    """
+    Populate T_CAMPAIGN_DAILY (from the seed rows unless ``rows`` is given)
+    and rebuild the rollups. Returns the number of daily rows loaded.
+    """
+    from .seed import Column
+
+    if rows is None:
+        campaigns = engine.tables["T_CAMPAIGN_PERFORMANCE"].records()
+        slots = engine.tables["T_INVENTORY_ANALYTICS"].records()
+        rows = daily_rows_from_lifetime(campaigns, slots, today=today)
+    engine.load_table("T_CAMPAIGN_DAILY", [Column(n, t) for n, t in DAILY_COLUMNS], rows)
+    engine.executescript("CREATE INDEX IF NOT EXISTS IX_DAILY_DATE ON T_CAMPAIGN_DAILY (date_day, campaign_id);")
+    refresh_local_rollups(engine)
+    return len(rows)
@@ -0,0 +1,350 @@
+"""
+=============================================================================
+PatientPoint Ad Tech Demo - Verified Query Matching
+=============================================================================
+Hot analyst questions are answered from the verified query repository
+(setup/09_verified_queries.sql) instead of regenerating SQL through Cortex
+every time:
+
+  1. normalize : tokenize the question, replace known values (therapeutic
+                 areas, partners, drugs, regions, specialties) with their
+                 placeholder and semantic-view synonyms with their column
+                 ("roi" -> roas, "advertiser" -> partner_name)
+  2. match     : TF-IDF cosine against every phrasing of every verified
+                 question. A template is eligible only if it takes exactly
+                 the values the question names
+  3. execute   : the stored SQL with the values bound, through the query
+                 router (result cache, warehouse routing)
+
+A miss returns None and the chat page sends the question to the agent as
+before. Lookups, hits and latency are recorded in the metrics registry:
+
+  verified.lookups / .hits / .misses / .errors   counters
+  verified.seconds                               match + execute time
+=============================================================================
+"""
+
+from __future__ import annotations
+
+import math
+import re
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from decimal import Decimal
+from pathlib import Path
+from typing import Callable, Dict, FrozenSet, List, Optional, Sequence, Tuple
+
+from .metrics import MetricsRegistry, registry
+from .search import tokenize
+from .seed import _strip_comments, load_seed_tables
+
+SETUP_DIR = Path(__file__).resolve().parents[2] / "setup"
+VERIFIED_SCRIPT = SETUP_DIR / "09_verified_queries.sql"
+SEMANTIC_SCRIPT = SETUP_DIR / "04_semantic_views.sql"
+
+MATCH_THRESHOLD = 0.75
+DEFAULT_LIMIT = 10
+MAX_LIMIT = 100
+ANSWER_ROWS = 20
+
+# Values a question may name, per semantic view: placeholder -> (table, column)
+VIEW_SLOTS = {
+    "SV_CAMPAIGN_ANALYTICS": {
+        "therapeutic_area": ("T_CAMPAIGN_PERFORMANCE", "therapeutic_area"),
+        "partner_name": ("T_CAMPAIGN_PERFORMANCE", "partner_name"),
+        "drug_name": ("T_CAMPAIGN_PERFORMANCE", "drug_name"),
+    },
+    "SV_INVENTORY_ANALYTICS": {
+        "region": ("T_INVENTORY_ANALYTICS", "region"),
+        "specialty_name": ("T_INVENTORY_ANALYTICS", "specialty_name"),
+    },
+    "SV_AUDIENCE_INSIGHTS": {
+        "region": ("T_AUDIENCE_INSIGHTS", "region"),
+    },
+}
+
+_STOPWORDS = frozenset(
+    "a an the of for in on at by to and or is are was were be do doe did what which who whose how "
+    "me my our we us you your show give list tell find get see there their it its this that these those "
+    "please can could would should i with from".split()
+)
+_PLACEHOLDER_RE = re.compile(r"\{(\w+)\}")
+_SUFFIX_RE = re.compile(r"(?:\s*&\s*co\.?|\s+(?:inc|co|corp|ltd|plc)\.?)$", re.IGNORECASE)
+_VIEW_RE = re.compile(r"CREATE\s+OR\s+REPLACE\s+SEMANTIC\s+VIEW\s+[\w.]*?(\w+)\s", re.IGNORECASE)
+_FIELD_RE = re.compile(
+    r"(\w+)\.(\w+)\s+AS\s+[^\n]*\n(?:\s*WITH\s+SYNONYMS\s*=\s*\(([^)]*)\))?", re.IGNORECASE
+)
+_TABLE_RE = re.compile(r"\bFROM\s+(?:\w+\.)*(\w+)", re.IGNORECASE)
+
+
+# =============================================================================
+# Repository
+# =============================================================================
+@dataclass(frozen=True)
+class VerifiedQuery:
+    name: str
+    semantic_view: str
+    tool: str
+    question: str
+    variants: Tuple[str, ...]
+    sql: str
+
+    @property
+    def phrasings(self) -> Tuple[str, ...]:
+        return (self.question,) + self.variants
+
+    @property
+    def slots(self) -> FrozenSet[str]:
+        """Values the SQL takes, besides the row limit."""
+        return frozenset(_PLACEHOLDER_RE.findall(self.sql)) - {"n"}
+
+    @property
+    def limited(self) -> bool:
+        return "{n}" in self.sql
+
+    @property
+    def table(self) -> str:
+        return _TABLE_RE.search(self.sql).group(1).upper()
+
+
+def load_verified_queries(path: Optional[Path] = None) -> List[VerifiedQuery]:
+    table = load_seed_tables(Path(path) if path else VERIFIED_SCRIPT)["VERIFIED_QUERIES"]
+    return [
+        VerifiedQuery(r["name"], r["semantic_view"], r["tool"], r["question"],
+                      tuple(v.strip() for v in (r["variants"] or "").split("|") if v.strip()), r["sql_text"])
+        for r in table.records()
+    ]
+
+
+def load_synonyms(path: Optional[Path] = None) -> Dict[str, Dict[str, str]]:
+    """``{view: {phrase: column}}`` from the semantic views' names and SYNONYMS."""
+    sql = _strip_comments(Path(path or SEMANTIC_SCRIPT).read_text(encoding="utf-8"))
+    views = list(_VIEW_RE.finditer(sql))
+    synonyms: Dict[str, Dict[str, str]] = {}
+    for i, view in enumerate(views):
+        body = sql[view.end():views[i + 1].start() if i + 1 < len(views) else len(sql)]
+        phrases = synonyms.setdefault(view.group(1).upper(), {})
+        for match in _FIELD_RE.finditer(body):
+            column = match.group(2).lower()
+            names = {column.replace("_", " "), re.sub(r"^(total|avg) | pct$", "", column.replace("_", " "))}
+            names.update(re.findall(r"'([^']*)'", match.group(3) or ""))
+            for phrase in names:
+                phrases.setdefault(phrase.lower(), column)
+    return synonyms
+
+
+def value_aliases(value: str) -> List[str]:
+    """'Pfizer Inc.' is also asked about as 'Pfizer'."""
+    short = _SUFFIX_RE.sub("", value)
+    return [value] if short == value or not short else [value, short]
+
+
+# =============================================================================
+# Matching
+# =============================================================================
+@dataclass
+class Match:
+    query: VerifiedQuery
+    score: float
+    params: Dict[str, object] = field(default_factory=dict)
+
+
+class _Phrases:
+    """Longest-first phrase table over token tuples."""
+
+    def __init__(self):
+        self.table: Dict[Tuple[str, ...], Tuple[str, object]] = {}
+        self.longest = 1
+
+    def add(self, phrase: str, token: str, value: object = None) -> None:
+        key = tuple(tokenize(phrase))
+        if key and key not in self.table:
+            self.table[key] = (token, value)
+            self.longest = max(self.longest, len(key))
+
+    def rewrite(self, tokens: List[str]) -> Tuple[List[str], Dict[str, object]]:
+        out, params, i = [], {}, 0
+        while i < len(tokens):
+            for size in range(min(self.longest, len(tokens) - i), 0, -1):
+                hit = self.table.get(tuple(tokens[i:i + size]))
+                if hit is not None:
+                    token, value = hit
+                    if value is not None:
+                        params[token[1:-1]] = value
+                    out.append(token)
+                    i += size
+                    break
+            else:
+                if tokens[i].isdigit():
+                    params["n"] = int(tokens[i])
+                    out.append("{n}")
+                elif tokens[i] not in _STOPWORDS:
+                    out.append(tokens[i])
+                i += 1
+        return out, params
+
+
+class QueryMatcher:
+    """TF-IDF cosine matching of questions to verified query phrasings."""
+
+    def __init__(self, queries: Sequence[VerifiedQuery], synonyms: Dict[str, Dict[str, str]],
+                 vocabulary: Dict[str, Sequence[str]], threshold: float = MATCH_THRESHOLD):
+        self.threshold = threshold
+        self.phrases: Dict[str, _Phrases] = {}
+        for view, slots in VIEW_SLOTS.items():
+            phrases = self.phrases[view] = _Phrases()
+            for slot in slots:
+                for value in vocabulary.get(slot, ()):
+                    for alias in value_aliases(value):
+                        phrases.add(alias, "{%s}" % slot, value)
+            for phrase, column in synonyms.get(view, {}).items():
+                phrases.add(phrase, f"={column}")
+
+        self._docs: List[Tuple[VerifiedQuery, Counter]] = []
+        for query in queries:
+            for phrasing in query.phrasings:
+                self._docs.append((query, Counter(self._template_tokens(phrasing, query.semantic_view))))
+        df = Counter(token for _, doc in self._docs for token in doc)
+        n = len(self._docs)
+        self._idf = {token: math.log(1 + n / count) for token, count in df.items()}
+        self._unknown_idf = math.log(1 + n)
+        self._vectors = [(query, self._weigh(doc)) for query, doc in self._docs]
+
+    def _template_tokens(self, phrasing: str, view: str) -> List[str]:
+        tokens: List[str] = []
+        for i, part in enumerate(_PLACEHOLDER_RE.split(phrasing)):
+            if i % 2:
+                tokens.append("{%s}" % part)
+            else:
+                tokens.extend(self.phrases[view].rewrite(tokenize(part))[0])
+        return tokens
+
+    def _weigh(self, tokens) -> Tuple[Dict[str, float], float]:
+        weights = {t: c * self._idf.get(t, self._unknown_idf) for t, c in Counter(tokens).items()}
+        return weights, math.sqrt(sum(w * w for w in weights.values())) or 1.0
+
+    def match(self, question: str) -> Optional[Match]:
+        """Best phrasing at or above the threshold whose values line up, else None."""
+        words = tokenize(question)
+        best: Optional[Match] = None
+        for view, phrases in self.phrases.items():
+            tokens, params = phrases.rewrite(words)
+            named = set(params) - {"n"}
+            q_weights, q_norm = self._weigh(tokens)
+            for query, (weights, norm) in self._vectors:
+                if query.semantic_view != view or query.slots != named or ("n" in params and not query.limited):
+                    continue
+                score = sum(w * weights.get(t, 0.0) for t, w in q_weights.items()) / (q_norm * norm)
+                if score >= self.threshold and (best is None or score > best.score):
+                    best = Match(query, score, params)
+        return best
+
+
+# =============================================================================
+# Execution
+# =============================================================================
+def _literal(value: object) -> str:
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+def render_sql(query: VerifiedQuery, params: Dict[str, object]) -> str:
+    """The stored SQL with values bound (quoted) and the limit clamped."""
+    limit = min(max(int(params.get("n", DEFAULT_LIMIT)), 1), MAX_LIMIT)
+
+    def bind(match):
+        name = match.group(1)
+        return str(limit) if name == "n" else _literal(params[name])
+
+    return _PLACEHOLDER_RE.sub(bind, query.sql)
+
+
+def _cell(value: object) -> str:
+    if isinstance(value, Decimal):
+        value = int(value) if value == value.to_integral_value() else float(value)
+    if isinstance(value, float):
+        return f"{value:,.2f}"
+    if isinstance(value, int) and not isinstance(value, bool):
+        return f"{value:,}"
+    return "" if value is None else str(value).replace("|", "\\|")
+
+
+@dataclass
+class VerifiedAnswer:
+    query: VerifiedQuery
+    score: float
+    params: Dict[str, object]
+    data: object               # pyarrow.Table
+    seconds: float
+
+    def markdown(self, max_rows: int = ANSWER_ROWS) -> str:
+        question = self.query.question
+        for name, value in self.params.items():
+            question = question.replace("{%s}" % name, str(value))
+        table = self.data
+        header = [c.replace("_", " ").title() for c in table.column_names]
+        rows = table.slice(0, max_rows).to_pylist()
+        lines = [f"**{question}**", "", "| " + " | ".join(header) + " |", "|" + "---|" * len(header)]
+        lines += ["| " + " | ".join(_cell(v) for v in row.values()) + " |" for row in rows]
+        if table.num_rows > max_rows:
+            lines.append(f"\n_{table.num_rows - max_rows} more rows not shown._")
+        lines.append(f"\n_✅ Verified query `{self.query.name}` ({self.query.tool}) · "
+                     f"{self.seconds * 1e3:.0f} ms, no SQL generation_")
+        return "\n".join(lines)
+
+
+class VerifiedQueryLayer:
+    """
+    Matches questions to verified queries and runs them. ``run(name, sql,
+    table)`` executes the bound SQL and returns a pyarrow.Table.
+    """
+
+    def __init__(self, matcher: QueryMatcher, run: Callable[[str, str, str], object],
+                 metrics: MetricsRegistry = registry, clock: Callable[[], float] = time.perf_counter):
+        self.matcher = matcher
+        self.run = run
+        self.metrics = metrics
+        self.clock = clock
+
+    def answer(self, question: str) -> Optional[VerifiedAnswer]:
+        start = self.clock()
+        self.metrics.inc("verified.lookups")
+        match = self.matcher.match(question)
+        if match is None:
+            self.metrics.inc("verified.misses")
+            return None
+        try:
+            data = self.run(f"verified.{match.query.name}", render_sql(match.query, match.params), match.query.table)
+        except Exception:
+            # Let the agent answer instead
+            self.metrics.inc("verified.errors")
+            return None
+        elapsed = self.clock() - start
+        self.metrics.inc("verified.hits")
+        self.metrics.observe("verified.seconds", elapsed)
+        return VerifiedAnswer(match.query, match.score, match.params, data, elapsed)
+
+    def stats(self, generation_seconds: Optional[float] = None) -> Dict[str, float]:
+        """
+        Hit rate and latency. With ``generation_seconds`` (mean time of an
+        agent answer) also the estimated time saved by the hits.
+        """
+        snap = self.metrics.snapshot("verified.")
+        counters = snap["counters"]
+        lookups, hits = counters.get("verified.lookups", 0), counters.get("verified.hits", 0)
+        verified_ms = snap["histograms"].get("verified.seconds", {}).get("mean_ms", 0.0)
+        stats = {"lookups": lookups, "hits": hits, "hit_rate": hits / lookups if lookups else 0.0,
+                 "verified_ms": verified_ms}
+        if generation_seconds:
+            stats["saved_seconds"] = hits * max(0.0, generation_seconds - verified_ms / 1e3)
+        return stats
+
+
+def load_vocabulary(fetch: Callable[[str], object]) -> Dict[str, List[str]]:
+    """Distinct values for every slot; ``fetch(sql)`` returns a pyarrow.Table."""
+    vocabulary: Dict[str, List[str]] = {}
+    for slots in VIEW_SLOTS.values():
+        for slot, (table, column) in slots.items():
+            values = fetch(f"SELECT DISTINCT {column} AS value FROM AD_TECH.ANALYTICS.{table}").column(0)
+            vocabulary[slot] = sorted(set(vocabulary.get(slot, [])) | {v for v in values.to_pylist() if v})
+    return vocabulary
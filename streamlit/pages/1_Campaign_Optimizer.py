@@ -3,20 +3,34 @@
 PatientPoint Ad Tech Demo - Campaign Optimizer Page
 =============================================================================
 Real-time campaign performance analytics and bid optimization.
-Uses Snowflake data to display KPIs and recommendations.
+Uses Snowflake data to display KPIs and recommendations. KPI Alerts come
+from the streaming anomaly detector (ad_tech/anomalies.py). Selecting a
+partner (or logging in as one) shows that partner's dashboard from the
+partner-scoped tables (ad_tech/partners.py). Chart data is cut to what
+the chart's width can show before it is sent (ad_tech/charts.py). Bid
+strategy experiments and their sequential test results come from
+ad_tech/experiments.py.
 =============================================================================
 """
 
+from datetime import timedelta
+
 import streamlit as st
 
-# Try to import Snowpark, handle gracefully if not in Snowflake
-try:
-    from snowflake.snowpark.context import get_active_session
-    session = get_active_session()
-    IN_SNOWFLAKE = True
-except:
-    IN_SNOWFLAKE = False
-    session = None
+from ad_tech import content
+from ad_tech.charts import FULL_WIDTH, HALF_WIDTH, downsample, reduce_bars
+from ad_tech.data_access import first_row, result_cache
+from ad_tech.partners import PartnerScope, partner_directory, resolve_partner
+from ad_tech.runtime import (
+    get_engine, get_experiments, get_kpi_monitor, get_query_router, get_session, get_summary, lazy_module,
+)
+from ad_tech.snapshots import campaign_kpis, format_age, roas_by, top_campaigns
+from ad_tech.trends import compare_periods, period_options, resolve_comparison
+
+# Snowpark is imported and the session resolved once per process, on first use
+session = get_session()
+IN_SNOWFLAKE = session is not None
+pd = lazy_module("pandas")
 
 st.set_page_config(
     page_title="Campaign Optimizer",
@@ -43,37 +57,117 @@ selected_therapeutic = st.sidebar.selectbox(
     index=0
 )
 
-# Partner Filter
-partners = [
-    "All", "Pfizer Inc.", "Eli Lilly", "Johnson & Johnson", 
-    "Merck & Co.", "AbbVie Inc.", "Novartis"
-]
+# Partner Filter: partner logins are pinned to their own partner
+if "partner_id" not in st.session_state:
+    st.session_state.partner_id = resolve_partner(get_engine())
+logged_in_partner = st.session_state.partner_id
+try:
+    partner_ids = {p["partner_name"]: p["partner_id"] for p in partner_directory(get_engine())}
+except Exception:
+    partner_ids = {}    # setup/12_partner_views.sql not run yet
+if logged_in_partner is None:
+    partners = ["All", *partner_ids]
+else:
+    partners = [name for name, pid in partner_ids.items() if pid == logged_in_partner]
+    if not partners:
+        st.error("Your partner login has no campaigns yet.")
+        st.stop()
 selected_partner = st.sidebar.selectbox(
     "Pharma Partner",
     partners,
-    index=0
+    index=0,
+    disabled=logged_in_partner is not None
 )
 
 # Time Period
-time_periods = ["Last 30 Days", "Last 90 Days", "Q4 2024", "Q3 2024", "YTD 2024"]
+time_periods = period_options()
 selected_period = st.sidebar.selectbox(
     "Time Period",
     time_periods,
     index=0
 )
 
+# Portfolio-wide numbers are for internal users only
 st.sidebar.divider()
-st.sidebar.markdown("### 📊 Quick Stats")
-st.sidebar.metric("Active Campaigns", "47")
-st.sidebar.metric("Avg Win Rate", "65.2%")
-st.sidebar.metric("Avg ROAS", "2.3x")
+summary = get_summary() if IN_SNOWFLAKE and logged_in_partner is None else None
+if logged_in_partner is None:
+    st.sidebar.markdown("### 📊 Quick Stats")
+    if summary:
+        st.sidebar.metric("Active Campaigns", f"{summary.active_campaigns:,}")
+        st.sidebar.metric("Avg Win Rate", f"{summary.avg_win_rate}%")
+        st.sidebar.metric("Avg ROAS", f"{summary.avg_roas}x")
+        st.sidebar.caption(f"Updated {format_age(summary.age())} ago")
+    else:
+        st.sidebar.metric("Active Campaigns", "47")
+        st.sidebar.metric("Avg Win Rate", "65.2%")
+        st.sidebar.metric("Avg ROAS", "2.3x")
+
+# Partner Dashboard: only the partner's partitions of the partner-scoped
+# tables are read, and results are cached in the partner's own namespace
+if selected_partner in partner_ids:
+    scope = PartnerScope(get_engine(), partner_ids[selected_partner])
+    st.markdown(f"## 🏢 {selected_partner} Dashboard")
+    partner_kpis = scope.kpis() or {}
+    col1, col2, col3, col4, col5 = st.columns(5)
+    col1.metric("Campaigns", f"{partner_kpis.get('campaigns', 0):,}",
+                help=f"{partner_kpis.get('active_campaigns', 0)} active")
+    col2.metric("Impressions", f"{partner_kpis.get('impressions') or 0:,.0f}")
+    col3.metric("Revenue", f"${partner_kpis.get('revenue') or 0:,.0f}")
+    col4.metric("ROAS", f"{partner_kpis.get('roas') or 0:.2f}x")
+    col5.metric("Win Rate", f"{partner_kpis.get('win_rate_pct') or 0:.1f}%")
+
+    window = resolve_comparison(selected_period).current
+    partner_daily = scope.daily(window.start, window.end)
+    if partner_daily.num_rows:
+        st.markdown(f"### Revenue and Spend · {window.label}")
+        partner_daily = partner_daily.rename_columns([c.upper() for c in partner_daily.column_names])
+        daily_frame = downsample(partner_daily, "DATE_DAY", ["REVENUE", "SPEND"], FULL_WIDTH.points).to_pandas()
+        st.line_chart(daily_frame.set_index("DATE_DAY")[["REVENUE", "SPEND"]])
+    else:
+        st.caption(f"No delivery in {window.label}.")
+
+    partner_campaigns = scope.campaigns()
+    st.dataframe(
+        partner_campaigns.rename_columns(["Campaign", "Drug", "Area", "Status", "Impressions", "Revenue", "ROAS"]),
+        use_container_width=True, hide_index=True
+    )
+    tenant = scope.stats()
+    st.caption(
+        f"Read from the partner_id = {scope.partner_id} partitions of T_PARTNER_CAMPAIGNS / T_PARTNER_DAILY · "
+        f"partner cache: {tenant.get('hit_rate', 0):.0%} hit rate over "
+        f"{tenant.get('hits', 0) + tenant.get('misses', 0):,} lookups, p50 {tenant.get('p50_ms', 0):.1f} ms"
+    )
+    if logged_in_partner is not None:
+        st.stop()    # partner logins see only their own dashboard
+    st.divider()
+
+if logged_in_partner is None:
+    tenants = result_cache().tenant_stats()
+    if tenants:
+        with st.sidebar.expander("🏢 Partner Cache"):
+            names = {f"partner:{pid}": name for name, pid in partner_ids.items()}
+            st.dataframe(pd.DataFrame([{
+                "Partner": names.get(tenant, tenant),
+                "Hit Rate": f"{stats['hit_rate']:.0%}",
+                "p50 ms": round(stats["p50_ms"], 1),
+                "p99 ms": round(stats["p99_ms"], 1),
+                "Cached": stats["entries"],
+            } for tenant, stats in sorted(tenants.items(), key=lambda t: -(t[1]["hits"] + t[1]["misses"]))]),
+                use_container_width=True, hide_index=True)
 
 # Main Content
 if IN_SNOWFLAKE and session:
     # Query real data from Snowflake
     
+    # Cheap aggregates are answered from the result cache, or from the local
+    # snapshot while AD_TECH_WH is suspended, so a page view doesn't pay a
+    # warehouse resume just for dashboard numbers
+    router = get_query_router()
+    TABLE = "T_CAMPAIGN_PERFORMANCE"
+    
     # KPI Section
     st.markdown("## 📊 Campaign Performance Overview")
+    route_caption = st.empty()
     
     col1, col2, col3, col4, col5 = st.columns(5)
     
@@ -90,9 +184,20 @@ if IN_SNOWFLAKE and session:
     """
     
     try:
-        kpis = session.sql(kpi_query).collect()
-        if kpis:
-            row = kpis[0]
+        kpis = router.fetch("kpis", kpi_query, table=TABLE, snapshot=campaign_kpis)
+        row = first_row(kpis.data)
+        if kpis.route == "snapshot":
+            freshness = router.snapshots.freshness(TABLE)
+            route_caption.caption(
+                f"📦 Local snapshot ({kpis.reason}) · refreshed {format_age(freshness['age_seconds'])} ago · "
+                f"{freshness['rows']:,} campaigns · no warehouse resume"
+            )
+        else:
+            route_caption.caption(
+                f"❄️ {'Cached result' if kpis.route == 'cache' else 'Live query'} · "
+                f"{kpis.seconds * 1000:,.0f} ms{' · resumed AD_TECH_WH' if kpis.resumed else ''}"
+            )
+        if row:
             col1.metric("Active Campaigns", f"{row['CAMPAIGNS']:,}")
             col2.metric("Total Impressions", f"{row['IMPRESSIONS']:,.0f}")
             col3.metric("Avg Win Rate", f"{row['AVG_WIN_RATE']}%")
@@ -129,9 +234,9 @@ if IN_SNOWFLAKE and session:
     """
     
     try:
-        campaigns_df = session.sql(campaign_query).to_pandas()
+        campaigns = router.fetch("top_campaigns", campaign_query, table=TABLE, snapshot=top_campaigns).data
         st.dataframe(
-            campaigns_df,
+            campaigns,
             use_container_width=True,
             hide_index=True,
             column_config={
@@ -170,9 +275,13 @@ if IN_SNOWFLAKE and session:
         """
         
         try:
-            therapeutic_df = session.sql(therapeutic_query).to_pandas()
+            therapeutic = router.fetch(
+                "roas_by_area", therapeutic_query, table=TABLE,
+                snapshot=lambda store: roas_by(store, "THERAPEUTIC_AREA"),
+            ).data
             st.bar_chart(
-                therapeutic_df.set_index('THERAPEUTIC_AREA')['AVG_ROAS'],
+                reduce_bars(therapeutic, "THERAPEUTIC_AREA", "AVG_ROAS", HALF_WIDTH.bars, weight="CAMPAIGNS"),
+                x='THERAPEUTIC_AREA', y='AVG_ROAS',
                 use_container_width=True
             )
         except Exception as e:
@@ -193,13 +302,35 @@ if IN_SNOWFLAKE and session:
         """
         
         try:
-            partner_df = session.sql(partner_query).to_pandas()
+            partners = router.fetch(
+                "roas_by_tier", partner_query, table=TABLE,
+                snapshot=lambda store: roas_by(store, "PARTNER_TIER"),
+            ).data
             st.bar_chart(
-                partner_df.set_index('PARTNER_TIER')['AVG_ROAS'],
+                reduce_bars(partners, "PARTNER_TIER", "AVG_ROAS", HALF_WIDTH.bars, weight="CAMPAIGNS"),
+                x='PARTNER_TIER', y='AVG_ROAS',
                 use_container_width=True
             )
         except Exception as e:
             st.info("Chart will display when connected to Snowflake")
+    
+    with st.sidebar.expander("🧭 Query Routing"):
+        routing = router.stats()
+        counters, totals = routing["counters"], routing["totals"]
+        st.caption(f"Warehouse: {routing['state']}")
+        st.metric("Warehouse resumes", f"{counters.get('warehouse.resumes', 0):,}")
+        st.metric("Resumes avoided", f"{counters.get('router.resumes_avoided', 0):,}")
+        st.metric("Latency saved", f"{totals.get('router.saved_seconds', 0.0):,.1f}s")
+        st.caption(" · ".join(
+            f"{route}: {counters.get(f'router.route.{route}', 0):,}"
+            for route in ("cache", "snapshot", "warehouse")
+        ))
+        cache = router.cache.stats()
+        st.caption(
+            f"Result cache: {cache['bytes'] / 2**20:,.1f} MB resident "
+            f"({cache['compression']:.1f}x compressed) · {cache['entries']} results · "
+            f"{cache['evictions']} evicted"
+        )
 
 else:
     # Demo mode with placeholder data
@@ -220,19 +351,7 @@ else:
     # Demo Campaign Table
     st.markdown("## 🎯 Top Performing Campaigns")
     
-    import pandas as pd
-    
-    demo_campaigns = pd.DataFrame({
-        "Campaign": ["Jardiance Awareness 2024", "Ozempic Education Q4", "Entresto HCP Engagement", 
-                    "Keytruda Patient Support", "Humira Launch 2024"],
-        "Drug": ["Jardiance", "Ozempic", "Entresto", "Keytruda", "Humira"],
-        "Therapeutic Area": ["Diabetes", "Diabetes", "Cardiology", "Oncology", "Immunology"],
-        "Partner": ["Eli Lilly", "Novo Nordisk", "Novartis", "Merck", "AbbVie"],
-        "Impressions": [245000, 312000, 189000, 156000, 278000],
-        "Win Rate %": [68.5, 72.1, 61.3, 58.9, 65.7],
-        "CTR %": [0.045, 0.052, 0.038, 0.041, 0.048],
-        "ROAS": [3.2, 2.9, 2.5, 2.3, 2.1]
-    })
+    demo_campaigns = pd.DataFrame(content.DEMO_CAMPAIGNS)
     
     st.dataframe(demo_campaigns, use_container_width=True, hide_index=True)
     
@@ -243,21 +362,98 @@ else:
     
     with col1:
         st.markdown("### 📊 ROAS by Therapeutic Area")
-        therapeutic_data = pd.DataFrame({
-            "Area": ["Diabetes", "Cardiology", "Oncology", "Immunology", "Neurology"],
-            "ROAS": [2.8, 2.4, 2.2, 2.0, 1.8]
-        })
+        therapeutic_data = pd.DataFrame(content.DEMO_THERAPEUTIC_ROAS)
         st.bar_chart(therapeutic_data.set_index("Area"))
     
     with col2:
         st.markdown("### 📈 Performance by Partner Tier")
-        tier_data = pd.DataFrame({
-            "Tier": ["Platinum", "Gold", "Silver", "Bronze"],
-            "ROAS": [2.6, 2.3, 1.9, 1.5]
-        })
+        tier_data = pd.DataFrame(content.DEMO_TIER_ROAS)
         st.bar_chart(tier_data.set_index("Tier"))
 
+# KPI Alerts: the detector is replayed over the daily facts once per process
+# and fed each new day in the background
+st.divider()
+st.markdown("## 🚨 KPI Alerts")
+
+KPI_LABELS = {"win_rate": "Win Rate", "fill_rate": "Fill Rate", "ctr": "CTR", "roas": "ROAS"}
+
+try:
+    monitor = get_kpi_monitor()
+except Exception as e:
+    monitor = None
+    st.info(f"KPI alerts need setup/06_daily_facts.sql ({e})")
+
+if monitor is not None and monitor.watermark is not None:
+    alerts = monitor.detector.alerts(since=monitor.watermark - timedelta(days=7), drops_only=True)
+    st.caption(
+        f"Monitoring {len(monitor.detector):,} campaign and slot series through {monitor.watermark:%b %d} · "
+        f"peer alerts compare each KPI with active peers, shift alerts with the series' own history"
+    )
+    if alerts:
+        def _fmt(kpi, value):
+            return f"{value:.2f}x" if kpi == "roas" else f"{value * 100:.1f}%"
+
+        st.dataframe(pd.DataFrame([{
+            "Type": a.kind.title(),
+            "Name": monitor.label(a.series),
+            "KPI": KPI_LABELS.get(a.kpi, a.kpi),
+            "Alert": "Below peers" if a.rule == "peer" else "Sudden drop",
+            "Value": _fmt(a.kpi, a.value),
+            "Expected": _fmt(a.kpi, a.expected),
+            "Robust z": round(a.z, 1),
+            "Day": a.day,
+        } for a in alerts]), use_container_width=True, hide_index=True)
+    else:
+        st.success("✅ No campaign or slot KPI is out of line")
+
+# Period Comparison Section (served from T_CAMPAIGN_PERIOD_ROLLUP)
+st.divider()
+comparison = resolve_comparison(selected_period)
+st.markdown(f"## 📅 {comparison.current.label} vs {comparison.previous.label}")
+
+try:
+    period_rows = compare_periods(get_engine(), comparison)
+except Exception as e:
+    st.info(f"Period comparison needs setup/06_daily_facts.sql ({e})")
+    period_rows = []
+
+if period_rows:
+    totals = period_rows[0]
+    
+    def _delta(current, previous, fmt):
+        if not previous:
+            return None
+        return fmt.format(current - previous)
+    
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric(
+        "Impressions",
+        f"{totals['cur_impressions'] or 0:,.0f}",
+        delta=_delta(totals['cur_impressions'] or 0, totals['prev_impressions'], "{:+,.0f}")
+    )
+    col2.metric(
+        "Revenue",
+        f"${totals['cur_revenue'] or 0:,.0f}",
+        delta=_delta(totals['cur_revenue'] or 0, totals['prev_revenue'], "${:+,.0f}")
+    )
+    col3.metric(
+        "ROAS",
+        f"{totals['cur_roas'] or 0:.2f}x",
+        delta=_delta(totals['cur_roas'] or 0, totals['prev_roas'], "{:+.2f}x")
+    )
+    col4.metric(
+        "CTR",
+        f"{totals['cur_ctr_pct'] or 0:.2f}%",
+        delta=_delta(totals['cur_ctr_pct'] or 0, totals['prev_ctr_pct'], "{:+.2f}%")
+    )
+
 # Bid Optimization Section
+@st.cache_resource(show_spinner=False)
+def load_bid_recommender():
+    """Precompute bid aggregates once per process (Snowflake or local demo data)."""
+    from ad_tech.bidding import BidRecommender
+    return BidRecommender.from_session(get_engine())
+
 st.divider()
 st.markdown("## 💰 Bid Price Optimization")
 
@@ -297,35 +493,108 @@ with col2:
     st.markdown("### AI Recommendation")
     
     if st.session_state.get('show_recommendation', False):
-        st.success("**Recommended Bid Range: $14.50 - $18.25 CPM**")
-        
-        st.markdown("""
-        #### Analysis Summary
-        
-        Based on historical performance data for **{therapeutic}** campaigns 
-        targeting **{specialty}** facilities:
-        
-        | Metric | Value |
-        |--------|-------|
-        | Historical Avg CPM | $15.80 |
-        | Win Rate at Recommended | 68% |
-        | Expected ROAS | 2.4x |
-        | Competition Level | Moderate |
-        
-        #### Recommendation Details
-        - **Floor Price**: $12.00 (minimum competitive bid)
-        - **Sweet Spot**: $16.50 (optimal value/win rate balance)
-        - **Max Recommended**: $18.25 (diminishing returns above this)
+        try:
+            recommendation = load_bid_recommender().recommend(
+                specialty=opt_specialty,
+                region=None if opt_region == "All Regions" else opt_region,
+                daypart=None if opt_daypart == "All Day" else opt_daypart,
+                therapeutic_area=opt_therapeutic
+            )
+        except Exception as e:
+            st.error(f"Error computing recommendation: {e}")
+            recommendation = None
         
-        💡 **Tip**: Morning slots in cardiology waiting rooms show 15% higher 
-        engagement rates for diabetes medications.
-        """.format(
-            therapeutic=opt_therapeutic,
-            specialty=opt_specialty
-        ))
+        if recommendation:
+            st.success(
+                f"**Recommended Bid Range: ${recommendation.low_cpm:.2f} - "
+                f"${recommendation.high_cpm:.2f} CPM**"
+            )
+            
+            expected_roas = (
+                f"{recommendation.expected_roas:.1f}x" if recommendation.expected_roas else "N/A"
+            )
+            
+            st.markdown("""
+            #### Analysis Summary
+            
+            Based on historical performance data for **{therapeutic}** campaigns 
+            targeting **{specialty}** facilities ({slots} comparable slots, {level} match):
+            
+            | Metric | Value |
+            |--------|-------|
+            | Historical Avg CPM | ${avg_cpm:.2f} |
+            | Fill Rate of Comparable Slots | {fill_rate:.0f}% |
+            | Expected ROAS | {roas} |
+            | Competition Level | {competition} |
+            
+            #### Recommendation Details
+            - **Floor Price**: ${floor:.2f} (minimum competitive bid)
+            - **Sweet Spot**: ${sweet:.2f} (optimal value/win rate balance)
+            - **Max Recommended**: ${high:.2f} (diminishing returns above this)
+            """.format(
+                therapeutic=opt_therapeutic,
+                specialty=opt_specialty,
+                slots=recommendation.slots,
+                level=recommendation.match_level,
+                avg_cpm=recommendation.historical_avg_cpm,
+                fill_rate=recommendation.expected_fill_rate_pct,
+                roas=expected_roas,
+                competition=recommendation.competition,
+                floor=recommendation.floor_cpm,
+                sweet=recommendation.sweet_spot_cpm,
+                high=recommendation.high_cpm
+            ))
     else:
         st.info("👆 Configure your campaign parameters and click 'Get Optimal Bid' for AI-powered pricing recommendations.")
 
+# Bid strategy experiments: outcomes update the sequential test as they are
+# logged, so every run shows the current, always-valid result
+st.divider()
+st.markdown("## 🧪 Bid Strategy Experiments")
+
+try:
+    experiments = get_experiments()
+except Exception as e:
+    experiments = None
+    st.info(f"Bid experiments need setup/13_bid_experiments.sql ({e})")
+
+if experiments is not None and len(experiments):
+    from ad_tech.experiments import METRIC_LABELS
+
+    counts = experiments.summary()
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Running", counts["running"])
+    col2.metric("Promoted", counts["promoted"])
+    col3.metric("Stopped Early", counts["stopped"])
+    col4.metric("Inconclusive", counts["inconclusive"])
+
+    def _fmt_metric(metric, value):
+        if value != value:                      # NaN: no outcomes yet
+            return "-"
+        return f"{value:.2f}x" if metric == "roas" else f"{value * 100:.2f}%" if metric != "revenue" \
+            else f"${value:,.2f}"
+
+    STATE_LABELS = {"control": "Control", "running": "🔄 Running", "promoted": "✅ Promoted",
+                    "stopped": "⛔ Stopped", "replaced": "Replaced", "inconclusive": "➖ Inconclusive"}
+    st.dataframe(pd.DataFrame([{
+        "Experiment": r.experiment.name,
+        "Scope": r.experiment.scope_label(),
+        "Strategy": r.strategy.replace("_", " ").title(),
+        "Metric": METRIC_LABELS[r.experiment.metric],
+        "Requests": r.n,
+        "Value": _fmt_metric(r.experiment.metric, r.value),
+        "Lift": f"{r.lift:+.1%}" if r.lift is not None else "",
+        "95% CI (vs control)": f"{r.ci_low:+.2f} to {r.ci_high:+.2f}" if r.ci_low is not None else "",
+        "p (always valid)": f"{r.p_value:.3f}" if r.p_value is not None else "",
+        "Status": STATE_LABELS.get(r.state, r.state),
+    } for r in experiments.results()]), use_container_width=True, hide_index=True)
+    st.caption(
+        "Requests are split by hashing their slot (or request) id. The mSPRT test can be read after every "
+        "outcome; a strategy is promoted or stopped as soon as it beats or loses to the control at 95%."
+    )
+elif experiments is not None:
+    st.info("No bid strategy experiments yet.")
+
 # Footer
 st.divider()
 st.markdown("""
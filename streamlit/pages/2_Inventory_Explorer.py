@@ -3,20 +3,31 @@
 PatientPoint Ad Tech Demo - Inventory Explorer Page
 =============================================================================
 Natural language search and exploration of available ad inventory.
-Uses Cortex Search for semantic discovery.
+Uses Cortex Search for semantic discovery. The Reach Planner estimates
+deduplicated reach for any slot and cohort mix from mergeable sketches
+(ad_tech/reach.py); Availability & Booking checks free impressions per day
+and reserves slots (ad_tech/booking.py). Slot Delivery charts are reduced
+to the chart's width in the warehouse (ad_tech/charts.py).
 =============================================================================
 """
 
+from datetime import date, timedelta
+
 import streamlit as st
 
-# Try to import Snowpark
-try:
-    from snowflake.snowpark.context import get_active_session
-    session = get_active_session()
-    IN_SNOWFLAKE = True
-except:
-    IN_SNOWFLAKE = False
-    session = None
+from ad_tech import content
+from ad_tech.booking import BookingConflict
+from ad_tech.charts import FULL_WIDTH, HALF_WIDTH, category_bars, reduce_bars, time_series
+from ad_tech.runtime import (
+    get_booking_engine, get_engine, get_inventory_search, get_query_router, get_reach_store, get_session,
+    get_summary, lazy_module,
+)
+from ad_tech.snapshots import format_age, inventory_by_region
+
+# Snowpark is imported and the session resolved once per process, on first use
+session = get_session()
+IN_SNOWFLAKE = session is not None
+pd = lazy_module("pandas")
 
 st.set_page_config(
     page_title="Inventory Explorer",
@@ -71,6 +82,42 @@ if st.button("🔍 Search", use_container_width=True, type="primary"):
 
 st.divider()
 
+def render_slot(slot):
+    """One placement card; takes search results and DEMO_SLOTS entries."""
+    specialty = slot.get('specialty') or slot.get('specialty_name', 'N/A')
+    impressions = slot.get('daily_impressions') or slot.get('estimated_daily_impressions') or 0
+    with st.expander(
+        f"📍 {slot.get('slot_name', 'Unknown Slot')} | "
+        f"${slot.get('base_cpm', 0):.2f} CPM | "
+        f"{specialty}"
+    ):
+        col1, col2, col3 = st.columns(3)
+        
+        with col1:
+            st.markdown("**Location**")
+            st.write(f"🏥 {slot.get('facility_name', 'N/A')}")
+            st.write(f"📍 {slot.get('city', '')}, {slot.get('state', '')}")
+            st.write(f"🗺️ {slot.get('region', 'N/A')}")
+        
+        with col2:
+            st.markdown("**Specifications**")
+            st.write(f"🖥️ {slot.get('screen_type', 'N/A')}")
+            st.write(f"⏰ {slot.get('daypart', 'N/A')}")
+            st.write(f"⭐ {'Premium' if slot.get('is_premium') else 'Standard'}")
+        
+        with col3:
+            st.markdown("**Metrics**")
+            st.write(f"💰 ${slot.get('base_cpm', 0):.2f} CPM")
+            st.write(f"👀 {impressions:,} daily impressions")
+            st.write(f"🩺 {specialty}")
+        
+        if "score" in slot:
+            st.caption(
+                f"🎯 Score {slot['score']:.2f} · value {slot['value']:.2f} · "
+                f"availability {slot['availability']:.2f} · reach {slot['reach']:.2f}"
+            )
+
+
 # Results Section
 if st.session_state.get('search_executed', False):
     
@@ -80,75 +127,36 @@ if st.session_state.get('search_executed', False):
     if query_text:
         st.caption(f"Showing results for: *\"{query_text}\"*")
     
-    if IN_SNOWFLAKE and session and query_text:
-        # Use Cortex Search
+    st.session_state.show_demo = False
+    if query_text:
+        # Candidates from Cortex Search (local BM25 index outside Snowflake),
+        # re-ranked on engagement per dollar, availability and reach
+        filters = {
+            key: value for key, value in (
+                ("specialty", filter_specialty), ("region", filter_region), ("daypart", filter_daypart),
+            ) if value != "All"
+        }
+        premium = {"Premium Only": True, "Standard Only": False}.get(filter_premium)
         try:
-            # Build filter object
-            filter_parts = []
-            if filter_specialty != "All":
-                filter_parts.append(f'"@eq": {{"specialty": "{filter_specialty}"}}')
-            if filter_region != "All":
-                filter_parts.append(f'"@eq": {{"region": "{filter_region}"}}')
-            if filter_daypart != "All" and filter_daypart != "All Day":
-                filter_parts.append(f'"@eq": {{"daypart": "{filter_daypart}"}}')
-            
-            if filter_parts:
-                filter_clause = ', "filter": {' + ', '.join(filter_parts) + '}'
+            search = get_inventory_search()
+            result = search.search(
+                query_text, filters, premium, session=session if IN_SNOWFLAKE else None
+            )
+            if result.slots:
+                st.success(f"Found {len(result.slots)} matching ad placements")
+                source = "Cortex Search" if result.source == "cortex" else "local index"
+                refresher = getattr(search, "refresher", None)
+                lag = refresher.lag() if refresher is not None else None
+                st.caption(
+                    f"{result.candidates} candidates from {source} in {result.retrieve_ms:.0f} ms · "
+                    f"re-ranked by relevance, engagement per dollar and availability in {result.rerank_ms:.2f} ms"
+                    + (f" · inventory changes synced {format_age(lag)} ago" if lag is not None else "")
+                )
+                for slot in result.slots:
+                    render_slot(slot)
+                st.session_state.reach_slots = [slot["slot_id"] for slot in result.slots][:12]
             else:
-                filter_clause = ''
-            
-            search_sql = f"""
-            SELECT
-                SNOWFLAKE.CORTEX.SEARCH_PREVIEW(
-                    'AD_TECH.CORTEX.INVENTORY_SEARCH_SVC',
-                    '{{
-                        "query": "{query_text}",
-                        "columns": ["slot_id", "slot_name", "specialty", "facility_name", 
-                                   "city", "state", "region", "screen_type", "daypart", 
-                                   "base_cpm", "daily_impressions", "is_premium"],
-                        "limit": 20
-                        {filter_clause}
-                    }}'
-                ) as results
-            """
-            
-            results = session.sql(search_sql).collect()
-            
-            if results:
-                import json
-                result_data = json.loads(results[0]['RESULTS'])
-                
-                if 'results' in result_data and result_data['results']:
-                    st.success(f"Found {len(result_data['results'])} matching ad placements")
-                    
-                    for i, slot in enumerate(result_data['results']):
-                        with st.expander(
-                            f"📍 {slot.get('slot_name', 'Unknown Slot')} | "
-                            f"${slot.get('base_cpm', 0):.2f} CPM | "
-                            f"{slot.get('specialty', 'N/A')}"
-                        ):
-                            col1, col2, col3 = st.columns(3)
-                            
-                            with col1:
-                                st.markdown("**Location**")
-                                st.write(f"🏥 {slot.get('facility_name', 'N/A')}")
-                                st.write(f"📍 {slot.get('city', '')}, {slot.get('state', '')}")
-                                st.write(f"🗺️ {slot.get('region', 'N/A')}")
-                            
-                            with col2:
-                                st.markdown("**Specifications**")
-                                st.write(f"🖥️ {slot.get('screen_type', 'N/A')}")
-                                st.write(f"⏰ {slot.get('daypart', 'N/A')}")
-                                st.write(f"⭐ {'Premium' if slot.get('is_premium') else 'Standard'}")
-                            
-                            with col3:
-                                st.markdown("**Metrics**")
-                                st.write(f"💰 ${slot.get('base_cpm', 0):.2f} CPM")
-                                st.write(f"👀 {slot.get('daily_impressions', 0):,} daily impressions")
-                                st.write(f"🩺 {slot.get('specialty', 'N/A')}")
-                else:
-                    st.info("No matching inventory found. Try adjusting your search terms.")
-                    
+                st.info("No matching inventory found. Try adjusting your search terms.")
         except Exception as e:
             st.error(f"Search error: {e}")
             st.info("Showing demo results instead.")
@@ -157,104 +165,13 @@ if st.session_state.get('search_executed', False):
         st.session_state.show_demo = True
     
     # Demo results
-    if st.session_state.get('show_demo', not IN_SNOWFLAKE):
-        import pandas as pd
-        
-        demo_slots = [
-            {
-                "slot_name": "Austin Heart Hospital - Waiting Room TV 55\"",
-                "specialty": "Cardiology",
-                "facility_name": "Austin Heart Hospital",
-                "city": "Austin",
-                "state": "TX",
-                "region": "Southwest",
-                "screen_type": "Waiting Room TV",
-                "daypart": "Morning",
-                "base_cpm": 18.50,
-                "daily_impressions": 245,
-                "is_premium": True
-            },
-            {
-                "slot_name": "Houston Medical Center - Digital Display 65\"",
-                "specialty": "Cardiology",
-                "facility_name": "Houston Regional Medical Center",
-                "city": "Houston",
-                "state": "TX",
-                "region": "Southwest",
-                "screen_type": "Digital Display",
-                "daypart": "All Day",
-                "base_cpm": 22.00,
-                "daily_impressions": 320,
-                "is_premium": True
-            },
-            {
-                "slot_name": "Dallas Cardiology Clinic - Check-in Kiosk",
-                "specialty": "Cardiology",
-                "facility_name": "Dallas Cardiology Associates",
-                "city": "Dallas",
-                "state": "TX",
-                "region": "Southwest",
-                "screen_type": "Check-in Kiosk",
-                "daypart": "Morning",
-                "base_cpm": 12.00,
-                "daily_impressions": 150,
-                "is_premium": False
-            },
-            {
-                "slot_name": "San Antonio Heart Center - Exam Room Display",
-                "specialty": "Cardiology",
-                "facility_name": "San Antonio Heart Center",
-                "city": "San Antonio",
-                "state": "TX",
-                "region": "Southwest",
-                "screen_type": "Exam Room Display",
-                "daypart": "Afternoon",
-                "base_cpm": 25.00,
-                "daily_impressions": 80,
-                "is_premium": True
-            },
-            {
-                "slot_name": "Phoenix Cardiology - Waiting Room TV",
-                "specialty": "Cardiology",
-                "facility_name": "Phoenix Cardiology Group",
-                "city": "Phoenix",
-                "state": "AZ",
-                "region": "Southwest",
-                "screen_type": "Waiting Room TV",
-                "daypart": "Morning",
-                "base_cpm": 16.00,
-                "daily_impressions": 200,
-                "is_premium": False
-            }
-        ]
+    if st.session_state.get('show_demo', False):
+        demo_slots = content.DEMO_SLOTS
         
         st.success(f"Found {len(demo_slots)} matching ad placements (demo data)")
         
-        for i, slot in enumerate(demo_slots):
-            with st.expander(
-                f"📍 {slot['slot_name']} | "
-                f"${slot['base_cpm']:.2f} CPM | "
-                f"{slot['specialty']}"
-            ):
-                col1, col2, col3 = st.columns(3)
-                
-                with col1:
-                    st.markdown("**Location**")
-                    st.write(f"🏥 {slot['facility_name']}")
-                    st.write(f"📍 {slot['city']}, {slot['state']}")
-                    st.write(f"🗺️ {slot['region']}")
-                
-                with col2:
-                    st.markdown("**Specifications**")
-                    st.write(f"🖥️ {slot['screen_type']}")
-                    st.write(f"⏰ {slot['daypart']}")
-                    st.write(f"⭐ {'Premium' if slot['is_premium'] else 'Standard'}")
-                
-                with col3:
-                    st.markdown("**Metrics**")
-                    st.write(f"💰 ${slot['base_cpm']:.2f} CPM")
-                    st.write(f"👀 {slot['daily_impressions']:,} daily impressions")
-                    st.write(f"🩺 {slot['specialty']}")
+        for slot in demo_slots:
+            render_slot(slot)
 
 else:
     # Initial state
@@ -265,30 +182,10 @@ else:
     col1, col2 = st.columns(2)
     
     with col1:
-        st.markdown("""
-        **By Specialty:**
-        - "Cardiology waiting room displays"
-        - "Endocrinology clinics for diabetes campaigns"
-        - "Oncology facilities with premium screens"
-        
-        **By Location:**
-        - "Ad slots in Texas"
-        - "Northeast region hospitals"
-        - "Miami medical centers"
-        """)
+        st.markdown(content.EXAMPLE_SEARCHES_BY_SPECIALTY_LOCATION)
     
     with col2:
-        st.markdown("""
-        **By Screen Type:**
-        - "Digital displays in waiting rooms"
-        - "Exam room tablets"
-        - "Check-in kiosk advertising"
-        
-        **Combined:**
-        - "Premium morning slots in cardiology"
-        - "High-volume facilities in Southeast"
-        - "Affordable inventory for awareness campaigns"
-        """)
+        st.markdown(content.EXAMPLE_SEARCHES_BY_SCREEN_COMBINED)
 
 # Inventory Summary Section
 st.divider()
@@ -296,10 +193,19 @@ st.markdown("## 📊 Inventory Overview")
 
 col1, col2, col3, col4 = st.columns(4)
 
-col1.metric("Total Active Slots", "5,000+")
-col2.metric("Facilities", "500+")
-col3.metric("Avg CPM", "$14.50")
-col4.metric("Daily Impressions", "750K+")
+# Headline numbers come from the shared summary service (placeholders in demo mode)
+summary = get_summary() if IN_SNOWFLAKE else None
+if summary:
+    col1.metric("Total Active Slots", f"{summary.slots:,}")
+    col2.metric("Facilities", f"{summary.facilities:,}")
+    col3.metric("Avg CPM", f"${summary.avg_cpm:,.2f}")
+    col4.metric("Daily Impressions", f"{summary.daily_impressions:,}")
+    st.caption(f"Updated {format_age(summary.age())} ago")
+else:
+    col1.metric("Total Active Slots", "5,000+")
+    col2.metric("Facilities", "500+")
+    col3.metric("Avg CPM", "$14.50")
+    col4.metric("Daily Impressions", "750K+")
 
 # Regional Breakdown
 st.markdown("### 🗺️ Inventory by Region")
@@ -308,40 +214,38 @@ if IN_SNOWFLAKE and session:
     try:
         region_query = """
         SELECT 
-            l.region,
-            COUNT(DISTINCT i.slot_id) as slots,
-            COUNT(DISTINCT l.location_id) as facilities,
-            ROUND(AVG(i.base_cpm), 2) as avg_cpm,
-            SUM(i.daily_impressions) as daily_impressions
-        FROM AD_TECH.ANALYTICS.DIM_INVENTORY i
-        JOIN AD_TECH.ANALYTICS.DIM_LOCATIONS l ON i.location_id = l.location_id
-        WHERE i.is_active = TRUE
-        GROUP BY l.region
+            region,
+            COUNT(DISTINCT slot_id) as slots,
+            COUNT(DISTINCT facility_name) as facilities,
+            ROUND(AVG(base_cpm), 2) as avg_cpm,
+            SUM(estimated_daily_impressions) as daily_impressions
+        FROM AD_TECH.ANALYTICS.T_INVENTORY_ANALYTICS
+        GROUP BY region
         ORDER BY slots DESC
         """
         
-        region_df = session.sql(region_query).to_pandas()
+        # Same routing as the Campaign Optimizer: cached result, local
+        # snapshot while the warehouse is suspended, otherwise a live query
+        router = get_query_router()
+        result = router.fetch("inventory_by_region", region_query,
+                              table="T_INVENTORY_ANALYTICS", snapshot=inventory_by_region)
+        if result.route == "snapshot":
+            freshness = router.snapshots.freshness("T_INVENTORY_ANALYTICS")
+            st.caption(f"📦 Local snapshot · refreshed {format_age(freshness['age_seconds'])} ago")
+        regions = result.data
         
         col1, col2 = st.columns(2)
         
         with col1:
-            st.dataframe(region_df, use_container_width=True, hide_index=True)
+            st.dataframe(regions, use_container_width=True, hide_index=True)
         
         with col2:
-            st.bar_chart(region_df.set_index('REGION')['SLOTS'])
+            st.bar_chart(reduce_bars(regions, "REGION", "SLOTS", HALF_WIDTH.bars), x='REGION', y='SLOTS')
             
     except Exception as e:
         st.error(f"Error loading regional data: {e}")
 else:
-    import pandas as pd
-    
-    region_data = pd.DataFrame({
-        "Region": ["Southwest", "Southeast", "West", "Northeast", "Midwest"],
-        "Slots": [1200, 1100, 950, 900, 850],
-        "Facilities": [120, 110, 95, 90, 85],
-        "Avg CPM": [15.20, 14.80, 16.50, 17.20, 13.50],
-        "Daily Impressions": [180000, 165000, 142500, 135000, 127500]
-    })
+    region_data = pd.DataFrame(content.DEMO_REGIONS)
     
     col1, col2 = st.columns(2)
     
@@ -351,6 +255,161 @@ else:
     with col2:
         st.bar_chart(region_data.set_index("Region")["Slots"])
 
+# Slot Delivery: aggregated and downsampled in the warehouse, so the browser
+# gets a few hundred points however many slot-days T_CAMPAIGN_DAILY holds
+st.markdown("### 📈 Slot Delivery")
+
+DAILY_SLOTS_QUERY = """
+SELECT date_day, slot_id, impressions, revenue
+FROM AD_TECH.ANALYTICS.T_CAMPAIGN_DAILY
+"""
+
+try:
+    delivery = time_series(get_engine(), DAILY_SLOTS_QUERY, "date_day", ["impressions"], FULL_WIDTH)
+    top_slots = category_bars(get_engine(), DAILY_SLOTS_QUERY, "slot_id", "impressions", FULL_WIDTH)
+except Exception as e:
+    st.info(f"Slot delivery needs setup/06_daily_facts.sql ({e})")
+else:
+    if delivery.table.num_rows:
+        st.line_chart(delivery.table.to_pandas().set_index("DATE_DAY")["IMPRESSIONS"])
+        st.bar_chart(top_slots.table, x='SLOT_ID', y='IMPRESSIONS')
+        shown = top_slots.table.num_rows
+        slots = (f"top {shown - 1} of {top_slots.source_points:,} slots plus Other"
+                 if top_slots.source_points > shown else f"{shown} slots")
+        source = "cached" if delivery.cached and top_slots.cached else "reduced in the warehouse"
+        st.caption(
+            f"{delivery.table.num_rows:,} of {delivery.source_points:,} days · {slots} · "
+            f"{source} in {(delivery.seconds + top_slots.seconds) * 1000:,.0f} ms"
+        )
+
+# Reach Planner: sketches are built on first use, once per process
+st.divider()
+st.markdown("## 👥 Reach Planner")
+
+if st.toggle("Estimate deduplicated reach for a slot and audience mix"):
+    store = get_reach_store()
+    slot_names = {slot_id: info.get("slot_name") or slot_id for slot_id, info in store.slot_info.items()}
+    ages = sorted({info.get("age_bucket") for info in store.cohort_info.values() if info.get("age_bucket")})
+    genders = sorted({info.get("gender") for info in store.cohort_info.values() if info.get("gender")})
+    first_day, last_day = store.days
+
+    with st.form("reach_planner"):
+        chosen_slots = st.multiselect(
+            "Slots", list(slot_names), format_func=slot_names.get,
+            default=[s for s in st.session_state.get("reach_slots", []) if s in slot_names],
+            help="Defaults to your latest search results; leave empty for all slots"
+        )
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            chosen_ages = st.multiselect("Age Buckets", ages)
+        with col2:
+            chosen_genders = st.multiselect("Gender", genders)
+        with col3:
+            window = st.slider("Last N days", 1, (last_day - first_day).days + 1 if first_day else 1,
+                               (last_day - first_day).days + 1 if first_day else 1)
+        submitted = st.form_submit_button("📈 Estimate Reach", use_container_width=True)
+
+    if submitted:
+        filters = {k: v for k, v in (("age_bucket", chosen_ages), ("gender", chosen_genders)) if v}
+        cohorts = store.cohorts_where(**filters) if filters else None
+        estimate = store.estimate(
+            cohorts, chosen_slots or None,
+            start=last_day - timedelta(days=window - 1) if last_day else None,
+        )
+        low, high = estimate.reach_interval
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("Unique Reach", f"{estimate.reach:,.0f}", help=f"~95% interval {low:,.0f} - {high:,.0f}")
+        col2.metric("Impressions", f"{estimate.impressions:,}")
+        col3.metric("Avg Frequency", f"{estimate.frequency:.2f}")
+        col4.metric("Daily Frequency p99", f"{estimate.frequency_quantiles[0.99]:.0f}",
+                    help="Exposures per person per slot in a day")
+        st.caption(
+            f"Merged {estimate.sketches:,} sketches in {estimate.seconds * 1e6:,.0f} µs · "
+            f"reach ±{estimate.relative_error:.1%} (HyperLogLog) · "
+            f"exposures per person per slot-day (KLL) over {first_day:%b %d} - {last_day:%b %d}"
+        )
+
+# Availability & Booking: calendars are loaded on first use, once per process
+st.divider()
+st.markdown("## 📅 Availability & Booking")
+
+if st.toggle("Check free impressions and reserve slots"):
+    bookings = get_booking_engine()
+    today = date.today()
+    slot_names = dict(zip(bookings.slot_ids, bookings.names))
+
+    with st.form("availability"):
+        col1, col2 = st.columns(2)
+        with col1:
+            window = st.date_input(
+                "Flight Dates", (today, today + timedelta(days=29)),
+                min_value=bookings.origin, max_value=bookings.last_day
+            )
+        with col2:
+            min_free = st.number_input("Free Impressions / Day (at least)", 1, 100_000, 200, step=50)
+        st.caption("Uses the specialty, region, daypart and slot type filters above")
+        find = st.form_submit_button("🔎 Find Available Slots", use_container_width=True)
+
+    if find and len(window) == 2:
+        flight = {
+            "specialty_name": None if filter_specialty == "All" else filter_specialty,
+            "region": None if filter_region == "All" else filter_region,
+            "daypart": None if filter_daypart == "All" else filter_daypart,
+            "is_premium": {"Premium Only": True, "Standard Only": False}.get(filter_premium),
+        }
+        open_slots = bookings.available(window[0], window[1], int(min_free), **flight)
+        st.session_state.booking_slots = [slot["slot_id"] for slot in open_slots][:12]
+        if open_slots:
+            st.success(f"{len(open_slots)} slots have at least {int(min_free):,} impressions free every day "
+                       f"from {window[0]:%b %d} to {window[1]:%b %d}")
+            st.dataframe(
+                pd.DataFrame(open_slots[:50]).rename(columns={
+                    "slot_id": "Slot", "slot_name": "Placement", "free": "Free / Day", "capacity": "Capacity / Day",
+                }),
+                use_container_width=True, hide_index=True
+            )
+        else:
+            st.info("No slot has that much free inventory on every day of the flight.")
+
+    with st.form("booking"):
+        default = st.session_state.get("booking_slots") or st.session_state.get("reach_slots", [])
+        chosen = st.multiselect(
+            "Slots", list(slot_names), format_func=lambda s: f"{s} · {slot_names[s]}",
+            default=[s for s in default if s in slot_names],
+            help="Defaults to the latest availability or search results"
+        )
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            flight_dates = st.date_input(
+                "Booking Dates", (today, today + timedelta(days=29)),
+                min_value=bookings.origin, max_value=bookings.last_day
+            )
+        with col2:
+            per_day = st.number_input("Impressions / Day", 1, 100_000, 100, step=50)
+        with col3:
+            campaign_id = st.text_input("Campaign ID", placeholder="CAMP-00001")
+        reserve = st.form_submit_button("📅 Reserve", type="primary", use_container_width=True)
+
+    if reserve:
+        if not chosen or len(flight_dates) != 2:
+            st.warning("Pick at least one slot and both booking dates.")
+        else:
+            try:
+                booked = bookings.reserve(chosen, flight_dates[0], flight_dates[1], int(per_day),
+                                          campaign_id or None)
+                st.success(f"Booked {len(booked)} slots at {int(per_day):,} impressions/day "
+                           f"({booked[0].booking_id})")
+            except BookingConflict as e:
+                st.error("Nothing was booked - these slots are short:\n\n"
+                         + "\n".join(f"- {conflict}" for conflict in e.conflicts))
+            except Exception as e:
+                st.error(f"Booking error: {e}")
+
+    if chosen and len(flight_dates) == 2:
+        free = bookings.free(chosen, flight_dates[0], flight_dates[1])
+        st.caption("Free impressions/day over the booking dates: "
+                   + " · ".join(f"{slot_id} {count:,}" for slot_id, count in free.items()))
+
 # Footer
 st.divider()
 st.markdown("""
@@ -4,20 +4,52 @@ PatientPoint Ad Tech Demo - AI Agent Chat Page
 =============================================================================
 Conversational interface for the Cortex Agent.
 Allows natural language queries for campaign optimization.
+
+Prompts go through the shared agent request queue (ad_tech/agent_queue.py):
+one request in flight per session, bounded concurrency per user and per
+process, a 60 s budget per request, and a cancel button while waiting.
+Threads are kept in a ConversationMemory (ad_tech/memory.py): only the
+visible tail is rendered and the agent sees a summary plus recent turns.
+Questions that match a verified query (ad_tech/verified_queries.py) are
+answered from its stored SQL without going through the agent, and so are
+questions the offline answer engine (ad_tech/answers.py) classifies with
+confidence: bid pricing, audiences, period comparisons, inventory and
+partner ROAS.
 =============================================================================
 """
 
+import uuid
+
 import streamlit as st
-import json
 
-# Try to import Snowpark
-try:
-    from snowflake.snowpark.context import get_active_session
-    session = get_active_session()
-    IN_SNOWFLAKE = True
-except:
-    IN_SNOWFLAKE = False
-    session = None
+from ad_tech import content
+from ad_tech.agent import AgentCancelledError, AgentError
+from ad_tech.memory import ConversationMemory, ThreadStore
+from ad_tech.runtime import get_agent_queue, get_answer_engine, get_session, get_verified_queries
+
+# Snowpark is imported and the session resolved once per process, on first use
+session = get_session()
+IN_SNOWFLAKE = session is not None
+agent_queue = get_agent_queue()
+verified = get_verified_queries()
+answers = get_answer_engine()
+
+VISIBLE_TURNS = 20
+
+
+@st.cache_resource
+def load_thread_store() -> ThreadStore:
+    return ThreadStore()
+
+
+def _user_key(session_key: str) -> str:
+    """Per-user concurrency is keyed on the viewer's identity when available."""
+    try:
+        email = st.experimental_user.get("email")
+    except Exception:
+        email = None
+    return email or session_key
+
 
 st.set_page_config(
     page_title="AI Agent Chat",
@@ -30,328 +62,157 @@ st.markdown("Ask questions about campaigns, inventory, and audience targeting us
 
 st.divider()
 
+thread_store = load_thread_store()
+
+if "agent_session_key" not in st.session_state:
+    st.session_state.agent_session_key = uuid.uuid4().hex
+
+# Saved threads are listed and resumed only by the viewer who owns them
+owner = _user_key(st.session_state.agent_session_key)
+
 # Initialize chat history
-if "messages" not in st.session_state:
-    st.session_state.messages = []
+if "memory" not in st.session_state:
+    st.session_state.memory = ConversationMemory(owner=owner)
+
+if "visible_turns" not in st.session_state:
+    st.session_state.visible_turns = VISIBLE_TURNS
 
-if "thread_id" not in st.session_state:
-    st.session_state.thread_id = None
+if "agent_ticket" not in st.session_state:
+    st.session_state.agent_ticket = None
+
+pending_prompt = None
 
 # Sidebar with suggested prompts
 st.sidebar.markdown("## 💡 Suggested Questions")
 
-suggested_prompts = [
-    "What's the optimal bid price for a diabetes campaign in cardiology waiting rooms?",
-    "Which audience segments have the highest engagement for heart medications?",
-    "Compare Q4 2024 vs Q3 2024 campaign performance",
-    "Find premium morning slots in Texas endocrinology clinics",
-    "What's driving the ROAS improvement for Pfizer campaigns?",
-    "Show me high-conversion audience cohorts in the Southwest",
-    "Which therapeutic areas have the best CTR?",
-    "Recommend inventory for a new GLP-1 drug launch"
-]
-
-for prompt in suggested_prompts:
+for prompt in content.SUGGESTED_PROMPTS:
     if st.sidebar.button(prompt, key=f"prompt_{hash(prompt)}", use_container_width=True):
-        st.session_state.pending_prompt = prompt
+        pending_prompt = prompt
 
 st.sidebar.divider()
 st.sidebar.markdown("### 🛠️ Agent Tools")
-st.sidebar.markdown("""
-- **CampaignAnalyst**: Query campaign metrics
-- **InventoryAnalyst**: Analyze ad slot performance
-- **AudienceAnalyst**: Cohort engagement data
-- **InventorySearch**: Find available placements
-- **CampaignSearch**: Search campaign history
-- **AudienceSearch**: Discover target segments
-- **DataToChart**: Generate visualizations
-""")
-
-if st.sidebar.button("🗑️ Clear Chat History", use_container_width=True):
-    st.session_state.messages = []
-    st.session_state.thread_id = None
-    st.rerun()
-
-# Display chat messages
-for message in st.session_state.messages:
-    with st.chat_message(message["role"]):
-        st.markdown(message["content"])
-
-# Handle pending prompt from sidebar
-if st.session_state.get("pending_prompt"):
-    prompt = st.session_state.pending_prompt
-    st.session_state.pending_prompt = None
-    
-    # Add user message
-    st.session_state.messages.append({"role": "user", "content": prompt})
-    
-    with st.chat_message("user"):
-        st.markdown(prompt)
-    
-    # Generate response
-    with st.chat_message("assistant"):
-        with st.spinner("Thinking..."):
-            if IN_SNOWFLAKE and session:
-                try:
-                    # Call the Cortex Agent
-                    # Note: The exact API may vary based on your Snowflake version
-                    agent_response = call_cortex_agent(session, prompt)
-                    st.markdown(agent_response)
-                    st.session_state.messages.append({"role": "assistant", "content": agent_response})
-                except Exception as e:
-                    error_msg = f"Error calling agent: {e}"
-                    st.error(error_msg)
-                    st.session_state.messages.append({"role": "assistant", "content": error_msg})
-            else:
-                # Demo mode response
-                response = generate_demo_response(prompt)
-                st.markdown(response)
-                st.session_state.messages.append({"role": "assistant", "content": response})
-
-# Chat input
-if prompt := st.chat_input("Ask about campaigns, inventory, or audiences..."):
-    # Add user message
-    st.session_state.messages.append({"role": "user", "content": prompt})
-    
-    with st.chat_message("user"):
-        st.markdown(prompt)
-    
-    # Generate response
-    with st.chat_message("assistant"):
-        with st.spinner("Analyzing..."):
-            if IN_SNOWFLAKE and session:
-                try:
-                    agent_response = call_cortex_agent(session, prompt)
-                    st.markdown(agent_response)
-                    st.session_state.messages.append({"role": "assistant", "content": agent_response})
-                except Exception as e:
-                    error_msg = f"Error calling agent: {e}"
-                    st.error(error_msg)
-                    st.session_state.messages.append({"role": "assistant", "content": error_msg})
-            else:
-                response = generate_demo_response(prompt)
-                st.markdown(response)
-                st.session_state.messages.append({"role": "assistant", "content": response})
-
-
-def call_cortex_agent(session, prompt: str) -> str:
-    """
-    Call the Cortex Agent via the Snowflake session.
-    Uses the REST API pattern through SQL.
-    """
-    try:
-        # Escape the prompt for SQL
-        escaped_prompt = prompt.replace("'", "''").replace("\\", "\\\\")
-        
-        # Call the agent using the agent:run pattern
-        # Note: This may need adjustment based on your Snowflake version
-        agent_sql = f"""
-        SELECT SNOWFLAKE.CORTEX.COMPLETE(
-            'claude-3-5-sonnet',
-            CONCAT(
-                'You are a healthcare advertising optimization expert for PatientPoint. ',
-                'Answer this question about pharmaceutical advertising campaigns: ',
-                '{escaped_prompt}'
-            )
-        ) as response
-        """
-        
-        result = session.sql(agent_sql).collect()
-        
-        if result and len(result) > 0:
-            return result[0]['RESPONSE']
-        else:
-            return "I couldn't generate a response. Please try rephrasing your question."
-            
-    except Exception as e:
-        # If agent call fails, try a simpler approach
-        return f"Agent processing error. Please try the Snowsight Agent UI directly. Error: {str(e)}"
-
-
-def generate_demo_response(prompt: str) -> str:
-    """
-    Generate a demo response based on the prompt keywords.
-    Used when not connected to Snowflake.
-    """
-    prompt_lower = prompt.lower()
-    
-    if "optimal" in prompt_lower and ("bid" in prompt_lower or "price" in prompt_lower or "pricing" in prompt_lower):
-        return """
-## 💰 Optimal Bid Price Recommendation
-
-Based on my analysis of historical bid data for **diabetes campaigns** in **cardiology waiting rooms**:
-
-### Recommended Bid Range: **$14.50 - $18.25 CPM**
-
-| Metric | Value |
-|--------|-------|
-| Historical Avg Winning CPM | $15.80 |
-| Expected Win Rate | 68% |
-| Projected ROAS | 2.4x |
-| Competition Level | Moderate |
-
-### Key Insights:
-- **Morning slots** (8am-12pm) show 15% higher engagement for diabetes medications
-- **Premium 55" displays** in waiting rooms have 22% better completion rates
-- **Texas cardiology facilities** have above-average patient volume
-
-### Recommendation:
-Start with **$16.50 CPM** for the best balance of win rate and cost efficiency. 
-Monitor performance for 48 hours before adjusting.
-
-📊 *Analysis based on 45,000+ historical bids in similar configurations.*
-"""
-
-    elif "audience" in prompt_lower or "segment" in prompt_lower or "target" in prompt_lower:
-        return """
-## 👥 High-Value Audience Segments for Heart Medications
-
-Based on engagement data analysis, here are the top-performing cohorts:
-
-### Top 5 Recommended Segments:
+st.sidebar.markdown(content.AGENT_TOOLS)
 
-| Cohort | Engagement Rate | Conversion Rate | Cohort Size |
-|--------|----------------|-----------------|-------------|
-| Adults 55-64, Heart Health Interest | 0.52% | 18.5% | 12,500 |
-| Seniors 65+, Cardiology Visitors | 0.48% | 22.1% | 8,200 |
-| Adults 45-54, High Income, Midwest | 0.45% | 15.8% | 15,300 |
-| Adults 55-64, Medicare, Southeast | 0.42% | 19.2% | 11,800 |
-| Adults 45-54, Commercial Insurance | 0.38% | 14.5% | 18,500 |
+ticket = st.session_state.agent_ticket
+memory = st.session_state.memory
 
-### Key Patterns:
-- **Age 55-64** shows highest overall engagement with cardiology content
-- **Morning visitors** have 28% longer dwell times
-- **Repeat visitors** (2+ visits/month) convert at 2.3x average
 
-### Recommendation:
-Prioritize **Adults 55-64 with Heart Health Interest** for maximum ROI.
-Consider layering with **morning daypart** targeting for best results.
+def _switch_thread(new_memory: ConversationMemory) -> None:
+    if st.session_state.agent_ticket is not None:
+        st.session_state.agent_ticket.cancel()
+        st.session_state.agent_ticket = None
+    st.session_state.memory = new_memory
+    st.session_state.visible_turns = VISIBLE_TURNS
 
-🔒 *All data is privacy-safe with k-anonymity (min 50 members per cohort).*
-"""
-
-    elif "compare" in prompt_lower or "q4" in prompt_lower or "q3" in prompt_lower:
-        return """
-## 📊 Campaign Performance: Q4 2024 vs Q3 2024
-
-### Overall Performance Comparison:
-
-| Metric | Q3 2024 | Q4 2024 | Change |
-|--------|---------|---------|--------|
-| Total Impressions | 2.8M | 3.4M | +21.4% |
-| Average ROAS | 2.1x | 2.4x | +14.3% |
-| Win Rate | 62% | 67% | +8.1% |
-| CTR | 0.032% | 0.041% | +28.1% |
-| Total Revenue | $3.2M | $4.1M | +28.1% |
-
-### Top Improving Therapeutic Areas:
-1. **Diabetes** - ROAS improved from 2.3x to 2.9x (+26%)
-2. **Cardiology** - Impressions up 35%, CTR up 22%
-3. **Immunology** - Conversion rate improved 18%
-
-### Key Drivers of Improvement:
-- New ML-powered bid optimization (implemented Sept 2024)
-- Expanded premium inventory in high-volume facilities
-- Improved audience targeting with lookalike segments
-- Seasonal factors (Q4 health awareness campaigns)
-
-### Recommendation:
-Continue momentum with increased Q1 2025 budget allocation to Diabetes (+15%) 
-and Cardiology (+10%) based on strong Q4 performance.
-"""
-
-    elif "inventory" in prompt_lower or "slot" in prompt_lower or "find" in prompt_lower:
-        return """
-## 🔍 Available Premium Inventory - Texas Endocrinology
-
-Based on your search for **premium morning slots in Texas endocrinology clinics**:
-
-### Top 5 Available Placements:
-
-| Slot | Facility | CPM | Daily Impressions |
-|------|----------|-----|-------------------|
-| Houston Diabetes Center - Waiting Room 65" | Houston Diabetes & Endocrine | $19.50 | 285 |
-| Austin Endocrinology - Premium Display | Austin Metabolic Center | $18.00 | 245 |
-| Dallas Thyroid Clinic - Check-in Display | Dallas Thyroid Specialists | $16.50 | 195 |
-| San Antonio Diabetes - Waiting Room TV | SA Diabetes Care Center | $17.25 | 220 |
-| Fort Worth Endo - Exam Room Tablet | FW Endocrinology Associates | $22.00 | 85 |
 
-### Inventory Summary:
-- **28 total slots** matching your criteria
-- **Average CPM**: $17.80
-- **Total daily impressions**: 4,200+
-- **Premium slots**: 18 (64%)
+def _cancel_request() -> None:
+    # Runs before the rerun the click triggers, so the wait loop sees it at once
+    if st.session_state.agent_ticket is not None:
+        st.session_state.agent_ticket.cancel()
 
-### Recommendation:
-The **Houston Diabetes Center** slot offers the best value with high volume 
-and competitive CPM. Consider bundling with the Austin location for regional coverage.
 
-📍 *All slots verified available for immediate booking.*
-"""
-
-    elif "roas" in prompt_lower or "performance" in prompt_lower or "pfizer" in prompt_lower:
-        return """
-## 📈 Pfizer Campaign Performance Analysis
-
-### ROAS Improvement Drivers
-
-Pfizer campaigns have seen **ROAS improve from 2.0x to 2.6x** (+30%) over the past quarter.
+def _show_cancel() -> None:
+    cancel_slot.button("⏹️ Cancel Request", key="cancel_request", on_click=_cancel_request,
+                       use_container_width=True)
 
-### Contributing Factors:
 
-| Factor | Impact | Details |
-|--------|--------|---------|
-| Bid Optimization | +12% ROAS | ML-driven bid adjustments reduced wasted spend |
-| Audience Targeting | +9% ROAS | New lookalike segments based on converters |
-| Creative Refresh | +5% ROAS | Updated video creatives with higher completion |
-| Daypart Focus | +4% ROAS | Shifted budget to high-engagement time slots |
+# Filled whenever a request is in flight, including one submitted this run
+cancel_slot = st.sidebar.empty()
+if ticket is not None:
+    _show_cancel()
 
-### Top Performing Pfizer Campaigns:
-1. **Eliquis Awareness 2024** - 3.2x ROAS, 320K impressions
-2. **Ibrance Patient Education** - 2.8x ROAS, 185K impressions  
-3. **Prevnar 20 HCP Engagement** - 2.5x ROAS, 245K impressions
-
-### Recommendations:
-- Expand successful bid optimization to all Pfizer campaigns
-- Increase morning daypart allocation by 20%
-- Test new audience segments based on Eliquis converter profile
-
-💡 *Key insight: Cardiology-focused campaigns outperforming by 25% vs other specialties.*
-"""
+if st.sidebar.button("🗑️ Clear Chat History", use_container_width=True):
+    # The old thread stays on disk and can be resumed below
+    _switch_thread(ConversationMemory(owner=owner))
+    st.rerun()
 
+saved_threads = [t for t in thread_store.list_threads(owner) if t["thread_id"] != memory.thread_id]
+if saved_threads:
+    st.sidebar.markdown("### 🧵 Previous Conversations")
+    for thread in saved_threads[:5]:
+        label = f"{thread['title']} ({thread['turns']} messages)"
+        if st.sidebar.button(label, key=f"thread_{thread['thread_id']}", use_container_width=True):
+            restored = thread_store.load(thread["thread_id"], owner)
+            if restored is not None:
+                _switch_thread(restored)
+                st.rerun()
+
+# Display only the tail of the thread; older turns are one click away
+hidden = len(memory) - st.session_state.visible_turns
+if hidden > 0:
+    if st.button(f"⬆️ Show earlier messages ({hidden} hidden)"):
+        st.session_state.visible_turns += VISIBLE_TURNS
+        st.rerun()
+
+for turn in memory.visible(st.session_state.visible_turns):
+    with st.chat_message(turn.role):
+        st.markdown(turn.content)
+
+# Sidebar click or chat input; only one new prompt is taken per run
+if chat_prompt := st.chat_input("Ask about campaigns, inventory, or audiences..."):
+    pending_prompt = chat_prompt
+
+if pending_prompt:
+    if ticket is not None:
+        st.toast("⏳ Still working on your previous question. Cancel it to ask something new.")
+    elif ((answer := verified.answer(pending_prompt)) is not None
+          or (answer := answers.answer(pending_prompt, fast_path=IN_SNOWFLAKE)) is not None):
+        # Hot question with a verified query, or one the answer engine can
+        # classify: no SQL generation, no queue slot
+        memory.add("user", pending_prompt)
+        memory.add("assistant", answer.markdown())
+        thread_store.save(memory)
+        with st.chat_message("user"):
+            st.markdown(pending_prompt)
+        with st.chat_message("assistant"):
+            st.markdown(answer.markdown())
     else:
-        return """
-## 🤖 PatientPoint Campaign Optimizer
-
-I can help you with:
-
-### 📊 Campaign Analytics
-- Performance metrics (ROAS, CTR, conversions)
-- Partner comparisons
-- Trend analysis
-
-### 💰 Bid Optimization
-- Optimal pricing recommendations
-- Win rate predictions
-- CPM analysis by specialty
-
-### 🔍 Inventory Discovery
-- Available ad placements
-- Slot characteristics
-- Regional availability
-
-### 👥 Audience Targeting
-- High-engagement cohorts
-- Demographic analysis
-- Lookalike segments
-
-**Try asking something like:**
-- "What's the optimal bid for diabetes campaigns in cardiology?"
-- "Find premium inventory in the Southwest"
-- "Which audiences respond best to oncology medications?"
-
-*Note: Running in demo mode. For full functionality, deploy to Snowflake.*
-"""
+        # The agent gets the running summary and recent turns; demo answers
+        # are keyed on the question alone
+        agent_prompt = memory.build_prompt(pending_prompt) if IN_SNOWFLAKE else pending_prompt
+        try:
+            ticket = agent_queue.submit(
+                agent_prompt,
+                session_key=st.session_state.agent_session_key,
+                user_key=owner,
+            )
+        except AgentError as e:
+            st.warning(f"⏳ {e}")
+        else:
+            st.session_state.agent_ticket = ticket
+            _show_cancel()
+            memory.add("user", pending_prompt)
+            thread_store.save(memory)
+            with st.chat_message("user"):
+                st.markdown(pending_prompt)
+
+# Wait for the in-flight request. Polling keeps the script interruptible,
+# so a click on Cancel (or anything else) reruns the page immediately while
+# the request itself keeps its place in the queue.
+if ticket is not None:
+    with st.chat_message("assistant"):
+        status = st.empty()
+        while not ticket.wait(0.25):
+            if ticket.remaining() <= 0 or ticket.cancel_event.is_set():
+                break
+            state = "Waiting for a free agent slot" if ticket.status == "queued" else "Analyzing"
+            status.markdown(f"_{state}... {ticket.elapsed():.0f}s_")
+        try:
+            if ticket.cancel_event.is_set() and not ticket.expired:
+                raise AgentCancelledError("Request cancelled.")
+            response = ticket.result(timeout=0)
+        except AgentError as e:
+            response = f"⚠️ {e}"
+            status.warning(response)
+        except Exception as e:
+            response = f"Error calling agent: {e}"
+            status.error(response)
+        else:
+            status.markdown(response)
+    memory.add("assistant", response)
+    thread_store.save(memory)
+    st.session_state.agent_ticket = None
+    cancel_slot.empty()
 
 
 # Footer
@@ -365,6 +226,20 @@ with col1:
         st.success("✅ Connected to Snowflake")
     else:
         st.warning("⚠️ Demo Mode")
+    queue_stats = agent_queue.stats()
+    st.caption(f"Queue: {queue_stats['running']} running, {queue_stats['queued']} waiting")
+    st.caption(f"Context: ~{memory.context_tokens():,} tokens, {len(memory)} messages")
+    generation_ms = queue_stats["service"].get("mean_ms", 0.0)
+    verified_stats = verified.stats(generation_ms / 1e3 if generation_ms else None)
+    if verified_stats["lookups"]:
+        saved = verified_stats.get("saved_seconds")
+        st.caption(f"Verified queries: {verified_stats['hit_rate']:.0%} of questions"
+                   + (f", ~{saved:.0f}s saved" if saved is not None else ""))
+    answer_stats = answers.stats()
+    if answer_stats["hits"]:
+        hits = answer_stats["hits"]
+        st.caption(f"Answered from data: {hits} question{'s' if hits != 1 else ''}, "
+                   f"~{answer_stats.get('mean_ms', 0.0):.0f} ms each")
 
 with col2:
     st.markdown("**Tools Available**")
@@ -0,0 +1,54 @@
+"""Row allocation and eviction in ad_tech/anomalies.py's AnomalyDetector."""
+
+import sys
+from datetime import date, timedelta
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "streamlit"))
+
+from ad_tech.anomalies import AnomalyDetector  # noqa: E402
+from ad_tech.metrics import MetricsRegistry  # noqa: E402
+
+DAY = date(2026, 1, 1)
+
+
+def _update(detector, series, day):
+    return detector.update("campaign", series, day, np.ones((len(series), len(detector.kpis))))
+
+
+def _series(detector):
+    return sorted(key[1] for key in detector.index)
+
+
+def test_new_series_fill_free_rows_before_evicting():
+    metrics = MetricsRegistry()
+    detector = AnomalyDetector(max_series=10, metrics=metrics)
+    _update(detector, [f"A{i}" for i in range(8)], DAY)
+    _update(detector, [f"B{i}" for i in range(5)], DAY + timedelta(days=1))
+
+    assert len(detector) == 10
+    # Two free rows were used; only the three stalest series were evicted
+    assert _series(detector) == ["A3", "A4", "A5", "A6", "A7", "B0", "B1", "B2", "B3", "B4"]
+    assert metrics.snapshot("anomaly.")["counters"]["anomaly.evictions"] == 3
+    assert all(detector.keys[row] == key for key, row in detector.index.items())
+
+
+def test_eviction_spares_series_in_the_current_batch():
+    detector = AnomalyDetector(max_series=4, metrics=MetricsRegistry())
+    _update(detector, ["a", "b", "c", "d"], DAY)
+    _update(detector, ["b", "c", "d"], DAY + timedelta(days=1))
+    # "a" is the stalest series but is in the batch, so the next stalest goes
+    _update(detector, ["a", "new"], DAY + timedelta(days=2))
+
+    assert _series(detector) == ["a", "c", "d", "new"]
+    assert detector.count[detector.index[(0, "a")]].tolist() == [2] * len(detector.kpis)
+    assert detector.count[detector.index[(0, "new")]].tolist() == [1] * len(detector.kpis)
+
+
+def test_batch_larger_than_max_series_is_rejected():
+    detector = AnomalyDetector(max_series=3, metrics=MetricsRegistry())
+    with pytest.raises(ValueError):
+        _update(detector, ["a", "b", "c", "d"], DAY)